@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de detecção de anomalias em séries diárias
+Este script mantém, para cada série (VGV, vendas, leads por origem, conversões) e
+cada dia da semana, uma média e uma variância exponencialmente ponderadas (EWMA).
+Cada dia novo é comparado com a linha de base do seu dia da semana pelo escore z;
+valores extremos são limitados antes de atualizar a linha de base, para que um
+pico isolado não a contamine. O estado é salvo entre as execuções e apenas os
+dias ainda não vistos são processados.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+import persistencia
+
+logger = logging.getLogger('anomalias')
+
+# Versão do formato de output/modelos/anomalias.json (persistencia.carregar_estado descarta as demais)
+VERSAO_ESTADO = 3
+
+# Observações mínimas de um dia da semana antes de emitir alertas para ele
+MIN_OBSERVACOES = 4
+
+# Desvio mínimo relativo à média (evita escores enormes em séries quase constantes)
+PISO_RELATIVO = 0.05
+
+
+class DetectorAnomalias:
+    """
+    Linhas de base EWMA por dia da semana de várias séries com estado persistente.
+    """
+    
+    def __init__(self, caminho_estado, alpha=0.15, limiar=3.5, dias_retencao=90):
+        """
+        Inicializa o detector e carrega o estado salvo, se houver.
+        
+        Args:
+            caminho_estado (str): Arquivo JSON do estado das linhas de base
+            alpha (float): Peso de cada nova observação na média e na variância
+            limiar (float): Escore z absoluto a partir do qual um dia é anômalo
+            dias_retencao (int): Dias durante os quais os alertas ficam guardados no estado
+        """
+        self.caminho_estado = caminho_estado
+        self.alpha = alpha
+        self.limiar = limiar
+        self.dias_retencao = dias_retencao
+        self.estado = (persistencia.carregar_estado(caminho_estado, VERSAO_ESTADO, 'de anomalias', logger=logger)
+                       or {'series': {}, 'alertas': []})
+        self.dias_incorporados = 0
+    
+    def salvar(self):
+        """
+        Salva o estado das linhas de base e os alertas recentes.
+        
+        Returns:
+            str: Caminho do estado ou None em caso de erro
+        """
+        return persistencia.salvar_estado(self.caminho_estado, self.estado, VERSAO_ESTADO, 'de anomalias', logger=logger)
+    
+    def atualizar(self, dias, chaves, matriz, contagens=False):
+        """
+        Processa os dias ainda não vistos de cada série, registrando os alertas.
+        
+        Séries sem estado (ou cujo histórico recuou para antes do último dia visto ou
+        teve dias já vistos alterados) são processadas desde o primeiro dia da matriz.
+        
+        Args:
+            dias (pandas.DatetimeIndex): Dias das colunas da matriz
+            chaves (list): Identificador de cada série (linha)
+            matriz (numpy.ndarray): Observações (séries x dias); NaN indica dia sem observação
+            contagens (bool ou list): Se as séries (todas ou cada uma) são contagens; nelas a
+                                      variância nunca fica abaixo da de Poisson (a média, no mínimo 1)
+        
+        Returns:
+            list: Alertas novos
+        """
+        chaves = [str(c) for c in chaves]
+        matriz = np.atleast_2d(np.asarray(matriz, dtype=float))
+        n_series, n_dias = matriz.shape
+        salvas = self.estado['series']
+        contagens = np.broadcast_to(np.asarray(contagens, dtype=bool), (n_series,))
+        
+        inicio = np.zeros(n_series, dtype=np.int64)
+        media = np.zeros((n_series, 7))
+        variancia = np.zeros((n_series, 7))
+        contagem = np.zeros((n_series, 7))
+        for i, chave in enumerate(chaves):
+            serie = salvas.get(chave)
+            if serie is None:
+                continue
+            coluna = (pd.Timestamp(serie['ultimo_dia']) - dias[0]).days + 1
+            alterada = 0 < coluna <= n_dias and not np.isclose(
+                np.nansum(matriz[i, :coluna]), serie['soma'], rtol=1e-9, atol=1e-6
+            )
+            if coluna > n_dias or alterada:
+                # Histórico substituído (mais curto ou com dias já vistos alterados): refazer a linha de base
+                self.estado['alertas'] = [a for a in self.estado['alertas'] if a['serie'] != chave]
+                continue
+            inicio[i] = max(coluna, 0)
+            media[i], variancia[i], contagem[i] = serie['media'], serie['variancia'], serie['n']
+        
+        novos = []
+        primeira = int(inicio.min()) if n_series else n_dias
+        for coluna in range(primeira, n_dias):
+            dia = dias[coluna]
+            semana = dia.dayofweek
+            x = matriz[:, coluna]
+            validos = (inicio <= coluna) & ~np.isnan(x)
+            if not validos.any():
+                continue
+            
+            m, v, c = media[:, semana], variancia[:, semana], contagem[:, semana]
+            piso = np.where(contagens, np.maximum(m, 1.0), (PISO_RELATIVO * m) ** 2)
+            desvio = np.sqrt(np.maximum(v, piso) + 1e-12)
+            z = np.where(validos, (np.nan_to_num(x) - m) / desvio, 0.0)
+            aquecidas = c >= MIN_OBSERVACOES
+            
+            for i in np.flatnonzero(validos & aquecidas & (np.abs(z) >= self.limiar)):
+                novos.append({
+                    'data': dia.strftime('%Y-%m-%d'),
+                    'serie': chaves[i],
+                    'valor': float(x[i]),
+                    'esperado': float(m[i]),
+                    'z': float(z[i]),
+                    'tipo': 'pico' if z[i] > 0 else 'queda'
+                })
+            
+            # Valores extremos entram limitados na linha de base; no aquecimento vale a média simples
+            limitado = np.where(aquecidas, np.clip(x, m - self.limiar * desvio, m + self.limiar * desvio), x)
+            peso = np.maximum(self.alpha, 1.0 / (c + 1))
+            diferenca = np.where(validos, limitado - m, 0.0)
+            media[:, semana] = m + peso * diferenca
+            variancia[:, semana] = np.where(validos, (1 - peso) * (v + peso * diferenca ** 2), v)
+            contagem[:, semana] = c + validos
+        
+        # Várias chamadas em uma execução (séries com calendários diferentes): o maior avanço
+        self.dias_incorporados = max(self.dias_incorporados, n_dias - primeira, 0)
+        ultimo_dia = dias[-1].strftime('%Y-%m-%d')
+        for i, chave in enumerate(chaves):
+            salvas[chave] = {
+                'ultimo_dia': ultimo_dia,
+                'soma': float(np.nansum(matriz[i])),
+                'media': media[i].tolist(),
+                'variancia': variancia[i].tolist(),
+                'n': contagem[i].tolist()
+            }
+        
+        # Alertas guardados no estado: apenas os do período de retenção
+        limite = (dias[-1] - pd.Timedelta(days=self.dias_retencao)).strftime('%Y-%m-%d')
+        self.estado['alertas'] = sorted(
+            [a for a in self.estado['alertas'] + novos if a['data'] > limite],
+            key=lambda a: (a['data'], a['serie'])
+        )
+        return novos
+    
+    def alertas_recentes(self, desde):
+        """
+        Alertas a partir de uma data, dos mais extremos para os menos extremos.
+        
+        Args:
+            desde (pandas.Timestamp): Primeira data considerada
+        
+        Returns:
+            list: Alertas
+        """
+        desde = pd.Timestamp(desde).strftime('%Y-%m-%d')
+        recentes = [a for a in self.estado['alertas'] if a['data'] >= desde]
+        return sorted(recentes, key=lambda a: -abs(a['z']))
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de benchmark do pipeline de análise imobiliária
+Este script gera conjuntos de dados de tamanhos crescentes com o DataGenerator,
+executa cada etapa do pipeline (processamento, análise e relatório) em memória
+e mede vazão (linhas/s), pico de memória e escalabilidade. Os resultados são
+salvos em JSON e comparados com um baseline para detectar regressões.
+"""
+
+import os
+import gc
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import logging
+from datetime import datetime
+
+import numpy as np
+
+from data_generator import DataGenerator
+from data_processor import DataProcessor
+from data_analyzer import DataAnalyzer
+from report_generator import ReportGenerator
+import instrumentacao
+import config_logging
+
+logger = logging.getLogger('benchmark')
+
+# Tamanhos padrão (linhas de vendas e de leads); tamanhos maiores só quando passados em --tamanhos
+TAMANHOS_PADRAO = [1_000, 10_000, 100_000, 1_000_000]
+
+
+class BenchmarkPipeline:
+    """
+    Executa o pipeline completo para vários tamanhos de dados e coleta medições.
+    """
+    
+    def __init__(self, periodo_dias=365, rastrear_memoria=True):
+        """
+        Inicializa o benchmark.
+        
+        Args:
+            periodo_dias (int): Período em dias dos dados gerados
+            rastrear_memoria (bool): Rastrear pico de memória com tracemalloc
+        """
+        self.periodo_dias = periodo_dias
+        self.rastrear_memoria = rastrear_memoria
+        self.instrumentador = instrumentacao.ativar(rastrear_memoria)
+    
+    def executar_tamanho(self, tamanho, diretorio):
+        """
+        Executa todas as etapas do pipeline para um tamanho de dados.
+        
+        Args:
+            tamanho (int): Quantidade de linhas de vendas e de leads
+            diretorio (str): Diretório temporário vazio para figuras, modelos e relatório
+        
+        Returns:
+            dict: Medições por etapa
+        """
+        self.instrumentador.reiniciar()
+        generator = DataGenerator(diretorio)
+        
+        with instrumentacao.etapa('gerar_dados', linhas=2 * tamanho):
+            dataframes = generator.gerar_dataframes(tamanho, tamanho, self.periodo_dias)
+        
+        # Processamento (a leitura do Excel fica de fora: o formato limita a ~1M linhas)
+        with instrumentacao.etapa('processamento'):
+            processor = DataProcessor(diretorio)
+            processor.producao_df = dataframes['producao']
+            processor.ganhos_df = dataframes['ganhos']
+            processor.leads_df = dataframes['leads']
+            
+            limpos = {tipo: processor.limpar_dados(tipo) for tipo in DataProcessor.TIPOS_DADOS}
+            metricas = {tipo: processor.calcular_metricas(tipo, limpos[tipo]) for tipo in DataProcessor.TIPOS_DADOS}
+            instrumentacao.anotar(linhas=sum(len(df) for df in dataframes.values()))
+        
+        del dataframes, processor
+        gc.collect()
+        
+        with instrumentacao.etapa('analise', linhas=len(limpos['producao']) + len(limpos['leads'])):
+            analyzer = DataAnalyzer(limpos, metricas, diretorio)
+            resultados = {secao: getattr(analyzer, metodo)() for secao, metodo, _ in DataAnalyzer.SECOES_ANALISE}
+            resultados.update({
+                'metricas': metricas,
+                'insights': analyzer.insights,
+                'recomendacoes': analyzer.recomendacoes,
+                'figuras': analyzer.aguardar_figuras()
+            })
+        
+        with instrumentacao.etapa('relatorio'):
+            ReportGenerator(resultados, diretorio).gerar_relatorio('benchmark.pdf')
+        
+        del limpos, analyzer, resultados
+        gc.collect()
+        
+        etapas = {}
+        for registro in self.instrumentador.registros:
+            medicao = etapas.setdefault(registro['etapa'], {
+                'nivel': registro['nivel'],
+                'tempo_s': 0.0,
+                'cpu_s': 0.0,
+                'memoria_pico_mb': None,
+                'linhas': registro.get('linhas')
+            })
+            medicao['tempo_s'] += registro['tempo_s']
+            medicao['cpu_s'] += registro.get('cpu_s') or 0.0
+            if registro.get('memoria_pico_mb') is not None:
+                medicao['memoria_pico_mb'] = max(medicao['memoria_pico_mb'] or 0.0, registro['memoria_pico_mb'])
+        
+        for medicao in etapas.values():
+            linhas = medicao['linhas']
+            medicao['linhas_por_s'] = round(linhas / medicao['tempo_s'], 1) if linhas and medicao['tempo_s'] > 0 else None
+        
+        return etapas
+    
+    def executar(self, tamanhos):
+        """
+        Executa o benchmark para todos os tamanhos.
+        
+        Args:
+            tamanhos (list): Tamanhos de dados a medir
+        
+        Returns:
+            dict: Resultado completo do benchmark
+        """
+        resultado = {
+            'execucao': datetime.now().strftime('%Y%m%d_%H%M%S'),
+            'periodo_dias': self.periodo_dias,
+            'rastreamento_memoria': self.rastrear_memoria,
+            'tamanhos': {}
+        }
+        
+        for tamanho in tamanhos:
+            logger.info(f"Executando benchmark com {tamanho} linhas")
+            # Um diretório por tamanho: modelos, esboços e cache de figuras persistidos por um
+            # tamanho não podem transformar o tamanho seguinte em execução incremental
+            diretorio = tempfile.mkdtemp(prefix=f'benchmark_{tamanho}_')
+            try:
+                resultado['tamanhos'][str(tamanho)] = self.executar_tamanho(tamanho, diretorio)
+            finally:
+                shutil.rmtree(diretorio, ignore_errors=True)
+        
+        resultado['escalabilidade'] = calcular_escalabilidade(resultado['tamanhos'])
+        return resultado
+
+
+def calcular_escalabilidade(medicoes_por_tamanho):
+    """
+    Estima o expoente de crescimento do tempo de cada etapa (tempo ~ linhas^k).
+    
+    Args:
+        medicoes_por_tamanho (dict): Medições por etapa indexadas pelo tamanho
+    
+    Returns:
+        dict: Expoente k e classificação por etapa
+    """
+    escalabilidade = {}
+    etapas = {etapa for medicoes in medicoes_por_tamanho.values() for etapa in medicoes}
+    
+    for etapa in sorted(etapas):
+        pontos = [
+            (int(tamanho), medicoes[etapa]['tempo_s'])
+            for tamanho, medicoes in medicoes_por_tamanho.items()
+            if etapa in medicoes and medicoes[etapa]['tempo_s'] > 0
+        ]
+        if len(pontos) < 2:
+            continue
+        
+        x, y = np.log(np.array(pontos, dtype=float)).T
+        expoente = float(np.polyfit(x, y, 1)[0])
+        escalabilidade[etapa] = {
+            'expoente': round(expoente, 3),
+            'classificacao': 'sublinear' if expoente < 0.85 else 'linear' if expoente <= 1.15 else 'superlinear'
+        }
+    
+    return escalabilidade
+
+
+def comparar_com_baseline(resultado, baseline, tolerancia=0.25, tempo_minimo=0.05):
+    """
+    Compara o resultado atual com um baseline salvo.
+    
+    Args:
+        resultado (dict): Resultado atual do benchmark
+        baseline (dict): Resultado de referência
+        tolerancia (float): Aumento relativo aceito antes de acusar regressão (0.25 = 25%)
+        tempo_minimo (float): Tempo mínimo (s) para considerar uma etapa (evita ruído)
+    
+    Returns:
+        list: Regressões encontradas
+    """
+    regressoes = []
+    
+    for tamanho, medicoes in resultado['tamanhos'].items():
+        referencias = baseline.get('tamanhos', {}).get(tamanho, {})
+        
+        for etapa, medicao in medicoes.items():
+            referencia = referencias.get(etapa)
+            if not referencia:
+                continue
+            
+            for campo in ('tempo_s', 'memoria_pico_mb'):
+                atual, anterior = medicao.get(campo), referencia.get(campo)
+                if atual is None or not anterior:
+                    continue
+                if campo == 'tempo_s' and max(atual, anterior) < tempo_minimo:
+                    continue
+                
+                razao = atual / anterior
+                if razao > 1 + tolerancia:
+                    regressoes.append({
+                        'tamanho': int(tamanho),
+                        'etapa': etapa,
+                        'metrica': campo,
+                        'baseline': anterior,
+                        'atual': atual,
+                        'razao': round(razao, 3)
+                    })
+    
+    return regressoes
+
+
+def imprimir_resumo(resultado, regressoes=None):
+    """
+    Imprime as medições de nível superior e as regressões encontradas.
+    
+    Args:
+        resultado (dict): Resultado do benchmark
+        regressoes (list): Regressões encontradas na comparação com o baseline
+    """
+    print("\n" + "="*80)
+    print("BENCHMARK DO PIPELINE")
+    print("="*80)
+    print(f"{'Linhas':>12}  {'Etapa':<32}{'Tempo (s)':>10}{'Linhas/s':>14}{'Pico (MB)':>11}")
+    print("-"*80)
+    for tamanho, medicoes in resultado['tamanhos'].items():
+        for etapa, medicao in medicoes.items():
+            if medicao['nivel'] > 1:
+                continue
+            vazao = medicao['linhas_por_s']
+            pico = medicao['memoria_pico_mb']
+            print(f"{int(tamanho):>12,}  {etapa[:31]:<32}{medicao['tempo_s']:>10.3f}"
+                  f"{vazao if vazao is not None else float('nan'):>14,.0f}"
+                  f"{pico if pico is not None else float('nan'):>11.1f}")
+    
+    print("-"*80)
+    print("Escalabilidade (tempo ~ linhas^k):")
+    for etapa, dados in resultado['escalabilidade'].items():
+        print(f"  {etapa:<40} k = {dados['expoente']:.2f} ({dados['classificacao']})")
+    
+    if regressoes is not None:
+        print("-"*80)
+        if regressoes:
+            print(f"REGRESSÕES ENCONTRADAS: {len(regressoes)}")
+            for r in regressoes:
+                print(f"  {r['tamanho']:>12,} {r['etapa']:<32} {r['metrica']}: "
+                      f"{r['baseline']:.3f} -> {r['atual']:.3f} ({r['razao']:.2f}x)")
+        else:
+            print("Nenhuma regressão em relação ao baseline")
+    print("="*80)
+
+
+# Função para uso direto do script
+def main():
+    """
+    Função principal para execução direta do script.
+    """
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    dir_benchmarks = os.path.join(base_dir, 'output', 'benchmarks')
+    
+    parser = argparse.ArgumentParser(description='Benchmark do pipeline de análise imobiliária')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO, help='Quantidades de linhas a medir (padrão: até 1 milhão; tamanhos maiores apenas quando informados)')
+    parser.add_argument('--periodo-dias', type=int, default=365, help='Período em dias dos dados gerados')
+    parser.add_argument('--sem-memoria', action='store_true', help='Não rastrear o pico de memória')
+    parser.add_argument('--baseline', default=os.path.join(dir_benchmarks, 'baseline.json'), help='Arquivo de baseline para comparação')
+    parser.add_argument('--salvar-baseline', action='store_true', help='Salvar o resultado atual como novo baseline')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='Aumento relativo aceito antes de acusar regressão')
+    parser.add_argument('--tempo-minimo', type=float, default=0.05, help='Ignorar etapas mais rápidas que este tempo (s) na comparação')
+    args = parser.parse_args()
+    
+    # As mensagens dos módulos a cada etapa distorceriam as medições
+    config_logging.configurar_logging(nivel='WARNING')
+    
+    benchmark = BenchmarkPipeline(args.periodo_dias, rastrear_memoria=not args.sem_memoria)
+    resultado = benchmark.executar(sorted(args.tamanhos))
+    instrumentacao.desativar()
+    
+    regressoes = None
+    if os.path.exists(args.baseline) and not args.salvar_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressoes = comparar_com_baseline(resultado, baseline, args.tolerancia, args.tempo_minimo)
+        resultado['regressoes'] = regressoes
+    
+    os.makedirs(dir_benchmarks, exist_ok=True)
+    caminho = os.path.join(dir_benchmarks, f"benchmark_{resultado['execucao']}.json")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=4)
+    
+    if args.salvar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=4)
+        print(f"Baseline salvo em: {args.baseline}")
+    
+    imprimir_resumo(resultado, regressoes)
+    print(f"Resultados salvos em: {caminho}")
+    
+    if regressoes:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de configuração de logging do pipeline
+Este script centraliza a configuração de logging: os módulos apenas enfileiram
+os registros (QueueHandler) e uma thread de fundo (QueueListener) grava no console,
+no log geral e nos logs de cada etapa, de modo que a escrita em disco não bloqueie
+o processamento. Nenhuma configuração é feita na importação dos módulos.
+"""
+
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime
+
+# Log geral (recebe todos os registros)
+ARQUIVO_GERAL = 'automacao.log'
+
+# Log de cada etapa e os loggers (módulos) que gravam nele; módulos fora da lista,
+# usados por várias etapas (ex.: main, persistencia), vão apenas para o log geral
+ARQUIVOS_POR_ETAPA = {
+    'geracao_dados.log': ('data_generator',),
+    'processamento.log': ('data_processor',),
+    'analise.log': (
+        'data_analyzer', 'tendencias', 'janelas_moveis', 'sazonalidade', 'previsao', 'anomalias',
+        'indice_preco_m2', 'hierarquia', 'fluxo_comissoes', 'ranking_movel', 'funil', 'esbocos',
+        'tempo_conversao', 'contatos_unicos', 'coortes', 'intervalos', 'pontuacao_leads', 'simulacao',
+        'regras_insights', 'renderizador_graficos'
+    ),
+    'relatorio.log': ('report_generator',),
+    'monitoramento.log': ('monitor_dados', 'servidor_metricas'),
+    'desempenho.log': ('instrumentacao', 'perfilador', 'benchmark')
+}
+
+FORMATO_TEXTO = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Listener ativo no processo (None enquanto o logging não foi configurado)
+_listener = None
+
+
+class FiltroModulos(logging.Filter):
+    """
+    Aceita os registros de um conjunto de loggers (e dos seus filhos).
+    """
+    
+    def __init__(self, nomes):
+        """
+        Inicializa o filtro.
+        
+        Args:
+            nomes (tuple): Nomes dos loggers aceitos
+        """
+        super().__init__()
+        self.nomes = frozenset(nomes)
+    
+    def filter(self, record):
+        """
+        Indica se o registro pertence a um dos loggers aceitos.
+        
+        Args:
+            record (logging.LogRecord): Registro de log
+        
+        Returns:
+            bool: True se o registro deve ser gravado
+        """
+        return record.name.split('.', 1)[0] in self.nomes
+
+
+class FormatadorJSON(logging.Formatter):
+    """
+    Formata cada registro como um objeto JSON em uma única linha.
+    """
+    
+    def format(self, record):
+        """
+        Formata o registro.
+        
+        Args:
+            record (logging.LogRecord): Registro de log
+        
+        Returns:
+            str: Registro serializado em JSON
+        """
+        dados = {
+            'momento': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensagem': record.getMessage(),
+            'processo': record.process,
+            'thread': record.threadName
+        }
+        return json.dumps(dados, ensure_ascii=False)
+
+
+def configurar_logging(output_dir=None, nivel='INFO', formato_json=False, console=True):
+    """
+    Configura o logging do processo com fila e thread de escrita em segundo plano.
+    
+    Chamadas repetidas substituem a configuração anterior.
+    
+    Args:
+        output_dir (str): Diretório dos arquivos de log (padrão: output/ do projeto)
+        nivel (str): Nível mínimo dos registros (DEBUG, INFO, WARNING, ERROR)
+        formato_json (bool): Gravar os arquivos de log em JSON (uma linha por registro)
+        console (bool): Exibir os registros também no console
+    
+    Returns:
+        logging.handlers.QueueListener: Listener iniciado
+    """
+    global _listener
+    encerrar_logging()
+    
+    if output_dir is None:
+        output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'output')
+    os.makedirs(output_dir, exist_ok=True)
+    
+    formatador_texto = logging.Formatter(FORMATO_TEXTO)
+    formatador_arquivo = FormatadorJSON() if formato_json else formatador_texto
+    
+    destinos = []
+    if console:
+        saida_console = logging.StreamHandler(sys.stderr)
+        saida_console.setFormatter(formatador_texto)
+        destinos.append(saida_console)
+    
+    geral = logging.FileHandler(os.path.join(output_dir, ARQUIVO_GERAL), encoding='utf-8')
+    geral.setFormatter(formatador_arquivo)
+    destinos.append(geral)
+    
+    for arquivo, nomes_loggers in ARQUIVOS_POR_ETAPA.items():
+        destino = logging.FileHandler(os.path.join(output_dir, arquivo), encoding='utf-8')
+        destino.setFormatter(formatador_arquivo)
+        destino.addFilter(FiltroModulos(nomes_loggers))
+        destinos.append(destino)
+    
+    fila = queue.SimpleQueue()
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(logging.handlers.QueueHandler(fila))
+    raiz.setLevel(getattr(logging, str(nivel).upper(), logging.INFO))
+    
+    _listener = logging.handlers.QueueListener(fila, *destinos, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def encerrar_logging():
+    """
+    Esvazia a fila, encerra a thread de escrita e fecha os arquivos de log.
+    """
+    global _listener
+    if _listener is None:
+        return
+    
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+def adicionar_argumentos(parser):
+    """
+    Adiciona as opções de logging a um parser de linha de comando.
+    
+    Args:
+        parser (argparse.ArgumentParser): Parser a ser estendido
+    """
+    parser.add_argument('--nivel-log', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='Nível mínimo das mensagens de log')
+    parser.add_argument('--log-json', action='store_true',
+                        help='Gravar os arquivos de log em JSON (uma linha por registro)')
+
+
+def configurar_por_argumentos(args, output_dir=None):
+    """
+    Configura o logging a partir das opções de adicionar_argumentos.
+    
+    Args:
+        args (argparse.Namespace): Argumentos da linha de comando
+        output_dir (str): Diretório dos arquivos de log
+    
+    Returns:
+        logging.handlers.QueueListener: Listener iniciado
+    """
+    return configurar_logging(output_dir, nivel=args.nivel_log, formato_json=args.log_json)
+
+
+# Garante que os registros enfileirados sejam gravados ao final do processo
+atexit.register(encerrar_logging)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de contagem de leads e clientes únicos
+Este script mantém esboços HyperLogLog (esbocos.HyperLogLogPorGrupo) por origem,
+equipe e mês de captação: um com os contatos normalizados dos clientes (e-mail ou
+telefone) e outro com os identificadores dos leads. Como a união de esboços é o
+máximo dos registradores, as quantidades de clientes e leads distintos de qualquer
+combinação (total, por origem, por equipe, por mês) são estimadas sem guardar os
+contatos, e os esboços salvos entre as execuções acumulam as bases de várias fontes:
+reprocessar um lead já contado não altera as estimativas.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+import esbocos
+import persistencia
+
+logger = logging.getLogger('contatos_unicos')
+
+# Versão do formato de output/modelos/contatos_unicos.json (persistencia.carregar_estado descarta as demais)
+VERSAO_ESTADO = 1
+
+# Dimensões dos esboços (combinações agregáveis em qualquer nível)
+DIMENSOES = ('origem', 'equipe', 'mes')
+
+# Colunas que identificam um lead (além do contato normalizado)
+COLUNAS_LEAD = ('origem', 'data_captacao', 'tipo_interesse')
+
+# Valores de contato tratados como ausentes
+CONTATOS_AUSENTES = ('', 'nan', 'none', 'não informado')
+
+# Dígitos mínimos para um contato sem '@' ser tratado como telefone
+MIN_DIGITOS_TELEFONE = 8
+
+
+def normalizar_contato(contatos):
+    """
+    Normaliza contatos para que o mesmo cliente tenha sempre o mesmo identificador.
+    
+    E-mails são convertidos para minúsculas e sem espaços; telefones ficam apenas
+    com os dígitos.
+    
+    Args:
+        contatos (pandas.Series): Contatos (e-mail ou telefone)
+    
+    Returns:
+        pandas.Series: Contatos normalizados (NaN quando ausentes)
+    """
+    textos = contatos.astype(str).str.strip().str.lower()
+    digitos = textos.str.replace(r'\D', '', regex=True)
+    telefone = ~textos.str.contains('@', regex=False) & (digitos.str.len() >= MIN_DIGITOS_TELEFONE)
+    normalizados = textos.where(~telefone, digitos)
+    return normalizados.where(contatos.notna() & ~textos.isin(CONTATOS_AUSENTES))
+
+
+class ContatosUnicos:
+    """
+    Esboços persistentes de clientes e leads distintos por origem, equipe e mês.
+    """
+    
+    def __init__(self, caminho_estado, dimensoes=DIMENSOES, precisao=esbocos.PRECISAO_HLL):
+        """
+        Inicializa os esboços e carrega o estado salvo, se houver.
+        
+        Args:
+            caminho_estado (str): Arquivo JSON do estado
+            dimensoes (tuple): Dimensões dos esboços
+            precisao (int): Precisão do HyperLogLog
+        """
+        self.caminho_estado = caminho_estado
+        self.dimensoes = tuple(dimensoes)
+        self.precisao = precisao
+        estado = self._carregar()
+        self.esbocos = {
+            nome: esbocos.HyperLogLogPorGrupo.de_dict(estado['esbocos'][nome]) if estado
+            else esbocos.HyperLogLogPorGrupo(self.dimensoes, precisao)
+            for nome in ('clientes', 'leads')
+        }
+        self.leads_processados = 0
+        self.sem_contato = 0
+    
+    def _carregar(self):
+        """
+        Carrega o estado salvo (descartado se as dimensões ou a precisão dos esboços forem outras).
+        
+        Returns:
+            dict: Estado ou None se ausente/incompatível
+        """
+        def valido(estado):
+            return (set(estado.get('esbocos', {})) == {'clientes', 'leads'}
+                    and all(tuple(d['dimensoes']) == self.dimensoes and d['precisao'] == self.precisao
+                            for d in estado['esbocos'].values()))
+        return persistencia.carregar_estado(self.caminho_estado, VERSAO_ESTADO, 'de contatos únicos', valido, logger=logger)
+    
+    def salvar(self):
+        """
+        Salva os esboços.
+        
+        Returns:
+            str: Caminho do estado ou None em caso de erro
+        """
+        estado = {'esbocos': {nome: esboco.para_dict() for nome, esboco in self.esbocos.items()}}
+        return persistencia.salvar_estado(self.caminho_estado, estado, VERSAO_ESTADO, 'de contatos únicos', logger=logger)
+    
+    def adicionar(self, df):
+        """
+        Incorpora um lote de leads (de qualquer fonte) aos esboços.
+        
+        Leads sem contato entram apenas no esboço de leads, identificados pelas
+        demais colunas.
+        
+        Args:
+            df (pandas.DataFrame): Leads com 'contato', as colunas de COLUNAS_LEAD e as dimensões
+        """
+        contatos = normalizar_contato(df['contato'])
+        chaves = df[list(self.dimensoes)]
+        
+        identificacao = pd.DataFrame({'contato': contatos.fillna('').to_numpy()})
+        for coluna in COLUNAS_LEAD:
+            identificacao[coluna] = df[coluna].astype(str).to_numpy()
+        self.esbocos['leads'].adicionar(chaves, esbocos.hash_valores(identificacao))
+        
+        com_contato = contatos.notna().to_numpy()
+        self.esbocos['clientes'].adicionar(chaves[com_contato], esbocos.hash_valores(contatos[com_contato].to_numpy()))
+        
+        self.leads_processados += len(df)
+        self.sem_contato += int((~com_contato).sum())
+    
+    def tabela(self, dimensoes=()):
+        """
+        Leads e clientes distintos estimados em um nível de agregação.
+        
+        Args:
+            dimensoes (tuple): Dimensões mantidas (vazio = total)
+        
+        Returns:
+            pandas.DataFrame: Dimensões, leads_unicos, clientes_unicos e leads_por_cliente
+        """
+        leads = self.esbocos['leads'].consolidar(dimensoes).rename(columns={'distintos': 'leads_unicos'})
+        clientes = self.esbocos['clientes'].consolidar(dimensoes).rename(columns={'distintos': 'clientes_unicos'})
+        if dimensoes:
+            tabela = leads.merge(clientes, on=list(dimensoes), how='left')
+        else:
+            tabela = leads.join(clientes)
+        tabela['clientes_unicos'] = tabela['clientes_unicos'].fillna(0)
+        tabela[['leads_unicos', 'clientes_unicos']] = tabela[['leads_unicos', 'clientes_unicos']].round().astype(int)
+        tabela['leads_por_cliente'] = np.divide(
+            tabela['leads_unicos'].to_numpy(dtype=float), tabela['clientes_unicos'].to_numpy(dtype=float),
+            out=np.full(len(tabela), np.nan), where=tabela['clientes_unicos'].to_numpy() > 0
+        )
+        return tabela
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de coortes de conversão de leads
+Este script agrupa os leads em coortes pelo período de captação (semanas, por padrão)
+e calcula a conversão acumulada por tempo decorrido desde a captação. As datas são
+convertidas em números inteiros de dias, a coorte e o atraso de cada conversão viram
+índices inteiros e a matriz (coortes x períodos) é montada com um único bincount
+seguido de soma acumulada, sem groupby.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('coortes')
+
+
+def _dias(datas):
+    """
+    Converte datas em dias inteiros desde 1970-01-01 (NaT vira o menor inteiro).
+    
+    Args:
+        datas (pandas.Series): Datas
+    
+    Returns:
+        numpy.ndarray: Dias (int64)
+    """
+    return pd.to_datetime(datas).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+
+
+def calcular_coortes(captacao, conversao, periodo_dias=7, max_periodos=12, referencia=None):
+    """
+    Monta a matriz de conversão acumulada por coorte de captação.
+    
+    As coortes semanais começam na segunda-feira. Uma célula (coorte, k) só é
+    preenchida quando todos os leads da coorte já completaram k + 1 períodos desde
+    a captação até a data de referência; as demais ficam NaN.
+    
+    Args:
+        captacao (pandas.Series): Data de captação de cada lead
+        conversao (pandas.Series): Data de conversão (NaT para não convertidos)
+        periodo_dias (int): Duração de cada coorte e de cada período de atraso
+        max_periodos (int): Quantidade de períodos após a captação
+        referencia (pandas.Timestamp): Data até a qual há dados (padrão: maior captação)
+    
+    Returns:
+        dict: 'inicios' (início de cada coorte), 'tamanhos' (leads por coorte),
+              'conversoes' (conversões por período, coortes x períodos) e
+              'taxa_acumulada' (conversão acumulada, NaN onde incompleta)
+    """
+    dias_captacao = _dias(captacao)
+    dias_conversao = _dias(conversao)
+    nulo = np.iinfo(np.int64).min
+    validos = dias_captacao != nulo
+    dias_captacao, dias_conversao = dias_captacao[validos], dias_conversao[validos]
+    
+    vazio = {
+        'inicios': pd.DatetimeIndex([]),
+        'tamanhos': np.zeros(0, dtype=np.int64),
+        'conversoes': np.zeros((0, max_periodos), dtype=np.int64),
+        'taxa_acumulada': np.zeros((0, max_periodos))
+    }
+    if len(dias_captacao) == 0:
+        return vazio
+    
+    # Início alinhado à segunda-feira (1970-01-01 foi quinta-feira) em coortes semanais
+    primeiro = int(dias_captacao.min())
+    if periodo_dias == 7:
+        primeiro -= (primeiro + 3) % 7
+    coorte = (dias_captacao - primeiro) // periodo_dias
+    n_coortes = int(coorte.max()) + 1
+    tamanhos = np.bincount(coorte, minlength=n_coortes)
+    
+    # Período da conversão (0 = primeiro período após a captação)
+    convertidos = dias_conversao != nulo
+    atraso = (dias_conversao[convertidos] - dias_captacao[convertidos]) // periodo_dias
+    dentro = (atraso >= 0) & (atraso < max_periodos)
+    posicao = coorte[convertidos][dentro] * max_periodos + atraso[dentro]
+    conversoes = np.bincount(posicao, minlength=n_coortes * max_periodos).reshape(n_coortes, max_periodos)
+    
+    acumuladas = np.cumsum(conversoes, axis=1)
+    taxa = np.divide(acumuladas, tamanhos[:, None], out=np.full(acumuladas.shape, np.nan), where=tamanhos[:, None] > 0)
+    
+    # Células ainda não observadas por completo: o último lead da coorte não completou o período
+    referencia = int(dias_captacao.max()) if referencia is None else int(_dias(pd.Series([referencia]))[0])
+    inicio_coorte = primeiro + np.arange(n_coortes) * periodo_dias
+    fim_periodo = inicio_coorte[:, None] + periodo_dias - 1 + (np.arange(max_periodos)[None, :] + 1) * periodo_dias - 1
+    taxa[fim_periodo > referencia] = np.nan
+    
+    return {
+        'inicios': pd.to_datetime(inicio_coorte, unit='D'),
+        'tamanhos': tamanhos,
+        'conversoes': conversoes,
+        'taxa_acumulada': taxa
+    }
+
+
+def curva_media(resultado):
+    """
+    Conversão acumulada média por período, ponderada pelo tamanho das coortes completas.
+    
+    Args:
+        resultado (dict): Resultado de calcular_coortes
+    
+    Returns:
+        numpy.ndarray: Conversão acumulada média por período (NaN sem coortes completas)
+    """
+    taxa = resultado['taxa_acumulada']
+    pesos = np.where(np.isnan(taxa), 0, resultado['tamanhos'][:, None])
+    soma_pesos = pesos.sum(axis=0)
+    soma = (np.nan_to_num(taxa) * pesos).sum(axis=0)
+    return np.divide(soma, soma_pesos, out=np.full(taxa.shape[1], np.nan), where=soma_pesos > 0)
@@ -8,25 +8,36 @@ a partir dos dados processados de produção, ganhos e leads.
 """
 
 import os
+import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
 import logging
-from sklearn.linear_model import LinearRegression
-from statsmodels.tsa.seasonal import seasonal_decompose
 import json
 
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'output', 'analise.log')),
-        logging.StreamHandler()
-    ]
-)
+import instrumentacao
+import perfilador
+import config_logging
+import persistencia
+import tendencias
+import janelas_moveis
+import sazonalidade
+import previsao
+import anomalias
+import regras_insights
+import intervalos
+import coortes
+import funil
+import tempo_conversao
+import contatos_unicos
+import hierarquia
+import ranking_movel
+import fluxo_comissoes
+import indice_preco_m2
+import pontuacao_leads
+import simulacao
+import renderizador_graficos
+
 logger = logging.getLogger('data_analyzer')
 
 class DataAnalyzer:
@@ -35,21 +46,109 @@ class DataAnalyzer:
     Responsável por gerar insights e recomendações estratégicas.
     """
     
-    def __init__(self, dataframes, metricas):
+    # Seções da análise completa: (chave no resultado, método, DataFrames dos quais depende)
+    SECOES_ANALISE = [
+        ('tendencias_vendas', 'analisar_tendencias_vendas', ('producao',)),
+        ('tendencias_segmentos', 'analisar_tendencias_segmentos', ('producao',)),
+        ('janelas_segmentos', 'analisar_janelas_segmentos', ('producao',)),
+        ('preco_m2', 'analisar_preco_m2', ('producao',)),
+        ('sazonalidade', 'analisar_sazonalidade', ('producao',)),
+        ('previsao', 'analisar_previsao', ('producao',)),
+        ('desempenho_corretores', 'analisar_desempenho_corretores', ('producao',)),
+        ('ranking_corretores', 'analisar_ranking_corretores', ('producao',)),
+        ('hierarquia_equipes', 'analisar_hierarquia_equipes', ('producao', 'ganhos')),
+        ('fluxo_comissoes', 'analisar_fluxo_comissoes', ('ganhos',)),
+        ('conversao_leads', 'analisar_conversao_leads', ('leads',)),
+        ('funil_leads', 'analisar_funil_leads', ('leads',)),
+        ('tempo_conversao', 'analisar_tempo_conversao', ('leads',)),
+        ('contatos_unicos', 'analisar_contatos_unicos', ('leads',)),
+        ('coortes_leads', 'analisar_coortes_leads', ('leads',)),
+        ('pontuacao_leads', 'pontuar_leads', ('leads',)),
+        ('simulacao_cenarios', 'simular_cenarios', ('producao', 'leads')),
+        ('anomalias', 'detectar_anomalias', ('producao', 'leads')),
+    ]
+    
+    def __init__(self, dataframes, metricas, output_dir=None, renderizador=None):
         """
         Inicializa o analisador de dados.
         
         Args:
             dataframes (dict): Dicionário com DataFrames processados
             metricas (dict): Dicionário com métricas calculadas
+            output_dir (str): Diretório de saída das figuras e resultados (padrão: output/ do projeto)
+            renderizador (RenderizadorGraficos): Renderizador das figuras (padrão: pool compartilhado)
         """
         self.dataframes = dataframes
         self.metricas = metricas
+        self.output_dir = output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'output')
+        self.renderizador = renderizador or renderizador_graficos.obter_renderizador()
         self.insights = []
         self.recomendacoes = []
         self.figuras = []
+        self._renderizacoes = []
+        self.indice_preco_m2 = None
+        self.calendario_comissoes = None
         logger.info("Analisador de dados inicializado")
     
+    def _contar_linhas(self, tipo):
+        """
+        Retorna a quantidade de linhas de um DataFrame processado.
+        
+        Args:
+            tipo (str): Tipo de dado ('producao', 'ganhos' ou 'leads')
+            
+        Returns:
+            int: Quantidade de linhas ou None se o DataFrame não estiver disponível
+        """
+        df = self.dataframes.get(tipo)
+        return len(df) if isinstance(df, pd.DataFrame) else None
+    
+    def _adicionar_figura(self, spec, titulo, descricao):
+        """
+        Envia um gráfico para renderização e o registra em self.figuras.
+        
+        Args:
+            spec (dict): Especificação do gráfico (ver renderizador_graficos)
+            titulo (str): Título da figura no relatório
+            descricao (str): Descrição da figura no relatório
+        """
+        figura = {'titulo': titulo, 'descricao': descricao, 'arquivo': spec['arquivo']}
+        self._renderizacoes.append((figura, self.renderizador.submeter(spec)))
+        self.figuras.append(figura)
+    
+    def _aplicar_regras(self, nome_tabela, tabela):
+        """
+        Avalia as regras de insights de uma tabela agregada e registra o resultado.
+        
+        Args:
+            nome_tabela (str): Nome da tabela nas regras (ver regras_insights.REGRAS)
+            tabela (pandas.DataFrame): Tabela agregada, uma linha por entidade
+        
+        Returns:
+            list: Insights gerados
+        """
+        insights, recomendacoes = regras_insights.avaliar(nome_tabela, tabela)
+        self.insights.extend(insights)
+        self.recomendacoes.extend(recomendacoes)
+        return insights
+    
+    def aguardar_figuras(self):
+        """
+        Aguarda a renderização das figuras enviadas, removendo as que falharam.
+        
+        Returns:
+            list: Figuras renderizadas
+        """
+        if self._renderizacoes:
+            figuras, futuros = zip(*self._renderizacoes)
+            with instrumentacao.etapa('aguardar_figuras'):
+                caminhos = self.renderizador.aguardar(futuros)
+            falhas = [id(f) for f, caminho in zip(figuras, caminhos) if caminho is None]
+            self.figuras[:] = [f for f in self.figuras if id(f) not in falhas]
+            self._renderizacoes = []
+        return self.figuras
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('producao'))
     def analisar_tendencias_vendas(self):
         """
         Analisa tendências de vendas ao longo do tempo.
@@ -66,16 +165,13 @@ class DataAnalyzer:
             resultados = {}
             
             # Verificar se temos dados de data e valor
-            if 'data_venda' not in df.columns or 'valor_venda' not in df.columns:
+            if 'data_venda' not in df.columns or 'valor_venda' not in df.columns or df['data_venda'].isna().all():
                 logger.warning("Colunas necessárias não encontradas para análise de tendências")
                 return resultados
             
-            # Agrupar vendas por data
-            df_agrupado = df.groupby(df['data_venda'].dt.date)['valor_venda'].agg(['sum', 'count']).reset_index()
-            df_agrupado.columns = ['data', 'valor_total', 'quantidade']
-            
-            # Ordenar por data
-            df_agrupado = df_agrupado.sort_values('data')
+            # Série diária do total com os dias sem vendas em zero (mesma base das tendências por segmento)
+            dias, _, valores, quantidades = tendencias.montar_matriz_diaria(df, 'data_venda', 'valor_venda')
+            df_agrupado = pd.DataFrame({'data': dias.date, 'valor_total': valores[0], 'quantidade': quantidades[0]})
             
             # Calcular média móvel de 7 dias
             if len(df_agrupado) >= 7:
@@ -86,108 +182,496 @@ class DataAnalyzer:
             if len(df_agrupado) >= 30:
                 df_recente = df_agrupado.tail(30).copy()
                 
-                # Preparar dados para regressão linear
-                X = np.array(range(len(df_recente))).reshape(-1, 1)
-                y_valor = df_recente['valor_total'].values
-                y_qtd = df_recente['quantidade'].values
+                # Ajustar valor e quantidade na mesma operação
+                ajuste = tendencias.ajustar_tendencias(np.vstack([
+                    df_recente['valor_total'].values,
+                    df_recente['quantidade'].values
+                ]))
+                tendencia_valor, tendencia_qtd = ajuste['inclinacao']
                 
-                # Regressão linear para valor
-                modelo_valor = LinearRegression()
-                modelo_valor.fit(X, y_valor)
-                tendencia_valor = modelo_valor.coef_[0]
+                # Determinar direção da tendência
+                resultados['tendencia_valor'] = tendencias.resumir_ajuste(ajuste, 0)
+                resultados['tendencia_quantidade'] = tendencias.resumir_ajuste(ajuste, 1)
                 
-                # Regressão linear para quantidade
-                modelo_qtd = LinearRegression()
-                modelo_qtd.fit(X, y_qtd)
-                tendencia_qtd = modelo_qtd.coef_[0]
+                # Gerar insights sobre a tendência
+                self._aplicar_regras('vendas', pd.DataFrame([{
+                    'tendencia_valor': tendencia_valor,
+                    'tendencia_quantidade': tendencia_qtd
+                }]))
+            
+            # Enviar gráfico de tendência para renderização
+            serie_valor = [{'y': df_agrupado['valor_total'].tolist(), 'rotulo': 'Valor Total'}]
+            serie_qtd = [{'y': df_agrupado['quantidade'].tolist(), 'rotulo': 'Quantidade'}]
+            if 'media_movel_valor' in df_agrupado.columns:
+                serie_valor.append({'y': df_agrupado['media_movel_valor'].tolist(), 'rotulo': 'Média Móvel (7 dias)', 'estilo': 'r--'})
+                serie_qtd.append({'y': df_agrupado['media_movel_qtd'].tolist(), 'rotulo': 'Média Móvel (7 dias)', 'estilo': 'r--'})
+            
+            datas = df_agrupado['data'].tolist()
+            self._adicionar_figura({
+                'arquivo': os.path.join(self.output_dir, 'tendencia_vendas.png'),
+                'tamanho': (12, 6),
+                'paineis': [
+                    {'tipo': 'linhas', 'x': datas, 'series': serie_valor, 'titulo': 'Tendência de Valor de Vendas',
+                     'xlabel': 'Data', 'ylabel': 'Valor Total (R$)'},
+                    {'tipo': 'linhas', 'x': datas, 'series': serie_qtd, 'titulo': 'Tendência de Quantidade de Vendas',
+                     'xlabel': 'Data', 'ylabel': 'Quantidade'}
+                ]
+            }, 'Tendência de Vendas', 'Análise de tendências de valor e quantidade de vendas ao longo do tempo')
+            
+            logger.info("Análise de tendências de vendas concluída")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao analisar tendências de vendas: {str(e)}")
+            return {}
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('producao'))
+    def analisar_tendencias_segmentos(self, janela_dias=30):
+        """
+        Analisa a tendência diária de valor e quantidade de vendas de cada corretor,
+        tipo de imóvel e bairro, ajustando todas as séries de uma só vez.
+        
+        Args:
+            janela_dias (int): Quantidade de dias (até a venda mais recente) considerada
+        
+        Returns:
+            dict: Tendências por dimensão e segmento
+        """
+        if 'producao' not in self.dataframes or self.dataframes['producao'] is None:
+            logger.error("DataFrame de produção não disponível para análise de tendências por segmento")
+            return {}
+        
+        try:
+            df = self.dataframes['producao']
+            resultados = {}
+            
+            if 'data_venda' not in df.columns or 'valor_venda' not in df.columns or df.empty:
+                logger.warning("Colunas necessárias não encontradas para análise de tendências por segmento")
+                return resultados
+            
+            fim = df['data_venda'].max().normalize()
+            inicio = fim - pd.Timedelta(days=janela_dias - 1)
+            
+            tabelas_regras = []
+            dimensoes = [
+                ('corretores', 'corretor', 'corretores'),
+                ('tipos_imovel', 'tipo_imovel', 'tipos de imóvel'),
+                ('bairros', 'bairro', 'bairros')
+            ]
+            for nome, coluna, rotulo in dimensoes:
+                if coluna not in df.columns:
+                    continue
                 
-                # Determinar direção da tendência
-                resultados['tendencia_valor'] = {
-                    'coeficiente': float(tendencia_valor),
-                    'direcao': 'crescente' if tendencia_valor > 0 else 'decrescente' if tendencia_valor < 0 else 'estável'
+                _, chaves, valores, quantidades = tendencias.montar_matriz_diaria(
+                    df, 'data_venda', 'valor_venda', coluna, inicio, fim
+                )
+                if len(chaves) == 0:
+                    continue
+                
+                # Valor e quantidade de todos os segmentos em uma única matriz
+                ajuste = tendencias.ajustar_tendencias(np.vstack([valores, quantidades]))
+                n = len(chaves)
+                
+                resultados[nome] = {
+                    str(chave): {
+                        'tendencia_valor': tendencias.resumir_ajuste(ajuste, i),
+                        'tendencia_quantidade': tendencias.resumir_ajuste(ajuste, n + i),
+                        'vendas_periodo': int(quantidades[i].sum())
+                    }
+                    for i, chave in enumerate(chaves)
                 }
                 
-                resultados['tendencia_quantidade'] = {
-                    'coeficiente': float(tendencia_qtd),
-                    'direcao': 'crescente' if tendencia_qtd > 0 else 'decrescente' if tendencia_qtd < 0 else 'estável'
+                # Estatística t da inclinação do valor para as regras de insights (|t| > 2: tendência relevante)
+                inclinacao, erro = ajuste['inclinacao'][:n], ajuste['erro_padrao'][:n]
+                tabelas_regras.append(pd.DataFrame({
+                    'dimensao': nome,
+                    'rotulo': rotulo,
+                    'segmento': [str(chave) for chave in chaves],
+                    'estatistica_t': np.divide(inclinacao, erro, out=np.zeros(n), where=erro > 0),
+                    'vendas_periodo': quantidades.sum(axis=1),
+                    'janela_dias': janela_dias
+                }))
+            
+            if tabelas_regras:
+                self._aplicar_regras('segmentos', pd.concat(tabelas_regras, ignore_index=True))
+            
+            resultados['periodo'] = {'inicio': inicio.strftime('%Y-%m-%d'), 'fim': fim.strftime('%Y-%m-%d')}
+            
+            logger.info("Análise de tendências por segmento concluída")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao analisar tendências por segmento: {str(e)}")
+            return {}
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('producao'))
+    def analisar_janelas_segmentos(self, janelas=(7, 30, 90)):
+        """
+        Calcula médias móveis, volume móvel e mediana móvel de preço para cada
+        combinação de bairro e tipo de imóvel.
+        
+        Args:
+            janelas (tuple): Tamanhos das janelas em dias
+        
+        Returns:
+            dict: Valores mais recentes de cada janela por segmento
+        """
+        if 'producao' not in self.dataframes or self.dataframes['producao'] is None:
+            logger.error("DataFrame de produção não disponível para análise de janelas móveis")
+            return {}
+        
+        try:
+            df = self.dataframes['producao']
+            resultados = {}
+            
+            colunas = ['data_venda', 'valor_venda', 'bairro', 'tipo_imovel']
+            if not all(coluna in df.columns for coluna in colunas) or df.empty:
+                logger.warning("Colunas necessárias não encontradas para análise de janelas móveis")
+                return resultados
+            
+            calculo = janelas_moveis.calcular_janelas_segmentadas(
+                df, 'data_venda', 'valor_venda', ['bairro', 'tipo_imovel'], janelas
+            )
+            
+            def valor(matriz, i, dia=-1):
+                return float(matriz[i, dia]) if abs(dia) <= matriz.shape[1] and np.isfinite(matriz[i, dia]) else None
+            
+            segmentos = {}
+            for i, (bairro, tipo) in enumerate(calculo['segmentos']):
+                segmento = {'bairro': bairro, 'tipo_imovel': tipo}
+                for janela, estatisticas in calculo['janelas'].items():
+                    atual = valor(estatisticas['mediana_preco'], i)
+                    anterior = valor(estatisticas['mediana_preco'], i, -1 - janela)
+                    segmento[f'{janela}d'] = {
+                        'media_movel': valor(estatisticas['media_movel'], i),
+                        'volume': valor(estatisticas['volume'], i),
+                        'preco_medio': valor(estatisticas['preco_medio'], i),
+                        'mediana_preco': atual,
+                        'variacao_mediana': (atual / anterior - 1) if atual is not None and anterior else None
+                    }
+                segmentos[f'{bairro} / {tipo}'] = segmento
+            
+            resultados['segmentos'] = segmentos
+            resultados['data_referencia'] = calculo['dias'][-1].strftime('%Y-%m-%d')
+            resultados['janelas'] = list(janelas)
+            
+            # Gerar insights sobre as maiores variações da mediana de preço na janela de 30 dias
+            if 30 in janelas:
+                variacoes = pd.DataFrame({
+                    'segmento': list(segmentos),
+                    'variacao_mediana_30d': [dados['30d']['variacao_mediana'] for dados in segmentos.values()]
+                }).astype({'variacao_mediana_30d': float})
+                self._aplicar_regras('janelas_segmentos', variacoes.assign(queda_mediana_30d=-variacoes['variacao_mediana_30d']))
+            
+            logger.info("Análise de janelas móveis por segmento concluída")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao analisar janelas móveis por segmento: {str(e)}")
+            return {}
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('producao'))
+    def analisar_preco_m2(self, meses=12):
+        """
+        Atualiza o índice de preço por m² por bairro, tipo de imóvel e mês e resume os
+        valores atuais de cada segmento.
+        
+        O índice fica em output/modelos/indice_preco_m2.json e em self.indice_preco_m2,
+        para estimativas de imóveis (IndicePrecoM2.estimar / estimar_imovel).
+        
+        Args:
+            meses (int): Meses mais recentes incluídos nos resultados
+        
+        Returns:
+            dict: Preço por m² atual por segmento, evolução mensal por tipo e células recentes do índice
+        """
+        if 'producao' not in self.dataframes or self.dataframes['producao'] is None:
+            logger.error("DataFrame de produção não disponível para índice de preço por m²")
+            return {}
+        
+        try:
+            df = self.dataframes['producao']
+            resultados = {}
+            
+            if not {'data_venda', 'bairro', 'tipo_imovel', 'area_m2', 'valor_venda'} <= set(df.columns) or df.empty:
+                logger.warning("Colunas necessárias não encontradas para índice de preço por m²")
+                return resultados
+            
+            indice = indice_preco_m2.IndicePrecoM2(os.path.join(self.output_dir, 'modelos', 'indice_preco_m2.json'))
+            indice.atualizar(df)
+            indice.salvar()
+            self.indice_preco_m2 = indice
+            
+            celulas = indice.tabela(meses_recentes=meses)
+            por_bairro = celulas[celulas['bairro'] != indice_preco_m2.TODOS]
+            
+            # Preço por m² atual de cada segmento (mesma regra das estimativas de imóveis)
+            segmentos = por_bairro[['bairro', 'tipo_imovel']].drop_duplicates().sort_values(['bairro', 'tipo_imovel'])
+            estimativa = indice.estimar(segmentos['bairro'].to_numpy(), segmentos['tipo_imovel'].to_numpy())
+            atual = segmentos.assign(**{campo: estimativa[campo] for campo in (
+                'preco_m2', 'preco_m2_inferior', 'preco_m2_superior', 'amostras', 'mes_referencia', 'nivel'
+            )})
+            resultados['atual'] = atual.replace({np.nan: None}).to_dict('records')
+            
+            # Evolução mensal da mediana por tipo (todos os bairros)
+            por_tipo = celulas[celulas['bairro'] == indice_preco_m2.TODOS].pivot(index='mes', columns='tipo_imovel', values='mediana')
+            resultados['mediana_mensal_por_tipo'] = {
+                tipo: {mes: (None if np.isnan(v) else float(v)) for mes, v in serie.items()}
+                for tipo, serie in por_tipo.items()
+            }
+            resultados['celulas'] = por_bairro.to_dict('records')
+            resultados['indice'] = {
+                'modo': indice.modo,
+                'vendas_processadas': indice.linhas_processadas,
+                'celulas': int(len(indice.chaves))
+            }
+            
+            # Enviar gráfico da evolução do preço por m² para renderização
+            self._adicionar_figura({
+                'arquivo': os.path.join(self.output_dir, 'preco_m2.png'),
+                'tamanho': (12, 6),
+                'paineis': [
+                    {'tipo': 'linhas', 'x': por_tipo.index.tolist(),
+                     'series': [{'y': por_tipo[tipo].tolist(), 'rotulo': tipo, 'estilo': 'o-'} for tipo in por_tipo.columns],
+                     'titulo': 'Mediana do Preço por m² por Tipo de Imóvel', 'xlabel': 'Mês', 'ylabel': 'R$/m²'}
+                ]
+            }, 'Preço por m²', 'Evolução mensal da mediana do preço por m² de cada tipo de imóvel (todos os bairros)')
+            
+            logger.info(f"Índice de preço por m² atualizado ({indice.modo}, {indice.linhas_processadas} vendas processadas)")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao analisar preço por m²: {str(e)}")
+            return {}
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('producao'))
+    def analisar_sazonalidade(self):
+        """
+        Analisa os padrões semanais e mensais das vendas, no total e para cada
+        combinação de bairro e tipo de imóvel, decompondo todas as séries de uma vez.
+        
+        Returns:
+            dict: Força da sazonalidade e dias de pico por série
+        """
+        if 'producao' not in self.dataframes or self.dataframes['producao'] is None:
+            logger.error("DataFrame de produção não disponível para análise de sazonalidade")
+            return {}
+        
+        try:
+            df = self.dataframes['producao']
+            resultados = {}
+            
+            colunas = ['data_venda', 'valor_venda', 'bairro', 'tipo_imovel']
+            if not all(coluna in df.columns for coluna in colunas) or df.empty:
+                logger.warning("Colunas necessárias não encontradas para análise de sazonalidade")
+                return resultados
+            
+            dias, _, valores_total, quantidades_total = tendencias.montar_matriz_diaria(df, 'data_venda', 'valor_venda')
+            _, segmentos, _, quantidades = tendencias.montar_matriz_diaria(
+                df, 'data_venda', 'valor_venda', ['bairro', 'tipo_imovel'], dias[0], dias[-1]
+            )
+            
+            def dia_do_mes(fase):
+                # Dia do mês mais frequente entre as datas da fase (o período de 30 dias não segue o calendário)
+                return int(pd.Series(dias[fase::30].day).mode().iloc[0])
+            
+            periodos = {'semanal': 7, 'mensal': 30}
+            resultados['total'] = {}
+            for nome, periodo in periodos.items():
+                if len(dias) < 2 * periodo:
+                    continue
+                
+                # Quantidade e valor do total em uma única decomposição
+                decomposicao = sazonalidade.decompor(np.vstack([quantidades_total, valores_total]), periodo)
+                indices = decomposicao['indices'][0]
+                fase_pico, fase_vale = int(np.nanargmax(indices)), int(np.nanargmin(indices))
+                
+                total = {
+                    'forca_quantidade': float(decomposicao['forca'][0]),
+                    'forca_valor': float(decomposicao['forca'][1]),
+                    'amplitude_quantidade': float(np.nanmax(indices) - np.nanmin(indices))
                 }
+                if periodo == 7:
+                    fases = sorted(range(periodo), key=lambda fase: dias[fase].dayofweek)
+                    total['indices_quantidade'] = {
+                        sazonalidade.DIAS_SEMANA[dias[fase].dayofweek]: float(indices[fase]) for fase in fases
+                    }
+                    total['dia_pico'] = sazonalidade.DIAS_SEMANA[dias[fase_pico].dayofweek]
+                    total['dia_vale'] = sazonalidade.DIAS_SEMANA[dias[fase_vale].dayofweek]
+                else:
+                    total['dia_mes_pico'] = dia_do_mes(fase_pico)
+                    total['dia_mes_vale'] = dia_do_mes(fase_vale)
+                resultados['total'][nome] = total
+            
+            # Todas as combinações de bairro e tipo de imóvel
+            resultados['segmentos'] = {}
+            if len(segmentos) and len(dias) >= 14:
+                semanal = sazonalidade.decompor(quantidades, 7)
+                mensal = sazonalidade.decompor(quantidades, 30) if len(dias) >= 60 else None
+                picos = np.nanargmax(np.nan_to_num(semanal['indices'], nan=-np.inf), axis=1)
                 
-                # Adicionar insight sobre tendência
-                if tendencia_valor > 0 and tendencia_qtd > 0:
-                    self.insights.append({
-                        'categoria': 'tendencia_vendas',
-                        'descricao': 'Tendência de crescimento tanto em valor quanto em quantidade de vendas nos últimos 30 dias.',
-                        'impacto': 'alto',
-                        'confianca': 'média'
-                    })
-                elif tendencia_valor < 0 and tendencia_qtd < 0:
-                    self.insights.append({
-                        'categoria': 'tendencia_vendas',
-                        'descricao': 'Tendência de queda tanto em valor quanto em quantidade de vendas nos últimos 30 dias.',
-                        'impacto': 'alto',
-                        'confianca': 'média'
-                    })
-                elif tendencia_valor > 0 and tendencia_qtd < 0:
-                    self.insights.append({
-                        'categoria': 'tendencia_vendas',
-                        'descricao': 'Tendência de aumento no valor total de vendas, mas redução na quantidade, indicando possível foco em imóveis de maior valor.',
-                        'impacto': 'médio',
-                        'confianca': 'média'
-                    })
-                elif tendencia_valor < 0 and tendencia_qtd > 0:
-                    self.insights.append({
-                        'categoria': 'tendencia_vendas',
-                        'descricao': 'Tendência de aumento na quantidade de vendas, mas redução no valor total, indicando possível foco em imóveis de menor valor.',
-                        'impacto': 'médio',
-                        'confianca': 'média'
-                    })
-            
-            # Criar gráfico de tendência
-            plt.figure(figsize=(12, 6))
-            plt.subplot(2, 1, 1)
-            plt.plot(df_agrupado['data'], df_agrupado['valor_total'], label='Valor Total')
-            if 'media_movel_valor' in df_agrupado.columns:
-                plt.plot(df_agrupado['data'], df_agrupado['media_movel_valor'], 'r--', label='Média Móvel (7 dias)')
-            plt.title('Tendência de Valor de Vendas')
-            plt.xlabel('Data')
-            plt.ylabel('Valor Total (R$)')
-            plt.legend()
-            plt.grid(True, alpha=0.3)
-            
-            plt.subplot(2, 1, 2)
-            plt.plot(df_agrupado['data'], df_agrupado['quantidade'], label='Quantidade')
-            if 'media_movel_qtd' in df_agrupado.columns:
-                plt.plot(df_agrupado['data'], df_agrupado['media_movel_qtd'], 'r--', label='Média Móvel (7 dias)')
-            plt.title('Tendência de Quantidade de Vendas')
-            plt.xlabel('Data')
-            plt.ylabel('Quantidade')
-            plt.legend()
-            plt.grid(True, alpha=0.3)
-            
-            plt.tight_layout()
-            
-            # Salvar figura
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'output')
-            figura_path = os.path.join(output_dir, 'tendencia_vendas.png')
-            plt.savefig(figura_path)
-            plt.close()
-            
-            self.figuras.append({
-                'titulo': 'Tendência de Vendas',
-                'descricao': 'Análise de tendências de valor e quantidade de vendas ao longo do tempo',
-                'arquivo': figura_path
-            })
+                for i, (bairro, tipo) in enumerate(segmentos):
+                    segmento = {
+                        'forca_semanal': float(semanal['forca'][i]),
+                        'dia_pico': sazonalidade.DIAS_SEMANA[dias[int(picos[i])].dayofweek]
+                    }
+                    if mensal is not None:
+                        segmento['forca_mensal'] = float(mensal['forca'][i])
+                    resultados['segmentos'][f'{bairro} / {tipo}'] = segmento
             
-            logger.info("Análise de tendências de vendas concluída")
+            # Gerar insights sobre os padrões semanal e mensal do total e dos segmentos
+            semanal_total = resultados['total'].get('semanal', {})
+            mensal_total = resultados['total'].get('mensal', {})
+            forca_semanal = semanal_total.get('forca_quantidade', np.nan)
+            self._aplicar_regras('sazonalidade', pd.DataFrame([{
+                'forca_semanal': forca_semanal,
+                'confianca_semanal': 'alta' if forca_semanal >= 0.6 else 'média',
+                'dia_pico': semanal_total.get('dia_pico', '').lower(),
+                'dia_vale': semanal_total.get('dia_vale', '').lower(),
+                'forca_mensal': mensal_total.get('forca_quantidade', np.nan),
+                'dia_mes_pico': mensal_total.get('dia_mes_pico')
+            }]))
+            self._aplicar_regras('sazonalidade_segmentos', pd.DataFrame({
+                'segmento': list(resultados['segmentos']),
+                'forca_semanal': [dados['forca_semanal'] for dados in resultados['segmentos'].values()]
+            }))
+            
+            logger.info("Análise de sazonalidade concluída")
             return resultados
         except Exception as e:
-            logger.error(f"Erro ao analisar tendências de vendas: {str(e)}")
+            logger.error(f"Erro ao analisar sazonalidade: {str(e)}")
+            return {}
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('producao'))
+    def analisar_previsao(self, horizonte=30):
+        """
+        Projeta VGV e quantidade de vendas (diários e mensais, com intervalos de 95%)
+        no total e para cada combinação de bairro e tipo de imóvel.
+        
+        O estado dos modelos fica em output/modelos/previsao.json e, entre execuções,
+        apenas os dias novos são incorporados.
+        
+        Args:
+            horizonte (int): Dias da previsão diária
+        
+        Returns:
+            dict: Previsões e informações do modelo
+        """
+        if 'producao' not in self.dataframes or self.dataframes['producao'] is None:
+            logger.error("DataFrame de produção não disponível para previsão")
+            return {}
+        
+        try:
+            df = self.dataframes['producao']
+            resultados = {}
+            
+            if 'data_venda' not in df.columns or 'valor_venda' not in df.columns or df.empty:
+                logger.warning("Colunas necessárias não encontradas para previsão")
+                return resultados
+            
+            fim = previsao.ultimo_dia_completo(df['data_venda'])
+            dias, _, vgv_total, qtd_total = tendencias.montar_matriz_diaria(df, 'data_venda', 'valor_venda', fim=fim)
+            if len(dias) < 14:
+                logger.warning("Histórico insuficiente para previsão (mínimo de 14 dias)")
+                return resultados
+            
+            vgv_total, qtd_total = vgv_total[0], qtd_total[0]
+            chaves = ['vgv|total', 'quantidade|total']
+            linhas = [vgv_total, qtd_total]
+            nomes_segmentos = []
+            if 'bairro' in df.columns and 'tipo_imovel' in df.columns:
+                _, segmentos, vgv_seg, qtd_seg = tendencias.montar_matriz_diaria(
+                    df, 'data_venda', 'valor_venda', ['bairro', 'tipo_imovel'], dias[0], fim
+                )
+                nomes_segmentos = [f'{bairro} / {tipo}' for bairro, tipo in segmentos]
+                chaves += [f'vgv|{nome}' for nome in nomes_segmentos] + [f'quantidade|{nome}' for nome in nomes_segmentos]
+                linhas += [vgv_seg, qtd_seg]
+            
+            # Todas as séries são atualizadas e projetadas em lote
+            modelo = previsao.ModeloPrevisao(os.path.join(self.output_dir, 'modelos', 'previsao.json'))
+            modelo.atualizar(dias, chaves, np.vstack(linhas))
+            modelo.salvar()
+            
+            janelas = ((1, 30), (31, 60), (61, 90))
+            projecao = modelo.prever(chaves, horizonte, janelas)
+            diaria, agregadas = projecao['diaria'], projecao['janelas']
+            
+            def intervalo(dados, i):
+                return {campo: float(dados[campo][i]) for campo in ('previsao', 'inferior', 'superior')}
+            
+            datas_futuras = pd.date_range(dias[-1] + pd.Timedelta(days=1), periods=horizonte, freq='D')
+            resultados['total'] = {}
+            for i, medida in enumerate(('vgv', 'quantidade')):
+                resultados['total'][medida] = {
+                    'diaria': [
+                        {'data': data.strftime('%Y-%m-%d'), 'previsao': float(diaria['previsao'][i, h]),
+                         'inferior': float(diaria['inferior'][i, h]), 'superior': float(diaria['superior'][i, h])}
+                        for h, data in enumerate(datas_futuras)
+                    ],
+                    'mensal': [
+                        dict(intervalo(agregada, i),
+                             inicio=(dias[-1] + pd.Timedelta(days=inicio)).strftime('%Y-%m-%d'),
+                             fim=(dias[-1] + pd.Timedelta(days=fim_janela)).strftime('%Y-%m-%d'))
+                        for (inicio, fim_janela), agregada in zip(janelas, agregadas)
+                    ]
+                }
+            
+            n = len(nomes_segmentos)
+            resultados['segmentos'] = {
+                nome: {
+                    'vgv_30d': intervalo(agregadas[0], 2 + i),
+                    'quantidade_30d': intervalo(agregadas[0], 2 + n + i)
+                }
+                for i, nome in enumerate(nomes_segmentos)
+            }
+            resultados['modelo'] = {
+                'tipo': 'Holt (nível e tendência aditiva amortecida)',
+                'data_base': dias[-1].strftime('%Y-%m-%d'),
+                'modo': modelo.modo,
+                'dias_incorporados': modelo.dias_incorporados,
+                'ajuste_completo_em': modelo.estado['ajuste_completo_em'],
+                'confianca_intervalos': 0.95
+            }
+            
+            # Comparação da projeção dos próximos 30 dias com os últimos 30 dias
+            realizado = float(vgv_total[-30:].sum())
+            projetado = resultados['total']['vgv']['mensal'][0]['previsao']
+            if realizado > 0:
+                variacao = projetado / realizado - 1
+                resultados['total']['variacao_vgv_30d'] = variacao
+                
+                # Gerar insights sobre a variação projetada do VGV
+                self._aplicar_regras('previsao', pd.DataFrame([{'variacao_vgv_30d': variacao, 'queda_vgv_30d': -variacao}]))
+            
+            # Enviar gráfico de previsão para renderização (últimos 90 dias + projeção)
+            historico = vgv_total[-90:].tolist()
+            lacuna = [float('nan')] * len(historico)
+            datas = list(dias[-90:].date) + list(datas_futuras.date)
+            vgv = resultados['total']['vgv']['diaria']
+            self._adicionar_figura({
+                'arquivo': os.path.join(self.output_dir, 'previsao_vgv.png'),
+                'tamanho': (12, 6),
+                'paineis': [
+                    {'tipo': 'linhas', 'x': datas, 'titulo': 'Previsão de VGV Diário (intervalo de 95%)',
+                     'xlabel': 'Data', 'ylabel': 'VGV (R$)', 'series': [
+                         {'y': historico + [float('nan')] * horizonte, 'rotulo': 'Realizado'},
+                         {'y': lacuna + [d['previsao'] for d in vgv], 'rotulo': 'Previsão', 'estilo': 'r-'},
+                         {'y': lacuna + [d['inferior'] for d in vgv], 'rotulo': 'Intervalo de 95%', 'estilo': 'r:'},
+                         {'y': lacuna + [d['superior'] for d in vgv], 'estilo': 'r:'}
+                     ]}
+                ]
+            }, 'Previsão de VGV', 'Projeção do VGV diário para os próximos 30 dias com intervalo de previsão de 95%')
+            
+            logger.info(f"Previsão concluída ({modelo.modo}, {modelo.dias_incorporados} dias incorporados)")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao calcular previsão: {str(e)}")
             return {}
     
-    def analisar_desempenho_corretores(self):
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('producao'))
+    def analisar_desempenho_corretores(self, max_workers=None):
         """
         Analisa o desempenho dos corretores.
         
+        Args:
+            max_workers (int): Threads do bootstrap dos intervalos (None ou 1 = sequencial)
+        
         Returns:
             dict: Resultados da análise de desempenho
         """
@@ -214,66 +698,42 @@ class DataAnalyzer:
             # Ordenar por valor total
             desempenho_corretores = desempenho_corretores.sort_values('valor_total', ascending=False)
             
-            # Top 10 corretores
-            top_corretores = desempenho_corretores.head(10)
-            resultados['top_corretores'] = top_corretores.to_dict('records')
-            
             # Identificar corretores de alto desempenho (outliers positivos)
             q3 = desempenho_corretores['valor_total'].quantile(0.75)
             iqr = desempenho_corretores['valor_total'].quantile(0.75) - desempenho_corretores['valor_total'].quantile(0.25)
             limite = q3 + 1.5 * iqr
             
+            # Intervalos bootstrap do VGV, da posição no ranking e da probabilidade de alto desempenho
+            desempenho_corretores = desempenho_corretores.merge(self._intervalos_corretores(df, max_workers), on='corretor', how='left')
+            top_corretores = desempenho_corretores.head(10)
+            resultados['top_corretores'] = top_corretores.to_dict('records')
+            
             alto_desempenho = desempenho_corretores[desempenho_corretores['valor_total'] > limite]
             resultados['corretores_alto_desempenho'] = alto_desempenho.to_dict('records')
             
-            # Adicionar insights sobre corretores
-            if not alto_desempenho.empty:
-                self.insights.append({
-                    'categoria': 'desempenho_corretores',
-                    'descricao': f'Identificados {len(alto_desempenho)} corretores com desempenho excepcional, significativamente acima da média.',
-                    'impacto': 'alto',
-                    'confianca': 'alta'
-                })
-                
-                # Adicionar recomendação
-                self.recomendacoes.append({
-                    'categoria': 'desempenho_corretores',
-                    'descricao': 'Analisar as práticas dos corretores de alto desempenho para identificar estratégias que possam ser replicadas pela equipe.',
-                    'prioridade': 'alta'
-                })
+            # Gerar insights sobre corretores
+            ticket_medio = df['valor_venda'].mean()
+            self._aplicar_regras('corretores', desempenho_corretores.assign(
+                limite_alto_desempenho=limite,
+                ticket_medio_geral=ticket_medio,
+                razao_ticket=desempenho_corretores['valor_medio'] / ticket_medio,
+                quantidade_media=desempenho_corretores['quantidade'].mean()
+            ))
             
-            # Criar gráfico de desempenho
-            plt.figure(figsize=(12, 10))
-            
-            plt.subplot(2, 1, 1)
-            sns.barplot(x='corretor', y='valor_total', data=top_corretores)
-            plt.title('Top 10 Corretores por Valor Total de Vendas')
-            plt.xlabel('Corretor')
-            plt.ylabel('Valor Total (R$)')
-            plt.xticks(rotation=45)
-            plt.grid(True, alpha=0.3)
-            
-            plt.subplot(2, 1, 2)
-            sns.barplot(x='corretor', y='quantidade', data=top_corretores)
-            plt.title('Top 10 Corretores por Quantidade de Vendas')
-            plt.xlabel('Corretor')
-            plt.ylabel('Quantidade')
-            plt.xticks(rotation=45)
-            plt.grid(True, alpha=0.3)
-            
-            plt.tight_layout()
-            
-            # Salvar figura
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'output')
-            figura_path = os.path.join(output_dir, 'desempenho_corretores.png')
-            plt.savefig(figura_path)
-            plt.close()
-            
-            self.figuras.append({
-                'titulo': 'Desempenho de Corretores',
-                'descricao': 'Análise dos corretores com melhor desempenho em valor e quantidade de vendas',
-                'arquivo': figura_path
-            })
+            # Enviar gráfico de desempenho para renderização
+            corretores = top_corretores['corretor'].tolist()
+            self._adicionar_figura({
+                'arquivo': os.path.join(self.output_dir, 'desempenho_corretores.png'),
+                'tamanho': (12, 10),
+                'paineis': [
+                    {'tipo': 'barras', 'categorias': corretores, 'valores': top_corretores['valor_total'].tolist(),
+                     'titulo': 'Top 10 Corretores por Valor Total de Vendas', 'xlabel': 'Corretor',
+                     'ylabel': 'Valor Total (R$)', 'rotacao_x': 45},
+                    {'tipo': 'barras', 'categorias': corretores, 'valores': top_corretores['quantidade'].tolist(),
+                     'titulo': 'Top 10 Corretores por Quantidade de Vendas', 'xlabel': 'Corretor',
+                     'ylabel': 'Quantidade', 'rotacao_x': 45}
+                ]
+            }, 'Desempenho de Corretores', 'Análise dos corretores com melhor desempenho em valor e quantidade de vendas')
             
             logger.info("Análise de desempenho de corretores concluída")
             return resultados
@@ -281,6 +741,305 @@ class DataAnalyzer:
             logger.error(f"Erro ao analisar desempenho de corretores: {str(e)}")
             return {}
     
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('producao'))
+    def analisar_ranking_corretores(self, janelas=ranking_movel.JANELAS, dias_historico=180, corretores_historico=10):
+        """
+        Calcula a posição de cada corretor em todos os dias pelo VGV das janelas móveis
+        (30 e 90 dias), com a variação e a volatilidade recentes do ranking.
+        
+        As somas das janelas vêm de uma matriz de somas acumuladas (corretores x dias) e
+        todos os dias são ordenados de uma vez (ver ranking_movel.calcular_rankings).
+        
+        Args:
+            janelas (tuple): Janelas do ranking em dias
+            dias_historico (int): Dias do histórico de posições incluído nos resultados
+            corretores_historico (int): Corretores (os de melhor posição atual) com histórico
+        
+        Returns:
+            dict: Por janela, ranking atual com variação e volatilidade e histórico recente de posições
+        """
+        if 'producao' not in self.dataframes or self.dataframes['producao'] is None:
+            logger.error("DataFrame de produção não disponível para ranking de corretores")
+            return {}
+        
+        try:
+            df = self.dataframes['producao']
+            resultados = {}
+            
+            if not {'data_venda', 'corretor', 'valor_venda'} <= set(df.columns) or df.empty:
+                logger.warning("Colunas necessárias não encontradas para ranking de corretores")
+                return resultados
+            
+            rankings = ranking_movel.calcular_rankings(df, 'data_venda', 'valor_venda', 'corretor', janelas)
+            if not rankings['janelas']:
+                logger.warning("Histórico insuficiente para ranking móvel de corretores")
+                return resultados
+            
+            paineis = []
+            for janela, ranking in rankings['janelas'].items():
+                tabela = ranking_movel.resumir(ranking, rankings['chaves']).rename(
+                    columns={'chave': 'corretor', 'soma_janela': 'vgv_janela'}
+                )
+                destaques = tabela.head(corretores_historico)
+                linhas = pd.Index(rankings['chaves']).get_indexer(destaques['corretor'])
+                datas = ranking['dias'][-dias_historico:]
+                historico = ranking['posicoes'][linhas, -dias_historico:]
+                
+                resultados[f'{janela}_dias'] = {
+                    'data': ranking['dias'][-1].strftime('%Y-%m-%d'),
+                    'ranking': tabela.replace({np.nan: None}).to_dict('records'),
+                    'historico': {
+                        'datas': datas.strftime('%Y-%m-%d').tolist(),
+                        'posicoes': {corretor: serie.tolist() for corretor, serie in zip(destaques['corretor'], historico)}
+                    }
+                }
+                
+                # Gerar insights sobre quedas no ranking
+                self._aplicar_regras('ranking_corretores', tabela.assign(janela=janela))
+                
+                paineis.append({
+                    'tipo': 'linhas', 'x': datas.tolist(),
+                    'series': [{'y': serie.tolist(), 'rotulo': corretor} for corretor, serie in zip(destaques['corretor'][:5], historico[:5])],
+                    'titulo': f'Posição no Ranking de VGV ({janela} dias) dos 5 Primeiros', 'xlabel': 'Data',
+                    'ylabel': 'Posição', 'inverter_y': True
+                })
+            
+            # Enviar gráfico da evolução das posições para renderização
+            self._adicionar_figura({
+                'arquivo': os.path.join(self.output_dir, 'ranking_corretores.png'),
+                'tamanho': (12, 5 * len(paineis)),
+                'paineis': paineis
+            }, 'Ranking Móvel de Corretores', 'Evolução diária da posição dos corretores no ranking de VGV das janelas móveis')
+            
+            logger.info(f"Ranking móvel de corretores concluído ({len(rankings['chaves'])} corretores)")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao calcular ranking móvel de corretores: {str(e)}")
+            return {}
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('producao'))
+    def analisar_hierarquia_equipes(self):
+        """
+        Consolida o VGV na hierarquia empresa → equipe → corretor → tipo de imóvel.
+        
+        A equipe de cada corretor vem dos dados de ganhos. As vendas são agregadas uma
+        única vez no nível mais detalhado e os demais níveis somam as parciais do nível
+        abaixo (ver hierarquia.consolidar).
+        
+        Returns:
+            dict: Tabela de cada nível com rankings, percentis e participações no nível superior
+        """
+        if 'producao' not in self.dataframes or self.dataframes['producao'] is None:
+            logger.error("DataFrame de produção não disponível para análise por equipe")
+            return {}
+        
+        try:
+            df = self.dataframes['producao']
+            resultados = {}
+            
+            if not {'corretor', 'tipo_imovel', 'valor_venda'} <= set(df.columns) or df.empty:
+                logger.warning("Colunas necessárias não encontradas para análise por equipe")
+                return resultados
+            
+            equipes = hierarquia.mapear_equipes(self.dataframes.get('ganhos'))
+            if equipes.empty:
+                logger.warning("Equipes não encontradas nos dados de ganhos; corretores agrupados em uma única equipe")
+            vendas = df[['corretor', 'tipo_imovel', 'valor_venda']].assign(
+                equipe=df['corretor'].map(equipes).fillna(hierarquia.SEM_EQUIPE)
+            )
+            niveis = hierarquia.consolidar(hierarquia.agregar_parciais(vendas))
+            
+            colunas = {'soma': 'valor_total', 'media': 'valor_medio'}
+            for nivel, tabela in niveis.items():
+                tabela = tabela.drop(columns='soma_quadrados').rename(columns=colunas)
+                tabela['quantidade'] = tabela['quantidade'].astype(int)
+                niveis[nivel] = tabela
+                resultados[nivel] = tabela.to_dict('records')[0] if nivel == 'empresa' else tabela.to_dict('records')
+            
+            # Corretor de maior VGV de cada equipe e concentração da equipe nele
+            corretores = niveis['corretor']
+            destaques = corretores[corretores['posicao_no_grupo'] == 1].drop_duplicates('equipe')
+            tabela_equipes = niveis['equipe'].merge(
+                destaques[['equipe', 'corretor', 'participacao_no_grupo']].rename(
+                    columns={'corretor': 'corretor_destaque', 'participacao_no_grupo': 'participacao_destaque'}
+                ), on='equipe', how='left'
+            ).merge(corretores.groupby('equipe').size().rename('corretores').reset_index(), on='equipe', how='left')
+            resultados['equipe'] = tabela_equipes.to_dict('records')
+            
+            # Gerar insights sobre as equipes
+            self._aplicar_regras('equipes', tabela_equipes)
+            
+            # Enviar gráfico por equipe para renderização
+            ordem_equipes = niveis['equipe'].sort_values('posicao')
+            self._adicionar_figura({
+                'arquivo': os.path.join(self.output_dir, 'hierarquia_equipes.png'),
+                'tamanho': (12, 10),
+                'paineis': [
+                    {'tipo': 'barras', 'categorias': ordem_equipes['equipe'].tolist(),
+                     'valores': ordem_equipes['valor_total'].tolist(),
+                     'titulo': 'VGV por Equipe', 'xlabel': 'Equipe', 'ylabel': 'Valor Total (R$)'},
+                    {'tipo': 'barras', 'categorias': (corretores['corretor'] + ' (' + corretores['equipe'] + ')').tolist(),
+                     'valores': corretores['participacao_no_grupo'].tolist(),
+                     'titulo': 'Participação de Cada Corretor no VGV da Equipe', 'xlabel': 'Corretor (equipe)',
+                     'ylabel': 'Participação', 'rotacao_x': 45}
+                ]
+            }, 'Desempenho por Equipe', 'VGV por equipe e participação de cada corretor no VGV da sua equipe')
+            
+            logger.info(f"Análise por equipe concluída ({len(niveis['equipe'])} equipes, {len(corretores)} corretores)")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao analisar hierarquia de equipes: {str(e)}")
+            return {}
+    
+    def _intervalos_corretores(self, df, max_workers=None):
+        """
+        Reamostra (bootstrap de Poisson) o VGV de todos os corretores de uma vez e deriva
+        intervalos de 95% do VGV e da posição no ranking e a confiança do alto desempenho.
+        
+        Args:
+            df (pandas.DataFrame): Vendas com 'corretor' e 'valor_venda'
+            max_workers (int): Threads do bootstrap (None ou 1 = sequencial)
+        
+        Returns:
+            pandas.DataFrame: Uma linha por corretor com intervalos e confiança
+        """
+        codigos, corretores = pd.factorize(df['corretor'], sort=True)
+        validos = codigos >= 0
+        somas = intervalos.reamostrar_somas(
+            codigos[validos], df['valor_venda'].to_numpy(dtype=float)[validos], len(corretores),
+            max_workers=max_workers
+        )
+        
+        # Em cada reamostragem: limite de alto desempenho (Q3 + 1,5 IQR) e posição de cada corretor
+        q1, q3 = np.quantile(somas, [0.25, 0.75], axis=1)
+        limite = q3 + 1.5 * (q3 - q1)
+        probabilidade_alto = (somas > limite[:, None]).mean(axis=0)
+        posicoes = (-somas).argsort(axis=1).argsort(axis=1) + 1
+        
+        inferior, superior = intervalos.intervalo_percentil(somas)
+        posicao_inferior, posicao_superior = intervalos.intervalo_percentil(posicoes)
+        return pd.DataFrame({
+            'corretor': corretores,
+            'valor_total_inferior': inferior,
+            'valor_total_superior': superior,
+            'posicao_melhor': posicao_inferior.astype(int),
+            'posicao_pior': posicao_superior.astype(int),
+            'probabilidade_alto_desempenho': probabilidade_alto,
+            'confianca_alto_desempenho': intervalos.rotulo_confianca(probabilidade_alto)
+        })
+    
+    def _intervalos_origens(self, conversao_por_origem):
+        """
+        Acrescenta intervalos de Wilson às taxas de conversão por origem e estima, por
+        bootstrap binomial de todas as origens de uma vez, a confiança das classificações
+        de conversão alta (> 1,5x a média), baixa (< 0,5x) e abaixo da média (< 0,8x).
+        
+        Args:
+            conversao_por_origem (pandas.DataFrame): Taxa, quantidade e convertidos por origem
+        
+        Returns:
+            pandas.DataFrame: Tabela com intervalos e rótulos de confiança
+        """
+        convertidos = conversao_por_origem['convertidos'].to_numpy(dtype=float)
+        quantidade = conversao_por_origem['quantidade'].to_numpy()
+        inferior, superior = intervalos.intervalo_wilson(convertidos, quantidade)
+        
+        amostras = intervalos.reamostrar_proporcoes(convertidos, quantidade)
+        media = np.nanmean(amostras, axis=1, keepdims=True)
+        return conversao_por_origem.assign(
+            intervalo_inferior=inferior,
+            intervalo_superior=superior,
+            confianca_alta_conversao=intervalos.rotulo_confianca((amostras > 1.5 * media).mean(axis=0)),
+            confianca_baixa_conversao=intervalos.rotulo_confianca((amostras < 0.5 * media).mean(axis=0)),
+            confianca_abaixo_media=intervalos.rotulo_confianca((amostras < 0.8 * media).mean(axis=0))
+        )
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('ganhos'))
+    def analisar_fluxo_comissoes(self, horizonte_dias=fluxo_comissoes.HORIZONTE_DIAS):
+        """
+        Projeta, dia a dia, as comissões pendentes e em processamento a pagar, no total,
+        por equipe e por corretor, com as faixas de atraso das comissões vencidas.
+        
+        O calendário (fluxo_comissoes.CalendarioComissoes) é salvo em
+        output/modelos/fluxo_comissoes.json com os registros em aberto incorporados; cada
+        execução aplica apenas os registros novos, alterados (status, data ou valor) ou
+        removidos desde a anterior. O calendário fica em self.calendario_comissoes.
+        
+        Args:
+            horizonte_dias (int): Dias projetados a partir de hoje
+        
+        Returns:
+            dict: Resumo do total, por equipe e por corretor e projeção diária
+        """
+        if 'ganhos' not in self.dataframes or self.dataframes['ganhos'] is None:
+            logger.error("DataFrame de ganhos não disponível para fluxo de comissões")
+            return {}
+        
+        try:
+            df = self.dataframes['ganhos']
+            resultados = {}
+            
+            if not {'data_pagamento', 'status_pagamento', 'valor_comissao', 'corretor'} <= set(df.columns) or df.empty:
+                logger.warning("Colunas necessárias não encontradas para fluxo de comissões")
+                return resultados
+            
+            if 'equipe' not in df.columns:
+                df = df.assign(equipe=hierarquia.SEM_EQUIPE)
+            calendario = fluxo_comissoes.CalendarioComissoes(os.path.join(self.output_dir, 'modelos', 'fluxo_comissoes.json'))
+            calendario.sincronizar(df)
+            calendario.salvar()
+            self.calendario_comissoes = calendario
+            
+            referencia = pd.Timestamp(datetime.now()).normalize()
+            horizontes = (7, 30, horizonte_dias)
+            total = calendario.resumo(referencia, horizontes=horizontes)
+            if total.empty:
+                logger.warning("Sem comissões em aberto para o fluxo de comissões")
+                return resultados
+            por_equipe = calendario.resumo(referencia, 'equipe', horizontes).sort_values('total_aberto', ascending=False)
+            por_corretor = calendario.resumo(referencia, 'corretor', horizontes).sort_values('total_aberto', ascending=False)
+            projecao = calendario.calendario(referencia, horizonte_dias, 'equipe')
+            
+            resultados['referencia'] = referencia.strftime('%Y-%m-%d')
+            resultados['atualizacao'] = {
+                'modo': calendario.modo,
+                'registros_adicionados': calendario.registros_adicionados,
+                'registros_removidos': calendario.registros_removidos
+            }
+            resultados['total'] = total.drop(columns='grupo').to_dict('records')[0]
+            resultados['por_equipe'] = por_equipe.to_dict('records')
+            resultados['por_corretor'] = por_corretor.to_dict('records')
+            resultados['calendario'] = [
+                {'data': data.strftime('%Y-%m-%d'), 'valor': round(float(linha.sum()), 2), 'por_equipe': linha[linha > 0].to_dict()}
+                for data, linha in projecao.iterrows()
+            ]
+            
+            # Gerar insights sobre corretores com comissões muito atrasadas
+            self._aplicar_regras('fluxo_comissoes_corretores', por_corretor)
+            
+            # Enviar gráfico da projeção e das faixas de atraso para renderização
+            acumulado = projecao.cumsum()
+            faixas = list(fluxo_comissoes.FAIXAS_ATRASO)
+            self._adicionar_figura({
+                'arquivo': os.path.join(self.output_dir, 'fluxo_comissoes.png'),
+                'tamanho': (12, 10),
+                'paineis': [
+                    {'tipo': 'linhas', 'x': projecao.index.tolist(),
+                     'series': [{'y': acumulado[equipe].tolist(), 'rotulo': str(equipe)} for equipe in acumulado.columns]
+                     + [{'y': acumulado.sum(axis=1).tolist(), 'rotulo': 'Total', 'estilo': 'k--'}],
+                     'titulo': f'Comissões a Pagar Acumuladas nos Próximos {horizonte_dias} Dias', 'xlabel': 'Data', 'ylabel': 'Valor (R$)'},
+                    {'tipo': 'barras', 'categorias': faixas, 'valores': [resultados['total'][faixa] for faixa in faixas],
+                     'titulo': 'Comissões em Aberto por Faixa de Atraso', 'xlabel': 'Faixa', 'ylabel': 'Valor (R$)', 'rotacao_x': 30}
+                ]
+            }, 'Fluxo de Comissões', 'Projeção acumulada das comissões a pagar por equipe e comissões em aberto por faixa de atraso')
+            
+            logger.info("Análise de fluxo de comissões concluída")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao analisar fluxo de comissões: {str(e)}")
+            return {}
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('leads'))
     def analisar_conversao_leads(self):
         """
         Analisa a conversão de leads.
@@ -308,79 +1067,45 @@ class DataAnalyzer:
             # Análise por origem
             if 'origem' in df.columns:
                 conversao_por_origem = df.groupby('origem').agg({
-                    'convertido': ['mean', 'count']
+                    'convertido': ['mean', 'count', 'sum']
                 }).reset_index()
                 
-                conversao_por_origem.columns = ['origem', 'taxa_conversao', 'quantidade']
+                conversao_por_origem.columns = ['origem', 'taxa_conversao', 'quantidade', 'convertidos']
                 
                 # Ordenar por taxa de conversão
                 conversao_por_origem = conversao_por_origem.sort_values('taxa_conversao', ascending=False)
                 
+                # Intervalos de Wilson e confiança das classificações por bootstrap
+                conversao_por_origem = self._intervalos_origens(conversao_por_origem)
                 resultados['conversao_por_origem'] = conversao_por_origem.to_dict('records')
                 
-                # Identificar origens de alta conversão
+                # Identificar origens de alta e baixa conversão
                 media_conversao = conversao_por_origem['taxa_conversao'].mean()
                 alta_conversao = conversao_por_origem[conversao_por_origem['taxa_conversao'] > media_conversao * 1.5]
+                baixa_conversao = conversao_por_origem[conversao_por_origem['taxa_conversao'] < media_conversao * 0.5]
                 
                 if not alta_conversao.empty:
                     resultados['origens_alta_conversao'] = alta_conversao.to_dict('records')
-                    
-                    # Adicionar insight sobre origens de alta conversão
-                    self.insights.append({
-                        'categoria': 'conversao_leads',
-                        'descricao': f'Identificadas {len(alta_conversao)} origens de leads com taxa de conversão significativamente acima da média.',
-                        'impacto': 'alto',
-                        'confianca': 'alta'
-                    })
-                    
-                    # Adicionar recomendação
-                    self.recomendacoes.append({
-                        'categoria': 'conversao_leads',
-                        'descricao': 'Aumentar investimento nas origens de leads com maior taxa de conversão para maximizar o retorno.',
-                        'prioridade': 'alta'
-                    })
-                
-                # Identificar origens de baixa conversão
-                baixa_conversao = conversao_por_origem[conversao_por_origem['taxa_conversao'] < media_conversao * 0.5]
-                
                 if not baixa_conversao.empty:
                     resultados['origens_baixa_conversao'] = baixa_conversao.to_dict('records')
-                    
-                    # Adicionar insight sobre origens de baixa conversão
-                    self.insights.append({
-                        'categoria': 'conversao_leads',
-                        'descricao': f'Identificadas {len(baixa_conversao)} origens de leads com taxa de conversão significativamente abaixo da média.',
-                        'impacto': 'médio',
-                        'confianca': 'alta'
-                    })
-                    
-                    # Adicionar recomendação
-                    self.recomendacoes.append({
-                        'categoria': 'conversao_leads',
-                        'descricao': 'Revisar e otimizar estratégias para origens de leads com baixa conversão.',
-                        'prioridade': 'média'
-                    })
-            
-            # Criar gráfico de conversão
-            plt.figure(figsize=(10, 6))
-            sns.barplot(x='origem', y='taxa_conversao', data=conversao_por_origem)
-            plt.title('Taxa de Conversão por Origem de Lead')
-            plt.xlabel('Origem')
-            plt.ylabel('Taxa de Conversão')
-            plt.xticks(rotation=45)
-            plt.grid(True, alpha=0.3)
-            
-            # Salvar figura
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'output')
-            figura_path = os.path.join(output_dir, 'conversao_leads.png')
-            plt.savefig(figura_path)
-            plt.close()
-            
-            self.figuras.append({
-                'titulo': 'Conversão de Leads',
-                'descricao': 'Análise da taxa de conversão por origem de leads',
-                'arquivo': figura_path
-            })
+                
+                # Gerar insights sobre as origens
+                self._aplicar_regras('origens', conversao_por_origem.assign(
+                    media_taxa=media_conversao,
+                    media_quantidade=conversao_por_origem['quantidade'].mean()
+                ))
+            
+            # Enviar gráfico de conversão para renderização
+            self._adicionar_figura({
+                'arquivo': os.path.join(self.output_dir, 'conversao_leads.png'),
+                'tamanho': (10, 6),
+                'paineis': [
+                    {'tipo': 'barras', 'categorias': conversao_por_origem['origem'].tolist(),
+                     'valores': conversao_por_origem['taxa_conversao'].tolist(),
+                     'titulo': 'Taxa de Conversão por Origem de Lead', 'xlabel': 'Origem',
+                     'ylabel': 'Taxa de Conversão', 'rotacao_x': 45}
+                ]
+            }, 'Conversão de Leads', 'Análise da taxa de conversão por origem de leads')
             
             logger.info("Análise de conversão de leads concluída")
             return resultados
@@ -388,6 +1113,567 @@ class DataAnalyzer:
             logger.error(f"Erro ao analisar conversão de leads: {str(e)}")
             return {}
 
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('leads'))
+    def analisar_funil_leads(self):
+        """
+        Analisa o funil de leads (captado → contatado → em negociação → convertido) no
+        total, por origem e por corretor responsável.
+        
+        As contagens vêm de um único bincount sobre os códigos de origem, corretor e
+        status (ver funil.FunilLeads).
+        
+        Returns:
+            dict: Etapas do funil total e tabelas por origem e por corretor
+        """
+        if 'leads' not in self.dataframes or self.dataframes['leads'] is None:
+            logger.error("DataFrame de leads não disponível para análise de funil")
+            return {}
+        
+        try:
+            df = self.dataframes['leads']
+            resultados = {}
+            
+            if not {'status', 'origem', 'corretor_responsavel'} <= set(df.columns) or df.empty:
+                logger.warning("Colunas necessárias não encontradas para análise de funil")
+                return resultados
+            
+            contagem = funil.FunilLeads()
+            contagem.adicionar(df)
+            total = contagem.tabela()
+            por_origem = contagem.tabela('origem').sort_values('captado', ascending=False)
+            por_corretor = contagem.tabela('corretor_responsavel').sort_values('captado', ascending=False)
+            
+            transicoes = [c for c in total.columns if c.startswith('conversao_')]
+            geral = total.iloc[0]
+            resultados['etapas'] = [
+                {'etapa': etapa, 'leads': int(geral[coluna]),
+                 'conversao_proxima': float(geral[transicao]) if transicao else None,
+                 'perda': float(1 - geral[transicao]) if transicao else None}
+                for etapa, coluna, transicao in zip(
+                    funil.ETAPAS, ('captado', 'contatado', 'em_negociacao', 'convertido'), transicoes + [None]
+                )
+            ]
+            resultados['descartados'] = int(geral['descartados'])
+            resultados['etapa_maior_perda'] = geral['etapa_maior_perda']
+            resultados['por_origem'] = por_origem.replace({np.nan: None}).to_dict('records')
+            resultados['por_corretor'] = por_corretor.rename(columns={'corretor_responsavel': 'corretor'}).replace({np.nan: None}).to_dict('records')
+            
+            # Gerar insights comparando cada origem e corretor com o funil geral
+            referencias = {f'{c}_geral': geral[c] for c in transicoes}
+            self._aplicar_regras('funil_origens', por_origem.assign(**referencias))
+            self._aplicar_regras('funil_corretores', por_corretor.rename(columns={'corretor_responsavel': 'corretor'}).assign(**referencias))
+            
+            # Enviar gráfico do funil para renderização
+            rotulos_transicoes = ['Captado → Contatado', 'Contatado → Negociação', 'Negociação → Convertido']
+            self._adicionar_figura({
+                'arquivo': os.path.join(self.output_dir, 'funil_leads.png'),
+                'tamanho': (12, 10),
+                'paineis': [
+                    {'tipo': 'barras', 'categorias': list(funil.ETAPAS),
+                     'valores': [etapa['leads'] for etapa in resultados['etapas']],
+                     'titulo': 'Funil de Leads', 'xlabel': 'Etapa', 'ylabel': 'Leads'},
+                    {'tipo': 'mapa_calor', 'matriz': por_origem[transicoes].replace({np.nan: None}).values.tolist(),
+                     'rotulos_x': rotulos_transicoes, 'rotulos_y': por_origem['origem'].tolist(),
+                     'percentual': True, 'rotulo_cor': 'Conversão da etapa',
+                     'titulo': 'Conversão entre Etapas por Origem', 'xlabel': 'Transição', 'ylabel': 'Origem'}
+                ]
+            }, 'Funil de Leads', 'Leads em cada etapa do funil e conversão entre etapas por origem')
+            
+            logger.info("Análise de funil de leads concluída")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao analisar funil de leads: {str(e)}")
+            return {}
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('leads'))
+    def analisar_contatos_unicos(self):
+        """
+        Estima os leads e clientes distintos no total, por origem, por equipe e por mês.
+        
+        As contagens vêm de esboços HyperLogLog salvos em output/modelos/contatos_unicos.json,
+        que acumulam as bases processadas em execuções anteriores; clientes são
+        identificados pelo contato normalizado (e-mail ou telefone).
+        
+        Returns:
+            dict: Leads e clientes únicos e leads por cliente em cada nível de agregação
+        """
+        if 'leads' not in self.dataframes or self.dataframes['leads'] is None:
+            logger.error("DataFrame de leads não disponível para contagem de contatos únicos")
+            return {}
+        
+        try:
+            df = self.dataframes['leads']
+            resultados = {}
+            
+            if not {'contato', 'origem', 'data_captacao', 'tipo_interesse', 'corretor_responsavel'} <= set(df.columns) or df.empty:
+                logger.warning("Colunas necessárias não encontradas para contagem de contatos únicos")
+                return resultados
+            
+            # A equipe do lead é a equipe do corretor responsável nos dados de ganhos
+            equipes = hierarquia.mapear_equipes(self.dataframes.get('ganhos'))
+            leads = df[['contato', 'origem', 'data_captacao', 'tipo_interesse']].assign(
+                equipe=df['corretor_responsavel'].map(equipes).fillna(hierarquia.SEM_EQUIPE),
+                mes=df['data_captacao'].dt.strftime('%Y-%m')
+            )
+            
+            contagem = contatos_unicos.ContatosUnicos(os.path.join(self.output_dir, 'modelos', 'contatos_unicos.json'))
+            contagem.adicionar(leads)
+            contagem.salvar()
+            
+            total = contagem.tabela().iloc[0]
+            por_origem = contagem.tabela(('origem',)).sort_values('leads_unicos', ascending=False)
+            por_equipe = contagem.tabela(('equipe',)).sort_values('leads_unicos', ascending=False)
+            por_mes = contagem.tabela(('mes',)).sort_values('mes')
+            
+            resultados['total'] = {
+                'leads_unicos': int(total['leads_unicos']),
+                'clientes_unicos': int(total['clientes_unicos']),
+                'leads_por_cliente': None if np.isnan(total['leads_por_cliente']) else float(total['leads_por_cliente']),
+                'leads_sem_contato': contagem.sem_contato
+            }
+            # Grupos sem nenhum contato não têm leads por cliente (NaN não é JSON válido)
+            resultados['por_origem'] = por_origem.replace({np.nan: None}).to_dict('records')
+            resultados['por_equipe'] = por_equipe.replace({np.nan: None}).to_dict('records')
+            resultados['por_mes'] = por_mes.replace({np.nan: None}).to_dict('records')
+            
+            # Gerar insights sobre origens que trazem o mesmo cliente repetidas vezes
+            # (comparadas à mediana das origens: no total, clientes de várias origens também se repetem)
+            self._aplicar_regras('contatos_origens', por_origem.assign(
+                leads_por_cliente_mediano=por_origem['leads_por_cliente'].median()
+            ))
+            
+            # Enviar gráfico de leads e clientes únicos para renderização
+            self._adicionar_figura({
+                'arquivo': os.path.join(self.output_dir, 'contatos_unicos.png'),
+                'tamanho': (12, 10),
+                'paineis': [
+                    {'tipo': 'linhas', 'x': por_origem['origem'].tolist(),
+                     'series': [{'y': por_origem['leads_unicos'].tolist(), 'rotulo': 'Leads únicos', 'estilo': 'o'},
+                                {'y': por_origem['clientes_unicos'].tolist(), 'rotulo': 'Clientes únicos', 'estilo': 's'}],
+                     'titulo': 'Leads e Clientes Únicos por Origem', 'xlabel': 'Origem', 'ylabel': 'Quantidade'},
+                    {'tipo': 'linhas', 'x': pd.to_datetime(por_mes['mes']).tolist(),
+                     'series': [{'y': por_mes['leads_unicos'].tolist(), 'rotulo': 'Leads únicos', 'estilo': 'o-'},
+                                {'y': por_mes['clientes_unicos'].tolist(), 'rotulo': 'Clientes únicos', 'estilo': 's-'}],
+                     'titulo': 'Leads e Clientes Únicos por Mês', 'xlabel': 'Mês', 'ylabel': 'Quantidade'}
+                ]
+            }, 'Contatos Únicos', 'Leads e clientes distintos estimados por origem e por mês de captação')
+            
+            logger.info(f"Contagem de contatos únicos concluída ({contagem.leads_processados} leads processados)")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao contar contatos únicos: {str(e)}")
+            return {}
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('leads'))
+    def analisar_tempo_conversao(self):
+        """
+        Analisa a distribuição do tempo entre a captação e a conversão dos leads, no
+        total, por origem e por corretor responsável.
+        
+        Os percentis e histogramas vêm de esboços de baldes fixos salvos em
+        output/modelos/tempo_conversao.json; cada execução processa, em lotes, apenas
+        os leads convertidos desde a execução anterior.
+        
+        Returns:
+            dict: Percentis (em dias) e histogramas do total, por origem e por corretor
+        """
+        if 'leads' not in self.dataframes or self.dataframes['leads'] is None:
+            logger.error("DataFrame de leads não disponível para análise de tempo até a conversão")
+            return {}
+        
+        try:
+            df = self.dataframes['leads']
+            resultados = {}
+            
+            if not {'data_captacao', 'data_conversao', 'convertido', 'origem', 'corretor_responsavel'} <= set(df.columns) or df.empty:
+                logger.warning("Colunas necessárias não encontradas para análise de tempo até a conversão")
+                return resultados
+            
+            tempos = tempo_conversao.TemposConversao(os.path.join(self.output_dir, 'modelos', 'tempo_conversao.json'))
+            tempos.atualizar(df)
+            tempos.salvar()
+            
+            total = tempos.resumo()
+            if total.empty:
+                logger.warning("Sem leads convertidos para análise de tempo até a conversão")
+                return resultados
+            por_origem = tempos.resumo('origem').sort_values('conversoes', ascending=False)
+            por_corretor = tempos.resumo('corretor_responsavel').rename(columns={'corretor_responsavel': 'corretor'}).sort_values('conversoes', ascending=False)
+            
+            geral = total.drop(columns='grupo').iloc[0].to_dict()
+            resultados['total'] = geral
+            resultados['por_origem'] = por_origem.to_dict('records')
+            resultados['por_corretor'] = por_corretor.to_dict('records')
+            resultados['esbocos'] = {'modo': tempos.modo, 'leads_incorporados': tempos.leads_incorporados}
+            
+            # Gerar insights sobre origens de conversão lenta
+            self._aplicar_regras('tempo_conversao_origens', por_origem.assign(
+                mediana_geral=geral['mediana_dias'], p90_geral=geral['p90_dias']
+            ))
+            
+            # Enviar gráfico da distribuição para renderização
+            self._adicionar_figura({
+                'arquivo': os.path.join(self.output_dir, 'tempo_conversao.png'),
+                'tamanho': (12, 10),
+                'paineis': [
+                    {'tipo': 'barras', 'categorias': list(geral['histograma']),
+                     'valores': list(geral['histograma'].values()),
+                     'titulo': 'Dias entre Captação e Conversão', 'xlabel': 'Dias', 'ylabel': 'Conversões'},
+                    {'tipo': 'linhas', 'x': por_origem['origem'].tolist(),
+                     'series': [{'y': por_origem['mediana_dias'].tolist(), 'rotulo': 'Mediana', 'estilo': 'o'},
+                                {'y': por_origem['p90_dias'].tolist(), 'rotulo': 'Percentil 90', 'estilo': 's'}],
+                     'titulo': 'Tempo até a Conversão por Origem', 'xlabel': 'Origem', 'ylabel': 'Dias'}
+                ]
+            }, 'Tempo até a Conversão', 'Distribuição dos dias entre a captação e a conversão dos leads e percentis por origem')
+            
+            logger.info(f"Análise de tempo até a conversão concluída ({tempos.modo}, {tempos.leads_incorporados} leads incorporados)")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao analisar tempo até a conversão: {str(e)}")
+            return {}
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('leads'))
+    def analisar_coortes_leads(self, max_periodos=12, periodo_referencia=4, coortes_grafico=26):
+        """
+        Analisa a conversão dos leads por coorte semanal de captação.
+        
+        A matriz (coortes x semanas desde a captação) é montada por coortes.calcular_coortes
+        com índices inteiros e bincount; a conversão acumulada das coortes recentes é
+        comparada com a média ponderada das coortes anteriores.
+        
+        Args:
+            max_periodos (int): Semanas acompanhadas após a captação
+            periodo_referencia (int): Semanas usadas na comparação entre coortes
+            coortes_grafico (int): Coortes mais recentes exibidas no mapa de calor
+        
+        Returns:
+            dict: Coortes, curva média de conversão acumulada e coortes recentes
+        """
+        if 'leads' not in self.dataframes or self.dataframes['leads'] is None:
+            logger.error("DataFrame de leads não disponível para análise de coortes")
+            return {}
+        
+        try:
+            df = self.dataframes['leads']
+            resultados = {}
+            
+            if not {'data_captacao', 'convertido', 'data_conversao'} <= set(df.columns) or df.empty:
+                logger.warning("Colunas necessárias não encontradas para análise de coortes")
+                return resultados
+            
+            # Datas de conversão apenas dos leads convertidos
+            conversao = df['data_conversao'].where(df['convertido'].fillna(False).astype(bool))
+            matriz = coortes.calcular_coortes(df['data_captacao'], conversao, max_periodos=max_periodos)
+            taxa = matriz['taxa_acumulada']
+            media = coortes.curva_media(matriz)
+            inicios = matriz['inicios'].strftime('%Y-%m-%d')
+            
+            def lista(valores):
+                return [None if np.isnan(v) else float(v) for v in valores]
+            
+            resultados['periodo_dias'] = 7
+            resultados['coortes'] = [
+                {'inicio': inicio, 'leads': int(tamanho), 'taxa_acumulada': lista(linha)}
+                for inicio, tamanho, linha in zip(inicios, matriz['tamanhos'], taxa)
+            ]
+            resultados['curva_media'] = lista(media)
+            
+            # Coortes recentes que já completaram o período de referência
+            coluna = periodo_referencia - 1
+            completas = np.flatnonzero(~np.isnan(taxa[:, coluna]))
+            if len(completas) > 1:
+                recentes = completas[-4:]
+                anteriores = completas[:-4] if len(completas) > 4 else completas
+                pesos = matriz['tamanhos'][anteriores]
+                media_referencia = float(np.average(taxa[anteriores, coluna], weights=pesos)) if pesos.sum() else float('nan')
+                tabela = pd.DataFrame({
+                    'inicio': inicios[recentes],
+                    'leads': matriz['tamanhos'][recentes],
+                    'taxa': taxa[recentes, coluna],
+                    'media': media_referencia,
+                    'semanas': periodo_referencia
+                })
+                resultados['coortes_recentes'] = tabela.to_dict('records')
+                
+                # Gerar insights sobre as coortes recentes
+                self._aplicar_regras('coortes', tabela)
+            
+            # Enviar mapa de calor das coortes mais recentes para renderização
+            if len(taxa):
+                ultimas = slice(max(0, len(taxa) - coortes_grafico), len(taxa))
+                self._adicionar_figura({
+                    'arquivo': os.path.join(self.output_dir, 'coortes_leads.png'),
+                    'tamanho': (12, 8),
+                    'paineis': [
+                        {'tipo': 'mapa_calor', 'matriz': [lista(linha) for linha in taxa[ultimas]],
+                         'rotulos_x': [f'S{k + 1}' for k in range(max_periodos)],
+                         'rotulos_y': list(inicios[ultimas]), 'percentual': True,
+                         'rotulo_cor': 'Conversão acumulada',
+                         'titulo': 'Conversão Acumulada por Coorte Semanal de Captação',
+                         'xlabel': 'Semanas desde a captação', 'ylabel': 'Coorte (início da semana)'}
+                    ]
+                }, 'Coortes de Leads', 'Conversão acumulada dos leads por semana de captação e semanas decorridas')
+            
+            logger.info(f"Análise de coortes de leads concluída ({len(taxa)} coortes)")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao analisar coortes de leads: {str(e)}")
+            return {}
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('leads'))
+    def pontuar_leads(self, limite_por_corretor=10):
+        """
+        Atualiza o modelo de pontuação com os leads rotulados ainda não incorporados e
+        pontua os leads em aberto, gerando a lista de prioridades de cada corretor.
+        
+        O estado do modelo fica em output/modelos/pontuacao_leads.json e, entre
+        execuções, apenas os leads rotulados que ainda não foram usados no treino
+        (reconhecidos pelo hash) atualizam o modelo.
+        
+        Args:
+            limite_por_corretor (int): Leads listados por corretor
+        
+        Returns:
+            dict: Prioridades por corretor, resumo por corretor e informações do modelo
+        """
+        if 'leads' not in self.dataframes or self.dataframes['leads'] is None:
+            logger.error("DataFrame de leads não disponível para pontuação")
+            return {}
+        
+        try:
+            df = self.dataframes['leads']
+            resultados = {}
+            
+            if not {'data_captacao', 'convertido', 'corretor_responsavel'} <= set(df.columns) or df.empty:
+                logger.warning("Colunas necessárias não encontradas para pontuação de leads")
+                return resultados
+            
+            modelo = pontuacao_leads.ModeloPontuacaoLeads(os.path.join(self.output_dir, 'modelos', 'pontuacao_leads.json'))
+            abertos = modelo.atualizar(df)
+            if not modelo.treinado:
+                logger.warning("Sem leads com desfecho conhecido para treinar o modelo de pontuação")
+                return resultados
+            modelo.salvar()
+            
+            # Pontuar todos os leads em aberto em lotes
+            df_abertos = df[abertos]
+            probabilidade = modelo.pontuar(df_abertos)
+            valor = df_abertos['valor_estimado'].clip(lower=0).fillna(0) if 'valor_estimado' in df_abertos.columns else 0.0
+            pontuados = df_abertos.assign(probabilidade=probabilidade, valor_esperado=probabilidade * valor)
+            
+            # Lista de prioridades por corretor (maior valor esperado primeiro)
+            pontuados = pontuados.sort_values(['corretor_responsavel', 'valor_esperado'], ascending=[True, False])
+            colunas = [c for c in ('data_captacao', 'origem', 'tipo_interesse', 'valor_estimado', 'status', 'probabilidade', 'valor_esperado') if c in pontuados.columns]
+            prioridades = pontuados.groupby('corretor_responsavel', sort=False).head(limite_por_corretor)
+            resultados['prioridades_por_corretor'] = {
+                str(corretor): grupo[colunas].assign(data_captacao=grupo['data_captacao'].dt.strftime('%Y-%m-%d')).to_dict('records')
+                for corretor, grupo in prioridades.groupby('corretor_responsavel', sort=False)
+            }
+            
+            resumo = pontuados.groupby('corretor_responsavel').agg(
+                leads_abertos=('probabilidade', 'size'),
+                leads_quentes=('probabilidade', lambda p: int((p >= pontuacao_leads.PROBABILIDADE_QUENTE).sum())),
+                probabilidade_media=('probabilidade', 'mean'),
+                valor_esperado_total=('valor_esperado', 'sum')
+            ).reset_index().rename(columns={'corretor_responsavel': 'corretor'})
+            resultados['resumo_corretores'] = resumo.to_dict('records')
+            
+            resultados['modelo'] = {
+                'tipo': 'Regressão logística incremental (SGD) com atributos por hashing',
+                'leads_incorporados': modelo.leads_incorporados,
+                'leads_treinados': modelo.estado['leads_treinados'],
+                'auc_progressiva': modelo.auc_progressiva,
+                'leads_abertos': int(abertos.sum())
+            }
+            
+            # Gerar insights sobre os leads em aberto de cada corretor
+            self._aplicar_regras('pontuacao_leads', resumo)
+            
+            logger.info(f"Pontuação de leads concluída ({int(abertos.sum())} leads em aberto, {modelo.leads_incorporados} incorporados ao modelo)")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao pontuar leads: {str(e)}")
+            return {}
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('leads'))
+    def simular_cenarios(self, simulacoes=simulacao.SIMULACOES, horizonte_dias=simulacao.HORIZONTE_DIAS):
+        """
+        Simula (Monte Carlo) o VGV e as comissões dos próximos dias no cenário atual e
+        nos cenários hipotéticos de simulacao.CENARIOS_PADRAO.
+        
+        As taxas de conversão e volumes de leads por origem e os tickets das vendas vêm
+        dos dados limpos; as simulações são divididas entre processos com sementes
+        reprodutíveis (ver simulacao.simular_cenarios).
+        
+        Args:
+            simulacoes (int): Simulações por cenário
+            horizonte_dias (int): Dias simulados
+        
+        Returns:
+            dict: Parâmetros estimados e faixas de percentis de cada cenário
+        """
+        if any(self.dataframes.get(tipo) is None for tipo in ('producao', 'leads')):
+            logger.error("DataFrames de produção e leads não disponíveis para simulação de cenários")
+            return {}
+        
+        try:
+            df_producao, df_leads = self.dataframes['producao'], self.dataframes['leads']
+            resultados = {}
+            
+            if (not {'valor_venda', 'tipo_imovel'} <= set(df_producao.columns)
+                    or not {'origem', 'convertido', 'data_captacao'} <= set(df_leads.columns)
+                    or df_producao.empty or df_leads.empty):
+                logger.warning("Colunas necessárias não encontradas para simulação de cenários")
+                return resultados
+            
+            parametros = simulacao.estimar_parametros(df_leads, df_producao)
+            simulados = simulacao.simular_cenarios(parametros, simulacoes=simulacoes, horizonte_dias=horizonte_dias)
+            
+            resultados['parametros'] = {
+                'simulacoes': simulacoes,
+                'horizonte_dias': horizonte_dias,
+                'semente': simulacao.SEMENTE,
+                'origens': [
+                    {'origem': origem, 'leads_por_dia': float(volume), 'taxa_conversao': float(convertidos / max(leads, 1))}
+                    for origem, volume, convertidos, leads in zip(
+                        parametros['origens'], parametros['leads_por_dia'], parametros['convertidos'], parametros['leads']
+                    )
+                ],
+                'vendas_base': len(parametros['tickets']),
+                'corretores': parametros['corretores']
+            }
+            base = simulacao.CENARIOS_PADRAO[0]['nome']
+            resultados['cenarios'] = [
+                dict({'nome': cenario['nome'], 'descricao': cenario['descricao']}, **simulacao.faixas_percentis(
+                    simulados[cenario['nome']], referencia=simulados[base] if cenario['nome'] != base else None
+                ))
+                for cenario in simulacao.CENARIOS_PADRAO
+            ]
+            
+            # Enviar gráfico das faixas de percentis para renderização
+            nomes = [cenario['descricao'] for cenario in resultados['cenarios']]
+            paineis = []
+            for medida, titulo in (('vgv', 'VGV'), ('comissao', 'Comissões')):
+                paineis.append({
+                    'tipo': 'linhas', 'x': nomes,
+                    'series': [{'y': [c[medida][f'p{p}'] for c in resultados['cenarios']], 'rotulo': f'Percentil {p}', 'estilo': estilo}
+                               for p, estilo in ((5, 'v--'), (50, 'o-'), (95, '^--'))],
+                    'titulo': f'{titulo} Simulado nos Próximos {horizonte_dias} Dias', 'xlabel': 'Cenário', 'ylabel': 'Valor (R$)'
+                })
+            self._adicionar_figura({
+                'arquivo': os.path.join(self.output_dir, 'simulacao_cenarios.png'),
+                'tamanho': (12, 10),
+                'paineis': paineis
+            }, 'Simulação de Cenários', f'Percentis 5, 50 e 95 do VGV e das comissões simulados em {simulacoes} cenários por hipótese')
+            
+            logger.info(f"Simulação de cenários concluída ({len(resultados['cenarios'])} cenários x {simulacoes} simulações)")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao simular cenários: {str(e)}")
+            return {}
+    
+    @instrumentacao.instrumentado(linhas=lambda self: self._contar_linhas('leads'))
+    def detectar_anomalias(self, dias_alerta=14):
+        """
+        Detecta quedas e picos diários de VGV, quantidade de vendas, leads captados
+        (total e por origem) e conversões de leads (pelo dia da conversão), comparando
+        cada dia com a linha de base do mesmo dia da semana.
+        
+        O estado das linhas de base fica em output/modelos/anomalias.json e, entre
+        execuções, apenas os dias novos são processados.
+        
+        Args:
+            dias_alerta (int): Dias recentes cujos alertas são reportados
+        
+        Returns:
+            dict: Alertas recentes e informações do detector
+        """
+        try:
+            detector = anomalias.DetectorAnomalias(os.path.join(self.output_dir, 'modelos', 'anomalias.json'))
+            resultados = {}
+            ultimos_dias = []
+            
+            df = self.dataframes.get('producao')
+            if isinstance(df, pd.DataFrame) and not df.empty and {'data_venda', 'valor_venda'} <= set(df.columns):
+                fim = previsao.ultimo_dia_completo(df['data_venda'])
+                dias, _, vgv, quantidade = tendencias.montar_matriz_diaria(df, 'data_venda', 'valor_venda', fim=fim)
+                if len(dias):
+                    detector.atualizar(dias, ['vgv|total', 'vendas|total'], np.vstack([vgv, quantidade]), [False, True])
+                    ultimos_dias.append(dias[-1])
+            
+            df = self.dataframes.get('leads')
+            if isinstance(df, pd.DataFrame) and not df.empty and 'data_captacao' in df.columns:
+                fim = previsao.ultimo_dia_completo(df['data_captacao'])
+                dias, _, _, captados = tendencias.montar_matriz_diaria(df, 'data_captacao', fim=fim)
+                if len(dias):
+                    chaves, linhas = ['leads|total'], [captados[0]]
+                    if 'origem' in df.columns:
+                        _, origens, _, por_origem = tendencias.montar_matriz_diaria(df, 'data_captacao', None, 'origem', dias[0], fim)
+                        chaves += [f'leads|{origem}' for origem in origens]
+                        linhas += list(por_origem)
+                    detector.atualizar(dias, chaves, np.vstack(linhas), True)
+                    ultimos_dias.append(dias[-1])
+                
+                # Conversões contadas no dia da conversão: a taxa por dia de captação dos dias
+                # recentes ainda não recebeu as conversões tardias e mudaria a cada execução
+                if {'convertido', 'data_conversao'} <= set(df.columns):
+                    convertidos = df[df['convertido'].fillna(False).astype(bool) & df['data_conversao'].notna()]
+                    if not convertidos.empty:
+                        fim_conversao = min(previsao.ultimo_dia_completo(convertidos['data_conversao']), fim)
+                        dias, _, _, conversoes = tendencias.montar_matriz_diaria(convertidos, 'data_conversao', fim=fim_conversao)
+                        if len(dias):
+                            detector.atualizar(dias, ['conversoes|total'], conversoes, True)
+                            ultimos_dias.append(dias[-1])
+            
+            if not ultimos_dias:
+                logger.warning("Dados insuficientes para detecção de anomalias")
+                return resultados
+            
+            detector.salvar()
+            
+            nomes = {'vgv': 'VGV diário', 'vendas': 'Quantidade de vendas', 'leads': 'Leads captados', 'conversoes': 'Conversões de leads'}
+            desde = max(ultimos_dias) - pd.Timedelta(days=dias_alerta - 1)
+            alertas = []
+            for alerta in detector.alertas_recentes(desde):
+                metrica, serie = alerta['serie'].split('|', 1)
+                nome = nomes.get(metrica, metrica) + ('' if serie == 'total' else f' ({serie})')
+                if metrica == 'vgv':
+                    valores = f"R$ {alerta['valor']:,.2f} (esperado: R$ {alerta['esperado']:,.2f})"
+                else:
+                    valores = f"{alerta['valor']:.0f} (esperado: {alerta['esperado']:.1f})"
+                data = pd.Timestamp(alerta['data']).strftime('%d/%m/%Y')
+                alertas.append(dict(
+                    alerta,
+                    metrica=metrica,
+                    severidade='alta' if abs(alerta['z']) >= 2 * detector.limiar else 'média',
+                    descricao=f"{'Queda' if alerta['tipo'] == 'queda' else 'Pico'} em {nome} em {data}: {valores}."
+                ))
+            
+            resultados['alertas'] = alertas
+            resultados['detector'] = {
+                'metodo': 'EWMA por dia da semana',
+                'limiar_z': detector.limiar,
+                'series_monitoradas': len(detector.estado['series']),
+                'dias_incorporados': detector.dias_incorporados,
+                'periodo_alertas_dias': dias_alerta
+            }
+            
+            # Gerar insights sobre os alertas recentes
+            quedas = sum(a['tipo'] == 'queda' for a in alertas)
+            self._aplicar_regras('anomalias', pd.DataFrame([{
+                'alertas': len(alertas),
+                'quedas': quedas,
+                'picos': len(alertas) - quedas,
+                'dias': dias_alerta,
+                'impacto': 'alto' if any(a['severidade'] == 'alta' for a in alertas) else 'médio'
+            }]))
+            
+            logger.info(f"Detecção de anomalias concluída ({len(alertas)} alertas recentes)")
+            return resultados
+        except Exception as e:
+            logger.error(f"Erro ao detectar anomalias: {str(e)}")
+            return {}
+
     def executar_analise_completa(self):
         """
         Executa todas as análises disponíveis.
@@ -398,33 +1684,40 @@ class DataAnalyzer:
         logger.info("Iniciando análise completa dos dados")
         
         # Executar todas as análises
-        resultados_tendencias = self.analisar_tendencias_vendas()
-        resultados_corretores = self.analisar_desempenho_corretores()
-        resultados_leads = self.analisar_conversao_leads()
-        
-        # Consolidar resultados
-        resultados = {
-            'tendencias_vendas': resultados_tendencias,
-            'desempenho_corretores': resultados_corretores,
-            'conversao_leads': resultados_leads,
-            'insights': self.insights,
+        resultados = {}
+        for secao, metodo, _ in self.SECOES_ANALISE:
+            resultados[secao] = getattr(self, metodo)()
+        
+        # Consolidar resultados (insights do mais para o menos relevante)
+        resultados.update({
+            'insights': regras_insights.ordenar(self.insights),
             'recomendacoes': self.recomendacoes,
-            'figuras': self.figuras
-        }
+            'figuras': self.aguardar_figuras()
+        })
         
-        # Salvar resultados em JSON
+        self.salvar_resultados(resultados)
+        return resultados
+    
+    def salvar_resultados(self, resultados):
+        """
+        Salva os resultados consolidados da análise em JSON.
+        
+        Args:
+            resultados (dict): Resultados consolidados da análise
+            
+        Returns:
+            str: Caminho do arquivo JSON gerado ou None em caso de erro
+        """
         try:
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'output')
-            caminho_json = os.path.join(output_dir, 'resultados_analise.json')
+            caminho_json = os.path.join(self.output_dir, 'resultados_analise.json')
             
-            with open(caminho_json, 'w', encoding='utf-8') as f:
-                json.dump(resultados, f, ensure_ascii=False, indent=4)
+            persistencia.salvar_json_atomico(caminho_json, resultados)
             
             logger.info(f"Resultados da análise salvos em: {caminho_json}")
+            return caminho_json
         except Exception as e:
             logger.error(f"Erro ao salvar resultados em JSON: {str(e)}")
-        
-        return resultados
+            return None
 
 
 # Função para uso direto do script
@@ -432,9 +1725,16 @@ def main():
     """
     Função principal para execução direta do script.
     """
+    parser = argparse.ArgumentParser(description='Análise de dados imobiliários')
+    perfilador.adicionar_argumentos(parser)
+    config_logging.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    
     # Diretório base do projeto
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     data_dir = os.path.join(base_dir, 'data')
+    config_logging.configurar_por_argumentos(args, os.path.join(base_dir, 'output'))
+    perfil = perfilador.iniciar(args, os.path.join(base_dir, 'output'))
     
     # Carregar dados processados
     with open(os.path.join(base_dir, 'output', 'metricas_processadas.json'), 'r', encoding='utf-8') as f:
@@ -450,6 +1750,10 @@ def main():
         print("Análise de dados concluída com sucesso!")
     else:
         print("Falha na análise de dados.")
+    
+    caminho_perfil = perfilador.finalizar(perfil)
+    if caminho_perfil:
+        print(f"Resumo do perfil: {caminho_perfil}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
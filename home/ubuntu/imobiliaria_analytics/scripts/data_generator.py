@@ -7,20 +7,14 @@ Este script gera dados simulados para testar o sistema de análise imobiliária
 """
 
 import os
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
 
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'output', 'geracao_dados.log')),
-        logging.StreamHandler()
-    ]
-)
+import config_logging
+
 logger = logging.getLogger('data_generator')
 
 class DataGenerator:
@@ -51,7 +45,7 @@ class DataGenerator:
         """
         try:
             # Definir dados base
-            datas = [datetime.now() - timedelta(days=i) for i in range(periodo_dias)]
+            agora = pd.Timestamp(datetime.now())
             corretores = [f"Corretor {i}" for i in range(1, 11)]
             tipos_imovel = ['Apartamento', 'Casa', 'Terreno', 'Comercial', 'Rural']
             bairros = ['Centro', 'Jardins', 'Vila Nova', 'Beira Mar', 'Parque Industrial', 'Zona Sul', 'Zona Norte']
@@ -73,16 +67,15 @@ class DataGenerator:
             tipos = np.random.choice(tipos_imovel, num_registros, p=probabilidades_tipos)
             
             # Gerar valores de venda baseados no tipo de imóvel
-            valores_venda = []
-            for tipo in tipos:
-                valor_medio = valores_medios[tipo]
-                # Adicionar variação de 30% para mais ou para menos
-                valores_venda.append(np.random.normal(valor_medio, valor_medio * 0.15))
+            # Adicionar variação de 30% para mais ou para menos
+            medias_tipo = pd.Series(tipos).map(valores_medios).to_numpy(dtype=float)
+            valores_venda = np.random.normal(medias_tipo, medias_tipo * 0.15)
             
-            # Gerar datas com tendência (mais vendas recentes)
+            # Gerar datas com tendência (sorteio do deslocamento em dias a partir de hoje)
             pesos_datas = np.linspace(1, 3, periodo_dias)  # Mais peso para datas recentes
             pesos_datas = pesos_datas / sum(pesos_datas)
-            datas_venda = np.random.choice(datas, num_registros, p=pesos_datas)
+            dias_atras = np.random.choice(periodo_dias, num_registros, p=pesos_datas)
+            datas_venda = agora - pd.to_timedelta(dias_atras, unit='D')
             
             # Gerar corretores com desempenho variado
             # Alguns corretores têm mais vendas que outros
@@ -103,9 +96,8 @@ class DataGenerator:
             
             # Adicionar algumas tendências
             # Corretores mais experientes vendem imóveis mais caros
-            for i, corretor in enumerate(corretores[:3]):
-                idx = df[df['corretor'] == corretor].index
-                df.loc[idx, 'valor_venda'] *= (1.1 - i * 0.03)  # Aumento de 10%, 7%, 4% para os top 3
+            fatores_corretor = {corretor: 1.1 - i * 0.03 for i, corretor in enumerate(corretores[:3])}  # Aumento de 10%, 7%, 4% para os top 3
+            df['valor_venda'] *= df['corretor'].map(fatores_corretor).fillna(1.0)
             
             # Adicionar coluna de VGV (Volume Geral de Vendas)
             df['vgv'] = df['valor_venda']
@@ -185,7 +177,7 @@ class DataGenerator:
         """
         try:
             # Definir dados base
-            datas = [datetime.now() - timedelta(days=i) for i in range(periodo_dias)]
+            agora = pd.Timestamp(datetime.now())
             origens = ['Site', 'Indicação', 'Portais', 'Redes Sociais', 'Anúncios', 'Eventos', 'Outros']
             tipos_interesse = ['Apartamento', 'Casa', 'Terreno', 'Comercial', 'Rural']
             corretores = [f"Corretor {i}" for i in range(1, 11)]
@@ -208,16 +200,15 @@ class DataGenerator:
             probabilidades_origens = [0.3, 0.15, 0.25, 0.15, 0.1, 0.03, 0.02]
             origens_lead = np.random.choice(origens, num_registros, p=probabilidades_origens)
             
-            # Gerar datas de captação
+            # Gerar datas de captação (sorteio do deslocamento em dias a partir de hoje)
             pesos_datas = np.linspace(1, 2, periodo_dias)  # Mais peso para datas recentes
             pesos_datas = pesos_datas / sum(pesos_datas)
-            datas_captacao = np.random.choice(datas, num_registros, p=pesos_datas)
+            dias_atras = np.random.choice(periodo_dias, num_registros, p=pesos_datas)
+            datas_captacao = agora - pd.to_timedelta(dias_atras, unit='D')
             
             # Gerar status de conversão baseado na origem
-            convertidos = []
-            for origem in origens_lead:
-                taxa = taxas_conversao[origem]
-                convertidos.append(np.random.choice([True, False], p=[taxa, 1-taxa]))
+            taxas_lead = pd.Series(origens_lead).map(taxas_conversao).to_numpy(dtype=float)
+            convertidos = np.random.random(num_registros) < taxas_lead
             
             # Criar DataFrame
             df = pd.DataFrame({
@@ -230,36 +221,39 @@ class DataGenerator:
             })
             
             # Adicionar data de conversão para leads convertidos
-            df['data_conversao'] = None
-            for i in range(len(df)):
-                if df.iloc[i]['convertido']:
-                    # Tempo até conversão varia de 1 a 30 dias
-                    dias_ate_conversao = np.random.randint(1, 30)
-                    df.loc[i, 'data_conversao'] = df.iloc[i]['data_captacao'] + timedelta(days=dias_ate_conversao)
+            # Tempo até conversão varia de 1 a 30 dias
+            dias_ate_conversao = pd.to_timedelta(np.random.randint(1, 30, num_registros), unit='D')
+            df['data_conversao'] = (df['data_captacao'] + dias_ate_conversao).where(df['convertido'])
             
             # Adicionar status do lead
-            df['status'] = 'Não contatado'
-            for i in range(len(df)):
-                if df.iloc[i]['convertido']:
-                    df.loc[i, 'status'] = 'Convertido'
-                else:
-                    # Distribuir status para não convertidos
-                    df.loc[i, 'status'] = np.random.choice(
-                        ['Em negociação', 'Contatado', 'Não interessado', 'Não contatado'],
-                        p=[0.3, 0.4, 0.2, 0.1]
-                    )
+            # Distribuir status para não convertidos
+            status_nao_convertidos = np.random.choice(
+                ['Em negociação', 'Contatado', 'Não interessado', 'Não contatado'],
+                num_registros,
+                p=[0.3, 0.4, 0.2, 0.1]
+            )
+            df['status'] = np.where(df['convertido'], 'Convertido', status_nao_convertidos)
             
             # Adicionar tendência temporal na taxa de conversão
-            # Melhoria gradual nos últimos 30 dias
-            for i in range(len(df)):
-                data = df.iloc[i]['data_captacao']
-                if (datetime.now() - data).days <= 30:
-                    # Aumentar chance de conversão em 20% para leads recentes
-                    if not df.iloc[i]['convertido'] and np.random.random() < 0.2:
-                        df.loc[i, 'convertido'] = True
-                        dias_ate_conversao = np.random.randint(1, 15)
-                        df.loc[i, 'data_conversao'] = data + timedelta(days=dias_ate_conversao)
-                        df.loc[i, 'status'] = 'Convertido'
+            # Melhoria gradual nos últimos 30 dias: aumentar chance de conversão em 20% para leads recentes
+            recentes = dias_atras <= 30
+            promovidos = recentes & ~convertidos & (np.random.random(num_registros) < 0.2)
+            dias_ate_conversao = pd.to_timedelta(np.random.randint(1, 15, num_registros), unit='D')
+            df.loc[promovidos, 'convertido'] = True
+            df.loc[promovidos, 'data_conversao'] = (df['data_captacao'] + dias_ate_conversao)[promovidos]
+            df.loc[promovidos, 'status'] = 'Convertido'
+            
+            # Adicionar contato do cliente (e-mail ou telefone)
+            # Parte dos clientes chega por mais de uma origem, e o mesmo contato aparece com formatações diferentes
+            num_clientes = max(1, int(num_registros * 0.8))
+            clientes = np.random.randint(0, num_clientes, num_registros)
+            usa_email = clientes % 2 == 0
+            emails = pd.Series(clientes).map(lambda c: f"cliente{c}@email.com.br")
+            telefones = pd.Series(clientes).map(lambda c: f"(11) 9{c % 10000:04d}-{c // 10000:04d}")
+            maiusculas = np.random.random(num_registros) < 0.1
+            emails = emails.where(~maiusculas, emails.str.upper())
+            telefones = telefones.where(~maiusculas, telefones.str.replace(r'\D', '', regex=True))
+            df['contato'] = np.where(usa_email, emails, telefones)
             
             logger.info(f"Gerados {len(df)} registros de dados de leads")
             return df
@@ -302,6 +296,25 @@ class DataGenerator:
             logger.error(f"Erro ao salvar dados: {str(e)}")
             return False
     
+    def gerar_dataframes(self, num_producao=200, num_leads=500, periodo_dias=100):
+        """
+        Gera os DataFrames de exemplo em memória, sem salvá-los.
+        
+        Args:
+            num_producao (int): Número de registros de produção
+            num_leads (int): Número de registros de leads
+            periodo_dias (int): Período em dias para distribuição das datas
+            
+        Returns:
+            dict: DataFrames gerados ('producao', 'ganhos' e 'leads')
+        """
+        df_producao = self.gerar_dados_producao(num_producao, periodo_dias)
+        return {
+            'producao': df_producao,
+            'ganhos': self.gerar_dados_ganhos(df_producao),
+            'leads': self.gerar_dados_leads(num_leads, periodo_dias)
+        }
+    
     def gerar_todos_dados(self, num_producao=200, num_leads=500, periodo_dias=100):
         """
         Gera e salva todos os dados de exemplo.
@@ -316,12 +329,10 @@ class DataGenerator:
         """
         try:
             # Gerar dados
-            df_producao = self.gerar_dados_producao(num_producao, periodo_dias)
-            df_ganhos = self.gerar_dados_ganhos(df_producao)
-            df_leads = self.gerar_dados_leads(num_leads, periodo_dias)
+            dataframes = self.gerar_dataframes(num_producao, num_leads, periodo_dias)
             
             # Salvar dados
-            sucesso = self.salvar_dados(df_producao, df_ganhos, df_leads)
+            sucesso = self.salvar_dados(dataframes['producao'], dataframes['ganhos'], dataframes['leads'])
             
             if sucesso:
                 logger.info("Todos os dados foram gerados e salvos com sucesso")
@@ -339,6 +350,13 @@ def main():
     """
     Função principal para execução direta do script.
     """
+    parser = argparse.ArgumentParser(description='Geração de dados de exemplo')
+    parser.add_argument('--num-vendas', type=int, default=200, help='Número de registros de produção')
+    parser.add_argument('--num-leads', type=int, default=500, help='Número de registros de leads')
+    parser.add_argument('--periodo-dias', type=int, default=100, help='Período em dias para distribuição das datas')
+    config_logging.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    
     # Diretório base do projeto
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     data_dir = os.path.join(base_dir, 'data')
@@ -347,10 +365,11 @@ def main():
     output_dir = os.path.join(base_dir, 'output')
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
+    config_logging.configurar_por_argumentos(args, output_dir)
     
     # Gerar dados
     generator = DataGenerator(data_dir)
-    sucesso = generator.gerar_todos_dados(num_producao=200, num_leads=500, periodo_dias=100)
+    sucesso = generator.gerar_todos_dados(num_producao=args.num_vendas, num_leads=args.num_leads, periodo_dias=args.periodo_dias)
     
     if sucesso:
         print("Dados de exemplo gerados com sucesso!")
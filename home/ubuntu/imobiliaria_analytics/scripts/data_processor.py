@@ -8,20 +8,16 @@ relacionadas a produção (vendas), ganhos (comissões) e leads.
 """
 
 import os
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
 
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'output', 'processamento.log')),
-        logging.StreamHandler()
-    ]
-)
+import instrumentacao
+import perfilador
+import config_logging
+
 logger = logging.getLogger('data_processor')
 
 class DataProcessor:
@@ -30,6 +26,9 @@ class DataProcessor:
     Responsável por extrair, limpar e processar dados de planilhas Excel.
     """
     
+    # Tipos de dados tratados pelo processador
+    TIPOS_DADOS = ('producao', 'ganhos', 'leads')
+    
     def __init__(self, data_dir):
         """
         Inicializa o processador de dados.
@@ -43,6 +42,7 @@ class DataProcessor:
         self.leads_df = None
         logger.info(f"Processador de dados inicializado. Diretório de dados: {data_dir}")
     
+    @instrumentacao.instrumentado()
     def carregar_dados(self, arquivo_producao, arquivo_ganhos, arquivo_leads):
         """
         Carrega os dados das planilhas Excel.
@@ -71,11 +71,65 @@ class DataProcessor:
             self.leads_df = pd.read_excel(caminho_leads)
             logger.info(f"Dados de leads carregados: {len(self.leads_df)} registros")
             
+            instrumentacao.anotar(linhas=len(self.producao_df) + len(self.ganhos_df) + len(self.leads_df))
             return True
         except Exception as e:
             logger.error(f"Erro ao carregar dados: {str(e)}")
             return False
     
+    @instrumentacao.instrumentado()
+    def carregar_arquivo(self, tipo, arquivo):
+        """
+        Carrega (ou recarrega) uma única planilha Excel, sem tocar nas demais.
+        
+        Args:
+            tipo (str): Tipo de dado ('producao', 'ganhos' ou 'leads')
+            arquivo (str): Nome do arquivo Excel
+            
+        Returns:
+            bool: True se os dados foram carregados com sucesso, False caso contrário
+        """
+        if tipo not in self.TIPOS_DADOS:
+            logger.error(f"Tipo de dado desconhecido: {tipo}")
+            return False
+        
+        try:
+            caminho = os.path.join(self.data_dir, arquivo)
+            df = pd.read_excel(caminho)
+            setattr(self, f'{tipo}_df', df)
+            instrumentacao.anotar(etapa=f'carregar_arquivo:{tipo}', linhas=len(df))
+            logger.info(f"Dados de {tipo} carregados: {len(df)} registros")
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao carregar dados de {tipo}: {str(e)}")
+            return False
+    
+    def limpar_dados(self, tipo):
+        """
+        Limpa os dados de um tipo específico.
+        
+        Args:
+            tipo (str): Tipo de dado ('producao', 'ganhos' ou 'leads')
+            
+        Returns:
+            pandas.DataFrame: DataFrame limpo ou None em caso de erro
+        """
+        return getattr(self, f'limpar_dados_{tipo}')()
+    
+    def calcular_metricas(self, tipo, df_limpo):
+        """
+        Calcula as métricas de um tipo específico.
+        
+        Args:
+            tipo (str): Tipo de dado ('producao', 'ganhos' ou 'leads')
+            df_limpo (pandas.DataFrame): DataFrame limpo do tipo informado
+            
+        Returns:
+            dict: Dicionário com métricas calculadas
+        """
+        return getattr(self, f'calcular_metricas_{tipo}')(df_limpo)
+    
+    @instrumentacao.instrumentado()
     def limpar_dados_producao(self):
         """
         Limpa e prepara os dados de produção.
@@ -114,6 +168,7 @@ class DataProcessor:
             logger.error(f"Erro ao limpar dados de produção: {str(e)}")
             return None
     
+    @instrumentacao.instrumentado()
     def limpar_dados_ganhos(self):
         """
         Limpa e prepara os dados de ganhos.
@@ -145,6 +200,7 @@ class DataProcessor:
             logger.error(f"Erro ao limpar dados de ganhos: {str(e)}")
             return None
     
+    @instrumentacao.instrumentado()
     def limpar_dados_leads(self):
         """
         Limpa e prepara os dados de leads.
@@ -179,6 +235,7 @@ class DataProcessor:
             logger.error(f"Erro ao limpar dados de leads: {str(e)}")
             return None
     
+    @instrumentacao.instrumentado()
     def calcular_metricas_producao(self, df_producao_limpo):
         """
         Calcula métricas derivadas para dados de produção.
@@ -241,6 +298,7 @@ class DataProcessor:
             logger.error(f"Erro ao calcular métricas de produção: {str(e)}")
             return {}
     
+    @instrumentacao.instrumentado()
     def calcular_metricas_ganhos(self, df_ganhos_limpo):
         """
         Calcula métricas derivadas para dados de ganhos.
@@ -283,6 +341,7 @@ class DataProcessor:
             logger.error(f"Erro ao calcular métricas de ganhos: {str(e)}")
             return {}
     
+    @instrumentacao.instrumentado()
     def calcular_metricas_leads(self, df_leads_limpo):
         """
         Calcula métricas derivadas para dados de leads.
@@ -390,9 +449,16 @@ def main():
     """
     Função principal para execução direta do script.
     """
+    parser = argparse.ArgumentParser(description='Processamento de dados imobiliários')
+    perfilador.adicionar_argumentos(parser)
+    config_logging.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    
     # Diretório base do projeto
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     data_dir = os.path.join(base_dir, 'data')
+    config_logging.configurar_por_argumentos(args, os.path.join(base_dir, 'output'))
+    perfil = perfilador.iniciar(args, os.path.join(base_dir, 'output'))
     
     # Criar processador de dados
     processor = DataProcessor(data_dir)
@@ -408,6 +474,10 @@ def main():
         print("Processamento de dados concluído com sucesso!")
     else:
         print("Falha no processamento de dados.")
+    
+    caminho_perfil = perfilador.finalizar(perfil)
+    if caminho_perfil:
+        print(f"Resumo do perfil: {caminho_perfil}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de esboços (sketches) combináveis
+Este script implementa resumos de distribuição de tamanho fixo que podem ser montados
+por lotes e combinados entre lotes, partições e execuções sem guardar as observações
+originais. HistogramasFixos guarda, para cada grupo, contagens em baldes de limites
+fixos (por exemplo, dias até a conversão), de onde são lidos quantis e histogramas;
+dois esboços com os mesmos limites são combinados somando as contagens.
+HyperLogLogPorGrupo estima a quantidade de valores distintos (leads, clientes) de
+cada grupo com registradores de tamanho fixo; a união de grupos, lotes ou execuções
+é o máximo dos registradores, de modo que contagens distintas de qualquer nível de
+agregação são obtidas sem guardar os identificadores.
+"""
+
+import base64
+import logging
+import zlib
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('esbocos')
+
+# Limites (inclusivos à esquerda) dos baldes de dias: diários até 90 dias, semanais
+# até 364 dias e um último balde aberto para prazos maiores
+LIMITES_DIAS = np.concatenate([np.arange(0, 91), np.arange(91, 365, 7)])
+
+# Precisão padrão do HyperLogLog: 2^11 registradores (erro padrão ~2,3%)
+PRECISAO_HLL = 11
+
+
+class HistogramasFixos:
+    """
+    Histogramas de baldes fixos por grupo, combináveis por soma.
+    """
+    
+    def __init__(self, limites=LIMITES_DIAS):
+        """
+        Inicializa o esboço vazio.
+        
+        Args:
+            limites (array-like): Limite inferior de cada balde, em ordem crescente; o
+                                  último balde não tem limite superior
+        """
+        self.limites = np.asarray(limites, dtype=float)
+        self.grupos = []
+        self.codigos = {}
+        self.contagens = np.zeros((0, len(self.limites)), dtype=np.int64)
+        self.descartados = 0
+    
+    @classmethod
+    def de_valores(cls, grupos, valores, limites=LIMITES_DIAS):
+        """
+        Monta o esboço de um lote de observações com um único bincount.
+        
+        Args:
+            grupos (array-like): Grupo de cada observação
+            valores (array-like): Valores (NaN ou abaixo do primeiro limite são descartados)
+            limites (array-like): Limites dos baldes
+        
+        Returns:
+            HistogramasFixos: Esboço do lote
+        """
+        esboco = cls(limites)
+        valores = np.asarray(valores, dtype=float)
+        validos = np.isfinite(valores) & (valores >= esboco.limites[0])
+        esboco.descartados = int((~validos).sum())
+        
+        codigos, distintos = pd.factorize(pd.Series(np.asarray(grupos, dtype=object)[validos]).astype(str))
+        baldes = np.searchsorted(esboco.limites, valores[validos], side='right') - 1
+        n_baldes = len(esboco.limites)
+        esboco.grupos = list(distintos)
+        esboco.codigos = {nome: i for i, nome in enumerate(esboco.grupos)}
+        esboco.contagens = np.bincount(
+            codigos * n_baldes + baldes, minlength=len(distintos) * n_baldes
+        ).reshape(len(distintos), n_baldes)
+        return esboco
+    
+    def mesclar(self, outro):
+        """
+        Soma ao esboço as contagens de outro esboço com os mesmos limites.
+        
+        Args:
+            outro (HistogramasFixos): Esboço a incorporar
+        
+        Returns:
+            HistogramasFixos: O próprio esboço (atualizado)
+        """
+        if not np.array_equal(self.limites, outro.limites):
+            raise ValueError("Esboços com limites de baldes diferentes não podem ser combinados")
+        for nome in outro.grupos:
+            if nome not in self.codigos:
+                self.codigos[nome] = len(self.grupos)
+                self.grupos.append(nome)
+        if len(self.grupos) > len(self.contagens):
+            self.contagens = np.pad(self.contagens, [(0, len(self.grupos) - len(self.contagens)), (0, 0)])
+        destino = np.array([self.codigos[nome] for nome in outro.grupos], dtype=np.int64)
+        np.add.at(self.contagens, destino, outro.contagens)
+        self.descartados += outro.descartados
+        return self
+    
+    def total(self):
+        """
+        Esboço de todos os grupos somados.
+        
+        Returns:
+            HistogramasFixos: Esboço com um único grupo ('Total')
+        """
+        esboco = HistogramasFixos(self.limites)
+        esboco.grupos, esboco.codigos = ['Total'], {'Total': 0}
+        esboco.contagens = self.contagens.sum(axis=0, keepdims=True)
+        esboco.descartados = self.descartados
+        return esboco
+    
+    def quantidades(self):
+        """
+        Observações de cada grupo.
+        
+        Returns:
+            numpy.ndarray: Quantidade por grupo
+        """
+        return self.contagens.sum(axis=1)
+    
+    def quantis(self, quantis):
+        """
+        Quantis de cada grupo pelo posto mais próximo, interpolando dentro do balde.
+        
+        Em baldes de largura 1 com valores inteiros (ex.: dias) o resultado é exato.
+        
+        Args:
+            quantis (array-like): Quantis desejados (entre 0 e 1)
+        
+        Returns:
+            numpy.ndarray: Quantis (grupos x quantis), NaN para grupos vazios
+        """
+        quantis = np.asarray(quantis, dtype=float)
+        acumuladas = np.cumsum(self.contagens, axis=1)
+        n = acumuladas[:, -1] if len(self.contagens) else np.zeros(0, dtype=np.int64)
+        postos = np.maximum(np.ceil(quantis[None, :] * n[:, None]), 1)
+        
+        resultado = np.full((len(self.contagens), len(quantis)), np.nan)
+        for i in np.flatnonzero(n > 0):
+            baldes = np.searchsorted(acumuladas[i], postos[i], side='left')
+            anteriores = np.where(baldes > 0, acumuladas[i][np.maximum(baldes - 1, 0)], 0)
+            fracao = (postos[i] - anteriores - 1) / self.contagens[i, baldes]
+            larguras = np.diff(np.r_[self.limites, self.limites[-1] + 1])[baldes]
+            resultado[i] = self.limites[baldes] + np.floor(larguras * fracao)
+        return resultado
+    
+    def histograma(self, limites):
+        """
+        Contagens reagrupadas em baldes mais largos (os novos limites devem ser limites do esboço).
+        
+        Args:
+            limites (array-like): Limites inferiores dos baldes reagrupados
+        
+        Returns:
+            numpy.ndarray: Contagens (grupos x baldes reagrupados)
+        """
+        limites = np.asarray(limites, dtype=float)
+        if not np.isin(limites, self.limites).all():
+            raise ValueError("Os limites reagrupados devem ser limites do esboço")
+        inicios = np.searchsorted(self.limites, limites)
+        return np.add.reduceat(self.contagens, inicios, axis=1) if len(self.contagens) else np.zeros((0, len(limites)), dtype=np.int64)
+    
+    def para_dict(self):
+        """
+        Representação serializável em JSON.
+        
+        Returns:
+            dict: Limites, grupos, contagens e descartados
+        """
+        return {
+            'limites': self.limites.tolist(),
+            'grupos': self.grupos,
+            'contagens': self.contagens.tolist(),
+            'descartados': self.descartados
+        }
+    
+    @classmethod
+    def de_dict(cls, dados):
+        """
+        Reconstrói um esboço salvo com para_dict.
+        
+        Args:
+            dados (dict): Representação do esboço
+        
+        Returns:
+            HistogramasFixos: Esboço
+        """
+        esboco = cls(dados['limites'])
+        esboco.grupos = list(dados['grupos'])
+        esboco.codigos = {nome: i for i, nome in enumerate(esboco.grupos)}
+        esboco.contagens = np.asarray(dados['contagens'], dtype=np.int64).reshape(len(esboco.grupos), len(esboco.limites))
+        esboco.descartados = int(dados.get('descartados', 0))
+        return esboco
+
+
+def hash_valores(valores):
+    """
+    Hash de 64 bits determinístico (igual entre execuções) de cada valor.
+    
+    Args:
+        valores (array-like ou pandas.DataFrame): Valores; em DataFrames, o hash
+                                                  combina as colunas de cada linha
+    
+    Returns:
+        numpy.ndarray: Hashes (uint64)
+    """
+    if isinstance(valores, pd.DataFrame):
+        return pd.util.hash_pandas_object(valores, index=False).to_numpy()
+    return pd.util.hash_array(np.asarray(valores, dtype=object))
+
+
+def _posicao_bit_mais_alto(valores):
+    """
+    Posição (0 a 63) do bit mais significativo de inteiros de 64 bits (-1 para zero).
+    
+    Args:
+        valores (numpy.ndarray): Inteiros (uint64)
+    
+    Returns:
+        numpy.ndarray: Posições
+    """
+    # Os 11 bits menos significativos são descartados antes da conversão para float,
+    # que só representa inteiros de até 53 bits sem arredondamento
+    grandes = valores >= (1 << 53)
+    reduzidos = np.where(grandes, valores >> np.uint64(11), valores).astype(float)
+    with np.errstate(divide='ignore'):
+        posicoes = np.floor(np.log2(reduzidos))
+    posicoes = np.where(reduzidos > 0, posicoes, -1).astype(np.int64)
+    return posicoes + np.where(grandes, 11, 0)
+
+
+class HyperLogLogPorGrupo:
+    """
+    Esboços HyperLogLog de valores distintos por grupo, combináveis pelo máximo dos registradores.
+    """
+    
+    def __init__(self, dimensoes, precisao=PRECISAO_HLL):
+        """
+        Inicializa o esboço vazio.
+        
+        Args:
+            dimensoes (tuple): Nomes das dimensões que identificam cada grupo
+            precisao (int): Bits do hash usados para escolher o registrador (2^precisao registradores)
+        """
+        self.dimensoes = tuple(dimensoes)
+        self.precisao = precisao
+        self.grupos = []
+        self.codigos = {}
+        self.registradores = np.zeros((0, 1 << precisao), dtype=np.uint8)
+    
+    def _indices_grupos(self, chaves):
+        """
+        Índice do grupo de cada linha, criando os grupos novos.
+        
+        Args:
+            chaves (pandas.DataFrame): Valores das dimensões de cada linha
+        
+        Returns:
+            numpy.ndarray: Índice do grupo de cada linha
+        """
+        # Códigos por coluna combinados em um único código por linha
+        colunas = [pd.factorize(chaves[dimensao], use_na_sentinel=False) for dimensao in self.dimensoes]
+        combinados = np.ravel_multi_index([codigos for codigos, _ in colunas], [len(valores) for _, valores in colunas])
+        unicos, codigos = np.unique(combinados, return_inverse=True)
+        posicoes = np.unravel_index(unicos, [len(valores) for _, valores in colunas])
+        distintos = list(zip(*[[str(v) for v in np.asarray(valores, dtype=object)[pos]] for (_, valores), pos in zip(colunas, posicoes)]))
+        for grupo in distintos:
+            if grupo not in self.codigos:
+                self.codigos[grupo] = len(self.grupos)
+                self.grupos.append(grupo)
+        if len(self.grupos) > len(self.registradores):
+            self.registradores = np.pad(self.registradores, [(0, len(self.grupos) - len(self.registradores)), (0, 0)])
+        return np.array([self.codigos[grupo] for grupo in distintos], dtype=np.int64)[codigos]
+    
+    def adicionar(self, chaves, hashes):
+        """
+        Adiciona valores (pelos seus hashes) aos grupos. Adicionar de novo um valor já
+        visto não altera o esboço.
+        
+        Args:
+            chaves (pandas.DataFrame): Valores das dimensões de cada linha
+            hashes (numpy.ndarray): Hash de 64 bits do valor de cada linha (ver hash_valores)
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(hashes):
+            return
+        grupos = self._indices_grupos(chaves)
+        bits = np.uint64(self.precisao)
+        registrador = (hashes >> (np.uint64(64) - bits)).astype(np.int64)
+        restante = hashes << bits
+        # Posição do primeiro bit 1 nos 64 - precisao bits restantes (contando a partir de 1)
+        postos = (63 - _posicao_bit_mais_alto(restante)).clip(max=64 - self.precisao) + 1
+        postos = np.where(restante == 0, 64 - self.precisao + 1, postos).astype(np.uint8)
+        np.maximum.at(self.registradores, (grupos, registrador), postos)
+    
+    def mesclar(self, outro):
+        """
+        Incorpora outro esboço (outra fonte, lote ou execução) com as mesmas dimensões e precisão.
+        
+        Args:
+            outro (HyperLogLogPorGrupo): Esboço a incorporar
+        
+        Returns:
+            HyperLogLogPorGrupo: O próprio esboço (atualizado)
+        """
+        if outro.dimensoes != self.dimensoes or outro.precisao != self.precisao:
+            raise ValueError("Esboços HyperLogLog com dimensões ou precisão diferentes não podem ser combinados")
+        for grupo in outro.grupos:
+            if grupo not in self.codigos:
+                self.codigos[grupo] = len(self.grupos)
+                self.grupos.append(grupo)
+        if len(self.grupos) > len(self.registradores):
+            self.registradores = np.pad(self.registradores, [(0, len(self.grupos) - len(self.registradores)), (0, 0)])
+        destino = np.array([self.codigos[grupo] for grupo in outro.grupos], dtype=np.int64)
+        self.registradores[destino] = np.maximum(self.registradores[destino], outro.registradores)
+        return self
+    
+    @staticmethod
+    def estimar_registradores(registradores):
+        """
+        Estimativa de valores distintos de cada linha de registradores.
+        
+        Usa contagem linear quando a estimativa é pequena e há registradores vazios.
+        
+        Args:
+            registradores (numpy.ndarray): Registradores (linhas x 2^precisao)
+        
+        Returns:
+            numpy.ndarray: Estimativas
+        """
+        m = registradores.shape[1]
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimativa = alpha * m * m / np.sum(np.exp2(-registradores.astype(float)), axis=1)
+        vazios = (registradores == 0).sum(axis=1)
+        linear = m * np.log(m / np.maximum(vazios, 1))
+        return np.where((estimativa <= 2.5 * m) & (vazios > 0), linear, estimativa)
+    
+    def consolidar(self, dimensoes=()):
+        """
+        Valores distintos estimados em um nível de agregação (união dos grupos pelo máximo dos registradores).
+        
+        Args:
+            dimensoes (tuple): Dimensões mantidas (vazio = total de todos os grupos)
+        
+        Returns:
+            pandas.DataFrame: Dimensões mantidas e 'distintos' estimados
+        """
+        dimensoes = list(dimensoes)
+        grupos = pd.DataFrame(self.grupos, columns=list(self.dimensoes))
+        if not dimensoes:
+            registradores = self.registradores.max(axis=0, keepdims=True) if len(self.grupos) else np.zeros((1, self.registradores.shape[1]), dtype=np.uint8)
+            return pd.DataFrame({'distintos': self.estimar_registradores(registradores)})
+        
+        codigos, niveis = pd.MultiIndex.from_frame(grupos[dimensoes]).factorize()
+        registradores = np.zeros((len(niveis), self.registradores.shape[1]), dtype=np.uint8)
+        np.maximum.at(registradores, codigos, self.registradores)
+        tabela = pd.DataFrame(list(niveis), columns=dimensoes)
+        tabela['distintos'] = self.estimar_registradores(registradores)
+        return tabela
+    
+    def para_dict(self):
+        """
+        Representação serializável em JSON (registradores comprimidos em base64).
+        
+        Returns:
+            dict: Dimensões, precisão, grupos e registradores
+        """
+        return {
+            'dimensoes': list(self.dimensoes),
+            'precisao': self.precisao,
+            'grupos': [list(grupo) for grupo in self.grupos],
+            'registradores': base64.b64encode(zlib.compress(self.registradores.tobytes())).decode('ascii')
+        }
+    
+    @classmethod
+    def de_dict(cls, dados):
+        """
+        Reconstrói um esboço salvo com para_dict.
+        
+        Args:
+            dados (dict): Representação do esboço
+        
+        Returns:
+            HyperLogLogPorGrupo: Esboço
+        """
+        esboco = cls(dados['dimensoes'], dados['precisao'])
+        esboco.grupos = [tuple(grupo) for grupo in dados['grupos']]
+        esboco.codigos = {grupo: i for i, grupo in enumerate(esboco.grupos)}
+        esboco.registradores = np.frombuffer(
+            zlib.decompress(base64.b64decode(dados['registradores'])), dtype=np.uint8
+        ).reshape(len(esboco.grupos), 1 << esboco.precisao).copy()
+        return esboco
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de fluxo de caixa de comissões
+Este script acumula as comissões em aberto (pendentes ou em processamento) em um
+calendário: um tensor corretor x equipe x dia de pagamento, preenchido com um único
+bincount sobre os índices de data. A projeção diária dos próximos dias, os valores
+vencidos e as faixas de atraso em qualquer data de referência são somas de fatias
+desse tensor. O calendário é aditivo: quando o status de comissões muda, a versão
+anterior dos registros é removida e a nova é adicionada, sem reprocessar a base.
+O tensor e os registros em aberto incorporados são salvos entre as execuções; a cada
+nova execução, apenas os registros em aberto novos, alterados (status, data ou valor)
+ou que deixaram a base são aplicados ao calendário.
+"""
+
+import base64
+import logging
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import esbocos
+import persistencia
+from funil import codificar_categorias
+
+logger = logging.getLogger('fluxo_comissoes')
+
+# Versão do formato de output/modelos/fluxo_comissoes.json (persistencia.carregar_estado descarta as demais)
+VERSAO_ESTADO = 1
+
+# Status de pagamento das comissões ainda a pagar
+STATUS_ABERTOS = ('Pendente', 'Em processamento')
+
+# Dimensões padrão do calendário
+DIMENSOES = ('corretor', 'equipe')
+
+# Dias projetados a partir da data de referência
+HORIZONTE_DIAS = 90
+
+# Limites inferiores (dias de atraso) das faixas de atraso; abaixo do primeiro, a comissão está a vencer
+LIMITES_ATRASO = (1, 16, 31, 61, 91)
+
+# Colunas das faixas de atraso (a última reúne as comissões sem data de pagamento)
+FAIXAS_ATRASO = ('a_vencer', 'atraso_1_15', 'atraso_16_30', 'atraso_31_60', 'atraso_61_90', 'atraso_90_mais', 'sem_data')
+
+# Colunas dos registros em aberto guardadas no estado (além das dimensões)
+COLUNAS_REGISTRO = ('data_pagamento', 'status_pagamento', 'valor_comissao')
+
+
+def chaves_registros(df):
+    """
+    Hash de cada registro com todas as suas colunas.
+    
+    Um registro com status, data ou valor alterado recebe uma chave nova; registros
+    idênticos repetidos são diferenciados pela ordem de ocorrência.
+    
+    Args:
+        df (pandas.DataFrame): Registros
+    
+    Returns:
+        numpy.ndarray: Chaves (uint64)
+    """
+    hashes = esbocos.hash_valores(df[sorted(df.columns)])
+    
+    # Ordem de ocorrência de cada hash entre os iguais (contagem acumulada via ordenação)
+    ordem = np.argsort(hashes, kind='stable')
+    ordenados = hashes[ordem]
+    posicoes = np.arange(len(hashes))
+    inicio_grupo = np.ones(len(hashes), dtype=bool)
+    inicio_grupo[1:] = ordenados[1:] != ordenados[:-1]
+    ocorrencia = np.empty(len(hashes), dtype=np.uint64)
+    ocorrencia[ordem] = posicoes - np.maximum.accumulate(np.where(inicio_grupo, posicoes, 0))
+    return hashes ^ (ocorrencia * np.uint64(0x9E3779B97F4A7C15))
+
+
+def _codificar_array(valores):
+    """
+    Array inteiro em texto para o JSON (comprimido em base64).
+    
+    Args:
+        valores (numpy.ndarray): Valores inteiros
+    
+    Returns:
+        str: Texto codificado
+    """
+    return base64.b64encode(zlib.compress(np.ascontiguousarray(valores).astype('<i8').tobytes())).decode('ascii')
+
+
+def _decodificar_array(texto, forma=None):
+    """
+    Array salvo com _codificar_array.
+    
+    Args:
+        texto (str): Texto codificado
+        forma (tuple): Forma do array (padrão: unidimensional)
+    
+    Returns:
+        numpy.ndarray: Valores (int64)
+    """
+    valores = np.frombuffer(zlib.decompress(base64.b64decode(texto)), dtype='<i8').astype(np.int64)
+    return valores.reshape(forma) if forma is not None else valores
+
+
+class CalendarioComissoes:
+    """
+    Tensor aditivo de comissões em aberto por dimensões (corretor, equipe) e dia de pagamento.
+    """
+    
+    def __init__(self, caminho_estado=None, dimensoes=DIMENSOES):
+        """
+        Inicializa o calendário e carrega o estado salvo, se houver.
+        
+        Args:
+            caminho_estado (str): Arquivo JSON do estado (padrão: calendário apenas em memória)
+            dimensoes (tuple): Colunas dos ganhos usadas como dimensões
+        """
+        self.caminho_estado = caminho_estado
+        self.dimensoes = tuple(dimensoes)
+        self.vocabularios = {dimensao: [] for dimensao in self.dimensoes}
+        self.codigos = {dimensao: {} for dimensao in self.dimensoes}
+        # Dia do índice 1 do último eixo; o índice 0 reúne as comissões sem data de pagamento
+        self.inicio = None
+        forma = (0,) * len(self.dimensoes) + (1,)
+        self.centavos = np.zeros(forma, dtype=np.int64)
+        self.quantidades = np.zeros(forma, dtype=np.int64)
+        # Registros em aberto incorporados (chave, dimensões e COLUNAS_REGISTRO)
+        self.registros = pd.DataFrame({
+            'chave': np.empty(0, dtype=np.uint64),
+            **{dimensao: np.empty(0, dtype=object) for dimensao in self.dimensoes},
+            'data_pagamento': np.empty(0, dtype='datetime64[ns]'),
+            'status_pagamento': np.empty(0, dtype=object),
+            'valor_comissao': np.empty(0, dtype=float)
+        })
+        self.modo = None
+        self.registros_adicionados = 0
+        self.registros_removidos = 0
+        if caminho_estado:
+            self._carregar()
+    
+    def _carregar(self):
+        """
+        Carrega o tensor e os registros em aberto salvos (mantém o calendário vazio se ausente/incompatível).
+        """
+        estado = persistencia.carregar_estado(
+            self.caminho_estado, VERSAO_ESTADO, 'do calendário de comissões',
+            valido=lambda estado: tuple(estado.get('dimensoes', ())) == self.dimensoes, logger=logger
+        )
+        if estado is None:
+            return
+        try:
+            forma = tuple(estado['forma'])
+            vocabularios = {dimensao: list(estado['vocabularios'][dimensao]) for dimensao in self.dimensoes}
+            centavos = _decodificar_array(estado['centavos'], forma)
+            quantidades = _decodificar_array(estado['quantidades'], forma)
+            
+            registros = estado['registros']
+            dias = _decodificar_array(registros['dias'])
+            registros = pd.DataFrame({
+                'chave': _decodificar_array(registros['chaves']).view(np.uint64),
+                **{dimensao: np.array(vocabularios[dimensao], dtype=object)[_decodificar_array(registros[dimensao])]
+                   for dimensao in self.dimensoes},
+                # Dias sem data foram salvos como -1
+                'data_pagamento': pd.to_datetime(np.where(dias >= 0, dias, np.iinfo(np.int64).min).astype('datetime64[D]')),
+                'status_pagamento': np.array(STATUS_ABERTOS, dtype=object)[_decodificar_array(registros['status'])],
+                'valor_comissao': _decodificar_array(registros['centavos']) / 100
+            })
+        except (KeyError, TypeError, ValueError, zlib.error) as e:
+            logger.warning(f"Arrays do estado do calendário de comissões inválidos, será refeito: {str(e)}")
+            return
+        
+        self.vocabularios = vocabularios
+        self.codigos = {dimensao: {nome: i for i, nome in enumerate(vocabulario)} for dimensao, vocabulario in vocabularios.items()}
+        self.inicio = pd.Timestamp(estado['inicio']) if estado['inicio'] else None
+        self.centavos, self.quantidades = centavos, quantidades
+        self.registros = registros
+    
+    def salvar(self):
+        """
+        Salva o tensor e os registros em aberto incorporados.
+        
+        Returns:
+            str: Caminho do estado ou None em caso de erro
+        """
+        registros = self.registros
+        datas = registros['data_pagamento']
+        dias = np.where(datas.notna(), datas.to_numpy(dtype='datetime64[D]').astype(np.int64), -1)
+        estado = {
+            'dimensoes': list(self.dimensoes),
+            'vocabularios': self.vocabularios,
+            'inicio': self.inicio.isoformat() if self.inicio is not None else None,
+            'forma': list(self.centavos.shape),
+            'centavos': _codificar_array(self.centavos),
+            'quantidades': _codificar_array(self.quantidades),
+            'registros': {
+                'chaves': _codificar_array(registros['chave'].to_numpy(dtype=np.uint64).view(np.int64)),
+                **{dimensao: _codificar_array(registros[dimensao].map(self.codigos[dimensao]).to_numpy(dtype=np.int64))
+                   for dimensao in self.dimensoes},
+                'dias': _codificar_array(dias),
+                'status': _codificar_array(pd.Categorical(registros['status_pagamento'], categories=STATUS_ABERTOS).codes),
+                'centavos': _codificar_array(np.rint(registros['valor_comissao'].to_numpy(dtype=float) * 100))
+            }
+        }
+        return persistencia.salvar_estado(self.caminho_estado, estado, VERSAO_ESTADO, 'do calendário de comissões', logger=logger)
+    
+    def _ampliar(self, forma, antes=0):
+        """
+        Amplia os tensores para novas categorias e dias (antes e depois dos atuais).
+        
+        Args:
+            forma (tuple): Nova forma
+            antes (int): Dias acrescentados antes do início atual
+        """
+        for nome in ('centavos', 'quantidades'):
+            tensor = getattr(self, nome)
+            larguras = [(0, novo - atual) for novo, atual in zip(forma[:-1], tensor.shape[:-1])]
+            tensor = np.pad(tensor, larguras + [(0, 0)])
+            # Os dias novos anteriores ao início entram logo depois do índice 0 (sem data)
+            tensor = np.insert(tensor, [1] * antes, 0, axis=-1) if antes else tensor
+            setattr(self, nome, np.pad(tensor, [(0, 0)] * len(larguras) + [(0, forma[-1] - tensor.shape[-1])]))
+    
+    def adicionar(self, df, sinal=1):
+        """
+        Soma (ou subtrai, com sinal=-1) as comissões em aberto de um lote de registros.
+        
+        Registros com outros status (ex.: 'Pago') são ignorados.
+        
+        Args:
+            df (pandas.DataFrame): Ganhos com as colunas das dimensões, 'data_pagamento',
+                                   'status_pagamento' e 'valor_comissao'
+            sinal (int): 1 para adicionar, -1 para remover
+        """
+        df = df[df['status_pagamento'].isin(STATUS_ABERTOS).to_numpy()]
+        codigos = [codificar_categorias(df[d], self.vocabularios[d], self.codigos[d]) for d in self.dimensoes]
+        datas = df['data_pagamento'].dt.normalize()
+        
+        antes = 0
+        if datas.notna().any():
+            primeira, ultima = datas.min(), datas.max()
+            if self.inicio is None:
+                self.inicio = primeira
+            antes = max(0, (self.inicio - primeira).days)
+            self.inicio = min(self.inicio, primeira)
+        dias = self.centavos.shape[-1] + antes
+        if datas.notna().any():
+            dias = max(dias, (ultima - self.inicio).days + 2)
+        
+        forma = tuple(len(self.vocabularios[d]) for d in self.dimensoes) + (dias,)
+        if forma != self.centavos.shape or antes:
+            self._ampliar(forma, antes)
+        
+        if len(df):
+            indices = ((datas - self.inicio).dt.days + 1).fillna(0).to_numpy(dtype=np.int64) if self.inicio is not None else np.zeros(len(df), dtype=np.int64)
+            posicoes = np.ravel_multi_index(codigos + [indices], forma)
+            centavos = np.rint(df['valor_comissao'].to_numpy(dtype=float) * 100)
+            tamanho = int(np.prod(forma))
+            self.centavos += sinal * np.rint(np.bincount(posicoes, weights=centavos, minlength=tamanho)).astype(np.int64).reshape(forma)
+            self.quantidades += sinal * np.bincount(posicoes, minlength=tamanho).reshape(forma)
+    
+    def remover(self, df):
+        """
+        Remove as comissões em aberto de um lote de registros.
+        
+        Args:
+            df (pandas.DataFrame): Registros a remover
+        """
+        self.adicionar(df, sinal=-1)
+    
+    def atualizar(self, anteriores, atuais):
+        """
+        Substitui a versão anterior de registros alterados (ex.: status ou data de pagamento) pela atual.
+        
+        Args:
+            anteriores (pandas.DataFrame): Registros como estavam incorporados
+            atuais (pandas.DataFrame): Os mesmos registros atualizados
+        """
+        self.remover(anteriores)
+        self.adicionar(atuais)
+    
+    def sincronizar(self, df):
+        """
+        Aplica ao calendário as diferenças entre a base atual e os registros já incorporados.
+        
+        Registros em aberto novos ou alterados (status, data de pagamento ou valor) são
+        adicionados; registros incorporados que mudaram ou deixaram a base (ex.: comissão
+        paga) são removidos com a versão guardada. O tensor não é refeito.
+        
+        Args:
+            df (pandas.DataFrame): Todos os ganhos (mesmas colunas entre as execuções)
+        """
+        chaves = chaves_registros(df)
+        abertos = df['status_pagamento'].isin(STATUS_ABERTOS).to_numpy()
+        chaves_abertos = chaves[abertos]
+        
+        anteriores = self.registros['chave'].to_numpy(dtype=np.uint64)
+        removidos = ~np.isin(anteriores, chaves_abertos)
+        novos = ~np.isin(chaves_abertos, anteriores)
+        self.modo = 'completo' if not len(anteriores) else 'incremental'
+        
+        self.remover(self.registros[removidos])
+        atuais = df[abertos][novos]
+        self.adicionar(atuais)
+        
+        novos_registros = atuais[list(self.dimensoes) + list(COLUNAS_REGISTRO)].assign(chave=chaves_abertos[novos])
+        mantidos = self.registros[~removidos]
+        partes = [mantidos, novos_registros[self.registros.columns]] if len(mantidos) else [novos_registros[self.registros.columns]]
+        self.registros = pd.concat(partes, ignore_index=True)
+        self.registros_adicionados = int(novos.sum())
+        self.registros_removidos = int(removidos.sum())
+    
+    def _somar(self, tensor, dimensao):
+        """
+        Soma um tensor em todas as dimensões exceto a escolhida.
+        
+        Args:
+            tensor (numpy.ndarray): Tensor (dimensões x dias)
+            dimensao (str): Dimensão mantida (padrão: total)
+        
+        Returns:
+            numpy.ndarray: Matriz (grupos x dias)
+        """
+        eixos = tuple(i for i, d in enumerate(self.dimensoes) if d != dimensao)
+        matriz = tensor.sum(axis=eixos)
+        return matriz[None, :] if dimensao is None else matriz
+    
+    def _dias_ate_pagamento(self, referencia):
+        """
+        Dias entre a referência e a data de pagamento de cada índice de dia (exceto o índice 0).
+        
+        Args:
+            referencia (pandas.Timestamp): Data de referência
+        
+        Returns:
+            numpy.ndarray: Dias (negativos = vencidos)
+        """
+        deslocamento = (self.inicio - referencia).days if self.inicio is not None else 0
+        return np.arange(self.centavos.shape[-1] - 1) + deslocamento
+    
+    def resumo(self, referencia, dimensao=None, horizontes=(7, 30, HORIZONTE_DIAS)):
+        """
+        Comissões em aberto, projeção dos próximos dias e faixas de atraso de cada grupo.
+        
+        Args:
+            referencia (datetime): Data de referência
+            dimensao (str): Dimensão (padrão: total de todas as comissões)
+            horizontes (tuple): Dias das janelas de projeção
+        
+        Returns:
+            pandas.DataFrame: Grupo, quantidade e valor em aberto, vencido, a pagar em cada
+                              horizonte e valor em cada faixa de atraso (em reais)
+        """
+        referencia = pd.Timestamp(referencia).normalize()
+        centavos = self._somar(self.centavos, dimensao)
+        quantidades = self._somar(self.quantidades, dimensao)
+        dias = self._dias_ate_pagamento(referencia)
+        
+        # Faixa de atraso de cada dia: matriz indicadora (dias x faixas) aplicada por produto matricial
+        faixas = np.searchsorted(LIMITES_ATRASO, -dias, side='right')
+        indicadora = np.zeros((len(dias), len(FAIXAS_ATRASO) - 1), dtype=np.int64)
+        indicadora[np.arange(len(dias)), faixas] = 1
+        por_faixa = np.column_stack([centavos[:, 1:] @ indicadora, centavos[:, 0]]) / 100
+        
+        tabela = pd.DataFrame({dimensao or 'grupo': self.vocabularios[dimensao] if dimensao else ['Total']})
+        tabela['quantidade_aberta'] = quantidades.sum(axis=1)
+        tabela['total_aberto'] = centavos.sum(axis=1) / 100
+        tabela['vencido'] = centavos[:, 1:][:, dias < 0].sum(axis=1) / 100
+        for horizonte in horizontes:
+            tabela[f'proximos_{horizonte}_dias'] = centavos[:, 1:][:, (dias >= 0) & (dias < horizonte)].sum(axis=1) / 100
+        for k, faixa in enumerate(FAIXAS_ATRASO):
+            tabela[faixa] = por_faixa[:, k]
+        tabela['atraso_acima_30'] = tabela[['atraso_31_60', 'atraso_61_90', 'atraso_90_mais']].sum(axis=1)
+        return tabela[tabela['quantidade_aberta'] > 0].reset_index(drop=True)
+    
+    def calendario(self, referencia, horizonte_dias=HORIZONTE_DIAS, dimensao=None):
+        """
+        Valor a pagar em cada dia a partir da data de referência.
+        
+        Args:
+            referencia (datetime): Primeiro dia projetado
+            horizonte_dias (int): Dias projetados
+            dimensao (str): Dimensão (padrão: total de todas as comissões)
+        
+        Returns:
+            pandas.DataFrame: Uma linha por dia e uma coluna por grupo (em reais)
+        """
+        referencia = pd.Timestamp(referencia).normalize()
+        centavos = self._somar(self.centavos, dimensao)[:, 1:]
+        dias = self._dias_ate_pagamento(referencia)
+        
+        projecao = np.zeros((len(centavos), horizonte_dias), dtype=np.int64)
+        dentro = (dias >= 0) & (dias < horizonte_dias)
+        projecao[:, dias[dentro]] = centavos[:, dentro]
+        grupos = self.vocabularios[dimensao] if dimensao else ['Total']
+        return pd.DataFrame(
+            projecao.T / 100, index=pd.date_range(referencia, periods=horizonte_dias, freq='D'), columns=grupos
+        )
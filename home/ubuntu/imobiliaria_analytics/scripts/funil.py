@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de funil de leads
+Este script conta os leads por origem, corretor responsável e status com um único
+bincount sobre os códigos categóricos combinados (origem x corretor x status). As
+tabelas por origem, por corretor e do total são somas desse tensor de contagens, e
+as etapas alcançadas, a conversão entre etapas e a perda em cada etapa são derivadas
+das contagens com operações matriciais. O tensor é aditivo: lotes de leads podem ser
+adicionados ou removidos (por exemplo, o estado anterior de leads que mudaram de
+status) sem recontar a base.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('funil')
+
+# Status possíveis de um lead
+STATUS = ('Não contatado', 'Contatado', 'Em negociação', 'Não interessado', 'Convertido')
+
+# Etapas do funil, em ordem
+ETAPAS = ('Captado', 'Contatado', 'Em negociação', 'Convertido')
+
+# Última etapa alcançada por cada status (descartados chegaram a ser contatados)
+ETAPA_DO_STATUS = np.array([0, 1, 2, 1, 3])
+
+# Dimensões padrão do tensor de contagens
+DIMENSOES = ('origem', 'corretor_responsavel')
+
+
+def codificar_categorias(valores, vocabulario, codigos):
+    """
+    Códigos de valores categóricos, acrescentando ao vocabulário os valores novos.
+    
+    Colunas do tipo category são recodificadas pelas suas categorias, sem percorrer
+    os textos de cada linha.
+    
+    Args:
+        valores (pandas.Series): Valores
+        vocabulario (list): Vocabulário (alterado no lugar)
+        codigos (dict): Código de cada valor do vocabulário (alterado no lugar)
+    
+    Returns:
+        numpy.ndarray: Código de cada valor
+    """
+    if isinstance(valores.dtype, pd.CategoricalDtype):
+        indices = valores.cat.codes.to_numpy().astype(np.int64)
+        distintos = list(valores.cat.categories.astype(str)) + ['nan']
+        indices[indices < 0] = len(distintos) - 1
+    else:
+        indices, distintos = pd.factorize(valores.astype(str))
+    for nome in distintos:
+        if nome not in codigos:
+            codigos[nome] = len(vocabulario)
+            vocabulario.append(nome)
+    return np.array([codigos[nome] for nome in distintos], dtype=np.int64)[indices]
+
+
+def metricas_funil(contagens):
+    """
+    Etapas alcançadas, conversão entre etapas e perda a partir das contagens por status.
+    
+    Args:
+        contagens (numpy.ndarray): Leads por status (grupos x (len(STATUS) + 1)); a
+                                   última coluna são status não reconhecidos
+    
+    Returns:
+        dict: 'alcancados' (grupos x etapas), 'conversao' e 'perda' (grupos x transições,
+              NaN sem leads na etapa de origem) e 'descartados' (por grupo)
+    """
+    contagens = np.asarray(contagens, dtype=np.int64)
+    # alcancados[g, k] = leads do grupo cuja etapa final é k ou posterior
+    alcancou = (ETAPA_DO_STATUS[:, None] >= np.arange(len(ETAPAS))[None, :]).astype(np.int64)
+    alcancados = contagens[:, :len(STATUS)] @ alcancou
+    # Leads com status não reconhecido contam apenas como captados
+    alcancados[:, 0] += contagens[:, len(STATUS)]
+    conversao = np.divide(
+        alcancados[:, 1:], alcancados[:, :-1],
+        out=np.full((len(contagens), len(ETAPAS) - 1), np.nan), where=alcancados[:, :-1] > 0
+    )
+    return {
+        'alcancados': alcancados,
+        'conversao': conversao,
+        'perda': 1 - conversao,
+        'descartados': contagens[:, STATUS.index('Não interessado')]
+    }
+
+
+def _coluna(etapa):
+    """
+    Nome de coluna de uma etapa ('Em negociação' -> 'em_negociacao').
+    
+    Args:
+        etapa (str): Etapa
+    
+    Returns:
+        str: Nome da coluna
+    """
+    return {'Captado': 'captado', 'Contatado': 'contatado', 'Em negociação': 'em_negociacao', 'Convertido': 'convertido'}[etapa]
+
+
+class FunilLeads:
+    """
+    Tensor aditivo de contagens de leads por dimensões (origem, corretor) e status.
+    """
+    
+    def __init__(self, dimensoes=DIMENSOES):
+        """
+        Inicializa o funil vazio.
+        
+        Args:
+            dimensoes (tuple): Colunas dos leads usadas como dimensões
+        """
+        self.dimensoes = tuple(dimensoes)
+        self.vocabularios = {dimensao: [] for dimensao in self.dimensoes}
+        self.codigos = {dimensao: {} for dimensao in self.dimensoes}
+        self.contagens = np.zeros((0,) * len(self.dimensoes) + (len(STATUS) + 1,), dtype=np.int64)
+    
+    def adicionar(self, df, sinal=1):
+        """
+        Soma (ou subtrai, com sinal=-1) as contagens de um lote de leads.
+        
+        Args:
+            df (pandas.DataFrame): Leads com as colunas das dimensões e 'status'
+            sinal (int): 1 para adicionar, -1 para remover
+        """
+        codigos = [codificar_categorias(df[d], self.vocabularios[d], self.codigos[d]) for d in self.dimensoes]
+        status = pd.Categorical(df['status'], categories=STATUS).codes.astype(np.int64)
+        codigos.append(np.where(status < 0, len(STATUS), status))
+        
+        # Ampliar o tensor para as categorias novas
+        forma = tuple(len(self.vocabularios[d]) for d in self.dimensoes) + (len(STATUS) + 1,)
+        if forma != self.contagens.shape:
+            self.contagens = np.pad(self.contagens, [(0, novo - atual) for novo, atual in zip(forma, self.contagens.shape)])
+        
+        if len(df):
+            posicoes = np.ravel_multi_index(codigos, forma)
+            self.contagens += sinal * np.bincount(posicoes, minlength=int(np.prod(forma))).reshape(forma)
+    
+    def remover(self, df):
+        """
+        Remove as contagens de um lote de leads (ex.: o status anterior de leads atualizados).
+        
+        Args:
+            df (pandas.DataFrame): Leads a remover
+        """
+        self.adicionar(df, sinal=-1)
+    
+    def tabela(self, dimensao=None):
+        """
+        Funil de cada categoria de uma dimensão (ou do total).
+        
+        Args:
+            dimensao (str): Dimensão (padrão: total de todos os leads)
+        
+        Returns:
+            pandas.DataFrame: Leads por etapa alcançada, descartados, conversão e perda
+                              entre etapas e etapa de maior perda
+        """
+        eixos = tuple(i for i, d in enumerate(self.dimensoes) if d != dimensao)
+        contagens = self.contagens.sum(axis=eixos)
+        if dimensao is None:
+            contagens = contagens[None, :]
+        metricas = metricas_funil(contagens)
+        
+        tabela = pd.DataFrame({dimensao or 'grupo': self.vocabularios[dimensao] if dimensao else ['Total']})
+        for k, etapa in enumerate(ETAPAS):
+            tabela[_coluna(etapa)] = metricas['alcancados'][:, k]
+        tabela['descartados'] = metricas['descartados']
+        tabela['status_desconhecido'] = contagens[:, len(STATUS)]
+        for k in range(len(ETAPAS) - 1):
+            transicao = f'{_coluna(ETAPAS[k])}_para_{_coluna(ETAPAS[k + 1])}'
+            tabela[f'conversao_{transicao}'] = metricas['conversao'][:, k]
+            tabela[f'perda_{transicao}'] = metricas['perda'][:, k]
+        perdas = np.nan_to_num(metricas['perda'], nan=-1)
+        tabela['etapa_maior_perda'] = np.array(ETAPAS[:-1], dtype=object)[perdas.argmax(axis=1)]
+        tabela['taxa_conversao'] = np.divide(
+            metricas['alcancados'][:, -1], metricas['alcancados'][:, 0],
+            out=np.full(len(tabela), np.nan), where=metricas['alcancados'][:, 0] > 0
+        )
+        return tabela[tabela['captado'] > 0].reset_index(drop=True)
+
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de consolidação hierárquica (empresa → equipe → corretor → tipo de imóvel)
+Este script agrega as vendas uma única vez, no nível mais detalhado da hierarquia,
+guardando parciais combináveis (quantidade, soma, soma dos quadrados, mínimo e
+máximo). Os níveis superiores são obtidos somando as parciais do nível imediatamente
+abaixo, sem reagrupar a base original, e cada nível recebe posições no ranking geral,
+posições e percentis dentro do nível superior e participação no total do nível superior.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('hierarquia')
+
+# Níveis da hierarquia, do mais agregado para o mais detalhado (a empresa é a raiz)
+NIVEIS = ('equipe', 'corretor', 'tipo_imovel')
+
+# Rótulo dos corretores sem equipe nos dados de ganhos
+SEM_EQUIPE = 'Sem equipe'
+
+# Como cada parcial é combinada ao subir um nível
+COMBINACAO_PARCIAIS = {'quantidade': 'sum', 'soma': 'sum', 'soma_quadrados': 'sum', 'minimo': 'min', 'maximo': 'max'}
+
+
+def mapear_equipes(df_ganhos):
+    """
+    Equipe de cada corretor (a mais frequente nos registros de ganhos).
+    
+    Args:
+        df_ganhos (pandas.DataFrame): Dados de ganhos com 'corretor' e 'equipe'
+    
+    Returns:
+        pandas.Series: Equipe indexada por corretor (vazia se as colunas não existirem)
+    """
+    if df_ganhos is None or not {'corretor', 'equipe'} <= set(df_ganhos.columns):
+        return pd.Series(dtype=object)
+    # value_counts ordena por frequência: a primeira ocorrência de cada corretor é a moda
+    contagens = df_ganhos[['corretor', 'equipe']].dropna().value_counts().reset_index()
+    return contagens.drop_duplicates('corretor').set_index('corretor')['equipe']
+
+
+def agregar_parciais(df, niveis=NIVEIS, coluna_valor='valor_venda'):
+    """
+    Parciais combináveis no nível mais detalhado, com um único agrupamento.
+    
+    Args:
+        df (pandas.DataFrame): Vendas com as colunas dos níveis e a coluna de valor
+        niveis (tuple): Colunas da hierarquia, do nível mais agregado ao mais detalhado
+        coluna_valor (str): Coluna agregada
+    
+    Returns:
+        pandas.DataFrame: Uma linha por combinação dos níveis com as parciais
+    """
+    valores = df[coluna_valor].astype(float)
+    base = pd.DataFrame({nivel: df[nivel] for nivel in niveis}).assign(
+        _valor=valores.to_numpy(), _quadrado=(valores ** 2).to_numpy()
+    )
+    return base.groupby(list(niveis), sort=False, observed=True, dropna=False).agg(
+        quantidade=('_valor', 'size'),
+        soma=('_valor', 'sum'),
+        soma_quadrados=('_quadrado', 'sum'),
+        minimo=('_valor', 'min'),
+        maximo=('_valor', 'max')
+    ).reset_index()
+
+
+def _derivar(tabela):
+    """
+    Estatísticas derivadas das parciais (média e desvio padrão amostral).
+    
+    Args:
+        tabela (pandas.DataFrame): Tabela com as parciais
+    
+    Returns:
+        pandas.DataFrame: Tabela com 'media' e 'desvio_padrao'
+    """
+    n = tabela['quantidade'].to_numpy(dtype=float)
+    soma = tabela['soma'].to_numpy(dtype=float)
+    variancia = np.divide(
+        tabela['soma_quadrados'].to_numpy(dtype=float) - soma ** 2 / np.maximum(n, 1), n - 1,
+        out=np.zeros(len(n)), where=n > 1
+    )
+    return tabela.assign(media=soma / np.maximum(n, 1), desvio_padrao=np.sqrt(np.clip(variancia, 0, None)))
+
+
+def consolidar(parciais, niveis=NIVEIS):
+    """
+    Consolida as parciais em todos os níveis da hierarquia.
+    
+    Cada nível é obtido somando (ou tomando mínimo/máximo) as parciais do nível
+    imediatamente abaixo; a base original não é reagrupada.
+    
+    Args:
+        parciais (pandas.DataFrame): Resultado de agregar_parciais
+        niveis (tuple): Colunas da hierarquia, do nível mais agregado ao mais detalhado
+    
+    Returns:
+        dict: Tabela de cada nível ('empresa' e um por coluna de niveis), com as
+              estatísticas derivadas, rankings, percentis e participações
+    """
+    tabelas = {niveis[-1]: parciais}
+    for profundidade in range(len(niveis) - 1, 0, -1):
+        chaves = list(niveis[:profundidade])
+        tabelas[niveis[profundidade - 1]] = tabelas[niveis[profundidade]].groupby(
+            chaves, sort=False, observed=True, dropna=False
+        ).agg(COMBINACAO_PARCIAIS).reset_index()
+    tabelas['empresa'] = tabelas[niveis[0]].agg(COMBINACAO_PARCIAIS).to_frame().T.astype(float)
+    
+    resultado = {'empresa': _derivar(tabelas['empresa'])}
+    for profundidade, nivel in enumerate(niveis):
+        tabela = _derivar(tabelas[nivel])
+        superiores = list(niveis[:profundidade])
+        soma = tabela['soma']
+        tabela['posicao'] = soma.rank(ascending=False, method='min').astype(int)
+        if superiores:
+            grupos = tabela.groupby(superiores, sort=False, observed=True, dropna=False)['soma']
+            tabela['posicao_no_grupo'] = grupos.rank(ascending=False, method='min').astype(int)
+            tabela['percentil_no_grupo'] = grupos.rank(pct=True)
+            total_superior = grupos.transform('sum')
+        else:
+            tabela['posicao_no_grupo'] = tabela['posicao']
+            tabela['percentil_no_grupo'] = soma.rank(pct=True)
+            total_superior = pd.Series(float(resultado['empresa']['soma'].iloc[0]), index=tabela.index)
+        tabela['participacao_no_grupo'] = np.divide(
+            soma.to_numpy(dtype=float), total_superior.to_numpy(dtype=float),
+            out=np.zeros(len(tabela)), where=total_superior.to_numpy() > 0
+        )
+        resultado[nivel] = tabela.sort_values(superiores + ['posicao_no_grupo']).reset_index(drop=True)
+    return resultado
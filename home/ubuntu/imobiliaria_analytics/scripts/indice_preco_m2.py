@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de índice de preço por m²
+Este script mantém um índice de preço por m² das vendas por (bairro, tipo de imóvel,
+mês), com quantidade, mediana e quantis de cada célula, além de uma célula agregada
+de todos os bairros para cada tipo e mês. As células ficam em arrays ordenados por uma
+chave inteira (bairro, tipo, mês), de modo que as consultas são buscas binárias
+vetorizadas (searchsorted). O índice é salvo entre as execuções e, a cada nova
+execução, apenas os meses ainda abertos são recalculados.
+
+Uso para estimar um imóvel a partir do índice salvo:
+    python indice_preco_m2.py --bairro Centro --tipo Apartamento --area 85
+"""
+
+import os
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import persistencia
+from funil import codificar_categorias
+
+logger = logging.getLogger('indice_preco_m2')
+
+# Versão do formato de output/modelos/indice_preco_m2.json (persistencia.carregar_estado descarta as demais)
+VERSAO_ESTADO = 2
+
+# Quantis guardados em cada célula (a mediana é o de 0.5)
+QUANTIS = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+# Bairro das células agregadas de todos os bairros
+TODOS = '*'
+
+# Meses mais recentes recalculados a cada execução (vendas podem ser lançadas com atraso)
+MESES_ABERTOS = 2
+
+# Amostras mínimas de uma célula para ser usada em estimativas
+MIN_AMOSTRAS = 5
+
+# Área mínima (m²) considerada válida
+AREA_MINIMA = 10.0
+
+# Bits de cada parte da chave inteira: bairro | tipo | mês
+BITS_MES = 20
+BITS_TIPO = 20
+
+
+def _meses(datas):
+    """
+    Converte datas em meses inteiros desde 1970-01.
+    
+    Args:
+        datas (pandas.Series): Datas
+    
+    Returns:
+        numpy.ndarray: Meses (int64)
+    """
+    return pd.to_datetime(datas).to_numpy(dtype='datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+
+
+def _rotulo_mes(meses):
+    """
+    Converte meses inteiros desde 1970-01 em rótulos 'AAAA-MM'.
+    
+    Args:
+        meses (numpy.ndarray): Meses
+    
+    Returns:
+        numpy.ndarray: Rótulos
+    """
+    return np.asarray(meses, dtype=np.int64).astype('datetime64[M]').astype(str)
+
+
+def _chaves(bairros, tipos, meses):
+    """
+    Chave inteira ordenável de cada (bairro, tipo, mês), a partir dos códigos.
+    
+    Args:
+        bairros (numpy.ndarray): Código do bairro
+        tipos (numpy.ndarray): Código do tipo de imóvel
+        meses (numpy.ndarray): Mês (meses desde 1970-01)
+    
+    Returns:
+        numpy.ndarray: Chaves (int64)
+    """
+    bairros = np.asarray(bairros, dtype=np.int64)
+    tipos = np.asarray(tipos, dtype=np.int64)
+    return (bairros << (BITS_TIPO + BITS_MES)) | (tipos << BITS_MES) | np.asarray(meses, dtype=np.int64)
+
+
+def calcular_quantis(chaves, valores, quantis=QUANTIS):
+    """
+    Quantidade e quantis dos valores de cada chave, com uma única ordenação.
+    
+    Os valores são ordenados por (chave, valor); os quantis de cada grupo são lidos
+    por posição com interpolação linear (mesmo critério de numpy.quantile).
+    
+    Args:
+        chaves (numpy.ndarray): Chave de cada valor
+        valores (numpy.ndarray): Valores
+        quantis (tuple): Quantis desejados
+    
+    Returns:
+        tuple: (chaves distintas ordenadas, contagens, quantis: chaves x len(quantis))
+    """
+    ordem = np.lexsort((valores, chaves))
+    chaves, valores = chaves[ordem], valores[ordem]
+    inicios = np.flatnonzero(np.r_[True, chaves[1:] != chaves[:-1]])
+    contagens = np.diff(np.r_[inicios, len(chaves)])
+    
+    posicoes = inicios[:, None] + np.asarray(quantis)[None, :] * (contagens[:, None] - 1)
+    abaixo = np.floor(posicoes).astype(np.int64)
+    acima = np.minimum(abaixo + 1, (inicios + contagens - 1)[:, None])
+    fracao = posicoes - abaixo
+    resultado = valores[abaixo] * (1 - fracao) + valores[acima] * fracao
+    return chaves[inicios], contagens, resultado
+
+
+class IndicePrecoM2:
+    """
+    Índice de preço por m² por (bairro, tipo de imóvel, mês) com estado persistente.
+    """
+    
+    def __init__(self, caminho_estado):
+        """
+        Inicializa o índice e carrega o estado salvo, se houver.
+        
+        Args:
+            caminho_estado (str): Arquivo JSON do índice
+        """
+        self.caminho_estado = caminho_estado
+        self.modo = None
+        self.linhas_processadas = 0
+        self._definir(self._carregar() or {'bairros': [TODOS], 'tipos': [], 'chaves': [], 'contagens': [], 'quantis': []})
+    
+    def _carregar(self):
+        """
+        Carrega o estado salvo (descartado se os quantis guardados forem outros).
+        
+        Returns:
+            dict: Estado do índice ou None se ausente/incompatível
+        """
+        return persistencia.carregar_estado(
+            self.caminho_estado, VERSAO_ESTADO, 'do índice de preço por m²',
+            valido=lambda estado: tuple(estado.get('niveis_quantis', ())) == QUANTIS, logger=logger
+        )
+    
+    def _definir(self, estado):
+        """
+        Carrega o estado nos arrays ordenados e vocabulários do índice.
+        
+        Args:
+            estado (dict): Estado (vocabulários, células e marcas de atualização)
+        """
+        self.estado = estado
+        self.bairros = list(estado['bairros'])
+        self.tipos = list(estado['tipos'])
+        self.codigo_bairro = {nome: i for i, nome in enumerate(self.bairros)}
+        self.codigo_tipo = {nome: i for i, nome in enumerate(self.tipos)}
+        self.chaves = np.asarray(estado['chaves'], dtype=np.int64)
+        self.contagens = np.asarray(estado['contagens'], dtype=np.int64)
+        self.quantis = np.asarray(estado['quantis'], dtype=float).reshape(len(self.chaves), len(QUANTIS))
+    
+    def salvar(self):
+        """
+        Salva o índice.
+        
+        Returns:
+            str: Caminho do estado ou None em caso de erro
+        """
+        self.estado.update({
+            'niveis_quantis': list(QUANTIS),
+            'bairros': self.bairros,
+            'tipos': self.tipos,
+            'chaves': self.chaves.tolist(),
+            'contagens': self.contagens.tolist(),
+            'quantis': self.quantis.tolist()
+        })
+        return persistencia.salvar_estado(self.caminho_estado, self.estado, VERSAO_ESTADO, 'do índice de preço por m²', logger=logger)
+    
+    def atualizar(self, df):
+        """
+        Incorpora as vendas ao índice, recalculando apenas os meses abertos.
+        
+        O índice é refeito por completo quando não há estado ou quando a quantidade ou a
+        soma dos preços por m² das vendas válidas dos meses já fechados mudou (vendas
+        antigas incluídas, removidas ou corrigidas).
+        
+        Args:
+            df (pandas.DataFrame): Vendas com data_venda, bairro, tipo_imovel, area_m2 e valor_venda
+        """
+        area = df['area_m2'].to_numpy(dtype=float)
+        valor = df['valor_venda'].to_numpy(dtype=float)
+        meses = _meses(df['data_venda'])
+        validos = (area >= AREA_MINIMA) & (valor > 0) & (meses != np.iinfo(np.int64).min)
+        precos = np.divide(valor, area, out=np.zeros(len(valor)), where=validos)
+        
+        mes_aberto = self.estado.get('mes_aberto')
+        completo = mes_aberto is None
+        if not completo:
+            fechadas = validos & (meses < mes_aberto)
+            completo = (int(fechadas.sum()) != self.estado['linhas_fechadas']
+                        or not np.isclose(precos[fechadas].sum(), self.estado['soma_fechada'], rtol=1e-9, atol=1e-6))
+        if completo:
+            self._definir({'bairros': [TODOS], 'tipos': [], 'chaves': [], 'contagens': [], 'quantis': []})
+            mes_aberto = np.iinfo(np.int64).min
+        selecionadas = np.flatnonzero(validos & (meses >= mes_aberto))
+        self.modo = 'completo' if completo else 'incremental'
+        self.linhas_processadas = len(selecionadas)
+        
+        if len(selecionadas):
+            bairros = codificar_categorias(df['bairro'].iloc[selecionadas], self.bairros, self.codigo_bairro)
+            tipos = codificar_categorias(df['tipo_imovel'].iloc[selecionadas], self.tipos, self.codigo_tipo)
+            preco = precos[selecionadas]
+            meses_sel = meses[selecionadas]
+            
+            # Cada venda entra na célula do seu bairro e na célula de todos os bairros
+            chaves = np.concatenate([
+                _chaves(bairros, tipos, meses_sel),
+                _chaves(np.full(len(tipos), self.codigo_bairro[TODOS]), tipos, meses_sel)
+            ])
+            novas, contagens, quantis = calcular_quantis(chaves, np.concatenate([preco, preco]))
+            
+            # Substituir as células dos meses reabertos e manter a ordenação das chaves
+            mantidas = (self.chaves & ((1 << BITS_MES) - 1)) < mes_aberto
+            chaves = np.concatenate([self.chaves[mantidas], novas])
+            ordem = np.argsort(chaves, kind='stable')
+            self.chaves = chaves[ordem]
+            self.contagens = np.concatenate([self.contagens[mantidas], contagens])[ordem]
+            self.quantis = np.concatenate([self.quantis[mantidas], quantis])[ordem]
+        
+        if validos.any():
+            novo_aberto = int(meses[validos].max()) - MESES_ABERTOS + 1
+            self.estado['mes_aberto'] = novo_aberto
+            fechadas = validos & (meses < novo_aberto)
+            self.estado['linhas_fechadas'] = int(fechadas.sum())
+            self.estado['soma_fechada'] = float(precos[fechadas].sum())
+    
+    def estimar(self, bairros, tipos, areas=None, meses=None, min_amostras=MIN_AMOSTRAS):
+        """
+        Estima o preço por m² (e o valor, se houver área) de vários imóveis de uma vez.
+        
+        Para cada imóvel é usada a célula mais recente do seu bairro e tipo até o mês de
+        referência com pelo menos min_amostras vendas; na falta dela, a célula de todos os
+        bairros do mesmo tipo. As buscas são binárias sobre as chaves ordenadas.
+        
+        Args:
+            bairros (array-like): Bairro de cada imóvel
+            tipos (array-like): Tipo de cada imóvel
+            areas (array-like): Área de cada imóvel em m² (opcional)
+            meses (array-like): Mês de referência ('AAAA-MM' ou datas; padrão: mês mais recente do índice)
+            min_amostras (int): Vendas mínimas da célula usada
+        
+        Returns:
+            dict: Arrays 'preco_m2' (mediana), 'preco_m2_inferior' / 'preco_m2_superior'
+                  (quartis), 'amostras', 'mes_referencia', 'nivel' ('bairro', 'tipo' ou None)
+                  e, com área, 'valor_estimado', 'valor_inferior' e 'valor_superior'
+        """
+        bairros = np.atleast_1d(np.asarray(bairros, dtype=object))
+        tipos = np.atleast_1d(np.asarray(tipos, dtype=object))
+        n = len(bairros)
+        
+        if meses is None:
+            mes_maximo = int((self.chaves & ((1 << BITS_MES) - 1)).max()) if len(self.chaves) else 0
+            meses = np.full(n, mes_maximo, dtype=np.int64)
+        else:
+            meses = _meses(pd.Series(np.atleast_1d(meses)))
+            meses = np.broadcast_to(meses, (n,))
+        
+        codigos_tipo = np.array([self.codigo_tipo.get(t, -1) for t in tipos], dtype=np.int64)
+        codigos_bairro = np.array([self.codigo_bairro.get(b, -1) for b in bairros], dtype=np.int64)
+        posicao = np.full(n, -1, dtype=np.int64)
+        nivel = np.full(n, None, dtype=object)
+        
+        # Primeiro o bairro do imóvel, depois todos os bairros
+        for nome_nivel, codigos in (('bairro', codigos_bairro), ('tipo', np.full(n, self.codigo_bairro[TODOS]))):
+            pendentes = (posicao < 0) & (codigos >= 0) & (codigos_tipo >= 0)
+            if not pendentes.any() or not len(self.chaves):
+                continue
+            prefixos = _chaves(codigos[pendentes], codigos_tipo[pendentes], 0)
+            encontradas = np.searchsorted(self.chaves, prefixos | meses[pendentes], side='right') - 1
+            dentro = (encontradas >= 0) & ((self.chaves[np.maximum(encontradas, 0)] >> BITS_MES) == (prefixos >> BITS_MES))
+            # Célula com poucas vendas: recua uma célula no mesmo bairro e tipo
+            poucas = dentro & (self.contagens[np.maximum(encontradas, 0)] < min_amostras)
+            anteriores = encontradas - 1
+            recua = poucas & (anteriores >= 0) & ((self.chaves[np.maximum(anteriores, 0)] >> BITS_MES) == (prefixos >> BITS_MES)) \
+                & (self.contagens[np.maximum(anteriores, 0)] >= min_amostras)
+            encontradas = np.where(recua, anteriores, encontradas)
+            aceitas = dentro & (~poucas | recua)
+            indices = np.flatnonzero(pendentes)[aceitas]
+            posicao[indices] = encontradas[aceitas]
+            nivel[indices] = nome_nivel
+        
+        encontrados = posicao >= 0
+        quantis = np.where(encontrados[:, None], self.quantis[np.maximum(posicao, 0)], np.nan) if len(self.chaves) else np.full((n, len(QUANTIS)), np.nan)
+        mediana, inferior, superior = (quantis[:, QUANTIS.index(q)] for q in (0.5, 0.25, 0.75))
+        meses_celula = self.chaves[np.maximum(posicao, 0)] & ((1 << BITS_MES) - 1) if len(self.chaves) else np.zeros(n, dtype=np.int64)
+        
+        resultado = {
+            'preco_m2': mediana,
+            'preco_m2_inferior': inferior,
+            'preco_m2_superior': superior,
+            'amostras': np.where(encontrados, self.contagens[np.maximum(posicao, 0)] if len(self.chaves) else 0, 0),
+            'mes_referencia': np.where(encontrados, _rotulo_mes(meses_celula), None),
+            'nivel': nivel
+        }
+        if areas is not None:
+            areas = np.broadcast_to(np.asarray(areas, dtype=float), (n,))
+            resultado.update({
+                'valor_estimado': mediana * areas,
+                'valor_inferior': inferior * areas,
+                'valor_superior': superior * areas
+            })
+        return resultado
+    
+    def estimar_imovel(self, bairro, tipo, area=None, mes=None):
+        """
+        Estima o preço por m² e o valor de um único imóvel.
+        
+        Args:
+            bairro (str): Bairro
+            tipo (str): Tipo de imóvel
+            area (float): Área em m² (opcional)
+            mes (str): Mês de referência 'AAAA-MM' (padrão: mês mais recente do índice)
+        
+        Returns:
+            dict: Campos de estimar para o imóvel
+        """
+        resultado = self.estimar([bairro], [tipo], None if area is None else [area], None if mes is None else [mes])
+        return {campo: valores[0].item() if hasattr(valores[0], 'item') else valores[0] for campo, valores in resultado.items()}
+    
+    def tabela(self, meses_recentes=None):
+        """
+        Células do índice em formato tabular.
+        
+        Args:
+            meses_recentes (int): Limitar aos últimos meses do índice (padrão: todos)
+        
+        Returns:
+            pandas.DataFrame: bairro, tipo_imovel, mes, quantidade e quantis do preço por m²
+        """
+        meses = self.chaves & ((1 << BITS_MES) - 1)
+        selecao = np.ones(len(self.chaves), dtype=bool)
+        if meses_recentes and len(self.chaves):
+            selecao = meses > meses.max() - meses_recentes
+        bairros = np.array(self.bairros, dtype=object)[(self.chaves[selecao] >> (BITS_TIPO + BITS_MES))]
+        tipos = np.array(self.tipos, dtype=object)[(self.chaves[selecao] >> BITS_MES) & ((1 << BITS_TIPO) - 1)]
+        tabela = pd.DataFrame({
+            'bairro': bairros,
+            'tipo_imovel': tipos,
+            'mes': _rotulo_mes(meses[selecao]),
+            'quantidade': self.contagens[selecao]
+        })
+        for i, q in enumerate(QUANTIS):
+            tabela['mediana' if q == 0.5 else f'p{int(q * 100)}'] = self.quantis[selecao, i]
+        return tabela
+
+
+def main():
+    """
+    Função principal: estima o preço por m² e o valor de um imóvel com o índice salvo.
+    """
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    
+    parser = argparse.ArgumentParser(description='Estimativa de valor de imóvel pelo índice de preço por m²')
+    parser.add_argument('--bairro', required=True, help='Bairro do imóvel')
+    parser.add_argument('--tipo', required=True, help='Tipo de imóvel')
+    parser.add_argument('--area', type=float, help='Área do imóvel em m²')
+    parser.add_argument('--mes', help='Mês de referência (AAAA-MM)')
+    parser.add_argument('--indice', default=os.path.join(base_dir, 'output', 'modelos', 'indice_preco_m2.json'), help='Arquivo do índice')
+    args = parser.parse_args()
+    
+    if not os.path.exists(args.indice):
+        print(f"Índice não encontrado em {args.indice}. Execute a análise primeiro.")
+        return
+    
+    estimativa = IndicePrecoM2(args.indice).estimar_imovel(args.bairro, args.tipo, args.area, args.mes)
+    if estimativa['nivel'] is None:
+        print("Sem vendas suficientes para estimar este imóvel.")
+        return
+    
+    origem = 'o bairro' if estimativa['nivel'] == 'bairro' else 'todos os bairros'
+    print(f"Preço por m² ({origem}, {estimativa['mes_referencia']}, {estimativa['amostras']} vendas): "
+          f"R$ {estimativa['preco_m2']:,.2f} (R$ {estimativa['preco_m2_inferior']:,.2f} a R$ {estimativa['preco_m2_superior']:,.2f})")
+    if args.area:
+        print(f"Valor estimado: R$ {estimativa['valor_estimado']:,.2f} "
+              f"(R$ {estimativa['valor_inferior']:,.2f} a R$ {estimativa['valor_superior']:,.2f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de instrumentação do pipeline
+Este script mede tempo de parede, tempo de CPU, pico de memória rastreada e
+quantidade de linhas de cada etapa, gravando os resultados em um manifesto
+de execução (JSON) para acompanhamento de regressões entre execuções diárias.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import functools
+import tracemalloc
+import logging
+from contextlib import contextmanager, ExitStack
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger('instrumentacao')
+
+# Instrumentador ativo no processo (None desativa a instrumentação)
+_instrumentador = None
+
+# Perfilador ativo no processo, acionado nas etapas decoradas com @instrumentado
+_perfilador = None
+
+
+class Instrumentador:
+    """
+    Coleta medições de etapas aninhadas do pipeline.
+    """
+    
+    def __init__(self, rastrear_memoria=True):
+        """
+        Inicializa o instrumentador.
+        
+        Args:
+            rastrear_memoria (bool): Rastrear pico de memória com tracemalloc
+        """
+        self.rastrear_memoria = rastrear_memoria
+        self.reiniciar()
+    
+    def reiniciar(self):
+        """
+        Descarta as medições anteriores e inicia uma nova execução.
+        """
+        self.registros = []
+        self._pilha = []
+        self._ordem = 0
+        self.inicio = datetime.now()
+        self._inicio_perf = time.perf_counter()
+        self._inicio_cpu = time.process_time()
+        
+        if self.rastrear_memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+    
+    @contextmanager
+    def etapa(self, nome, linhas=None):
+        """
+        Mede uma etapa do pipeline.
+        
+        Args:
+            nome (str): Nome da etapa
+            linhas (int): Quantidade de linhas processadas, se conhecida
+        
+        Yields:
+            dict: Registro da etapa (pode ser complementado durante a execução)
+        """
+        self._ordem += 1
+        registro = {
+            'ordem': self._ordem,
+            'etapa': nome,
+            'nivel': len(self._pilha),
+            'pai': self._pilha[-1]['etapa'] if self._pilha else None,
+            'inicio': datetime.now().isoformat(timespec='milliseconds'),
+            'linhas': linhas
+        }
+        
+        # O pico de memória é global ao tracemalloc: guardar o pico parcial do pai antes de zerá-lo
+        if self.rastrear_memoria and self._pilha:
+            pai = self._pilha[-1]
+            pai['_pico'] = max(pai['_pico'], tracemalloc.get_traced_memory()[1])
+        if self.rastrear_memoria:
+            tracemalloc.reset_peak()
+            registro['_pico'] = 0
+        
+        self._pilha.append(registro)
+        inicio_perf = time.perf_counter()
+        inicio_cpu = time.process_time()
+        try:
+            yield registro
+        finally:
+            registro['tempo_s'] = round(time.perf_counter() - inicio_perf, 6)
+            registro['cpu_s'] = round(time.process_time() - inicio_cpu, 6)
+            self._pilha.pop()
+            
+            if self.rastrear_memoria:
+                pico = max(registro.pop('_pico'), tracemalloc.get_traced_memory()[1])
+                registro['memoria_pico_mb'] = round(pico / (1024 * 1024), 3)
+                if self._pilha:
+                    self._pilha[-1]['_pico'] = max(self._pilha[-1]['_pico'], pico)
+                tracemalloc.reset_peak()
+            
+            self.registros.append(registro)
+    
+    def anotar(self, **campos):
+        """
+        Complementa o registro da etapa em andamento (ex.: linhas=1234).
+        
+        Args:
+            **campos: Campos a serem adicionados ao registro
+        """
+        if self._pilha:
+            self._pilha[-1].update(campos)
+    
+    def registrar(self, nome, tempo_s, cpu_s=None, linhas=None, **campos):
+        """
+        Registra uma medição feita fora do processo (ex.: em um worker).
+        
+        Args:
+            nome (str): Nome da etapa
+            tempo_s (float): Tempo de parede em segundos
+            cpu_s (float): Tempo de CPU em segundos
+            linhas (int): Quantidade de linhas processadas
+            **campos: Campos adicionais do registro
+        """
+        self._ordem += 1
+        registro = {
+            'ordem': self._ordem,
+            'etapa': nome,
+            'nivel': len(self._pilha),
+            'pai': self._pilha[-1]['etapa'] if self._pilha else None,
+            'inicio': datetime.now().isoformat(timespec='milliseconds'),
+            'linhas': linhas,
+            'tempo_s': round(tempo_s, 6),
+            'cpu_s': round(cpu_s, 6) if cpu_s is not None else None
+        }
+        registro.update(campos)
+        self.registros.append(registro)
+    
+    def gerar_manifesto(self):
+        """
+        Monta o manifesto da execução.
+        
+        Returns:
+            dict: Manifesto com metadados da execução e as medições de cada etapa
+        """
+        return {
+            'execucao': self.inicio.strftime('%Y%m%d_%H%M%S'),
+            'inicio': self.inicio.isoformat(timespec='seconds'),
+            'fim': datetime.now().isoformat(timespec='seconds'),
+            'duracao_s': round(time.perf_counter() - self._inicio_perf, 6),
+            'cpu_s': round(time.process_time() - self._inicio_cpu, 6),
+            'rastreamento_memoria': self.rastrear_memoria,
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'pandas': pd.__version__,
+            'argumentos': sys.argv[1:],
+            'etapas': sorted(self.registros, key=lambda r: r['ordem'])
+        }
+    
+    def salvar_manifesto(self, output_dir):
+        """
+        Salva o manifesto da execução e acrescenta um resumo ao histórico.
+        
+        Args:
+            output_dir (str): Diretório de saída do pipeline
+        
+        Returns:
+            str: Caminho do manifesto gerado ou None em caso de erro
+        """
+        try:
+            manifesto = self.gerar_manifesto()
+            diretorio = os.path.join(output_dir, 'manifestos')
+            os.makedirs(diretorio, exist_ok=True)
+            
+            caminho = os.path.join(diretorio, f"manifesto_{manifesto['execucao']}.json")
+            with open(caminho, 'w', encoding='utf-8') as f:
+                json.dump(manifesto, f, ensure_ascii=False, indent=4)
+            
+            # Histórico compacto (uma linha por execução) para comparar execuções diárias
+            resumo = {
+                'execucao': manifesto['execucao'],
+                'duracao_s': manifesto['duracao_s'],
+                'etapas': {r['etapa']: r['tempo_s'] for r in manifesto['etapas'] if r['nivel'] == 0}
+            }
+            with open(os.path.join(diretorio, 'historico.jsonl'), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(resumo, ensure_ascii=False) + '\n')
+            
+            logger.info(f"Manifesto de execução salvo em: {caminho}")
+            return caminho
+        except Exception as e:
+            logger.error(f"Erro ao salvar manifesto de execução: {str(e)}")
+            return None
+    
+    def imprimir_resumo(self):
+        """
+        Imprime uma tabela resumida das etapas no stdout.
+        """
+        print("\n" + "="*80)
+        print("DESEMPENHO POR ETAPA")
+        print("="*80)
+        print(f"{'Etapa':<44}{'Tempo (s)':>10}{'CPU (s)':>10}{'Pico (MB)':>10}{'Linhas':>10}")
+        print("-"*84)
+        for registro in sorted(self.registros, key=lambda r: r['ordem']):
+            nome = ('  ' * registro['nivel'] + registro['etapa'])[:43]
+            cpu = registro.get('cpu_s')
+            pico = registro.get('memoria_pico_mb')
+            linhas = registro.get('linhas')
+            print(f"{nome:<44}{registro['tempo_s']:>10.3f}"
+                  f"{cpu if cpu is not None else float('nan'):>10.3f}"
+                  f"{pico if pico is not None else float('nan'):>10.2f}"
+                  f"{linhas if linhas is not None else '-':>10}")
+        print("="*80)
+
+
+def ativar(rastrear_memoria=True):
+    """
+    Ativa a instrumentação no processo.
+    
+    Args:
+        rastrear_memoria (bool): Rastrear pico de memória com tracemalloc
+    
+    Returns:
+        Instrumentador: Instrumentador ativo
+    """
+    global _instrumentador
+    _instrumentador = Instrumentador(rastrear_memoria)
+    return _instrumentador
+
+
+def desativar():
+    """
+    Desativa a instrumentação no processo.
+    """
+    global _instrumentador
+    if _instrumentador is not None and _instrumentador.rastrear_memoria:
+        tracemalloc.stop()
+    _instrumentador = None
+
+
+def ativar_perfil(perfilador):
+    """
+    Ativa a captura de perfil (cProfile) nas etapas decoradas com @instrumentado.
+    
+    Args:
+        perfilador: Objeto com o gerenciador de contexto `perfilar(nome)`
+    """
+    global _perfilador
+    _perfilador = perfilador
+
+
+def desativar_perfil():
+    """
+    Desativa a captura de perfil.
+    """
+    global _perfilador
+    _perfilador = None
+
+
+def instrumentador_ativo():
+    """
+    Retorna o instrumentador ativo.
+    
+    Returns:
+        Instrumentador: Instrumentador ativo ou None se desativado
+    """
+    return _instrumentador
+
+
+@contextmanager
+def etapa(nome, linhas=None):
+    """
+    Mede uma etapa com o instrumentador ativo (sem custo quando desativado).
+    
+    Args:
+        nome (str): Nome da etapa
+        linhas (int): Quantidade de linhas processadas, se conhecida
+    
+    Yields:
+        dict: Registro da etapa ou None se a instrumentação estiver desativada
+    """
+    if _instrumentador is None:
+        yield None
+        return
+    
+    with _instrumentador.etapa(nome, linhas) as registro:
+        yield registro
+
+
+def anotar(**campos):
+    """
+    Complementa o registro da etapa em andamento, se houver instrumentação.
+    
+    Args:
+        **campos: Campos a serem adicionados ao registro
+    """
+    if _instrumentador is not None:
+        _instrumentador.anotar(**campos)
+
+
+def instrumentado(nome=None, linhas=None):
+    """
+    Decorador que mede a execução de uma função como etapa do pipeline
+    (e captura seu perfil, se houver um perfilador ativo).
+    
+    Sem `linhas`, a contagem vem do DataFrame retornado ou, na falta dele,
+    do primeiro DataFrame recebido como argumento.
+    
+    Args:
+        nome (str): Nome da etapa (padrão: nome da função)
+        linhas (callable): Função que recebe o primeiro argumento da chamada (a instância,
+            nos métodos) e retorna a contagem de linhas
+    
+    Returns:
+        callable: Decorador
+    """
+    def decorador(funcao):
+        nome_etapa = nome or funcao.__name__
+        
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            if _instrumentador is None and _perfilador is None:
+                return funcao(*args, **kwargs)
+            
+            with ExitStack() as contextos:
+                registro = None
+                if _instrumentador is not None:
+                    registro = contextos.enter_context(_instrumentador.etapa(nome_etapa))
+                if _perfilador is not None:
+                    contextos.enter_context(_perfilador.perfilar(nome_etapa))
+                
+                resultado = funcao(*args, **kwargs)
+                
+                if registro is not None and registro.get('linhas') is None:
+                    if linhas is not None:
+                        registro['linhas'] = linhas(args[0])
+                    elif isinstance(resultado, pd.DataFrame):
+                        registro['linhas'] = len(resultado)
+                    else:
+                        df = next((a for a in args if isinstance(a, pd.DataFrame)), None)
+                        registro['linhas'] = len(df) if df is not None else None
+                return resultado
+        
+        return envoltorio
+    return decorador
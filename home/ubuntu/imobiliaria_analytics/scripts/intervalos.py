@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de intervalos de confiança vetorizados
+Este script calcula intervalos de Wilson para proporções e reamostragens bootstrap
+de todos os grupos de uma vez (taxas de conversão por origem, VGV por corretor).
+Proporções são reamostradas diretamente pela distribuição binomial de cada grupo,
+com custo independente do número de linhas; somas usam pesos de Poisson
+(bootstrap de Poisson) processados em blocos de reamostragens com memória limitada,
+opcionalmente em paralelo. Os rótulos de confiança são derivados das probabilidades
+estimadas pelas reamostragens.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger('intervalos')
+
+# Quantil normal do intervalo de 95%
+Z_95 = 1.959964
+
+# Quantidade padrão de reamostragens
+REAMOSTRAGENS = 1000
+
+# Semente padrão (resultados reprodutíveis entre execuções)
+SEMENTE = 0
+
+# Máximo de elementos (observações x reamostragens) gerados por bloco
+LIMITE_ELEMENTOS_BLOCO = 1_000_000
+
+
+def intervalo_wilson(sucessos, tentativas, z=Z_95):
+    """
+    Intervalo de Wilson para proporções de vários grupos.
+    
+    Args:
+        sucessos (numpy.ndarray): Sucessos por grupo
+        tentativas (numpy.ndarray): Tentativas por grupo
+        z (float): Quantil normal do nível de confiança
+    
+    Returns:
+        tuple: (inferior, superior) por grupo (NaN para grupos sem tentativas)
+    """
+    sucessos = np.asarray(sucessos, dtype=float)
+    tentativas = np.asarray(tentativas, dtype=float)
+    validos = tentativas > 0
+    n = np.where(validos, tentativas, 1.0)
+    p = np.where(validos, sucessos / n, 0.0)
+    
+    denominador = 1 + z ** 2 / n
+    centro = (p + z ** 2 / (2 * n)) / denominador
+    margem = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominador
+    inferior = np.where(validos, np.clip(centro - margem, 0, 1), np.nan)
+    superior = np.where(validos, np.clip(centro + margem, 0, 1), np.nan)
+    return inferior, superior
+
+
+def reamostrar_proporcoes(sucessos, tentativas, reamostragens=REAMOSTRAGENS, semente=SEMENTE):
+    """
+    Bootstrap das proporções de todos os grupos em uma única operação.
+    
+    Reamostrar as n observações binárias de um grupo equivale a sortear
+    Binomial(n, p) sucessos, de modo que o custo depende apenas de grupos x reamostragens.
+    
+    Args:
+        sucessos (numpy.ndarray): Sucessos por grupo
+        tentativas (numpy.ndarray): Tentativas por grupo
+        reamostragens (int): Quantidade de reamostragens
+        semente (int): Semente do gerador
+    
+    Returns:
+        numpy.ndarray: Proporções reamostradas (reamostragens x grupos)
+    """
+    tentativas = np.asarray(tentativas, dtype=np.int64)
+    p = np.divide(sucessos, tentativas, out=np.zeros(len(tentativas)), where=tentativas > 0)
+    gerador = np.random.default_rng(semente)
+    amostras = gerador.binomial(tentativas, p, size=(reamostragens, len(tentativas)))
+    return np.divide(amostras, tentativas, out=np.full(amostras.shape, np.nan), where=tentativas > 0)
+
+
+def _somas_bloco(valores, inicios, fins, reamostragens, semente):
+    """
+    Somas por grupo de um bloco de reamostragens com pesos de Poisson(1).
+    
+    Args:
+        valores (numpy.ndarray): Valores ordenados por grupo
+        inicios (numpy.ndarray): Posição inicial de cada grupo em valores
+        fins (numpy.ndarray): Posição seguinte à última de cada grupo (igual ao início nos grupos vazios)
+        reamostragens (int): Reamostragens do bloco
+        semente (numpy.random.SeedSequence): Semente do bloco
+    
+    Returns:
+        numpy.ndarray: Somas (reamostragens x grupos)
+    """
+    ponderados = np.random.default_rng(semente).poisson(1.0, size=(reamostragens, len(valores))) * valores
+    # Soma de cada segmento contíguo pela diferença das somas acumuladas nas suas extremidades
+    acumuladas = np.zeros((reamostragens, len(valores) + 1))
+    np.cumsum(ponderados, axis=1, out=acumuladas[:, 1:])
+    return acumuladas[:, fins] - acumuladas[:, inicios]
+
+
+def reamostrar_somas(codigos, valores, n_grupos, reamostragens=REAMOSTRAGENS, semente=SEMENTE, max_workers=None):
+    """
+    Bootstrap das somas por grupo (ex.: VGV de cada corretor) de todos os grupos de uma vez.
+    
+    Cada observação recebe, em cada reamostragem, um peso Poisson(1). As reamostragens
+    são geradas em blocos de no máximo LIMITE_ELEMENTOS_BLOCO elementos, cada bloco com
+    a sua própria semente derivada, de modo que o resultado não depende da quantidade
+    de workers.
+    
+    Args:
+        codigos (numpy.ndarray): Grupo de cada observação (0 .. n_grupos - 1)
+        valores (numpy.ndarray): Valor de cada observação
+        n_grupos (int): Quantidade de grupos
+        reamostragens (int): Quantidade de reamostragens
+        semente (int): Semente do gerador
+        max_workers (int): Threads para processar os blocos (None ou 1 = sequencial)
+    
+    Returns:
+        numpy.ndarray: Somas reamostradas (reamostragens x grupos)
+    """
+    codigos = np.asarray(codigos, dtype=np.int64)
+    if len(codigos) == 0:
+        return np.zeros((reamostragens, n_grupos))
+    
+    # Observações ordenadas por grupo: cada reamostragem soma segmentos contíguos
+    ordem = np.argsort(codigos, kind='stable')
+    valores = np.nan_to_num(np.asarray(valores, dtype=float))[ordem]
+    inicios = np.searchsorted(codigos[ordem], np.arange(n_grupos), side='left')
+    fins = np.searchsorted(codigos[ordem], np.arange(n_grupos), side='right')
+    por_bloco = max(1, min(reamostragens, LIMITE_ELEMENTOS_BLOCO // max(len(valores), 1)))
+    tamanhos = [min(por_bloco, reamostragens - inicio) for inicio in range(0, reamostragens, por_bloco)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    
+    def processar(bloco):
+        return _somas_bloco(valores, inicios, fins, tamanhos[bloco], sementes[bloco])
+    
+    if max_workers and max_workers > 1 and len(tamanhos) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            blocos = list(executor.map(processar, range(len(tamanhos))))
+    else:
+        blocos = [processar(bloco) for bloco in range(len(tamanhos))]
+    return np.vstack(blocos)
+
+
+def intervalo_percentil(amostras, confianca=0.95):
+    """
+    Intervalo percentil das reamostragens de cada grupo.
+    
+    Args:
+        amostras (numpy.ndarray): Reamostragens (reamostragens x grupos)
+        confianca (float): Nível de confiança
+    
+    Returns:
+        tuple: (inferior, superior) por grupo
+    """
+    cauda = (1 - confianca) / 2
+    inferior, superior = np.nanquantile(amostras, [cauda, 1 - cauda], axis=0)
+    return inferior, superior
+
+
+def rotulo_confianca(probabilidade):
+    """
+    Converte a probabilidade de uma conclusão (estimada nas reamostragens) em rótulo.
+    
+    Args:
+        probabilidade (numpy.ndarray): Probabilidades entre 0 e 1
+    
+    Returns:
+        numpy.ndarray: 'alta' (>= 95%), 'média' (>= 80%) ou 'baixa'
+    """
+    probabilidade = np.asarray(probabilidade, dtype=float)
+    return np.where(probabilidade >= 0.95, 'alta', np.where(probabilidade >= 0.8, 'média', 'baixa')).astype(object)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de estatísticas móveis segmentadas
+Este script calcula, para todos os segmentos de uma vez (ex.: cada combinação de
+bairro e tipo de imóvel), médias móveis, volume móvel e mediana móvel de preço
+em várias janelas. As somas usam somas acumuladas sobre a matriz densa
+(segmentos x dias) e a mediana usa uma lista ordenada deslizante por segmento.
+"""
+
+import bisect
+import logging
+
+import numpy as np
+import pandas as pd
+
+import tendencias
+
+logger = logging.getLogger('janelas_moveis')
+
+
+def somas_moveis(matriz, janela):
+    """
+    Soma móvel ao longo dos dias (eixo 1) de todas as séries.
+    
+    Args:
+        matriz (numpy.ndarray): Matriz (séries x dias)
+        janela (int): Tamanho da janela em dias
+    
+    Returns:
+        numpy.ndarray: Somas móveis (NaN enquanto a janela não está completa)
+    """
+    matriz = np.asarray(matriz, dtype=float)
+    acumulada = np.zeros((matriz.shape[0], matriz.shape[1] + 1))
+    np.cumsum(matriz, axis=1, out=acumulada[:, 1:])
+    
+    resultado = np.full(matriz.shape, np.nan)
+    if janela <= matriz.shape[1]:
+        resultado[:, janela - 1:] = acumulada[:, janela:] - acumulada[:, :-janela]
+    return resultado
+
+
+def medianas_moveis(indice_dia, valores, n_dias, janela):
+    """
+    Mediana móvel dos valores individuais de uma série.
+    
+    Mantém os valores da janela em uma lista ordenada: a cada dia entram os valores
+    do dia e saem os do dia que deixou a janela.
+    
+    Args:
+        indice_dia (numpy.ndarray): Dia de cada valor, em ordem crescente
+        valores (numpy.ndarray): Valores, na mesma ordem de indice_dia
+        n_dias (int): Quantidade de dias da série
+        janela (int): Tamanho da janela em dias
+    
+    Returns:
+        numpy.ndarray: Mediana por dia (NaN sem valores na janela ou janela incompleta)
+    """
+    medianas = np.full(n_dias, np.nan)
+    if len(valores) == 0:
+        return medianas
+    
+    # Limites dos valores de cada dia em indice_dia (listas Python: acesso escalar mais rápido)
+    limites = np.searchsorted(indice_dia, np.arange(n_dias + 1)).tolist()
+    valores = np.asarray(valores, dtype=float).tolist()
+    ordenados = []
+    
+    for dia in range(int(indice_dia[0]), n_dias):
+        for valor in valores[limites[dia]:limites[dia + 1]]:
+            bisect.insort(ordenados, valor)
+        
+        saida = dia - janela
+        if saida >= 0:
+            for valor in valores[limites[saida]:limites[saida + 1]]:
+                del ordenados[bisect.bisect_left(ordenados, valor)]
+        
+        if ordenados and dia >= janela - 1:
+            meio = len(ordenados) // 2
+            medianas[dia] = ordenados[meio] if len(ordenados) % 2 else (ordenados[meio - 1] + ordenados[meio]) / 2
+    
+    return medianas
+
+
+def calcular_janelas_segmentadas(df, coluna_data, coluna_valor, colunas_segmento, janelas=(7, 30, 90)):
+    """
+    Calcula as estatísticas móveis de todos os segmentos.
+    
+    Args:
+        df (pandas.DataFrame): Registros (ex.: vendas)
+        coluna_data (str): Coluna de data
+        coluna_valor (str): Coluna de preço
+        colunas_segmento (list): Colunas que definem o segmento
+        janelas (tuple): Tamanhos das janelas em dias
+    
+    Returns:
+        dict: 'dias', 'segmentos' e, por janela, matrizes (segmentos x dias) de
+              'media_movel' (valor diário médio), 'volume', 'preco_medio' e 'mediana_preco'
+    """
+    dias, segmentos, somas, contagens = tendencias.montar_matriz_diaria(df, coluna_data, coluna_valor, list(colunas_segmento))
+    n_dias = len(dias)
+    
+    # Valores individuais ordenados por (segmento, dia) para as medianas
+    datas = df[coluna_data].dt.normalize()
+    codigos, _ = pd.factorize(pd.MultiIndex.from_frame(df[list(colunas_segmento)]), sort=True)
+    indice_dia = ((datas - dias[0]) // pd.Timedelta(days=1)).to_numpy(dtype=np.int64)
+    precos = df[coluna_valor].to_numpy(dtype=float)
+    
+    validos = (codigos >= 0) & ~np.isnan(precos)
+    codigos, indice_dia, precos = codigos[validos], indice_dia[validos], precos[validos]
+    ordem = np.lexsort((indice_dia, codigos))
+    codigos, indice_dia, precos = codigos[ordem], indice_dia[ordem], precos[ordem]
+    limites_segmento = np.searchsorted(codigos, np.arange(len(segmentos) + 1))
+    
+    resultado = {'dias': dias, 'segmentos': segmentos, 'janelas': {}}
+    for janela in janelas:
+        soma_valor = somas_moveis(somas, janela)
+        volume = somas_moveis(contagens, janela)
+        
+        mediana = np.full((len(segmentos), n_dias), np.nan)
+        for i in range(len(segmentos)):
+            inicio, fim = limites_segmento[i], limites_segmento[i + 1]
+            mediana[i] = medianas_moveis(indice_dia[inicio:fim], precos[inicio:fim], n_dias, janela)
+        
+        resultado['janelas'][janela] = {
+            'media_movel': soma_valor / janela,
+            'volume': volume,
+            'preco_medio': np.divide(soma_valor, volume, out=np.full(soma_valor.shape, np.nan), where=volume > 0),
+            'mediana_preco': mediana
+        }
+    
+    return resultado
@@ -14,15 +14,6 @@ import logging
 import argparse
 from datetime import datetime
 
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(os.path.dirname(__file__), '..', 'output', 'automacao.log')),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger('main')
 
 # Adicionar diretório de scripts ao path
@@ -35,7 +26,12 @@ try:
     from data_processor import DataProcessor
     from data_analyzer import DataAnalyzer
     from report_generator import ReportGenerator
-    logger.info("Módulos importados com sucesso")
+    from monitor_dados import MonitorDados, PipelineResidente
+    from servidor_metricas import iniciar_servidor
+    import instrumentacao
+    import perfilador
+    import persistencia
+    import config_logging
 except ImportError as e:
     logger.error(f"Erro ao importar módulos: {str(e)}")
     sys.exit(1)
@@ -47,16 +43,40 @@ def main():
     # Configurar argumentos de linha de comando
     parser = argparse.ArgumentParser(description='Automação de Análise de Dados Imobiliários')
     parser.add_argument('--gerar-dados', action='store_true', help='Gerar dados de exemplo')
+    parser.add_argument('--num-vendas', type=int, default=200, help='Número de vendas geradas com --gerar-dados')
+    parser.add_argument('--num-leads', type=int, default=500, help='Número de leads gerados com --gerar-dados')
+    parser.add_argument('--periodo-dias', type=int, default=100, help='Período em dias dos dados gerados com --gerar-dados')
     parser.add_argument('--pular-processamento', action='store_true', help='Pular etapa de processamento de dados')
     parser.add_argument('--pular-analise', action='store_true', help='Pular etapa de análise de dados')
     parser.add_argument('--apenas-relatorio', action='store_true', help='Gerar apenas o relatório final')
+    parser.add_argument('--monitorar', action='store_true', help='Manter o processo residente e reprocessar quando data/ for alterado')
+    parser.add_argument('--intervalo-monitoramento', type=float, default=1.0, help='Intervalo de varredura (s) quando o inotify não está disponível')
+    parser.add_argument('--debounce', type=float, default=2.0, help='Segundos sem novas escritas antes de reprocessar')
+    parser.add_argument('--servidor', action='store_true', help='Servir métricas e resultados via HTTP local (combinável com --monitorar)')
+    parser.add_argument('--host', default='127.0.0.1', help='Endereço de escuta do servidor de métricas (padrão: apenas local)')
+    parser.add_argument('--porta', type=int, default=8050, help='Porta do servidor de métricas')
+    parser.add_argument('--manifesto', action='store_true', help='Instrumentar as etapas e salvar um manifesto de execução em output/manifestos')
+    parser.add_argument('--resumo-etapas', action='store_true', help='Exibir tabela de desempenho por etapa ao final (implica --manifesto)')
+    parser.add_argument('--sem-memoria', action='store_true', help='Não rastrear o pico de memória (reduz o custo da instrumentação)')
+    perfilador.adicionar_argumentos(parser)
+    config_logging.adicionar_argumentos(parser)
     args = parser.parse_args()
     
+    # Os modos residentes não chegam ao final da execução, onde o perfil e o resumo de etapas são gravados
+    if args.monitorar or args.servidor:
+        if args.perfil or args.resumo_etapas:
+            parser.error("--perfil e --resumo-etapas não podem ser combinados com --monitorar ou --servidor")
+        if args.manifesto and not args.monitorar:
+            parser.error("--manifesto com --servidor exige --monitorar (o manifesto é salvo a cada reprocessamento)")
+    
     # Definir diretórios do projeto
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     data_dir = os.path.join(base_dir, 'data')
     output_dir = os.path.join(base_dir, 'output')
     
+    # Configurar logging (fila com escrita em segundo plano)
+    config_logging.configurar_por_argumentos(args, output_dir)
+    
     # Criar diretórios se não existirem
     for directory in [data_dir, output_dir]:
         if not os.path.exists(directory):
@@ -67,11 +87,15 @@ def main():
     logger.info("Iniciando processo de automação de análise de dados imobiliários")
     inicio = datetime.now()
     
+    if args.manifesto or args.resumo_etapas:
+        instrumentacao.ativar(rastrear_memoria=not args.sem_memoria)
+    perfil = perfilador.iniciar(args, output_dir)
+    
     # Etapa 1: Geração de dados (opcional)
     if args.gerar_dados:
         logger.info("Iniciando geração de dados de exemplo")
         generator = DataGenerator(data_dir)
-        sucesso = generator.gerar_todos_dados(num_producao=200, num_leads=500, periodo_dias=100)
+        sucesso = generator.gerar_todos_dados(num_producao=args.num_vendas, num_leads=args.num_leads, periodo_dias=args.periodo_dias)
         
         if not sucesso:
             logger.error("Falha na geração de dados. Abortando processo.")
@@ -93,6 +117,28 @@ def main():
         logger.error("Arquivos de dados necessários não encontrados.")
         sys.exit(1)
     
+    # Modo residente: processa tudo uma vez e reprocessa a cada alteração em data/
+    if args.monitorar:
+        arquivos = {'producao': arquivo_producao, 'ganhos': arquivo_ganhos, 'leads': arquivo_leads}
+        pipeline = PipelineResidente(data_dir, output_dir, arquivos)
+        
+        if not pipeline.executar():
+            logger.error("Falha na execução inicial do pipeline. Abortando monitoramento.")
+            sys.exit(1)
+        
+        if args.servidor:
+            iniciar_servidor(data_dir, output_dir, arquivos, args.host, args.porta, em_segundo_plano=True)
+        
+        monitor = MonitorDados(data_dir, arquivos.values(), args.intervalo_monitoramento, args.debounce)
+        pipeline.monitorar(monitor)
+        return
+    
+    # Modo servidor: apenas serve os resultados da última execução
+    if args.servidor:
+        arquivos = {'producao': arquivo_producao, 'ganhos': arquivo_ganhos, 'leads': arquivo_leads}
+        iniciar_servidor(data_dir, output_dir, arquivos, args.host, args.porta)
+        return
+    
     # Etapa 2: Processamento de dados
     if not args.pular_processamento and not args.apenas_relatorio:
         logger.info("Iniciando processamento de dados")
@@ -109,8 +155,7 @@ def main():
             del resultado_json['dataframes']
         
         caminho_resultado = os.path.join(output_dir, 'metricas_processadas.json')
-        with open(caminho_resultado, 'w', encoding='utf-8') as f:
-            json.dump(resultado_json, f, ensure_ascii=False, indent=4)
+        persistencia.salvar_json_atomico(caminho_resultado, resultado_json)
         
         logger.info(f"Processamento de dados concluído. Resultados salvos em: {caminho_resultado}")
         
@@ -195,6 +240,7 @@ def main():
         sys.exit(1)
     
     logger.info(f"Relatório gerado com sucesso: {caminho_relatorio}")
+    persistencia.registrar_execucao(output_dir, relatorio=os.path.basename(caminho_relatorio))
     
     # Registrar fim da execução
     fim = datetime.now()
@@ -216,6 +262,20 @@ def main():
     print("\nProcesso concluído com sucesso!")
     print(f"O relatório está disponível em: {caminho_relatorio}")
     print("="*80)
+    
+    # Manifesto de desempenho por etapa
+    instrumentador = instrumentacao.instrumentador_ativo()
+    if instrumentador is not None:
+        caminho_manifesto = instrumentador.salvar_manifesto(output_dir)
+        if args.resumo_etapas:
+            instrumentador.imprimir_resumo()
+        if caminho_manifesto:
+            print(f"Manifesto de execução: {caminho_manifesto}")
+    
+    # Perfil por etapa
+    caminho_perfil = perfilador.finalizar(perfil)
+    if caminho_perfil:
+        print(f"Resumo do perfil: {caminho_perfil}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de monitoramento contínuo da pasta de dados
+Este script mantém o pipeline residente em memória, observa a pasta data/
+(via inotify ou, na falta dele, por varredura periódica) e reprocessa apenas
+as etapas afetadas pelas planilhas alteradas.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+from datetime import datetime
+
+from data_processor import DataProcessor
+from data_analyzer import DataAnalyzer
+from report_generator import ReportGenerator
+import instrumentacao
+import persistencia
+import regras_insights
+
+logger = logging.getLogger('monitor_dados')
+
+# Máscaras de eventos do inotify (ver <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+EVENTOS_INOTIFY = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+CABECALHO_EVENTO = struct.Struct('iIII')
+
+
+class ObservadorInotify:
+    """
+    Observador de diretório baseado em inotify (Linux), acessado via ctypes.
+    """
+
+    def __init__(self, diretorio):
+        """
+        Inicializa o observador.
+
+        Args:
+            diretorio (str): Diretório a ser observado
+
+        Raises:
+            OSError: Se o inotify não estiver disponível na plataforma
+        """
+        nome_libc = ctypes.util.find_library('c')
+        if not sys.platform.startswith('linux') or not nome_libc:
+            raise OSError(errno.ENOSYS, "inotify indisponível nesta plataforma")
+
+        self._libc = ctypes.CDLL(nome_libc, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "Falha ao inicializar inotify")
+
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(diretorio), EVENTOS_INOTIFY)
+        if wd < 0:
+            os.close(self._fd)
+            raise OSError(ctypes.get_errno(), f"Falha ao observar {diretorio}")
+
+    def ler_eventos(self, timeout):
+        """
+        Aguarda eventos por até `timeout` segundos.
+
+        Args:
+            timeout (float): Tempo máximo de espera em segundos
+
+        Returns:
+            set: Nomes dos arquivos afetados
+        """
+        prontos, _, _ = select.select([self._fd], [], [], timeout)
+        if not prontos:
+            return set()
+
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        nomes = set()
+        posicao = 0
+        while posicao + CABECALHO_EVENTO.size <= len(buffer):
+            _, _, _, tamanho = CABECALHO_EVENTO.unpack_from(buffer, posicao)
+            posicao += CABECALHO_EVENTO.size
+            nome = buffer[posicao:posicao + tamanho].rstrip(b'\0')
+            posicao += tamanho
+            if nome:
+                nomes.add(os.fsdecode(nome))
+        return nomes
+
+    def fechar(self):
+        """
+        Libera o descritor do inotify.
+        """
+        os.close(self._fd)
+
+
+class ObservadorVarredura:
+    """
+    Observador de diretório por varredura periódica (fallback portátil).
+    """
+
+    def __init__(self, diretorio, arquivos, intervalo=1.0):
+        """
+        Inicializa o observador.
+
+        Args:
+            diretorio (str): Diretório a ser observado
+            arquivos (iterable): Nomes dos arquivos monitorados
+            intervalo (float): Intervalo entre varreduras em segundos
+        """
+        self.diretorio = diretorio
+        self.arquivos = list(arquivos)
+        self.intervalo = intervalo
+        self._assinaturas = self._ler_assinaturas()
+
+    def _ler_assinaturas(self):
+        """
+        Lê data de modificação e tamanho de cada arquivo monitorado.
+
+        Returns:
+            dict: Assinatura (mtime_ns, tamanho) por arquivo
+        """
+        assinaturas = {}
+        for arquivo in self.arquivos:
+            try:
+                info = os.stat(os.path.join(self.diretorio, arquivo))
+                assinaturas[arquivo] = (info.st_mtime_ns, info.st_size)
+            except FileNotFoundError:
+                assinaturas[arquivo] = None
+        return assinaturas
+
+    def ler_eventos(self, timeout):
+        """
+        Aguarda até a próxima varredura e retorna os arquivos alterados.
+
+        Args:
+            timeout (float): Tempo máximo de espera em segundos
+
+        Returns:
+            set: Nomes dos arquivos alterados
+        """
+        time.sleep(min(timeout, self.intervalo))
+        atuais = self._ler_assinaturas()
+        alterados = {a for a in self.arquivos if atuais[a] != self._assinaturas.get(a)}
+        self._assinaturas = atuais
+        return alterados
+
+    def fechar(self):
+        """
+        Nada a liberar na varredura periódica.
+        """
+
+
+class MonitorDados:
+    """
+    Observa a pasta de dados e agrupa rajadas de escrita (debounce).
+    """
+
+    def __init__(self, data_dir, arquivos, intervalo=1.0, debounce=2.0, usar_inotify=True):
+        """
+        Inicializa o monitor.
+
+        Args:
+            data_dir (str): Diretório das planilhas
+            arquivos (iterable): Nomes dos arquivos monitorados
+            intervalo (float): Intervalo de varredura quando não há inotify
+            debounce (float): Segundos sem novas escritas antes de disparar o reprocessamento
+            usar_inotify (bool): Tentar usar inotify antes da varredura periódica
+        """
+        self.data_dir = data_dir
+        self.arquivos = set(arquivos)
+        self.intervalo = intervalo
+        self.debounce = debounce
+        self.observador = None
+
+        if usar_inotify:
+            try:
+                self.observador = ObservadorInotify(data_dir)
+                logger.info(f"Monitorando {data_dir} via inotify")
+            except OSError as e:
+                logger.warning(f"inotify indisponível ({str(e)}). Usando varredura periódica")
+
+        if self.observador is None:
+            self.observador = ObservadorVarredura(data_dir, self.arquivos, intervalo)
+            logger.info(f"Monitorando {data_dir} por varredura a cada {intervalo:.1f} segundos")
+
+    def aguardar_alteracoes(self):
+        """
+        Bloqueia até que uma rajada de alterações termine.
+
+        Returns:
+            set: Arquivos monitorados alterados durante a rajada
+        """
+        alterados = set()
+        ultimo_evento = None
+
+        while True:
+            timeout = self.debounce if ultimo_evento is not None else self.intervalo
+            eventos = self.observador.ler_eventos(timeout) & self.arquivos
+
+            if eventos:
+                alterados |= eventos
+                ultimo_evento = time.monotonic()
+            elif ultimo_evento is not None and time.monotonic() - ultimo_evento >= self.debounce:
+                return alterados
+
+    def fechar(self):
+        """
+        Libera os recursos do observador.
+        """
+        self.observador.fechar()
+
+
+class PipelineResidente:
+    """
+    Pipeline mantido em memória entre execuções.
+    Guarda os DataFrames limpos, as métricas e os resultados de cada análise,
+    reprocessando apenas o que depende dos arquivos alterados.
+    """
+
+    def __init__(self, data_dir, output_dir, arquivos):
+        """
+        Inicializa o pipeline residente.
+
+        Args:
+            data_dir (str): Diretório das planilhas
+            output_dir (str): Diretório de saída
+            arquivos (dict): Nome do arquivo por tipo de dado ('producao', 'ganhos', 'leads')
+        """
+        self.data_dir = data_dir
+        self.output_dir = output_dir
+        self.arquivos = arquivos
+        self.tipo_por_arquivo = {arquivo: tipo for tipo, arquivo in arquivos.items()}
+        self.processor = DataProcessor(data_dir)
+        self.dataframes = {}
+        self.metricas = {}
+        self.secoes = {}
+        logger.info("Pipeline residente inicializado")
+
+    def processar(self, tipos):
+        """
+        Recarrega, limpa e recalcula as métricas dos tipos informados.
+
+        Args:
+            tipos (iterable): Tipos de dados a reprocessar
+
+        Returns:
+            bool: True se todos os tipos foram processados com sucesso
+        """
+        for tipo in tipos:
+            if not self.processor.carregar_arquivo(tipo, self.arquivos[tipo]):
+                return False
+
+            self.dataframes[tipo] = self.processor.limpar_dados(tipo)
+            self.metricas[tipo] = self.processor.calcular_metricas(tipo, self.dataframes[tipo])
+
+        self.metricas['data_processamento'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        caminho_resultado = os.path.join(self.output_dir, 'metricas_processadas.json')
+        persistencia.salvar_json_atomico(caminho_resultado, self.metricas)
+
+        logger.info(f"Métricas atualizadas para {', '.join(sorted(tipos))}")
+        return True
+
+    def analisar(self, tipos):
+        """
+        Executa novamente apenas as análises que dependem dos tipos informados.
+
+        Args:
+            tipos (iterable): Tipos de dados alterados
+
+        Returns:
+            dict: Resultados consolidados da análise
+        """
+        tipos = set(tipos)
+        analisadores = []
+
+        for secao, metodo, dependencias in DataAnalyzer.SECOES_ANALISE:
+            if secao in self.secoes and not tipos.intersection(dependencias):
+                continue
+
+            # Cada seção usa um analisador próprio para isolar insights e figuras
+            analyzer = DataAnalyzer(self.dataframes, self.metricas, self.output_dir)
+            resultado = getattr(analyzer, metodo)()
+            self.secoes[secao] = (resultado, analyzer.insights, analyzer.recomendacoes, analyzer.figuras)
+            analisadores.append(analyzer)
+            logger.info(f"Seção de análise atualizada: {secao}")
+
+        # As figuras das seções são renderizadas em paralelo enquanto as demais seções são calculadas
+        for analyzer in analisadores:
+            analyzer.aguardar_figuras()
+        
+        resultados = {'insights': [], 'recomendacoes': [], 'figuras': []}
+        for secao, _, _ in DataAnalyzer.SECOES_ANALISE:
+            resultado, insights, recomendacoes, figuras = self.secoes[secao]
+            resultados[secao] = resultado
+            resultados['insights'].extend(insights)
+            resultados['recomendacoes'].extend(recomendacoes)
+            resultados['figuras'].extend(figuras)
+
+        resultados['insights'] = regras_insights.ordenar(resultados['insights'])
+        DataAnalyzer(self.dataframes, self.metricas, self.output_dir).salvar_resultados(resultados)
+        return resultados
+
+    def executar(self, tipos=None):
+        """
+        Executa o pipeline para os tipos alterados (ou todos) e gera o relatório.
+
+        Args:
+            tipos (iterable): Tipos de dados alterados; None reprocessa tudo
+
+        Returns:
+            str: Caminho do relatório gerado ou None em caso de erro
+        """
+        tipos = set(tipos) if tipos is not None else set(self.arquivos)
+        inicio = time.perf_counter()
+
+        instrumentador = instrumentacao.instrumentador_ativo()
+        if instrumentador is not None:
+            instrumentador.reiniciar()
+
+        if not self.processar(tipos):
+            logger.error("Falha no reprocessamento dos dados")
+            return None
+
+        resultados = self.analisar(tipos)
+
+        nome_arquivo = f"relatorio_estrategico_{datetime.now().strftime('%Y%m%d')}.pdf"
+        caminho_relatorio = ReportGenerator(resultados, self.output_dir).gerar_relatorio(nome_arquivo)
+
+        if caminho_relatorio:
+            persistencia.registrar_execucao(self.output_dir, relatorio=os.path.basename(caminho_relatorio),
+                                            tipos_atualizados=sorted(tipos))
+        
+        if instrumentador is not None:
+            instrumentador.salvar_manifesto(self.output_dir)
+
+        logger.info(f"Reprocessamento concluído em {time.perf_counter() - inicio:.2f} segundos")
+        return caminho_relatorio
+
+    def monitorar(self, monitor):
+        """
+        Laço principal: aguarda alterações e reprocessa as etapas afetadas.
+
+        Args:
+            monitor (MonitorDados): Monitor da pasta de dados
+        """
+        try:
+            while True:
+                alterados = monitor.aguardar_alteracoes()
+                tipos = {self.tipo_por_arquivo[arquivo] for arquivo in alterados}
+                logger.info(f"Arquivos alterados: {', '.join(sorted(alterados))}")
+                self.executar(tipos)
+        except KeyboardInterrupt:
+            logger.info("Monitoramento interrompido pelo usuário")
+        finally:
+            monitor.fechar()
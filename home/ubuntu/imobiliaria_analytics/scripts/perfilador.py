@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de perfilamento do pipeline
+Este script captura um perfil cProfile separado para cada etapa do pipeline
+(carregar_dados, limpar_dados_*, calcular_metricas_*, analisar_*, gerar_relatorio),
+opcionalmente com instantâneos do tracemalloc para localizar pontos de alocação,
+e grava os arquivos pstats e um resumo textual ranqueado em output/perfil/.
+"""
+
+import io
+import os
+import re
+import pstats
+import cProfile
+import tracemalloc
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+import instrumentacao
+
+logger = logging.getLogger('perfilador')
+
+
+class Perfilador:
+    """
+    Captura perfis de CPU (e, opcionalmente, de alocação) por etapa.
+    """
+    
+    def __init__(self, output_dir, memoria=False, top=25):
+        """
+        Inicializa o perfilador.
+        
+        Args:
+            output_dir (str): Diretório de saída do pipeline
+            memoria (bool): Capturar instantâneos do tracemalloc por etapa
+            top (int): Quantidade de funções/linhas listadas no resumo
+        """
+        self.execucao = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.diretorio = os.path.join(output_dir, 'perfil', self.execucao)
+        self.memoria = memoria
+        self.top = top
+        self.etapas = []
+        self._ativo = False
+        os.makedirs(self.diretorio, exist_ok=True)
+    
+    @contextmanager
+    def perfilar(self, nome):
+        """
+        Captura o perfil de uma etapa.
+        
+        Etapas aninhadas em outra etapa perfilada entram no perfil da etapa externa,
+        já que o cProfile não admite perfis simultâneos.
+        
+        Args:
+            nome (str): Nome da etapa
+        """
+        if self._ativo:
+            yield
+            return
+        
+        self._ativo = True
+        snapshot_inicial = None
+        if self.memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+            snapshot_inicial = tracemalloc.take_snapshot()
+        
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            self._ativo = False
+            
+            arquivo = f"{len(self.etapas) + 1:02d}_{re.sub(r'[^A-Za-z0-9_.-]', '_', nome)}.pstats"
+            caminho = os.path.join(self.diretorio, arquivo)
+            perfil.dump_stats(caminho)
+            
+            etapa = {'nome': nome, 'arquivo': caminho, 'alocacoes': []}
+            if snapshot_inicial is not None:
+                diferencas = tracemalloc.take_snapshot().compare_to(snapshot_inicial, 'lineno')
+                etapa['alocacoes'] = [str(d) for d in diferencas[:self.top]]
+            
+            self.etapas.append(etapa)
+            logger.info(f"Perfil da etapa {nome} salvo em: {caminho}")
+    
+    def gerar_resumo(self):
+        """
+        Grava o resumo textual ranqueado das funções mais custosas.
+        
+        Returns:
+            str: Caminho do resumo ou None se nenhuma etapa foi perfilada
+        """
+        if not self.etapas:
+            logger.warning("Nenhuma etapa perfilada")
+            return None
+        
+        saida = io.StringIO()
+        saida.write(f"PERFIL DA EXECUÇÃO {self.execucao}\n")
+        saida.write("=" * 80 + "\n\n")
+        
+        # Tempo total de cada etapa, da mais lenta para a mais rápida
+        totais = []
+        for etapa in self.etapas:
+            stats = pstats.Stats(etapa['arquivo'])
+            totais.append((stats.total_tt, etapa))
+        
+        saida.write("ETAPAS POR TEMPO TOTAL\n")
+        saida.write("-" * 80 + "\n")
+        for total, etapa in sorted(totais, key=lambda t: t[0], reverse=True):
+            saida.write(f"{total:>10.3f} s  {etapa['nome']}\n")
+        saida.write("\n")
+        
+        # Ranking global das funções (tempo próprio somado entre as etapas)
+        geral = pstats.Stats(*[etapa['arquivo'] for etapa in self.etapas], stream=saida)
+        saida.write("FUNÇÕES MAIS CUSTOSAS (TODAS AS ETAPAS, POR TEMPO PRÓPRIO)\n")
+        saida.write("-" * 80 + "\n")
+        geral.sort_stats('tottime').print_stats(self.top)
+        
+        # Ranking por etapa (tempo acumulado)
+        for total, etapa in totais:
+            saida.write(f"ETAPA: {etapa['nome']} ({total:.3f} s)\n")
+            saida.write("-" * 80 + "\n")
+            pstats.Stats(etapa['arquivo'], stream=saida).sort_stats('cumulative').print_stats(self.top)
+            
+            if etapa['alocacoes']:
+                saida.write("Maiores alocações (tracemalloc, por linha):\n")
+                for linha in etapa['alocacoes']:
+                    saida.write(f"  {linha}\n")
+                saida.write("\n")
+        
+        caminho = os.path.join(self.diretorio, 'perfil_resumo.txt')
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(saida.getvalue())
+        
+        logger.info(f"Resumo do perfil salvo em: {caminho}")
+        return caminho
+
+
+def adicionar_argumentos(parser):
+    """
+    Adiciona as opções de perfilamento a um parser de linha de comando.
+    
+    Args:
+        parser (argparse.ArgumentParser): Parser a ser estendido
+    """
+    parser.add_argument('--perfil', '--profile', dest='perfil', action='store_true',
+                        help='Capturar perfil cProfile por etapa em output/perfil/')
+    parser.add_argument('--perfil-memoria', action='store_true',
+                        help='Incluir instantâneos do tracemalloc por etapa no perfil')
+    parser.add_argument('--perfil-top', type=int, default=25,
+                        help='Quantidade de funções listadas no resumo do perfil')
+
+
+def iniciar(args, output_dir):
+    """
+    Ativa o perfilador se solicitado na linha de comando.
+    
+    Args:
+        args (argparse.Namespace): Argumentos com as opções de adicionar_argumentos
+        output_dir (str): Diretório de saída do pipeline
+    
+    Returns:
+        Perfilador: Perfilador ativo ou None se o perfilamento não foi solicitado
+    """
+    if not args.perfil:
+        return None
+    
+    perfilador = Perfilador(output_dir, memoria=args.perfil_memoria, top=args.perfil_top)
+    instrumentacao.ativar_perfil(perfilador)
+    logger.info(f"Perfilamento ativado. Resultados em: {perfilador.diretorio}")
+    return perfilador
+
+
+def finalizar(perfilador):
+    """
+    Desativa o perfilador e grava o resumo.
+    
+    Args:
+        perfilador (Perfilador): Perfilador retornado por iniciar (ou None)
+    
+    Returns:
+        str: Caminho do resumo ou None
+    """
+    if perfilador is None:
+        return None
+    
+    instrumentacao.desativar_perfil()
+    return perfilador.gerar_resumo()
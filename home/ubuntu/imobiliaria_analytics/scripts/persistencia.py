@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de persistência de arquivos do pipeline
+Este script reúne as rotinas de gravação atômica (arquivo temporário + os.replace)
+usadas para os resultados em JSON, para o marcador de execução concluída e para
+as figuras em cache, de modo que leitores concorrentes nunca vejam arquivos
+parcialmente escritos, e a leitura e gravação versionadas dos estados das análises
+incrementais (output/modelos/).
+"""
+
+import os
+import json
+import tempfile
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger('persistencia')
+
+# Marcador gravado ao final de cada execução completa do pipeline
+ARQUIVO_MARCADOR = 'ultima_execucao.json'
+
+# Máscara de criação de arquivos do processo, lida na primeira gravação (ver _mascara_criacao)
+_umask = None
+_trava_umask = threading.Lock()
+
+
+def _mascara_criacao():
+    """
+    Retorna a umask do processo, lida uma única vez.
+    
+    os.umask só pode ser lida alterando-a, então a leitura é feita sob uma trava
+    na primeira gravação, e não na importação do módulo.
+    
+    Returns:
+        int: Máscara de criação de arquivos
+    """
+    global _umask
+    with _trava_umask:
+        if _umask is None:
+            _umask = os.umask(0)
+            os.umask(_umask)
+    return _umask
+
+
+def criar_temporario(diretorio, sufixo):
+    """
+    Cria um arquivo temporário para gravação atômica com as permissões de um arquivo comum.
+    
+    tempfile.mkstemp cria o arquivo apenas para o dono (0600) e os.replace preserva esse
+    modo; aqui o temporário recebe o modo padrão (0666 menos a umask), para que o
+    dashboard e outros usuários continuem lendo os arquivos de output/.
+    
+    Args:
+        diretorio (str): Diretório do arquivo de destino
+        sufixo (str): Sufixo do temporário (ex.: '.json')
+    
+    Returns:
+        tuple: (descritor, caminho) do temporário
+    """
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, prefix='.tmp_', suffix=sufixo)
+    try:
+        os.chmod(temporario, 0o666 & ~_mascara_criacao())
+    except BaseException:
+        os.close(descritor)
+        os.remove(temporario)
+        raise
+    return descritor, temporario
+
+
+def salvar_json_atomico(caminho, dados, **kwargs):
+    """
+    Grava um JSON de forma atômica.
+
+    Args:
+        caminho (str): Caminho do arquivo de destino
+        dados: Objeto serializável em JSON
+        **kwargs: Argumentos adicionais repassados a json.dump
+
+    Returns:
+        str: Caminho do arquivo gravado
+    """
+    kwargs.setdefault('ensure_ascii', False)
+    kwargs.setdefault('indent', 4)
+
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    os.makedirs(diretorio, exist_ok=True)
+
+    descritor, temporario = criar_temporario(diretorio, '.json')
+    try:
+        with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, **kwargs)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+    return caminho
+
+
+def carregar_estado(caminho, versao, descricao, valido=None, logger=logger):
+    """
+    Lê o estado persistente de uma análise incremental (output/modelos/*.json).
+    
+    Estados ausentes, ilegíveis, de outra versão do formato ou reprovados pela
+    verificação de compatibilidade são descartados, e a análise refaz o estado.
+    
+    Args:
+        caminho (str): Arquivo JSON do estado
+        versao (int): Versão atual do formato do estado
+        descricao (str): Nome do estado nas mensagens de log (ex.: 'de previsão')
+        valido (callable): Verificação adicional de compatibilidade, que recebe o estado
+        logger (logging.Logger): Logger do módulo dono do estado
+    
+    Returns:
+        dict: Estado ou None se ausente/incompatível
+    """
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            estado = json.load(f)
+        if estado.get('versao') != versao or (valido is not None and not valido(estado)):
+            logger.info(f"Estado {descricao} incompatível, será refeito")
+            return None
+        return estado
+    except Exception as e:
+        logger.warning(f"Não foi possível ler o estado {descricao}: {str(e)}")
+        return None
+
+
+def salvar_estado(caminho, estado, versao, descricao, logger=logger):
+    """
+    Grava o estado persistente de uma análise incremental com a versão do formato.
+    
+    Falhas são registradas sem interromper a análise: na execução seguinte o estado
+    anterior (ou nenhum) é lido e refeito se necessário.
+    
+    Args:
+        caminho (str): Arquivo JSON do estado
+        estado (dict): Estado serializável em JSON
+        versao (int): Versão atual do formato do estado
+        descricao (str): Nome do estado nas mensagens de log (ex.: 'de previsão')
+        logger (logging.Logger): Logger do módulo dono do estado
+    
+    Returns:
+        str: Caminho do estado ou None em caso de erro
+    """
+    try:
+        return salvar_json_atomico(caminho, dict(estado, versao=versao))
+    except Exception as e:
+        logger.error(f"Erro ao salvar estado {descricao}: {str(e)}")
+        return None
+
+
+def registrar_execucao(output_dir, **detalhes):
+    """
+    Grava o marcador de execução concluída, sinalizando aos leitores
+    (ex.: servidor de métricas) que há resultados novos.
+
+    Args:
+        output_dir (str): Diretório de saída do pipeline
+        **detalhes: Informações adicionais sobre a execução
+
+    Returns:
+        str: Caminho do marcador
+    """
+    marcador = {'concluida_em': datetime.now().isoformat(timespec='seconds')}
+    marcador.update(detalhes)
+    return salvar_json_atomico(os.path.join(output_dir, ARQUIVO_MARCADOR), marcador)
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de pontuação de leads
+Este script treina, de forma incremental, um modelo logístico (SGDClassifier com
+partial_fit) sobre atributos dos leads codificados por hashing (origem, tipo de
+interesse, corretor, cruzamentos e faixa de valor) e pontua os leads em aberto em
+lotes vetorizados. O estado do modelo é salvo entre as execuções junto com os hashes
+dos leads rotulados já usados no treino; a cada nova execução, apenas os leads
+rotulados ainda não incorporados atualizam o modelo, inclusive os que chegam em
+exportações posteriores com desfecho antigo (ex.: venda registrada com atraso).
+"""
+
+import base64
+import logging
+import zlib
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.utils import murmurhash3_32
+
+import esbocos
+import persistencia
+from contatos_unicos import normalizar_contato
+
+logger = logging.getLogger('pontuacao_leads')
+
+# Versão do formato de output/modelos/pontuacao_leads.json (persistencia.carregar_estado descarta as demais)
+VERSAO_ESTADO = 2
+
+# Dimensão do espaço de atributos (hashing)
+N_ATRIBUTOS = 2 ** 12
+
+# Atributos categóricos e cruzamentos codificados por hashing
+COLUNAS_CATEGORICAS = ('origem', 'tipo_interesse', 'corretor_responsavel')
+CRUZAMENTOS = (('origem', 'tipo_interesse'), ('corretor_responsavel', 'tipo_interesse'))
+
+# Dias sem conversão após os quais um lead em aberto é considerado perdido
+PRAZO_PERDA_DIAS = 60
+
+# Status de leads descartados (desfecho negativo conhecido)
+STATUS_PERDIDO = 'Não interessado'
+
+# Passadas sobre os dados no primeiro treino (as atualizações fazem uma única passada)
+EPOCAS_INICIAIS = 5
+
+# Probabilidade a partir da qual um lead em aberto é considerado quente
+PROBABILIDADE_QUENTE = 0.5
+
+# Leads pontuados por lote
+TAMANHO_LOTE = 50_000
+
+# Colunas que identificam um lead entre exportações (as presentes na base)
+COLUNAS_IDENTIFICACAO = ('contato', 'origem', 'data_captacao', 'tipo_interesse')
+
+
+def _indices_hash(nome, valores, n_atributos):
+    """
+    Índice de hashing de cada valor, calculando o hash apenas dos valores distintos.
+    
+    Args:
+        nome (str): Nome do atributo (prefixo do hash)
+        valores (pandas.Series): Valores do atributo
+        n_atributos (int): Dimensão do espaço de atributos
+    
+    Returns:
+        tuple: (linhas válidas, índice do atributo de cada linha válida)
+    """
+    codigos, distintos = pd.factorize(valores)
+    # O índice 0 é reservado para o valor estimado (atributo numérico)
+    indices = np.array([murmurhash3_32(f'{nome}={valor}', positive=True) % (n_atributos - 1) + 1 for valor in distintos], dtype=np.int64)
+    validos = codigos >= 0
+    return np.flatnonzero(validos), indices[codigos[validos]]
+
+
+def montar_atributos(df, n_atributos=N_ATRIBUTOS):
+    """
+    Monta a matriz esparsa de atributos dos leads.
+    
+    Args:
+        df (pandas.DataFrame): Leads
+        n_atributos (int): Dimensão do espaço de atributos
+    
+    Returns:
+        scipy.sparse.csr_matrix: Matriz (leads x n_atributos)
+    """
+    n = len(df)
+    linhas, colunas, valores = [], [], []
+    
+    if 'valor_estimado' in df.columns:
+        valor = df['valor_estimado'].to_numpy(dtype=float)
+        # Escala logarítmica centrada em R$ 500 mil (log ~ 13); valores ausentes ficam em 0
+        escala = np.nan_to_num(np.log1p(np.clip(valor, 0, None)) - 13.0)
+        linhas.append(np.arange(n))
+        colunas.append(np.zeros(n, dtype=np.int64))
+        valores.append(escala)
+        
+        faixa = np.floor(np.log10(np.clip(valor, 1, None)) * 4).astype('float')
+        faixa[np.isnan(valor)] = np.nan
+        atributos = [('faixa_valor', pd.Series(faixa))]
+    else:
+        atributos = []
+    
+    atributos += [(coluna, df[coluna]) for coluna in COLUNAS_CATEGORICAS if coluna in df.columns]
+    atributos += [
+        (f'{a}*{b}', df[a].astype(str) + '|' + df[b].astype(str))
+        for a, b in CRUZAMENTOS if a in df.columns and b in df.columns
+    ]
+    
+    for nome, serie in atributos:
+        linhas_validas, indices = _indices_hash(nome, serie.reset_index(drop=True), n_atributos)
+        linhas.append(linhas_validas)
+        colunas.append(indices)
+        valores.append(np.ones(len(indices)))
+    
+    return sparse.csr_matrix(
+        (np.concatenate(valores), (np.concatenate(linhas), np.concatenate(colunas))),
+        shape=(n, n_atributos)
+    )
+
+
+def identificar_rotulados(df, rotulo):
+    """
+    Hash de cada lead combinado ao seu rótulo.
+    
+    O mesmo lead com o mesmo desfecho tem o mesmo hash em qualquer exportação; um lead
+    cujo desfecho mudou (ex.: dado como perdido e convertido depois) recebe um hash novo.
+    
+    Args:
+        df (pandas.DataFrame): Leads
+        rotulo (numpy.ndarray): Rótulo 0/1 de cada lead (NaN se em aberto)
+    
+    Returns:
+        numpy.ndarray: Hashes (uint64)
+    """
+    identificacao = pd.DataFrame({
+        coluna: (normalizar_contato(df[coluna]) if coluna == 'contato' else df[coluna]).astype(str).to_numpy()
+        for coluna in COLUNAS_IDENTIFICACAO if coluna in df.columns
+    })
+    identificacao['rotulo'] = rotulo
+    return esbocos.hash_valores(identificacao)
+
+
+def _codificar_hashes(hashes):
+    """
+    Hashes ordenados em texto para o JSON (diferenças sucessivas comprimidas em base64).
+    
+    Args:
+        hashes (numpy.ndarray): Hashes ordenados (uint64)
+    
+    Returns:
+        str: Texto codificado
+    """
+    diferencas = np.diff(hashes, prepend=np.uint64(0))
+    return base64.b64encode(zlib.compress(diferencas.astype('<u8').tobytes())).decode('ascii')
+
+
+def _decodificar_hashes(texto):
+    """
+    Hashes ordenados salvos com _codificar_hashes.
+    
+    Args:
+        texto (str): Texto codificado
+    
+    Returns:
+        numpy.ndarray: Hashes ordenados (uint64)
+    """
+    diferencas = np.frombuffer(zlib.decompress(base64.b64decode(texto)), dtype='<u8')
+    return np.cumsum(diferencas, dtype=np.uint64)
+
+
+def classificar_leads(df, agora):
+    """
+    Separa os leads com desfecho conhecido (rotulados) dos leads em aberto.
+    
+    Desfechos: convertido (positivo), descartado ou sem conversão há mais de
+    PRAZO_PERDA_DIAS dias (negativo). A data do rótulo é a data em que o desfecho
+    passou a ser conhecido.
+    
+    Args:
+        df (pandas.DataFrame): Leads
+        agora (pandas.Timestamp): Momento de referência
+    
+    Returns:
+        tuple: (rotulo, data_rotulo, abertos) — rótulo 0/1 (NaN se em aberto),
+               data do rótulo e máscara dos leads em aberto
+    """
+    captacao = df['data_captacao']
+    convertido = df['convertido'].fillna(False).astype(bool).to_numpy()
+    perdido = (df['status'] == STATUS_PERDIDO).to_numpy() if 'status' in df.columns else np.zeros(len(df), dtype=bool)
+    vencimento = captacao + pd.Timedelta(days=PRAZO_PERDA_DIAS)
+    
+    if 'data_conversao' in df.columns:
+        data_conversao = df['data_conversao'].fillna(captacao)
+    else:
+        data_conversao = captacao
+    
+    data_rotulo = pd.Series(
+        np.where(convertido, data_conversao, np.where(perdido, captacao, vencimento)),
+        index=df.index
+    ).astype('datetime64[ns]')
+    abertos = ~convertido & ~perdido & (vencimento > agora).to_numpy()
+    rotulo = np.where(abertos, np.nan, convertido.astype(float))
+    return rotulo, data_rotulo, abertos
+
+
+class ModeloPontuacaoLeads:
+    """
+    Modelo logístico incremental de probabilidade de conversão de leads com estado persistente.
+    """
+    
+    def __init__(self, caminho_estado, n_atributos=N_ATRIBUTOS):
+        """
+        Inicializa o modelo e carrega o estado salvo, se houver.
+        
+        Args:
+            caminho_estado (str): Arquivo JSON do estado do modelo
+            n_atributos (int): Dimensão do espaço de atributos
+        """
+        self.caminho_estado = caminho_estado
+        self.n_atributos = n_atributos
+        self.modelo = SGDClassifier(loss='log_loss', alpha=1e-4, learning_rate='constant', eta0=0.01, random_state=0)
+        self.estado = self._carregar()
+        self.hashes_treinados = _decodificar_hashes(self.estado['hashes_treinados']) if self.estado else np.empty(0, dtype=np.uint64)
+        self.leads_incorporados = 0
+        self.auc_progressiva = None
+    
+    def _carregar(self):
+        """
+        Carrega o estado salvo e restaura os coeficientes do modelo.
+        
+        Returns:
+            dict: Metadados do estado ou None se ausente/incompatível
+        """
+        estado = persistencia.carregar_estado(
+            self.caminho_estado, VERSAO_ESTADO, 'de pontuação de leads',
+            valido=lambda estado: estado.get('n_atributos') == self.n_atributos, logger=logger
+        )
+        if estado is None:
+            return None
+        try:
+            self.modelo.classes_ = np.array(estado['classes'])
+            self.modelo.coef_ = np.array([estado['coeficientes']])
+            self.modelo.intercept_ = np.array([estado['intercepto']])
+            self.modelo.t_ = estado['t']
+            self.modelo.n_features_in_ = self.n_atributos
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Coeficientes do estado de pontuação de leads inválidos, será refeito: {str(e)}")
+            self.modelo = SGDClassifier(**self.modelo.get_params())
+            return None
+        return estado
+    
+    @property
+    def treinado(self):
+        """
+        Indica se o modelo já foi treinado.
+        
+        Returns:
+            bool: True se há coeficientes
+        """
+        return hasattr(self.modelo, 'coef_')
+    
+    def salvar(self):
+        """
+        Salva os coeficientes e metadados do modelo.
+        
+        Returns:
+            str: Caminho do estado ou None em caso de erro
+        """
+        self.estado.update({
+            'n_atributos': self.n_atributos,
+            'classes': self.modelo.classes_.tolist(),
+            'coeficientes': self.modelo.coef_[0].tolist(),
+            'intercepto': float(self.modelo.intercept_[0]),
+            't': float(self.modelo.t_),
+            'hashes_treinados': _codificar_hashes(self.hashes_treinados)
+        })
+        return persistencia.salvar_estado(self.caminho_estado, self.estado, VERSAO_ESTADO, 'de pontuação de leads', logger=logger)
+    
+    def atualizar(self, df, agora=None):
+        """
+        Treina o modelo com os leads rotulados ainda não incorporados.
+        
+        Os leads já usados no treino são reconhecidos pelo hash das colunas de
+        identificação e do rótulo, e não pela data do desfecho: leads que chegam em uma
+        exportação posterior com desfecho anterior ao último treino também são incorporados.
+        
+        Args:
+            df (pandas.DataFrame): Todos os leads
+            agora (pandas.Timestamp): Momento de referência (padrão: agora)
+        
+        Returns:
+            numpy.ndarray: Máscara dos leads em aberto
+        """
+        agora = pd.Timestamp.now() if agora is None else pd.Timestamp(agora)
+        rotulo, data_rotulo, abertos = classificar_leads(df, agora)
+        
+        rotulados = np.flatnonzero(~np.isnan(rotulo) & (data_rotulo <= agora).to_numpy())
+        hashes = identificar_rotulados(df.iloc[rotulados], rotulo[rotulados])
+        # Leads repetidos na base entram uma única vez
+        _, primeiros = np.unique(hashes, return_index=True)
+        primeiros.sort()
+        novos = primeiros[~np.isin(hashes[primeiros], self.hashes_treinados)]
+        
+        indices = rotulados[novos]
+        self.leads_incorporados = len(indices)
+        if len(indices):
+            X = montar_atributos(df.iloc[indices], self.n_atributos)
+            y = rotulo[indices].astype(int)
+            
+            # Validação progressiva: avaliar nos leads novos antes de aprender com eles
+            if self.treinado and len(np.unique(y)) == 2:
+                self.auc_progressiva = float(roc_auc_score(y, self.modelo.predict_proba(X)[:, 1]))
+            
+            gerador = np.random.default_rng(len(indices))
+            for _ in range(1 if self.treinado else EPOCAS_INICIAIS):
+                ordem = gerador.permutation(len(indices))
+                self.modelo.partial_fit(X[ordem], y[ordem], classes=np.array([0, 1]))
+        
+        if self.estado is None:
+            self.estado = {'leads_treinados': 0}
+        self.estado['leads_treinados'] += self.leads_incorporados
+        self.hashes_treinados = np.union1d(self.hashes_treinados, hashes[novos])
+        return abertos
+    
+    def pontuar(self, df):
+        """
+        Probabilidade de conversão dos leads, em lotes.
+        
+        Args:
+            df (pandas.DataFrame): Leads a pontuar
+        
+        Returns:
+            numpy.ndarray: Probabilidade de conversão por lead
+        """
+        probabilidades = np.empty(len(df))
+        for inicio in range(0, len(df), TAMANHO_LOTE):
+            lote = df.iloc[inicio:inicio + TAMANHO_LOTE]
+            probabilidades[inicio:inicio + len(lote)] = self.modelo.predict_proba(montar_atributos(lote, self.n_atributos))[:, 1]
+        return probabilidades
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de previsão de VGV e vendas
+Este script ajusta modelos de Holt (nível + tendência aditiva amortecida) para muitas
+séries diárias de uma vez e projeta valores diários e mensais com intervalos de
+previsão. O estado dos modelos (nível, tendência, parâmetros e variância dos erros)
+é salvo entre as execuções e, a cada nova execução, apenas os dias novos são
+incorporados; o ajuste completo dos parâmetros só é refeito periodicamente.
+"""
+
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import persistencia
+
+logger = logging.getLogger('previsao')
+
+# Versão do formato de output/modelos/previsao.json (persistencia.carregar_estado descarta as demais)
+VERSAO_ESTADO = 2
+
+# Grade de parâmetros avaliada no ajuste completo
+GRADE_ALPHA = (0.05, 0.1, 0.2, 0.3, 0.5)
+GRADE_BETA = (0.01, 0.05, 0.1, 0.2)
+
+# Amortecimento da tendência (evita extrapolar tendências diárias ruidosas indefinidamente)
+AMORTECIMENTO = 0.98
+
+# Quantil normal do intervalo de previsão de 95%
+Z_95 = 1.959964
+
+
+def _inicializar(matriz):
+    """
+    Nível e tendência iniciais a partir das duas primeiras semanas.
+    
+    Args:
+        matriz (numpy.ndarray): Matriz (séries x dias)
+    
+    Returns:
+        tuple: (nivel, tendencia) por série
+    """
+    primeira = matriz[:, :7].mean(axis=1)
+    if matriz.shape[1] >= 14:
+        tendencia = (matriz[:, 7:14].mean(axis=1) - primeira) / 7
+    else:
+        tendencia = np.zeros(len(matriz))
+    return primeira, tendencia
+
+
+def suavizar(matriz, nivel, tendencia, alpha, beta):
+    """
+    Aplica as equações de Holt a todas as séries (e combinações de parâmetros) ao longo dos dias.
+    
+    Args:
+        matriz (numpy.ndarray): Observações (séries x dias)
+        nivel (numpy.ndarray): Nível inicial (séries ou séries x combinações)
+        tendencia (numpy.ndarray): Tendência inicial (mesmo formato de nivel)
+        alpha (numpy.ndarray): Suavização do nível (mesmo formato ou difusível)
+        beta (numpy.ndarray): Suavização da tendência (mesmo formato ou difusível)
+    
+    Returns:
+        tuple: (nivel, tendencia, soma dos erros quadráticos, quantidade de erros)
+    """
+    nivel, tendencia = np.array(nivel, dtype=float), np.array(tendencia, dtype=float)
+    sse = np.zeros(nivel.shape)
+    expandir = nivel.ndim > 1
+    
+    for dia in range(matriz.shape[1]):
+        observado = matriz[:, dia][:, None] if expandir else matriz[:, dia]
+        erro = observado - (nivel + AMORTECIMENTO * tendencia)
+        nivel = nivel + AMORTECIMENTO * tendencia + alpha * erro
+        tendencia = AMORTECIMENTO * tendencia + alpha * beta * erro
+        sse += erro ** 2
+    
+    return nivel, tendencia, sse, matriz.shape[1]
+
+
+def _somas_amortecidas(n):
+    """
+    Somas dos fatores de amortecimento.
+    
+    Args:
+        n (int): Maior passo necessário
+    
+    Returns:
+        tuple: (S, CS), com S[k] = phi + ... + phi^k e CS[m] = S[1] + ... + S[m] (S[0] = CS[0] = 0)
+    """
+    potencias = AMORTECIMENTO ** np.arange(1, n + 1)
+    somas = np.concatenate([[0.0], np.cumsum(potencias)])
+    return somas, np.concatenate([[0.0], np.cumsum(somas[1:])])
+
+
+def variancia_soma(alpha, beta, sigma2, inicio, fim):
+    """
+    Variância do erro da soma das previsões dos passos inicio..fim (modelo ETS(A,Ad,N)).
+    
+    O erro da previsão h passos à frente é e_h + soma_{j<h} (alpha + alpha*beta*S(h-j)) e_j;
+    somando os passos da janela, cada inovação e_j recebe um coeficiente c_j.
+    
+    Args:
+        alpha (numpy.ndarray): Suavização do nível por série
+        beta (numpy.ndarray): Suavização da tendência por série
+        sigma2 (numpy.ndarray): Variância dos erros de um passo por série
+        inicio (int): Primeiro passo da janela (1 = dia seguinte)
+        fim (int): Último passo da janela
+    
+    Returns:
+        numpy.ndarray: Variância por série
+    """
+    _, acumuladas = _somas_amortecidas(fim)
+    j = np.arange(1, fim + 1)
+    primeiro = np.maximum(j + 1, inicio)
+    passos = np.maximum(fim - primeiro + 1, 0)
+    # Soma de S(h - j) para h = primeiro..fim
+    soma_fatores = np.where(passos > 0, acumuladas[fim - j] - acumuladas[np.minimum(primeiro - j - 1, fim - j)], 0.0)
+    
+    dentro = (j >= inicio).astype(float)
+    coeficientes = dentro + alpha[:, None] * passos + (alpha * beta)[:, None] * soma_fatores
+    return sigma2 * (coeficientes ** 2).sum(axis=1)
+
+
+class ModeloPrevisao:
+    """
+    Modelos de Holt (tendência amortecida) de várias séries com estado persistente.
+    """
+    
+    def __init__(self, caminho_estado, dias_reajuste=30):
+        """
+        Inicializa o modelo e carrega o estado salvo, se houver.
+        
+        Args:
+            caminho_estado (str): Arquivo JSON do estado dos modelos
+            dias_reajuste (int): Dias após os quais os parâmetros são reajustados do zero
+        """
+        self.caminho_estado = caminho_estado
+        self.dias_reajuste = dias_reajuste
+        self.estado = persistencia.carregar_estado(caminho_estado, VERSAO_ESTADO, 'de previsão', logger=logger)
+        self.modo = None
+        self.dias_incorporados = 0
+    
+    def salvar(self):
+        """
+        Salva o estado dos modelos.
+        
+        Returns:
+            str: Caminho do estado ou None em caso de erro
+        """
+        return persistencia.salvar_estado(self.caminho_estado, self.estado, VERSAO_ESTADO, 'de previsão', logger=logger)
+    
+    def _ajustar(self, matriz):
+        """
+        Ajuste completo: escolhe (alpha, beta) da grade com menor erro de um passo.
+        
+        Args:
+            matriz (numpy.ndarray): Histórico completo (séries x dias)
+        
+        Returns:
+            dict: Arrays 'nivel', 'tendencia', 'alpha', 'beta', 'sse' e 'n'
+        """
+        alphas, betas = np.meshgrid(GRADE_ALPHA, GRADE_BETA, indexing='ij')
+        alphas, betas = alphas.ravel(), betas.ravel()
+        combinacoes = len(alphas)
+        
+        nivel, tendencia = _inicializar(matriz)
+        nivel = np.repeat(nivel[:, None], combinacoes, axis=1)
+        tendencia = np.repeat(tendencia[:, None], combinacoes, axis=1)
+        
+        # Todas as séries e combinações da grade avançam juntas
+        nivel, tendencia, sse, n = suavizar(matriz, nivel, tendencia, alphas[None, :], betas[None, :])
+        melhor = sse.argmin(axis=1)
+        linhas = np.arange(len(matriz))
+        
+        return {
+            'nivel': nivel[linhas, melhor],
+            'tendencia': tendencia[linhas, melhor],
+            'alpha': alphas[melhor],
+            'beta': betas[melhor],
+            'sse': sse[linhas, melhor],
+            'n': np.full(len(matriz), n, dtype=float)
+        }
+    
+    def atualizar(self, dias, chaves, matriz):
+        """
+        Incorpora o histórico ao estado: apenas os dias novos se o estado estiver
+        em dia, ou um ajuste completo quando necessário (parâmetros vencidos, período
+        incompatível ou dias já incorporados alterados).
+        
+        Args:
+            dias (pandas.DatetimeIndex): Dias das colunas da matriz
+            chaves (list): Identificador de cada série (linha)
+            matriz (numpy.ndarray): Observações (séries x dias)
+        """
+        chaves = [str(c) for c in chaves]
+        ultimo_dia = dias[-1]
+        estado = self.estado
+        
+        reajustar = estado is None
+        if estado is not None:
+            ajuste_em = pd.Timestamp(estado['ajuste_completo_em'])
+            estado_dia = pd.Timestamp(estado['ultimo_dia'])
+            reajustar = (ultimo_dia - ajuste_em).days >= self.dias_reajuste or estado_dia < dias[0] or estado_dia > ultimo_dia
+            if not reajustar:
+                # Dias já incorporados alterados (vendas antigas incluídas, removidas ou corrigidas)
+                coluna = dias.get_loc(estado_dia) + 1
+                reajustar = any(
+                    not np.isclose(matriz[i, :coluna].sum(), estado['series'][chave]['soma'], rtol=1e-9, atol=1e-6)
+                    for i, chave in enumerate(chaves) if chave in estado['series']
+                )
+        
+        if reajustar:
+            ajuste = self._ajustar(matriz)
+            self.estado = {
+                'versao': VERSAO_ESTADO,
+                'ajuste_completo_em': ultimo_dia.strftime('%Y-%m-%d'),
+                'ultimo_dia': ultimo_dia.strftime('%Y-%m-%d'),
+                'series': {chave: {campo: float(ajuste[campo][i]) for campo in ajuste} for i, chave in enumerate(chaves)}
+            }
+            self.modo = 'ajuste completo'
+            self.dias_incorporados = matriz.shape[1]
+            self._registrar_somas(chaves, matriz)
+            return
+        
+        # Séries novas (sem estado) recebem ajuste completo apenas para elas
+        novas = [i for i, chave in enumerate(chaves) if chave not in estado['series']]
+        if novas:
+            ajuste = self._ajustar(matriz[novas])
+            for posicao, i in enumerate(novas):
+                estado['series'][chaves[i]] = {campo: float(ajuste[campo][posicao]) for campo in ajuste}
+        
+        # Demais séries: apenas os dias posteriores ao último incorporado
+        coluna_inicial = dias.get_loc(pd.Timestamp(estado['ultimo_dia'])) + 1
+        existentes = [i for i in range(len(chaves)) if i not in set(novas)]
+        self.dias_incorporados = matriz.shape[1] - coluna_inicial
+        if existentes and self.dias_incorporados > 0:
+            series = [estado['series'][chaves[i]] for i in existentes]
+            campos = {campo: np.array([s[campo] for s in series]) for campo in ('nivel', 'tendencia', 'alpha', 'beta', 'sse', 'n')}
+            nivel, tendencia, sse, n = suavizar(
+                matriz[existentes, coluna_inicial:], campos['nivel'], campos['tendencia'], campos['alpha'], campos['beta']
+            )
+            for posicao, serie in enumerate(series):
+                serie['nivel'] = float(nivel[posicao])
+                serie['tendencia'] = float(tendencia[posicao])
+                serie['sse'] = float(campos['sse'][posicao] + sse[posicao])
+                serie['n'] = float(campos['n'][posicao] + n)
+        
+        estado['ultimo_dia'] = ultimo_dia.strftime('%Y-%m-%d')
+        self.modo = 'incremental'
+        self._registrar_somas(chaves, matriz)
+    
+    def _registrar_somas(self, chaves, matriz):
+        """
+        Guarda a soma do histórico incorporado de cada série, usada para detectar
+        alterações nos dias já vistos.
+        
+        Args:
+            chaves (list): Identificador de cada série (linha)
+            matriz (numpy.ndarray): Observações (séries x dias)
+        """
+        for chave, soma in zip(chaves, matriz.sum(axis=1)):
+            self.estado['series'][chave]['soma'] = float(soma)
+    
+    def prever(self, chaves, horizonte=30, janelas=((1, 30),)):
+        """
+        Projeta as séries a partir do estado atual.
+        
+        Args:
+            chaves (list): Séries a projetar
+            horizonte (int): Quantidade de dias da previsão diária
+            janelas (tuple): Janelas (primeiro passo, último passo) das previsões agregadas
+        
+        Returns:
+            dict: 'diaria' (previsão, inferior e superior: séries x horizonte) e
+                  'janelas' (lista de dicts com previsão, inferior e superior por série)
+        """
+        series = [self.estado['series'][str(c)] for c in chaves]
+        campos = {campo: np.array([s[campo] for s in series]) for campo in ('nivel', 'tendencia', 'alpha', 'beta', 'sse', 'n')}
+        sigma2 = campos['sse'] / np.maximum(campos['n'], 1)
+        alpha, beta = campos['alpha'], campos['alpha'] * campos['beta']
+        
+        somas, acumuladas = _somas_amortecidas(max([horizonte] + [fim for _, fim in janelas]))
+        previsao = campos['nivel'][:, None] + campos['tendencia'][:, None] * somas[1:horizonte + 1]
+        
+        # Var(h) = sigma² [1 + soma_{k<h} (alpha + alpha*beta*S(k))²]
+        fatores = alpha[:, None] + beta[:, None] * somas[1:horizonte]
+        variancia = sigma2[:, None] * (1 + np.concatenate([np.zeros((len(series), 1)), np.cumsum(fatores ** 2, axis=1)], axis=1))
+        margem = Z_95 * np.sqrt(variancia)
+        
+        agregadas = []
+        for inicio, fim in janelas:
+            soma = campos['nivel'] * (fim - inicio + 1) + campos['tendencia'] * (acumuladas[fim] - acumuladas[inicio - 1])
+            margem_soma = Z_95 * np.sqrt(variancia_soma(campos['alpha'], campos['beta'], sigma2, inicio, fim))
+            soma = np.maximum(soma, 0)
+            agregadas.append({
+                'previsao': soma,
+                'inferior': np.maximum(soma - margem_soma, 0),
+                'superior': soma + margem_soma
+            })
+        
+        # VGV e quantidade de vendas não são negativos
+        previsao = np.maximum(previsao, 0)
+        return {
+            'diaria': {
+                'previsao': previsao,
+                'inferior': np.maximum(previsao - margem, 0),
+                'superior': previsao + margem
+            },
+            'janelas': agregadas
+        }
+
+
+def ultimo_dia_completo(datas):
+    """
+    Último dia com dados completos (o dia corrente ainda pode receber vendas).
+    
+    Args:
+        datas (pandas.Series): Datas dos registros
+    
+    Returns:
+        pandas.Timestamp: Último dia completo
+    """
+    ultimo = datas.max().normalize()
+    if ultimo >= pd.Timestamp(datetime.now().date()):
+        ultimo -= pd.Timedelta(days=1)
+    return ultimo
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de rankings móveis
+Este script calcula a posição de cada série (ex.: cada corretor) em todos os dias,
+pela soma de uma janela móvel (ex.: VGV dos últimos 30 ou 90 dias). As somas de
+todas as janelas vêm de uma única matriz de somas acumuladas (séries x dias), em
+centavos inteiros para que empates não dependam de arredondamentos, e todos os dias
+são ordenados de uma vez com argsort ao longo do eixo das séries. Do histórico de
+posições são derivadas a variação recente, a melhor e a pior posição e a
+volatilidade de cada série.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+import tendencias
+
+logger = logging.getLogger('ranking_movel')
+
+# Janelas padrão (dias)
+JANELAS = (30, 90)
+
+# Dias recentes usados na volatilidade, na melhor e na pior posição
+DIAS_VOLATILIDADE = 90
+
+# Dias de defasagem da comparação de posição
+DEFASAGEM = 30
+
+
+def posicoes(somas):
+    """
+    Posição de cada série em cada dia (1 = maior soma); empates recebem a menor posição.
+    
+    Args:
+        somas (numpy.ndarray): Somas (séries x dias)
+    
+    Returns:
+        numpy.ndarray: Posições (séries x dias)
+    """
+    n = somas.shape[0]
+    ordem = np.argsort(-somas, axis=0, kind='stable')
+    ordenadas = np.take_along_axis(somas, ordem, axis=0)
+    
+    # Em cada dia, a posição de uma série é a do primeiro elemento do seu grupo de empate
+    inicio_grupo = np.ones(ordenadas.shape, dtype=bool)
+    inicio_grupo[1:] = ordenadas[1:] != ordenadas[:-1]
+    primeira = np.maximum.accumulate(np.where(inicio_grupo, np.arange(n)[:, None], 0), axis=0) + 1
+    
+    resultado = np.empty_like(primeira)
+    np.put_along_axis(resultado, ordem, primeira, axis=0)
+    return resultado
+
+
+def calcular_rankings(df, coluna_data, coluna_valor, coluna_chave, janelas=JANELAS, fim=None):
+    """
+    Somas móveis e posições diárias de todas as séries em cada janela.
+    
+    Args:
+        df (pandas.DataFrame): Registros (ex.: vendas)
+        coluna_data (str): Coluna de data
+        coluna_valor (str): Coluna somada
+        coluna_chave (str): Coluna que define as séries (ex.: 'corretor')
+        janelas (tuple): Tamanhos das janelas em dias
+        fim (pandas.Timestamp): Último dia (padrão: maior data)
+    
+    Returns:
+        dict: 'chaves' e, por janela com histórico suficiente, 'dias' (dias com a janela
+              completa), 'somas' e 'posicoes' (séries x dias)
+    """
+    dias, chaves, somas, _ = tendencias.montar_matriz_diaria(df, coluna_data, coluna_valor, coluna_chave, fim=fim)
+    centavos = np.rint(somas * 100).astype(np.int64)
+    acumulada = np.zeros((len(chaves), len(dias) + 1), dtype=np.int64)
+    np.cumsum(centavos, axis=1, out=acumulada[:, 1:])
+    
+    resultado = {'chaves': chaves, 'janelas': {}}
+    for janela in janelas:
+        if janela > len(dias):
+            continue
+        somas_janela = acumulada[:, janela:] - acumulada[:, :-janela]
+        resultado['janelas'][janela] = {
+            'dias': dias[janela - 1:],
+            'somas': somas_janela / 100,
+            'posicoes': posicoes(somas_janela)
+        }
+    return resultado
+
+
+def resumir(ranking, chaves, dias_volatilidade=DIAS_VOLATILIDADE, defasagem=DEFASAGEM):
+    """
+    Posição atual, variação e volatilidade do ranking de cada série.
+    
+    Args:
+        ranking (dict): Resultado de uma janela de calcular_rankings
+        chaves (numpy.ndarray): Rótulo de cada série
+        dias_volatilidade (int): Dias recentes usados na volatilidade e nas posições extremas
+        defasagem (int): Dias entre a posição anterior e a atual
+    
+    Returns:
+        pandas.DataFrame: Série, soma na janela, posição atual e anterior, variação
+                          (positiva = subiu), melhor e pior posição, desvio padrão da
+                          posição, variação diária média e dias na liderança, por posição
+    """
+    posicoes_series = ranking['posicoes']
+    recentes = posicoes_series[:, -dias_volatilidade:]
+    anterior = posicoes_series[:, -defasagem - 1] if posicoes_series.shape[1] > defasagem else np.full(len(chaves), np.nan)
+    
+    tabela = pd.DataFrame({
+        'chave': chaves,
+        'soma_janela': ranking['somas'][:, -1],
+        'posicao': posicoes_series[:, -1],
+        'posicao_anterior': anterior,
+        'melhor_posicao': recentes.min(axis=1),
+        'pior_posicao': recentes.max(axis=1),
+        'volatilidade': recentes.std(axis=1),
+        'variacao_diaria_media': np.abs(np.diff(recentes, axis=1)).mean(axis=1) if recentes.shape[1] > 1 else 0.0,
+        'dias_lider': (recentes == 1).sum(axis=1)
+    })
+    tabela['variacao'] = tabela['posicao_anterior'] - tabela['posicao']
+    return tabela.sort_values(['posicao', 'chave']).reset_index(drop=True)
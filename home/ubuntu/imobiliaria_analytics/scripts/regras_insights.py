@@ -0,0 +1,674 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de regras declarativas de insights
+Este script define as regras que geram insights e recomendações a partir de tabelas
+agregadas (uma linha por corretor, origem, segmento etc.) e o motor que as avalia.
+Cada condição (na sintaxe de DataFrame.eval) é compilada uma única vez e avaliada
+sobre as colunas da tabela inteira como operações NumPy, produzindo uma máscara;
+apenas as linhas selecionadas são formatadas em texto.
+"""
+
+import ast
+import functools
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('regras_insights')
+
+# Pesos usados na ordenação dos insights
+PESO_IMPACTO = {'alto': 3, 'médio': 2, 'baixo': 1}
+PESO_CONFIANCA = {'alta': 1.0, 'média': 0.7, 'baixa': 0.4}
+
+# Nível de confiança imediatamente inferior (linhas com amostra pequena)
+CONFIANCA_REDUZIDA = {'alta': 'média', 'média': 'baixa', 'baixa': 'baixa'}
+
+# Níveis de confiança do menor para o maior
+NIVEIS_CONFIANCA = ['baixa', 'média', 'alta']
+
+# Regras de insights. Campos:
+#   id, tabela, condicao (expressão de DataFrame.eval), categoria, descricao (modelo str.format),
+#   impacto, confianca e, opcionalmente:
+#   escopo: 'linha' (um insight por linha selecionada, padrão) ou 'conjunto' (um insight para
+#           todas as linhas selecionadas, com {n} e {lista} disponíveis no modelo)
+#   agrupar_por: coluna que separa os conjuntos (um insight por grupo)
+#   coluna_nome: coluna usada em {lista}
+#   ordenar_por / crescente: ordem das linhas (mais relevantes primeiro)
+#   max_itens: limite de insights (escopo linha) ou de nomes em {lista} (escopo conjunto)
+#   amostra / amostra_minima: linhas com amostra menor têm a confiança reduzida
+#   coluna_confianca: coluna com a confiança de cada linha (ex.: derivada de intervalos de
+#                     confiança), usada no lugar de 'confianca'; em conjuntos vale a menor
+#   coluna_impacto: coluna com o impacto de cada linha, usada no lugar de 'impacto'
+#   recomendacao: {'descricao', 'prioridade'} emitida quando a regra é disparada
+REGRAS = [
+    # Tendência geral de vendas (tabela de uma linha)
+    {
+        'id': 'vendas_crescimento',
+        'tabela': 'vendas',
+        'condicao': 'tendencia_valor > 0 and tendencia_quantidade > 0',
+        'categoria': 'tendencia_vendas',
+        'descricao': 'Tendência de crescimento tanto em valor quanto em quantidade de vendas nos últimos 30 dias.',
+        'impacto': 'alto',
+        'confianca': 'média'
+    },
+    {
+        'id': 'vendas_queda',
+        'tabela': 'vendas',
+        'condicao': 'tendencia_valor < 0 and tendencia_quantidade < 0',
+        'categoria': 'tendencia_vendas',
+        'descricao': 'Tendência de queda tanto em valor quanto em quantidade de vendas nos últimos 30 dias.',
+        'impacto': 'alto',
+        'confianca': 'média'
+    },
+    {
+        'id': 'vendas_foco_alto_valor',
+        'tabela': 'vendas',
+        'condicao': 'tendencia_valor > 0 and tendencia_quantidade < 0',
+        'categoria': 'tendencia_vendas',
+        'descricao': 'Tendência de aumento no valor total de vendas, mas redução na quantidade, indicando possível foco em imóveis de maior valor.',
+        'impacto': 'médio',
+        'confianca': 'média'
+    },
+    {
+        'id': 'vendas_foco_baixo_valor',
+        'tabela': 'vendas',
+        'condicao': 'tendencia_valor < 0 and tendencia_quantidade > 0',
+        'categoria': 'tendencia_vendas',
+        'descricao': 'Tendência de aumento na quantidade de vendas, mas redução no valor total, indicando possível foco em imóveis de menor valor.',
+        'impacto': 'médio',
+        'confianca': 'média'
+    },
+    
+    # Tendências por segmento (corretor, tipo de imóvel e bairro)
+    {
+        'id': 'segmentos_queda_corretores',
+        'tabela': 'segmentos',
+        'condicao': "estatistica_t < -2 and dimensao == 'corretores'",
+        'escopo': 'conjunto',
+        'agrupar_por': 'rotulo',
+        'coluna_nome': 'segmento',
+        'ordenar_por': 'estatistica_t',
+        'crescente': True,
+        'max_itens': 5,
+        'categoria': 'tendencias_segmentos',
+        'descricao': 'Queda consistente no valor de vendas nos últimos {janela_dias} dias nos {rotulo}: {lista}.',
+        'impacto': 'alto',
+        'confianca': 'média'
+    },
+    {
+        'id': 'segmentos_queda',
+        'tabela': 'segmentos',
+        'condicao': "estatistica_t < -2 and dimensao != 'corretores'",
+        'escopo': 'conjunto',
+        'agrupar_por': 'rotulo',
+        'coluna_nome': 'segmento',
+        'ordenar_por': 'estatistica_t',
+        'crescente': True,
+        'max_itens': 5,
+        'categoria': 'tendencias_segmentos',
+        'descricao': 'Queda consistente no valor de vendas nos últimos {janela_dias} dias nos {rotulo}: {lista}.',
+        'impacto': 'médio',
+        'confianca': 'média'
+    },
+    {
+        'id': 'segmentos_crescimento',
+        'tabela': 'segmentos',
+        'condicao': 'estatistica_t > 2',
+        'escopo': 'conjunto',
+        'agrupar_por': 'rotulo',
+        'coluna_nome': 'segmento',
+        'ordenar_por': 'estatistica_t',
+        'max_itens': 5,
+        'categoria': 'tendencias_segmentos',
+        'descricao': 'Crescimento consistente no valor de vendas nos últimos {janela_dias} dias nos {rotulo}: {lista}.',
+        'impacto': 'médio',
+        'confianca': 'média'
+    },
+    
+    # Mediana de preço dos segmentos na janela de 30 dias
+    {
+        'id': 'segmento_mediana_alta',
+        'tabela': 'janelas_segmentos',
+        'condicao': 'variacao_mediana_30d > 0.1',
+        'ordenar_por': 'variacao_mediana_30d',
+        'max_itens': 1,
+        'categoria': 'janelas_segmentos',
+        'descricao': 'A mediana de preço de {segmento} subiu {variacao_mediana_30d:.1%} em relação aos 30 dias anteriores.',
+        'impacto': 'médio',
+        'confianca': 'média'
+    },
+    {
+        'id': 'segmento_mediana_queda',
+        'tabela': 'janelas_segmentos',
+        'condicao': 'variacao_mediana_30d < -0.1',
+        'ordenar_por': 'variacao_mediana_30d',
+        'crescente': True,
+        'max_itens': 1,
+        'categoria': 'janelas_segmentos',
+        'descricao': 'A mediana de preço de {segmento} caiu {queda_mediana_30d:.1%} em relação aos 30 dias anteriores.',
+        'impacto': 'médio',
+        'confianca': 'média'
+    },
+    
+    # Sazonalidade do total (tabela de uma linha) e dos segmentos
+    {
+        'id': 'sazonalidade_semanal',
+        'tabela': 'sazonalidade',
+        'condicao': 'forca_semanal >= 0.3',
+        'categoria': 'sazonalidade',
+        'descricao': 'As vendas seguem um padrão semanal, com pico às {dia_pico}s e menor volume às {dia_vale}s.',
+        'impacto': 'médio',
+        'confianca': 'média',
+        'coluna_confianca': 'confianca_semanal',
+        'recomendacao': {
+            'descricao': 'Concentrar plantões e ações de captação nos dias que antecedem o pico semanal de vendas.',
+            'prioridade': 'média'
+        }
+    },
+    {
+        'id': 'sazonalidade_mensal',
+        'tabela': 'sazonalidade',
+        'condicao': 'forca_mensal >= 0.3',
+        'categoria': 'sazonalidade',
+        'descricao': 'Há um ciclo mensal nas vendas, com pico por volta do dia {dia_mes_pico} de cada mês.',
+        'impacto': 'médio',
+        'confianca': 'média'
+    },
+    {
+        'id': 'segmentos_padrao_semanal',
+        'tabela': 'sazonalidade_segmentos',
+        'condicao': 'forca_semanal >= 0.5',
+        'escopo': 'conjunto',
+        'coluna_nome': 'segmento',
+        'ordenar_por': 'forca_semanal',
+        'categoria': 'sazonalidade',
+        'descricao': 'Segmentos com forte padrão semanal: {lista}.',
+        'impacto': 'baixo',
+        'confianca': 'média'
+    },
+    
+    # Previsão de VGV dos próximos 30 dias comparada aos últimos 30 (tabela de uma linha)
+    {
+        'id': 'previsao_vgv_alta',
+        'tabela': 'previsao',
+        'condicao': 'variacao_vgv_30d >= 0.1',
+        'categoria': 'previsao',
+        'descricao': 'O VGV projetado para os próximos 30 dias é {variacao_vgv_30d:.1%} maior que o dos últimos 30 dias.',
+        'impacto': 'alto',
+        'confianca': 'média'
+    },
+    {
+        'id': 'previsao_vgv_queda',
+        'tabela': 'previsao',
+        'condicao': 'variacao_vgv_30d <= -0.1',
+        'categoria': 'previsao',
+        'descricao': 'O VGV projetado para os próximos 30 dias é {queda_vgv_30d:.1%} menor que o dos últimos 30 dias.',
+        'impacto': 'alto',
+        'confianca': 'média',
+        'recomendacao': {
+            'descricao': 'Antecipar ações comerciais e de captação para compensar a queda projetada de VGV.',
+            'prioridade': 'alta'
+        }
+    },
+    
+    # Desempenho de corretores
+    {
+        'id': 'corretores_alto_desempenho',
+        'tabela': 'corretores',
+        'condicao': 'valor_total > limite_alto_desempenho',
+        'escopo': 'conjunto',
+        'coluna_confianca': 'confianca_alto_desempenho',
+        'categoria': 'desempenho_corretores',
+        'descricao': 'Identificados {n} corretores com desempenho excepcional, significativamente acima da média.',
+        'impacto': 'alto',
+        'confianca': 'alta',
+        'recomendacao': {
+            'descricao': 'Analisar as práticas dos corretores de alto desempenho para identificar estratégias que possam ser replicadas pela equipe.',
+            'prioridade': 'alta'
+        }
+    },
+    {
+        'id': 'corretor_ticket_alto',
+        'tabela': 'corretores',
+        'condicao': 'valor_medio >= 1.3 * ticket_medio_geral',
+        'ordenar_por': 'valor_medio',
+        'max_itens': 3,
+        'amostra': 'quantidade',
+        'amostra_minima': 10,
+        'categoria': 'desempenho_corretores',
+        'descricao': 'O corretor {corretor} tem ticket médio de R$ {valor_medio:,.2f}, {razao_ticket:.0%} do ticket médio geral.',
+        'impacto': 'médio',
+        'confianca': 'média'
+    },
+    {
+        'id': 'corretor_baixo_volume',
+        'tabela': 'corretores',
+        'condicao': 'quantidade <= 0.5 * quantidade_media',
+        'ordenar_por': 'quantidade',
+        'crescente': True,
+        'max_itens': 3,
+        'categoria': 'desempenho_corretores',
+        'descricao': 'O corretor {corretor} registrou {quantidade} vendas, menos da metade da média da equipe ({quantidade_media:.1f}).',
+        'impacto': 'médio',
+        'confianca': 'alta',
+        'recomendacao': {
+            'descricao': 'Oferecer acompanhamento e treinamento aos corretores com volume de vendas abaixo da metade da média.',
+            'prioridade': 'média'
+        }
+    },
+    
+    # Conversão de leads por origem
+    {
+        'id': 'origens_alta_conversao',
+        'tabela': 'origens',
+        'condicao': 'taxa_conversao > 1.5 * media_taxa',
+        'escopo': 'conjunto',
+        'coluna_confianca': 'confianca_alta_conversao',
+        'categoria': 'conversao_leads',
+        'descricao': 'Identificadas {n} origens de leads com taxa de conversão significativamente acima da média.',
+        'impacto': 'alto',
+        'confianca': 'alta',
+        'recomendacao': {
+            'descricao': 'Aumentar investimento nas origens de leads com maior taxa de conversão para maximizar o retorno.',
+            'prioridade': 'alta'
+        }
+    },
+    {
+        'id': 'origens_baixa_conversao',
+        'tabela': 'origens',
+        'condicao': 'taxa_conversao < 0.5 * media_taxa',
+        'escopo': 'conjunto',
+        'coluna_confianca': 'confianca_baixa_conversao',
+        'categoria': 'conversao_leads',
+        'descricao': 'Identificadas {n} origens de leads com taxa de conversão significativamente abaixo da média.',
+        'impacto': 'médio',
+        'confianca': 'alta',
+        'recomendacao': {
+            'descricao': 'Revisar e otimizar estratégias para origens de leads com baixa conversão.',
+            'prioridade': 'média'
+        }
+    },
+    {
+        'id': 'origem_volume_sem_conversao',
+        'tabela': 'origens',
+        'condicao': 'quantidade >= media_quantidade and taxa_conversao < 0.8 * media_taxa',
+        'ordenar_por': 'quantidade',
+        'max_itens': 3,
+        'coluna_confianca': 'confianca_abaixo_media',
+        'categoria': 'conversao_leads',
+        'descricao': 'A origem {origem} concentra {quantidade} leads, acima da média, mas converte apenas {taxa_conversao:.1%} (IC 95%: {intervalo_inferior:.1%} a {intervalo_superior:.1%}; média: {media_taxa:.1%}).',
+        'impacto': 'médio',
+        'confianca': 'alta',
+        'recomendacao': {
+            'descricao': 'Revisar a qualificação e o atendimento dos leads das origens de alto volume e baixa conversão.',
+            'prioridade': 'média'
+        }
+    },
+    
+    # Leads em aberto pontuados por corretor
+    {
+        'id': 'corretor_leads_quentes',
+        'tabela': 'pontuacao_leads',
+        'condicao': 'leads_quentes >= 3',
+        'ordenar_por': 'valor_esperado_total',
+        'max_itens': 3,
+        'categoria': 'pontuacao_leads',
+        'descricao': 'O corretor {corretor} tem {leads_quentes} leads em aberto com probabilidade de conversão de 50% ou mais; o valor esperado de toda a sua carteira em aberto é de R$ {valor_esperado_total:,.2f}.',
+        'impacto': 'alto',
+        'confianca': 'média',
+        'recomendacao': {
+            'descricao': 'Priorizar o contato com os leads de maior pontuação na lista de cada corretor.',
+            'prioridade': 'alta'
+        }
+    },
+    
+    # Funil de leads por origem e por corretor
+    {
+        'id': 'funil_origem_baixa_qualificacao',
+        'tabela': 'funil_origens',
+        'condicao': 'contatado >= 30 and conversao_contatado_para_em_negociacao < 0.75 * conversao_contatado_para_em_negociacao_geral',
+        'ordenar_por': 'contatado',
+        'max_itens': 2,
+        'categoria': 'funil_leads',
+        'descricao': 'Apenas {conversao_contatado_para_em_negociacao:.1%} dos leads contatados da origem {origem} chegam à negociação (geral: {conversao_contatado_para_em_negociacao_geral:.1%}).',
+        'impacto': 'médio',
+        'confianca': 'média',
+        'recomendacao': {
+            'descricao': 'Revisar a qualificação dos leads das origens que pouco avançam do contato para a negociação.',
+            'prioridade': 'média'
+        }
+    },
+    {
+        'id': 'funil_corretor_baixo_fechamento',
+        'tabela': 'funil_corretores',
+        'condicao': 'em_negociacao >= 20 and conversao_em_negociacao_para_convertido < 0.75 * conversao_em_negociacao_para_convertido_geral',
+        'ordenar_por': 'em_negociacao',
+        'max_itens': 3,
+        'categoria': 'funil_leads',
+        'descricao': 'O corretor {corretor} fecha {conversao_em_negociacao_para_convertido:.1%} dos {em_negociacao} leads que chegaram à negociação (geral: {conversao_em_negociacao_para_convertido_geral:.1%}).',
+        'impacto': 'alto',
+        'confianca': 'média',
+        'recomendacao': {
+            'descricao': 'Acompanhar as negociações dos corretores com baixa taxa de fechamento e reforçar técnicas de fechamento.',
+            'prioridade': 'alta'
+        }
+    },
+    
+    # Tempo até a conversão por origem
+    {
+        'id': 'origem_conversao_lenta',
+        'tabela': 'tempo_conversao_origens',
+        'condicao': 'conversoes >= 30 and p90_dias >= 1.5 * p90_geral',
+        'ordenar_por': 'p90_dias',
+        'max_itens': 2,
+        'categoria': 'tempo_conversao',
+        'descricao': 'Os leads da origem {origem} levam até {p90_dias:.0f} dias para 90% das conversões (mediana de {mediana_dias:.0f} dias), contra {p90_geral:.0f} dias no geral.',
+        'impacto': 'médio',
+        'confianca': 'média',
+        'recomendacao': {
+            'descricao': 'Estender a cadência de acompanhamento dos leads das origens de conversão lenta até o percentil 90 do seu tempo de conversão.',
+            'prioridade': 'média'
+        }
+    },
+    {
+        'id': 'origem_clientes_repetidos',
+        'tabela': 'contatos_origens',
+        'condicao': 'leads_unicos >= 50 and leads_por_cliente >= 1.2 * leads_por_cliente_mediano',
+        'ordenar_por': 'leads_por_cliente',
+        'max_itens': 2,
+        'categoria': 'contatos',
+        'descricao': 'A origem {origem} gerou {leads_unicos} leads de apenas {clientes_unicos} clientes distintos ({leads_por_cliente:.2f} leads por cliente, contra {leads_por_cliente_mediano:.2f} na origem mediana).',
+        'impacto': 'médio',
+        'confianca': 'média',
+        'recomendacao': {
+            'descricao': 'Deduplicar os leads da origem pelo contato do cliente antes da distribuição aos corretores e revisar o custo por lead considerando apenas clientes novos.',
+            'prioridade': 'média'
+        }
+    },
+    
+    # Ranking móvel de VGV (90 dias) de corretores
+    {
+        'id': 'corretor_queda_ranking',
+        'tabela': 'ranking_corretores',
+        'condicao': 'janela == 90 and variacao <= -3 and posicao_anterior <= 5',
+        'ordenar_por': 'posicao_anterior',
+        'crescente': True,
+        'max_itens': 2,
+        'categoria': 'ranking_corretores',
+        'descricao': '{corretor} caiu da {posicao_anterior:.0f}ª para a {posicao:.0f}ª posição no ranking de VGV dos últimos 90 dias em relação a 30 dias atrás.',
+        'impacto': 'médio',
+        'confianca': 'média',
+        'recomendacao': {
+            'descricao': 'Acompanhar os corretores que saíram das primeiras posições do ranking e revisar a carteira de leads e negociações em andamento.',
+            'prioridade': 'média'
+        }
+    },
+    
+    # Equipes (consolidação hierárquica)
+    {
+        'id': 'equipe_concentrada',
+        'tabela': 'equipes',
+        'condicao': 'corretores >= 3 and participacao_destaque >= 0.4',
+        'ordenar_por': 'participacao_destaque',
+        'max_itens': 2,
+        'categoria': 'hierarquia_equipes',
+        'descricao': 'A {equipe} depende de {corretor_destaque}, responsável por {participacao_destaque:.1%} dos R$ {valor_total:,.2f} de VGV da equipe.',
+        'impacto': 'médio',
+        'confianca': 'alta',
+        'recomendacao': {
+            'descricao': 'Reduzir a dependência das equipes concentradas em um único corretor, distribuindo leads e apoiando os demais membros.',
+            'prioridade': 'média'
+        }
+    },
+    {
+        'id': 'comissoes_atrasadas_corretor',
+        'tabela': 'fluxo_comissoes_corretores',
+        'condicao': 'atraso_acima_30 >= 10000 and atraso_acima_30 >= 0.5 * total_aberto',
+        'ordenar_por': 'atraso_acima_30',
+        'max_itens': 3,
+        'categoria': 'comissoes',
+        'descricao': '{corretor} tem R$ {atraso_acima_30:,.2f} em comissões vencidas há mais de 30 dias, de R$ {total_aberto:,.2f} em aberto.',
+        'impacto': 'médio',
+        'confianca': 'alta',
+        'recomendacao': {
+            'descricao': 'Revisar com o financeiro as comissões pendentes há mais de 30 dias e atualizar o status ou a data prevista de pagamento.',
+            'prioridade': 'alta'
+        }
+    },
+    
+    # Coortes semanais de leads
+    {
+        'id': 'coorte_conversao_abaixo_media',
+        'tabela': 'coortes',
+        'condicao': 'leads >= 30 and taxa < 0.8 * media',
+        'ordenar_por': 'leads',
+        'max_itens': 2,
+        'categoria': 'coortes_leads',
+        'descricao': 'Os leads captados na semana de {inicio} converteram {taxa:.1%} em {semanas} semanas, abaixo da média das coortes anteriores ({media:.1%}).',
+        'impacto': 'médio',
+        'confianca': 'média',
+        'recomendacao': {
+            'descricao': 'Verificar mudanças de origem, campanha ou atendimento nas semanas de captação com conversão abaixo da média.',
+            'prioridade': 'média'
+        }
+    },
+    
+    # Anomalias recentes (tabela de uma linha; impacto alto quando há alerta de severidade alta)
+    {
+        'id': 'anomalias_com_quedas',
+        'tabela': 'anomalias',
+        'condicao': 'quedas > 0',
+        'categoria': 'anomalias',
+        'descricao': 'Detectadas {alertas} anomalias nos últimos {dias} dias ({quedas} quedas e {picos} picos).',
+        'impacto': 'médio',
+        'coluna_impacto': 'impacto',
+        'confianca': 'média',
+        'recomendacao': {
+            'descricao': 'Investigar as quedas detectadas (campanhas pausadas, falhas de captação ou de registro) antes do fechamento do mês.',
+            'prioridade': 'alta'
+        }
+    },
+    {
+        'id': 'anomalias_apenas_picos',
+        'tabela': 'anomalias',
+        'condicao': 'picos > 0 and quedas == 0',
+        'categoria': 'anomalias',
+        'descricao': 'Detectadas {alertas} anomalias nos últimos {dias} dias ({quedas} quedas e {picos} picos).',
+        'impacto': 'médio',
+        'coluna_impacto': 'impacto',
+        'confianca': 'média'
+    },
+]
+
+
+def pontuar(impacto, confianca):
+    """
+    Pontuação de um insight para ordenação.
+    
+    Args:
+        impacto (str): 'alto', 'médio' ou 'baixo'
+        confianca (str): 'alta', 'média' ou 'baixa'
+    
+    Returns:
+        float: Pontuação (maior = mais relevante)
+    """
+    return round(PESO_IMPACTO.get(impacto, 1) * PESO_CONFIANCA.get(confianca, 0.4), 2)
+
+
+def ordenar(insights):
+    """
+    Ordena insights do mais para o menos relevante (ordem original nos empates).
+    
+    Args:
+        insights (list): Insights com 'impacto' e 'confianca' (e 'pontuacao', se houver)
+    
+    Returns:
+        list: Insights ordenados
+    """
+    return sorted(insights, key=lambda i: -i.get('pontuacao', pontuar(i.get('impacto'), i.get('confianca'))))
+
+
+class _ParaOperadoresVetoriais(ast.NodeTransformer):
+    """
+    Reescreve and/or/not e comparações encadeadas como operações elemento a elemento (&, |, ~).
+    """
+    
+    def visit_BoolOp(self, no):
+        self.generic_visit(no)
+        operador = ast.BitAnd() if isinstance(no.op, ast.And) else ast.BitOr()
+        resultado = no.values[0]
+        for valor in no.values[1:]:
+            resultado = ast.BinOp(left=resultado, op=operador, right=valor)
+        return resultado
+    
+    def visit_UnaryOp(self, no):
+        self.generic_visit(no)
+        if isinstance(no.op, ast.Not):
+            return ast.UnaryOp(op=ast.Invert(), operand=no.operand)
+        return no
+    
+    def visit_Compare(self, no):
+        self.generic_visit(no)
+        esquerda, comparacoes = no.left, []
+        for operador, direita in zip(no.ops, no.comparators):
+            comparacoes.append(ast.Compare(left=esquerda, ops=[operador], comparators=[direita]))
+            esquerda = direita
+        resultado = comparacoes[0]
+        for comparacao in comparacoes[1:]:
+            resultado = ast.BinOp(left=resultado, op=ast.BitAnd(), right=comparacao)
+        return resultado
+
+
+@functools.lru_cache(maxsize=None)
+def compilar_condicao(condicao):
+    """
+    Compila uma condição (mesma sintaxe de DataFrame.eval) para avaliação sobre arrays NumPy.
+    
+    A compilação é feita uma única vez por condição; a avaliação é uma sequência de
+    operações vetoriais sobre as colunas da tabela.
+    
+    Args:
+        condicao (str): Expressão booleana sobre as colunas (ex.: 'taxa > 1.5 * media and n >= 30')
+    
+    Returns:
+        code: Código compilado
+    """
+    arvore = _ParaOperadoresVetoriais().visit(ast.parse(condicao, mode='eval'))
+    return compile(ast.fix_missing_locations(arvore), f'<regra: {condicao}>', 'eval')
+
+
+def _linha(colunas, indice, **extras):
+    """
+    Valores de uma linha da tabela para formatação do texto.
+    
+    Args:
+        colunas (dict): Arrays das colunas
+        indice (int): Linha
+        **extras: Campos adicionais
+    
+    Returns:
+        dict: Campos da linha
+    """
+    return dict({nome: valores[indice] for nome, valores in colunas.items()}, **extras)
+
+
+def _mais_relevantes(indices, colunas, regra, limite):
+    """
+    As linhas mais relevantes de uma seleção, em ordem, segundo 'ordenar_por' da regra.
+    
+    Usa seleção parcial (argpartition): apenas as 'limite' primeiras linhas são ordenadas.
+    
+    Args:
+        indices (numpy.ndarray): Linhas selecionadas
+        colunas (dict): Arrays das colunas
+        regra (dict): Regra
+        limite (int): Quantidade de linhas desejada
+    
+    Returns:
+        numpy.ndarray: Até 'limite' linhas
+    """
+    if not regra.get('ordenar_por'):
+        return indices[:limite]
+    chave = colunas[regra['ordenar_por']][indices].astype(float)
+    chave = chave if regra.get('crescente') else -chave
+    if limite < len(indices):
+        parcial = np.argpartition(chave, limite - 1)[:limite]
+        return indices[parcial[np.argsort(chave[parcial], kind='stable')]]
+    return indices[np.argsort(chave, kind='stable')]
+
+
+def avaliar(nome_tabela, tabela, regras=None):
+    """
+    Avalia as regras de uma tabela agregada.
+    
+    Args:
+        nome_tabela (str): Nome da tabela (campo 'tabela' das regras)
+        tabela (pandas.DataFrame): Tabela agregada, uma linha por entidade
+        regras (list): Regras a avaliar (padrão: REGRAS)
+    
+    Returns:
+        tuple: (insights, recomendacoes), com os insights ordenados por relevância
+    """
+    regras = [r for r in (REGRAS if regras is None else regras) if r['tabela'] == nome_tabela]
+    insights, recomendacoes = [], []
+    if tabela is None or tabela.empty or not regras:
+        return insights, recomendacoes
+    
+    n_linhas = len(tabela)
+    colunas = {nome: tabela[nome].to_numpy() for nome in tabela.columns}
+    ambiente = {'__builtins__': {}, 'np': np}
+    mascaras = {}
+    
+    for regra in regras:
+        try:
+            # Condições repetidas entre regras são avaliadas uma única vez
+            if regra['condicao'] not in mascaras:
+                mascara = eval(compilar_condicao(regra['condicao']), ambiente, colunas)
+                mascaras[regra['condicao']] = np.broadcast_to(np.asarray(mascara, dtype=bool), (n_linhas,))
+            selecionadas = np.flatnonzero(mascaras[regra['condicao']])
+            if len(selecionadas) == 0:
+                continue
+            
+            limite = regra.get('max_itens', 5 if regra.get('escopo') == 'conjunto' else len(selecionadas))
+            emitidos = []
+            if regra.get('escopo', 'linha') == 'conjunto':
+                if regra.get('agrupar_por'):
+                    codigos, _ = pd.factorize(colunas[regra['agrupar_por']][selecionadas])
+                    grupos = [selecionadas[codigos == codigo] for codigo in range(codigos.max() + 1)]
+                else:
+                    grupos = [selecionadas]
+                for grupo in grupos:
+                    primeiras = _mais_relevantes(grupo, colunas, regra, limite)
+                    nomes = [str(nome) for nome in colunas[regra['coluna_nome']][primeiras]] if regra.get('coluna_nome') else []
+                    campos = _linha(colunas, primeiras[0], n=len(grupo), lista=', '.join(nomes))
+                    nivel = regra['confianca']
+                    if regra.get('coluna_confianca'):
+                        nivel = min(colunas[regra['coluna_confianca']][grupo], key=NIVEIS_CONFIANCA.index)
+                    impacto = colunas[regra['coluna_impacto']][primeiras[0]] if regra.get('coluna_impacto') else regra['impacto']
+                    emitidos.append((regra['descricao'].format(**campos), nivel, impacto))
+            else:
+                for indice in _mais_relevantes(selecionadas, colunas, regra, limite):
+                    nivel = colunas[regra['coluna_confianca']][indice] if regra.get('coluna_confianca') else regra['confianca']
+                    if regra.get('amostra') and colunas[regra['amostra']][indice] < regra.get('amostra_minima', 0):
+                        nivel = CONFIANCA_REDUZIDA[nivel]
+                    impacto = colunas[regra['coluna_impacto']][indice] if regra.get('coluna_impacto') else regra['impacto']
+                    emitidos.append((regra['descricao'].format(**_linha(colunas, indice)), nivel, impacto))
+            
+            for descricao, nivel, impacto in emitidos:
+                insights.append({
+                    'categoria': regra['categoria'],
+                    'descricao': descricao,
+                    'impacto': impacto,
+                    'confianca': nivel,
+                    'regra': regra['id'],
+                    'pontuacao': pontuar(impacto, nivel)
+                })
+            if emitidos and regra.get('recomendacao'):
+                recomendacoes.append(dict(regra['recomendacao'], categoria=regra['categoria'], regra=regra['id']))
+        except Exception as e:
+            logger.error(f"Erro ao avaliar a regra {regra.get('id')}: {str(e)}")
+    
+    return ordenar(insights), recomendacoes
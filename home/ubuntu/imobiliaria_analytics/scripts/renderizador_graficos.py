@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de renderização de gráficos em paralelo
+Este script recebe especificações de gráficos (dados + tipo de gráfico) das análises
+e as renderiza em um pool de processos, usando a API orientada a objetos do
+matplotlib com o backend Agg (sem o estado global do pyplot). Assim o cálculo das
+análises e a renderização das figuras se sobrepõem e a renderização usa vários núcleos.
+
+Formato de uma especificação:
+    {
+        'arquivo': caminho do PNG,
+        'tamanho': (largura, altura) em polegadas,
+        'paineis': [painel, ...]  # empilhados verticalmente
+    }
+
+Tipos de painel:
+    {'tipo': 'linhas', 'x': [...], 'series': [{'y': [...], 'rotulo': str, 'estilo': str}],
+     'inverter_y': bool, ...}  # inverter_y: valores menores no topo (ex.: posições de ranking)
+    {'tipo': 'barras', 'categorias': [...], 'valores': [...], 'rotacao_x': int, ...}
+    {'tipo': 'mapa_calor', 'matriz': [[...], ...], 'rotulos_x': [...], 'rotulos_y': [...],
+     'rotulo_cor': str, 'percentual': bool, ...}  # células None/NaN ficam em branco
+Campos comuns aos painéis: 'titulo', 'xlabel', 'ylabel'.
+
+As figuras ficam em cache (output/cache_figuras/), endereçadas pelo hash dos dados,
+dos parâmetros do gráfico e da versão de estilo: se nada mudou, o PNG anterior é
+reaproveitado sem renderizar de novo.
+"""
+
+import os
+import json
+import time
+import atexit
+import shutil
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import persistencia
+
+logger = logging.getLogger('renderizador_graficos')
+
+# Versão do estilo dos gráficos: incrementar ao alterar o código de desenho invalida o cache
+VERSAO_ESTILO = 1
+
+# Subdiretório (ao lado das figuras) onde ficam os PNGs em cache
+DIRETORIO_CACHE = 'cache_figuras'
+
+# Renderizador compartilhado pelo processo (criado sob demanda)
+_renderizador = None
+
+
+def _inicializar_worker():
+    """
+    Pré-carrega o matplotlib (backend Agg) em cada processo do pool.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure  # noqa: F401
+
+
+def _desenhar_linhas(ax, painel):
+    """
+    Desenha um painel de linhas.
+    
+    Args:
+        ax (matplotlib.axes.Axes): Eixos de destino
+        painel (dict): Especificação do painel
+    """
+    for serie in painel['series']:
+        ax.plot(painel['x'], serie['y'], serie.get('estilo', '-'), label=serie.get('rotulo'))
+    if any(serie.get('rotulo') for serie in painel['series']):
+        ax.legend()
+    if painel.get('inverter_y'):
+        ax.invert_yaxis()
+
+
+def _desenhar_barras(ax, painel):
+    """
+    Desenha um painel de barras (uma cor por categoria).
+    
+    Args:
+        ax (matplotlib.axes.Axes): Eixos de destino
+        painel (dict): Especificação do painel
+    """
+    categorias = [str(c) for c in painel['categorias']]
+    cores = [f'C{i % 10}' for i in range(len(categorias))]
+    ax.bar(categorias, painel['valores'], color=cores)
+    rotacao = painel.get('rotacao_x')
+    if rotacao:
+        ax.tick_params(axis='x', labelrotation=rotacao)
+
+
+def _desenhar_mapa_calor(ax, painel):
+    """
+    Desenha um mapa de calor (linhas x colunas), anotando os valores quando cabem.
+    
+    Args:
+        ax (matplotlib.axes.Axes): Eixos de destino
+        painel (dict): Especificação do painel
+    """
+    import numpy as np
+    from matplotlib.ticker import PercentFormatter
+    
+    matriz = np.array([[np.nan if v is None else v for v in linha] for linha in painel['matriz']], dtype=float)
+    imagem = ax.imshow(np.ma.masked_invalid(matriz), aspect='auto', cmap='YlGnBu', interpolation='nearest')
+    barra = ax.figure.colorbar(imagem, ax=ax, format=PercentFormatter(1.0) if painel.get('percentual') else None)
+    barra.set_label(painel.get('rotulo_cor', ''))
+    
+    # Rótulos dos eixos (no máximo ~25 por eixo)
+    for eixo, rotulos, definir_ticks, definir_rotulos in (
+        ('x', painel.get('rotulos_x'), ax.set_xticks, ax.set_xticklabels),
+        ('y', painel.get('rotulos_y'), ax.set_yticks, ax.set_yticklabels)
+    ):
+        if rotulos:
+            passo = max(1, len(rotulos) // 25)
+            posicoes = list(range(0, len(rotulos), passo))
+            definir_ticks(posicoes)
+            definir_rotulos([str(rotulos[i]) for i in posicoes])
+    
+    formato = '{:.0%}' if painel.get('percentual') else '{:.2g}'
+    if matriz.size <= 400:
+        limite = np.nanmax(matriz) if np.isfinite(matriz).any() else 0
+        for (i, j), valor in np.ndenumerate(matriz):
+            if np.isfinite(valor):
+                ax.text(j, i, formato.format(valor), ha='center', va='center', fontsize=7,
+                        color='white' if valor > 0.6 * limite else 'black')
+
+
+DESENHOS = {
+    'linhas': _desenhar_linhas,
+    'barras': _desenhar_barras,
+    'mapa_calor': _desenhar_mapa_calor
+}
+
+# Tipos de painel desenhados sem grade
+SEM_GRADE = {'mapa_calor'}
+
+
+def renderizar(spec):
+    """
+    Renderiza uma especificação de gráfico em PNG (executado nos workers).
+    
+    Args:
+        spec (dict): Especificação do gráfico
+    
+    Returns:
+        dict: Caminho do arquivo, tempo de parede e tempo de CPU da renderização
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    
+    inicio_perf = time.perf_counter()
+    inicio_cpu = time.process_time()
+    
+    paineis = spec['paineis']
+    figura = Figure(figsize=spec.get('tamanho', (10, 6)))
+    FigureCanvasAgg(figura)
+    eixos = figura.subplots(len(paineis), 1, squeeze=False)[:, 0]
+    
+    for ax, painel in zip(eixos, paineis):
+        DESENHOS[painel['tipo']](ax, painel)
+        ax.set_title(painel.get('titulo', ''))
+        ax.set_xlabel(painel.get('xlabel', ''))
+        ax.set_ylabel(painel.get('ylabel', ''))
+        if painel['tipo'] not in SEM_GRADE:
+            ax.grid(True, alpha=0.3)
+    
+    figura.tight_layout()
+    figura.savefig(spec['arquivo'])
+    
+    return {
+        'arquivo': spec['arquivo'],
+        'tempo_s': time.perf_counter() - inicio_perf,
+        'cpu_s': time.process_time() - inicio_cpu
+    }
+
+
+def chave_cache(spec):
+    """
+    Calcula a chave de cache de uma especificação.
+    
+    O caminho de destino não entra na chave: o mesmo gráfico gravado em outro
+    arquivo reaproveita a mesma entrada.
+    
+    Args:
+        spec (dict): Especificação do gráfico
+    
+    Returns:
+        str: Hash SHA-256 em hexadecimal
+    """
+    conteudo = {chave: valor for chave, valor in spec.items() if chave != 'arquivo'}
+    conteudo['versao_estilo'] = VERSAO_ESTILO
+    serializado = json.dumps(conteudo, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(serializado.encode('utf-8')).hexdigest()
+
+
+def _copiar_atomico(origem, destino):
+    """
+    Copia um arquivo por meio de um temporário no diretório de destino.
+    
+    Args:
+        origem (str): Arquivo de origem
+        destino (str): Arquivo de destino
+    """
+    descritor, temporario = persistencia.criar_temporario(os.path.dirname(os.path.abspath(destino)), '.png')
+    os.close(descritor)
+    try:
+        shutil.copyfile(origem, temporario)
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def renderizar_com_cache(spec, caminho_cache):
+    """
+    Renderiza uma especificação e guarda uma cópia do PNG no cache (executado nos workers).
+    
+    Args:
+        spec (dict): Especificação do gráfico
+        caminho_cache (str): Caminho da entrada de cache
+    
+    Returns:
+        dict: Resultado de renderizar
+    """
+    resultado = renderizar(spec)
+    os.makedirs(os.path.dirname(caminho_cache), exist_ok=True)
+    _copiar_atomico(spec['arquivo'], caminho_cache)
+    return resultado
+
+
+class _Concluido:
+    """
+    Resultado já disponível (renderização síncrona), com a interface de um Future.
+    """
+    
+    def __init__(self, funcao, *args):
+        """
+        Executa a função imediatamente e guarda o resultado ou a exceção.
+        
+        Args:
+            funcao (callable): Função a executar
+            *args: Argumentos da função
+        """
+        self._resultado = None
+        self._erro = None
+        try:
+            self._resultado = funcao(*args)
+        except Exception as e:
+            self._erro = e
+    
+    def result(self):
+        """
+        Retorna o resultado ou propaga a exceção da execução.
+        """
+        if self._erro is not None:
+            raise self._erro
+        return self._resultado
+
+
+class RenderizadorGraficos:
+    """
+    Pool de processos que renderiza especificações de gráficos.
+    """
+    
+    def __init__(self, max_workers=None, paralelo=True, usar_cache=True, limite_cache_mb=50):
+        """
+        Inicializa o renderizador (o pool é criado no primeiro envio).
+        
+        Args:
+            max_workers (int): Quantidade de processos (padrão: até 4, reservando um núcleo para as análises)
+            paralelo (bool): False renderiza no próprio processo, sem pool
+            usar_cache (bool): Reaproveitar PNGs de gráficos com os mesmos dados e parâmetros
+            limite_cache_mb (float): Tamanho máximo de cada diretório de cache
+        """
+        self.max_workers = max_workers or min(4, (os.cpu_count() or 1) - 1)
+        self.paralelo = paralelo and self.max_workers > 0
+        self.usar_cache = usar_cache
+        self.limite_cache_bytes = int(limite_cache_mb * 1024 * 1024)
+        self._pool = None
+        self._diretorios_cache = set()
+    
+    def _obter_pool(self):
+        """
+        Cria o pool sob demanda; em caso de falha passa a renderizar no próprio processo.
+        
+        Returns:
+            ProcessPoolExecutor: Pool ativo ou None
+        """
+        if self._pool is None and self.paralelo:
+            try:
+                # 'spawn' evita herdar threads (logging, monitoramento) via fork
+                contexto = multiprocessing.get_context('spawn')
+                self._pool = ProcessPoolExecutor(self.max_workers, mp_context=contexto,
+                                                 initializer=_inicializar_worker)
+                logger.info(f"Pool de renderização iniciado com {self.max_workers} processos")
+            except (OSError, ValueError, NotImplementedError) as e:
+                logger.warning(f"Pool de renderização indisponível, renderizando no processo principal: {str(e)}")
+                self.paralelo = False
+        return self._pool
+    
+    def submeter(self, spec):
+        """
+        Envia uma especificação para renderização.
+        
+        Args:
+            spec (dict): Especificação do gráfico
+        
+        Returns:
+            concurrent.futures.Future: Resultado futuro de renderizar(spec)
+        """
+        if not self.usar_cache:
+            funcao, args = renderizar, (spec,)
+        else:
+            diretorio_cache = os.path.join(os.path.dirname(os.path.abspath(spec['arquivo'])), DIRETORIO_CACHE)
+            caminho_cache = os.path.join(diretorio_cache, f'{chave_cache(spec)}.png')
+            self._diretorios_cache.add(diretorio_cache)
+            
+            if os.path.exists(caminho_cache):
+                return _Concluido(self._reaproveitar, spec['arquivo'], caminho_cache)
+            funcao, args = renderizar_com_cache, (spec, caminho_cache)
+        
+        pool = self._obter_pool()
+        if pool is None:
+            return _Concluido(funcao, *args)
+        return pool.submit(funcao, *args)
+    
+    def _reaproveitar(self, arquivo, caminho_cache):
+        """
+        Copia um PNG do cache para o destino.
+        
+        Args:
+            arquivo (str): Caminho de destino
+            caminho_cache (str): Entrada de cache
+        
+        Returns:
+            dict: Resultado no mesmo formato de renderizar
+        """
+        inicio_perf = time.perf_counter()
+        inicio_cpu = time.process_time()
+        _copiar_atomico(caminho_cache, arquivo)
+        
+        # O mtime marca o último uso, usado na remoção das entradas antigas
+        os.utime(caminho_cache)
+        return {
+            'arquivo': arquivo,
+            'tempo_s': time.perf_counter() - inicio_perf,
+            'cpu_s': time.process_time() - inicio_cpu,
+            'cache': True
+        }
+    
+    def limpar_cache(self):
+        """
+        Remove as entradas menos usadas recentemente até respeitar o limite de tamanho.
+        
+        Returns:
+            int: Quantidade de arquivos removidos
+        """
+        removidos = 0
+        for diretorio in self._diretorios_cache:
+            try:
+                entradas = []
+                with os.scandir(diretorio) as itens:
+                    for item in itens:
+                        if item.is_file() and item.name.endswith('.png'):
+                            info = item.stat()
+                            entradas.append((info.st_mtime, info.st_size, item.path))
+            except FileNotFoundError:
+                continue
+            
+            total = sum(tamanho for _, tamanho, _ in entradas)
+            for _, tamanho, caminho in sorted(entradas):
+                if total <= self.limite_cache_bytes:
+                    break
+                try:
+                    os.remove(caminho)
+                    total -= tamanho
+                    removidos += 1
+                except OSError as e:
+                    logger.warning(f"Não foi possível remover {caminho} do cache de figuras: {str(e)}")
+        
+        if removidos:
+            logger.info(f"{removidos} figuras antigas removidas do cache")
+        return removidos
+    
+    def aguardar(self, futuros):
+        """
+        Aguarda as renderizações e registra seus tempos na instrumentação.
+        
+        Args:
+            futuros (list): Futures retornados por submeter
+        
+        Returns:
+            list: Caminhos das figuras renderizadas com sucesso (None nas que falharam)
+        """
+        # Importado aqui para que os workers não carreguem o pandas ao importar este módulo
+        import instrumentacao
+        
+        instrumentador = instrumentacao.instrumentador_ativo()
+        caminhos = []
+        for futuro in futuros:
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                logger.error(f"Erro ao renderizar gráfico: {str(e)}")
+                caminhos.append(None)
+                continue
+            
+            if instrumentador is not None:
+                instrumentador.registrar(f"render:{os.path.basename(resultado['arquivo'])}",
+                                         resultado['tempo_s'], resultado['cpu_s'],
+                                         cache=resultado.get('cache', False))
+            caminhos.append(resultado['arquivo'])
+        
+        if self.usar_cache:
+            self.limpar_cache()
+        return caminhos
+    
+    def encerrar(self):
+        """
+        Encerra o pool de processos.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+def obter_renderizador():
+    """
+    Retorna o renderizador compartilhado do processo.
+    
+    Returns:
+        RenderizadorGraficos: Renderizador compartilhado
+    """
+    global _renderizador
+    if _renderizador is None:
+        _renderizador = RenderizadorGraficos()
+        atexit.register(_renderizador.encerrar)
+    return _renderizador
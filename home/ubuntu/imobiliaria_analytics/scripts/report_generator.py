@@ -8,6 +8,7 @@ Este script gera um relatório PDF com insights estratégicos baseados nas anál
 
 import os
 import json
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime
@@ -20,15 +21,10 @@ from reportlab.platypus import PageBreak, ListFlowable, ListItem
 from reportlab.lib.units import inch, cm
 from reportlab.lib.enums import TA_JUSTIFY, TA_LEFT, TA_CENTER, TA_RIGHT
 
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'output', 'relatorio.log')),
-        logging.StreamHandler()
-    ]
-)
+import instrumentacao
+import perfilador
+import config_logging
+
 logger = logging.getLogger('report_generator')
 
 class ReportGenerator:
@@ -235,7 +231,23 @@ class ReportGenerator:
             elementos.append(texto_leads)
         
         elementos.append(Spacer(1, 0.3*cm))
-        
+
+        # Alertas de anomalias recentes
+        alertas = self.resultados.get('anomalias', {}).get('alertas', [])
+        if alertas:
+            texto_alertas = Paragraph("<b>Alertas:</b>", self.styles['TextoNormal'])
+            elementos.append(texto_alertas)
+
+            for alerta in alertas[:5]:
+                texto = Paragraph(alerta.get('descricao', ''), self.styles['Alerta'])
+                elementos.append(texto)
+
+            if len(alertas) > 5:
+                texto = Paragraph(f"Outros {len(alertas) - 5} alertas estão disponíveis nos resultados da análise.", self.styles['TextoNormal'])
+                elementos.append(texto)
+
+            elementos.append(Spacer(1, 0.3*cm))
+
         # Principais insights
         insights = self.resultados.get('insights', [])
         if insights:
@@ -276,10 +288,57 @@ class ReportGenerator:
                 texto = Paragraph(recomendacao.get('descricao', ''), self.styles['Recomendacao'])
                 elementos.append(texto)
         
+        elementos.extend(self._criar_tabela_cenarios())
+        
         elementos.append(PageBreak())
         
         return elementos
     
+    def _criar_tabela_cenarios(self):
+        """
+        Cria a tabela com as faixas de percentis dos cenários simulados.
+        
+        Returns:
+            list: Lista de elementos da tabela (vazia sem simulação)
+        """
+        elementos = []
+        simulacao = self.resultados.get('simulacao_cenarios', {})
+        cenarios = simulacao.get('cenarios', [])
+        if not cenarios:
+            return elementos
+        
+        horizonte = simulacao.get('parametros', {}).get('horizonte_dias', 30)
+        texto = Paragraph(f"<b>Cenários para os Próximos {horizonte} Dias (percentis 5 / 50 / 95):</b>", self.styles['TextoNormal'])
+        elementos.append(texto)
+        
+        dados_tabela = [['Cenário', 'VGV (R$ mil)', 'Comissões (R$ mil)', 'Ganho Mediano de VGV']]
+        for cenario in cenarios:
+            vgv, comissao = cenario.get('vgv', {}), cenario.get('comissao', {})
+            comparacao = cenario.get('comparacao')
+            dados_tabela.append([
+                Paragraph(cenario.get('descricao', ''), self.styles['TextoNormal']),
+                f"{vgv.get('p5', 0) / 1000:,.0f} / {vgv.get('p50', 0) / 1000:,.0f} / {vgv.get('p95', 0) / 1000:,.0f}",
+                f"{comissao.get('p5', 0) / 1000:,.0f} / {comissao.get('p50', 0) / 1000:,.0f} / {comissao.get('p95', 0) / 1000:,.0f}",
+                f"R$ {comparacao.get('diferenca_vgv_p50', 0) / 1000:,.0f} mil" if comparacao else '-'
+            ])
+        
+        tabela = Table(dados_tabela, colWidths=[1.9*inch, 1.6*inch, 1.4*inch, 1.3*inch])
+        tabela.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]))
+        elementos.append(tabela)
+        elementos.append(Spacer(1, 0.3*cm))
+        
+        return elementos
+    
     def _criar_secao_producao(self):
         """
         Cria a seção de análise de produção.
@@ -414,10 +473,67 @@ class ReportGenerator:
                 texto = Paragraph(insight.get('descricao', ''), self.styles['Insight'])
                 elementos.append(texto)
         
+        elementos.append(Spacer(1, 0.3*cm))
+        
+        # Desempenho por equipe
+        subtitulo = Paragraph("2.3. Desempenho por Equipe", self.styles['Secao'])
+        elementos.append(subtitulo)
+        
+        figura_equipes = next((f for f in figuras if 'hierarquia_equipes' in f.get('arquivo', '')), None)
+        
+        if figura_equipes:
+            caminho_figura = os.path.join(self.output_dir, figura_equipes.get('arquivo', ''))
+            if os.path.exists(caminho_figura):
+                img = Image(caminho_figura, width=6*inch, height=3*inch)
+                elementos.append(img)
+                elementos.append(Spacer(1, 0.2*cm))
+                
+                # Legenda da figura
+                legenda = Paragraph(
+                    f"<i>{figura_equipes.get('descricao', 'VGV por equipe e participação dos corretores')}</i>",
+                    self.styles['TextoNormal']
+                )
+                elementos.append(legenda)
+        
+        # Tabela de equipes com o corretor de maior VGV de cada uma
+        equipes = self.resultados.get('hierarquia_equipes', {}).get('equipe', [])
+        
+        if equipes:
+            dados_tabela = [['Equipe', 'VGV (R$)', 'Participação', 'Vendas', 'Destaque (% da equipe)']]
+            
+            for equipe in sorted(equipes, key=lambda e: e.get('posicao', 0)):
+                dados_tabela.append([
+                    equipe.get('equipe', ''),
+                    f"{equipe.get('valor_total', 0):,.2f}",
+                    f"{equipe.get('participacao_no_grupo', 0):.1%}",
+                    equipe.get('quantidade', 0),
+                    f"{equipe.get('corretor_destaque', '')} ({equipe.get('participacao_destaque') or 0:.0%})"
+                ])
+            
+            tabela = Table(dados_tabela, colWidths=[1.2*inch, 1.5*inch, 1*inch, 0.8*inch, 2*inch])
+            tabela.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                ('ALIGN', (1, 1), (-2, -1), 'RIGHT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ]))
+            
+            elementos.append(tabela)
+            elementos.append(Spacer(1, 0.3*cm))
+        
+        insights = [i for i in self.resultados.get('insights', []) if i.get('categoria') == 'hierarquia_equipes']
+        for insight in insights:
+            elementos.append(Paragraph(insight.get('descricao', ''), self.styles['Insight']))
+        
         elementos.append(PageBreak())
         
         return elementos
 
+    @instrumentacao.instrumentado()
     def gerar_relatorio(self, nome_arquivo):
         """
         Gera o relatório PDF completo.
@@ -450,7 +566,8 @@ class ReportGenerator:
             elementos.extend(self._criar_resumo_executivo())
             
             # Gerar PDF
-            doc.build(elementos)
+            with instrumentacao.etapa('doc.build', linhas=len(elementos)):
+                doc.build(elementos)
             
             logger.info(f"Relatório PDF gerado com sucesso: {caminho_pdf}")
             return caminho_pdf
@@ -464,9 +581,16 @@ def main():
     """
     Função principal para execução direta do script.
     """
+    parser = argparse.ArgumentParser(description='Geração de relatório PDF')
+    perfilador.adicionar_argumentos(parser)
+    config_logging.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    
     # Diretório base do projeto
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     output_dir = os.path.join(base_dir, 'output')
+    config_logging.configurar_por_argumentos(args, output_dir)
+    perfil = perfilador.iniciar(args, output_dir)
     
     # Carregar resultados da análise
     with open(os.path.join(output_dir, 'resultados_analise.json'), 'r', encoding='utf-8') as f:
@@ -485,6 +609,10 @@ def main():
         print(f"Relatório gerado com sucesso: {caminho_relatorio}")
     else:
         print("Falha na geração do relatório.")
+    
+    caminho_perfil = perfilador.finalizar(perfil)
+    if caminho_perfil:
+        print(f"Resumo do perfil: {caminho_perfil}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de decomposição sazonal vetorizada
+Este script faz a decomposição aditiva clássica (tendência por média móvel centrada,
+componente sazonal pela média de cada fase e resíduo) de todas as linhas de uma
+matriz de séries diárias de uma só vez, para períodos semanais e mensais.
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger('sazonalidade')
+
+# Nome dos dias da semana (segunda = 0, como em pandas.Timestamp.dayofweek)
+DIAS_SEMANA = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+
+
+def media_movel_centrada(matriz, periodo):
+    """
+    Tendência por média móvel centrada em todas as séries.
+    
+    Para períodos pares usa a média 2 x período (pesos 1/2 nas extremidades),
+    como na decomposição clássica.
+    
+    Args:
+        matriz (numpy.ndarray): Matriz (séries x dias)
+        periodo (int): Período sazonal em dias
+    
+    Returns:
+        numpy.ndarray: Tendência (NaN nas bordas sem janela completa)
+    """
+    matriz = np.asarray(matriz, dtype=float)
+    n = matriz.shape[1]
+    meio = periodo // 2
+    tendencia = np.full(matriz.shape, np.nan)
+    if n < 2 * meio + 1:
+        return tendencia
+    
+    acumulada = np.zeros((matriz.shape[0], n + 1))
+    np.cumsum(matriz, axis=1, out=acumulada[:, 1:])
+    
+    # Soma dos 2 * meio + 1 pontos centrados em cada dia
+    soma = acumulada[:, 2 * meio + 1:] - acumulada[:, :n - 2 * meio]
+    if periodo % 2 == 0:
+        soma = soma - 0.5 * (matriz[:, :n - 2 * meio] + matriz[:, 2 * meio:])
+    tendencia[:, meio:n - meio] = soma / periodo
+    return tendencia
+
+
+def _media_ignorando_nan(valores, eixo):
+    """
+    Média ao longo de um eixo ignorando NaN (NaN quando não há valores).
+    
+    Args:
+        valores (numpy.ndarray): Valores
+        eixo (int): Eixo da média
+    
+    Returns:
+        numpy.ndarray: Médias
+    """
+    validos = ~np.isnan(valores)
+    soma = np.where(validos, valores, 0.0).sum(axis=eixo)
+    contagem = validos.sum(axis=eixo)
+    return np.divide(soma, contagem, out=np.full(soma.shape, np.nan), where=contagem > 0)
+
+
+def _variancia_ignorando_nan(valores):
+    """
+    Variância de cada linha ignorando NaN.
+    
+    Args:
+        valores (numpy.ndarray): Matriz (séries x dias)
+    
+    Returns:
+        numpy.ndarray: Variância por linha
+    """
+    media = _media_ignorando_nan(valores, 1)
+    return _media_ignorando_nan((valores - media[:, None]) ** 2, 1)
+
+
+def decompor(matriz, periodo):
+    """
+    Decompõe todas as séries em tendência, sazonalidade e resíduo.
+    
+    Args:
+        matriz (numpy.ndarray): Matriz (séries x dias)
+        periodo (int): Período sazonal em dias
+    
+    Returns:
+        dict: 'tendencia', 'sazonal' e 'residuo' (séries x dias), 'indices'
+              (séries x período, componente sazonal de cada fase) e 'forca'
+              (força da sazonalidade entre 0 e 1, por série)
+    """
+    matriz = np.atleast_2d(np.asarray(matriz, dtype=float))
+    n_series, n = matriz.shape
+    
+    tendencia = media_movel_centrada(matriz, periodo)
+    sem_tendencia = matriz - tendencia
+    
+    # Média de cada fase: completar com NaN até um múltiplo do período e dobrar o eixo dos dias
+    ciclos = -(-n // periodo)
+    preenchido = np.full((n_series, ciclos * periodo), np.nan)
+    preenchido[:, :n] = sem_tendencia
+    indices = _media_ignorando_nan(preenchido.reshape(n_series, ciclos, periodo), 1)
+    indices = indices - _media_ignorando_nan(indices, 1)[:, None]
+    
+    sazonal = np.tile(indices, ciclos)[:, :n]
+    residuo = sem_tendencia - sazonal
+    
+    # Força da sazonalidade: 1 - Var(resíduo) / Var(sazonal + resíduo)
+    var_residuo = _variancia_ignorando_nan(residuo)
+    var_total = _variancia_ignorando_nan(sem_tendencia)
+    forca = np.clip(1 - np.divide(var_residuo, var_total, out=np.ones(n_series), where=var_total > 0), 0, 1)
+    
+    return {
+        'tendencia': tendencia,
+        'sazonal': sazonal,
+        'residuo': residuo,
+        'indices': indices,
+        'forca': np.nan_to_num(forca)
+    }
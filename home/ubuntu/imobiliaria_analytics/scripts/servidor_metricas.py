@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de serviço HTTP local de métricas
+Este script carrega uma única vez as métricas processadas, os resultados da análise
+e os dados limpos, e os serve da memória via HTTP (somente local) para o dashboard
+de BI. O estado é recarregado e trocado atomicamente sempre que uma nova execução
+do pipeline é concluída.
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+import logging
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import pandas as pd
+
+from data_processor import DataProcessor
+import persistencia
+import config_logging
+
+logger = logging.getLogger('servidor_metricas')
+
+# Coluna de data usada nos filtros ?inicio=&fim= de cada tipo de dado
+COLUNAS_DATA = {
+    'producao': 'data_venda',
+    'ganhos': 'data_pagamento',
+    'leads': 'data_captacao'
+}
+
+# Coluna que identifica o corretor em cada tipo de dado
+COLUNAS_CORRETOR = {
+    'producao': 'corretor',
+    'ganhos': 'corretor',
+    'leads': 'corretor_responsavel'
+}
+
+
+def _serializar(dados):
+    """
+    Serializa uma resposta em JSON (UTF-8).
+    
+    Args:
+        dados: Objeto a ser serializado
+    
+    Returns:
+        bytes: Corpo da resposta
+    """
+    return json.dumps(dados, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def resumir_corretor(fatias):
+    """
+    Resume os dados de um corretor.
+    
+    Args:
+        fatias (dict): DataFrames do corretor por tipo de dado
+    
+    Returns:
+        dict: Resumo de vendas, comissões e leads
+    """
+    resumo = {}
+    
+    producao = fatias.get('producao')
+    if producao is not None and 'valor_venda' in producao.columns:
+        resumo['vendas'] = int(len(producao))
+        resumo['vgv_total'] = float(producao['valor_venda'].sum())
+        resumo['ticket_medio'] = float(producao['valor_venda'].mean()) if len(producao) else 0.0
+    
+    ganhos = fatias.get('ganhos')
+    if ganhos is not None and 'valor_comissao' in ganhos.columns:
+        resumo['total_comissoes'] = float(ganhos['valor_comissao'].sum())
+        if 'status_pagamento' in ganhos.columns:
+            pendentes = ganhos[ganhos['status_pagamento'] != 'Pago']
+            resumo['comissoes_pendentes'] = float(pendentes['valor_comissao'].sum())
+    
+    leads = fatias.get('leads')
+    if leads is not None and 'convertido' in leads.columns:
+        resumo.update(resumir_leads(leads))
+    
+    return resumo
+
+
+def resumir_leads(df):
+    """
+    Resume um conjunto de leads.
+    
+    Args:
+        df (pandas.DataFrame): Leads a resumir
+    
+    Returns:
+        dict: Total, convertidos e taxa de conversão
+    """
+    total = int(len(df))
+    convertidos = int(df['convertido'].sum()) if 'convertido' in df.columns else 0
+    resumo = {
+        'total_leads': total,
+        'leads_convertidos': convertidos,
+        'taxa_conversao': convertidos / total if total else 0.0
+    }
+    if 'valor_estimado' in df.columns and total:
+        resumo['valor_estimado_medio'] = float(df['valor_estimado'].mean())
+    return resumo
+
+
+def resumir_origem(fatias):
+    """
+    Resume os leads de uma origem, incluindo a distribuição por corretor.
+    
+    Args:
+        fatias (dict): DataFrames da origem (apenas 'leads')
+    
+    Returns:
+        dict: Resumo da origem
+    """
+    leads = fatias['leads']
+    resumo = resumir_leads(leads)
+    if 'corretor_responsavel' in leads.columns and 'convertido' in leads.columns:
+        por_corretor = leads.groupby('corretor_responsavel')['convertido'].agg(['count', 'mean'])
+        resumo['por_corretor'] = {
+            corretor: {'total_leads': int(linha['count']), 'taxa_conversao': float(linha['mean'])}
+            for corretor, linha in por_corretor.iterrows()
+        }
+    return resumo
+
+
+def filtrar_periodo(fatias, inicio=None, fim=None):
+    """
+    Restringe as fatias a um intervalo de datas.
+    
+    Args:
+        fatias (dict): DataFrames por tipo de dado
+        inicio (pandas.Timestamp): Data inicial (inclusive)
+        fim (pandas.Timestamp): Data final (inclusive)
+    
+    Returns:
+        dict: Fatias filtradas
+    """
+    filtradas = {}
+    for tipo, df in fatias.items():
+        coluna = COLUNAS_DATA.get(tipo)
+        if coluna in df.columns:
+            mascara = pd.Series(True, index=df.index)
+            if inicio is not None:
+                mascara &= df[coluna] >= inicio
+            if fim is not None:
+                mascara &= df[coluna] < fim + pd.Timedelta(days=1)
+            df = df[mascara]
+        filtradas[tipo] = df
+    return filtradas
+
+
+class EstadoMetricas:
+    """
+    Instantâneo imutável do estado do pipeline servido pela API.
+    """
+    
+    def __init__(self, metricas, analise, dataframes, marcador=None):
+        """
+        Monta o estado e pré-serializa as respostas estáticas.
+        
+        Args:
+            metricas (dict): Conteúdo de metricas_processadas.json
+            analise (dict): Conteúdo de resultados_analise.json
+            dataframes (dict): DataFrames limpos por tipo de dado
+            marcador (dict): Conteúdo do marcador da última execução
+        """
+        self.carregado_em = datetime.now().isoformat(timespec='seconds')
+        self.marcador = marcador or {}
+        
+        # Fatias por corretor e por origem, separadas uma única vez
+        self.corretores = {}
+        for tipo, coluna in COLUNAS_CORRETOR.items():
+            df = dataframes.get(tipo)
+            if df is not None and coluna in df.columns:
+                for nome, grupo in df.groupby(coluna):
+                    self.corretores.setdefault(str(nome), {})[tipo] = grupo
+        
+        self.origens = {}
+        leads = dataframes.get('leads')
+        if leads is not None and 'origem' in leads.columns:
+            for nome, grupo in leads.groupby('origem'):
+                self.origens[str(nome)] = {'leads': grupo}
+        
+        resumos_corretores = {nome: resumir_corretor(f) for nome, f in self.corretores.items()}
+        resumos_origens = {nome: resumir_origem(f) for nome, f in self.origens.items()}
+        
+        self.respostas = {
+            '/metricas': _serializar(metricas),
+            '/analise': _serializar(analise),
+            '/corretores': _serializar(resumos_corretores),
+            '/origens': _serializar(resumos_origens)
+        }
+        for tipo, valor in metricas.items():
+            self.respostas[f'/metricas/{tipo}'] = _serializar(valor)
+        for secao, valor in analise.items():
+            self.respostas[f'/analise/{secao}'] = _serializar(valor)
+        for nome, resumo in resumos_corretores.items():
+            self.respostas[f'/corretores/{nome}'] = _serializar(resumo)
+        for nome, resumo in resumos_origens.items():
+            self.respostas[f'/origens/{nome}'] = _serializar(resumo)
+    
+    def saude(self):
+        """
+        Retorna informações sobre o estado carregado.
+        
+        Returns:
+            dict: Momento da carga e dados da última execução
+        """
+        return {
+            'status': 'ok',
+            'carregado_em': self.carregado_em,
+            'ultima_execucao': self.marcador,
+            'corretores': len(self.corretores),
+            'origens': len(self.origens)
+        }
+
+
+def carregar_estado(data_dir, output_dir, arquivos):
+    """
+    Lê os resultados mais recentes do pipeline e os dados limpos.
+    
+    Args:
+        data_dir (str): Diretório das planilhas
+        output_dir (str): Diretório de saída do pipeline
+        arquivos (dict): Nome do arquivo por tipo de dado
+    
+    Returns:
+        EstadoMetricas: Novo estado carregado
+    """
+    def ler_json(nome):
+        caminho = os.path.join(output_dir, nome)
+        if not os.path.exists(caminho):
+            return {}
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    metricas = ler_json('metricas_processadas.json')
+    analise = ler_json('resultados_analise.json')
+    marcador = ler_json(persistencia.ARQUIVO_MARCADOR)
+    
+    processor = DataProcessor(data_dir)
+    dataframes = {}
+    for tipo, arquivo in arquivos.items():
+        if processor.carregar_arquivo(tipo, arquivo):
+            dataframes[tipo] = processor.limpar_dados(tipo)
+    
+    return EstadoMetricas(metricas, analise, dataframes, marcador)
+
+
+class ServicoMetricas:
+    """
+    Mantém o estado atual e o recarrega quando o pipeline conclui uma nova execução.
+    """
+    
+    def __init__(self, data_dir, output_dir, arquivos, intervalo=2.0):
+        """
+        Inicializa o serviço e carrega o estado inicial.
+        
+        Args:
+            data_dir (str): Diretório das planilhas
+            output_dir (str): Diretório de saída do pipeline
+            arquivos (dict): Nome do arquivo por tipo de dado
+            intervalo (float): Intervalo (s) de verificação do marcador de execução
+        """
+        self.data_dir = data_dir
+        self.output_dir = output_dir
+        self.arquivos = arquivos
+        self.intervalo = intervalo
+        self._assinatura = self._ler_assinatura()
+        self.estado = carregar_estado(data_dir, output_dir, arquivos)
+        logger.info("Estado inicial de métricas carregado")
+    
+    def _ler_assinatura(self):
+        """
+        Lê a assinatura do marcador da última execução.
+        
+        Returns:
+            tuple: (mtime_ns, tamanho) do marcador ou None se ele não existir
+        """
+        try:
+            info = os.stat(os.path.join(self.output_dir, persistencia.ARQUIVO_MARCADOR))
+            return (info.st_mtime_ns, info.st_size)
+        except FileNotFoundError:
+            return None
+    
+    def recarregar_se_necessario(self):
+        """
+        Recarrega o estado se houver uma execução mais recente.
+        
+        Returns:
+            bool: True se o estado foi trocado
+        """
+        assinatura = self._ler_assinatura()
+        if assinatura == self._assinatura:
+            return False
+        
+        try:
+            novo_estado = carregar_estado(self.data_dir, self.output_dir, self.arquivos)
+        except Exception as e:
+            logger.error(f"Erro ao recarregar estado de métricas: {str(e)}")
+            return False
+        
+        # A troca da referência é atômica: cada requisição usa um único instantâneo
+        self.estado = novo_estado
+        self._assinatura = assinatura
+        logger.info("Estado de métricas recarregado após nova execução do pipeline")
+        return True
+    
+    def vigiar(self):
+        """
+        Laço de verificação periódica do marcador (executado em thread própria).
+        """
+        while True:
+            time.sleep(self.intervalo)
+            self.recarregar_se_necessario()
+    
+    def responder(self, caminho, parametros):
+        """
+        Resolve uma requisição.
+        
+        Args:
+            caminho (str): Caminho da URL (já decodificado)
+            parametros (dict): Parâmetros da query string
+        
+        Returns:
+            tuple: (HTTPStatus, corpo em bytes)
+        """
+        estado = self.estado
+        caminho = caminho.rstrip('/') or '/'
+        
+        if caminho in ('/', '/saude'):
+            return HTTPStatus.OK, _serializar(estado.saude())
+        
+        inicio = parametros.get('inicio', [None])[0]
+        fim = parametros.get('fim', [None])[0]
+        
+        # Fatias filtradas por período são calculadas sob demanda
+        if inicio or fim:
+            partes = caminho.strip('/').split('/', 1)
+            grupos = {'corretores': (estado.corretores, resumir_corretor),
+                      'origens': (estado.origens, resumir_origem)}
+            if len(partes) == 2 and partes[0] in grupos:
+                fatias_por_nome, resumir = grupos[partes[0]]
+                fatias = fatias_por_nome.get(partes[1])
+                if fatias is None:
+                    return HTTPStatus.NOT_FOUND, _serializar({'erro': f'{partes[0][:-1]} não encontrado'})
+                try:
+                    inicio = pd.Timestamp(inicio) if inicio else None
+                    fim = pd.Timestamp(fim) if fim else None
+                except ValueError:
+                    return HTTPStatus.BAD_REQUEST, _serializar({'erro': 'Datas devem estar no formato AAAA-MM-DD'})
+                return HTTPStatus.OK, _serializar(resumir(filtrar_periodo(fatias, inicio, fim)))
+        
+        corpo = estado.respostas.get(caminho)
+        if corpo is None:
+            return HTTPStatus.NOT_FOUND, _serializar({'erro': f'Recurso não encontrado: {caminho}'})
+        return HTTPStatus.OK, corpo
+
+
+class ManipuladorMetricas(BaseHTTPRequestHandler):
+    """
+    Manipulador HTTP das rotas de métricas (somente GET).
+    """
+    
+    servico = None
+    
+    def do_GET(self):
+        """
+        Atende uma requisição GET.
+        """
+        url = urlsplit(self.path)
+        status, corpo = self.servico.responder(unquote(url.path), parse_qs(url.query))
+        
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(corpo)
+    
+    def log_message(self, formato, *args):
+        """
+        Redireciona o log de acesso para o logger do módulo.
+        """
+        logger.debug(formato % args)
+
+
+def iniciar_servidor(data_dir, output_dir, arquivos, host='127.0.0.1', porta=8050, intervalo=2.0, em_segundo_plano=False):
+    """
+    Inicia o servidor HTTP de métricas.
+    
+    Args:
+        data_dir (str): Diretório das planilhas
+        output_dir (str): Diretório de saída do pipeline
+        arquivos (dict): Nome do arquivo por tipo de dado
+        host (str): Endereço de escuta (padrão: apenas local)
+        porta (int): Porta de escuta
+        intervalo (float): Intervalo (s) de verificação de novas execuções
+        em_segundo_plano (bool): Atender em uma thread e retornar imediatamente
+    
+    Returns:
+        ThreadingHTTPServer: Servidor iniciado
+    """
+    servico = ServicoMetricas(data_dir, output_dir, arquivos, intervalo)
+    threading.Thread(target=servico.vigiar, name='vigia-metricas', daemon=True).start()
+    
+    manipulador = type('ManipuladorServico', (ManipuladorMetricas,), {'servico': servico})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    logger.info(f"Servidor de métricas disponível em http://{host}:{porta}/")
+    
+    if em_segundo_plano:
+        threading.Thread(target=servidor.serve_forever, name='servidor-metricas', daemon=True).start()
+        return servidor
+    
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Servidor de métricas interrompido pelo usuário")
+    finally:
+        servidor.server_close()
+    return servidor
+
+
+# Função para uso direto do script
+def main():
+    """
+    Função principal para execução direta do script.
+    """
+    parser = argparse.ArgumentParser(description='Servidor HTTP local de métricas')
+    parser.add_argument('--host', default='127.0.0.1', help='Endereço de escuta (padrão: apenas local)')
+    parser.add_argument('--porta', type=int, default=8050, help='Porta de escuta')
+    parser.add_argument('--intervalo', type=float, default=2.0, help='Intervalo (s) de verificação de novas execuções')
+    config_logging.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    config_logging.configurar_por_argumentos(args, os.path.join(base_dir, 'output'))
+    arquivos = {'producao': 'vendas.xlsx', 'ganhos': 'comissoes.xlsx', 'leads': 'leads.xlsx'}
+    iniciar_servidor(os.path.join(base_dir, 'data'), os.path.join(base_dir, 'output'), arquivos,
+                     args.host, args.porta, args.intervalo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de simulação de cenários (Monte Carlo) de VGV e comissões
+Este script estima, a partir dos dados limpos, o volume diário de leads e a taxa de
+conversão de cada origem e a distribuição de tickets e percentuais de comissão das
+vendas por tipo de imóvel, e simula dezenas de milhares de cenários do VGV e das
+comissões dos próximos dias. Cada cenário sorteia as taxas de conversão (incerteza
+da estimativa), o volume de leads, as conversões e os tickets das vendas, tudo de
+forma vetorizada e com custo proporcional à quantidade de simulações (não ao volume
+de leads): volumes e conversões saem das inversas das distribuições de Poisson e
+binomial, e a soma dos tickets de simulações com muitas vendas da aproximação
+normal. As simulações são divididas em blocos com sementes derivadas de
+uma única semente (numpy.random.SeedSequence) e processadas em processos paralelos:
+o resultado não depende da quantidade de processos, e todos os cenários usam os
+mesmos números aleatórios, de modo que as diferenças entre cenários refletem apenas
+as hipóteses alteradas.
+"""
+
+import os
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+logger = logging.getLogger('simulacao')
+
+# Quantidade padrão de simulações por cenário
+SIMULACOES = 20_000
+
+# Simulações por bloco (unidade de trabalho de cada processo)
+TAMANHO_BLOCO = 2_500
+
+# Dias simulados
+HORIZONTE_DIAS = 30
+
+# Dias mais recentes usados para estimar o volume de leads por origem
+DIAS_BASE = 90
+
+# Percentis reportados
+PERCENTIS = (5, 25, 50, 75, 95)
+
+# Semente padrão (resultados reprodutíveis entre execuções)
+SEMENTE = 0
+
+# Vendas por simulação até as quais os tickets são sorteados um a um (acima, aproximação normal da soma)
+VENDAS_EXATAS = 500
+
+# Produtividade de um corretor novo no horizonte, em relação à média dos atuais
+PRODUTIVIDADE_NOVOS = 0.5
+
+# Cenários simulados pela análise
+CENARIOS_PADRAO = (
+    {'nome': 'base', 'descricao': 'Taxas de conversão, volumes de leads e tickets atuais'},
+    {'nome': 'portais_conversao_5pp', 'descricao': 'Conversão dos leads de Portais 5 p.p. maior',
+     'conversao': {'Portais': 0.05}},
+    {'nome': 'dois_corretores', 'descricao': 'Dois corretores a mais na equipe', 'corretores_adicionais': 2},
+)
+
+
+def estimar_parametros(df_leads, df_producao, dias_base=DIAS_BASE):
+    """
+    Estima os parâmetros da simulação a partir dos dados limpos.
+    
+    As taxas de conversão usam todos os leads de cada origem; o volume diário usa
+    apenas os leads captados nos últimos dias_base dias.
+    
+    Args:
+        df_leads (pandas.DataFrame): Leads com 'origem', 'convertido' e 'data_captacao'
+        df_producao (pandas.DataFrame): Vendas com 'valor_venda', 'tipo_imovel' e, se houver,
+                                        'comissao_percentual' e 'corretor'
+        dias_base (int): Dias recentes usados no volume de leads
+    
+    Returns:
+        dict: Origens, leads e conversões por origem, leads por dia, tickets e comissões
+              das vendas, tipo de cada venda e quantidade de corretores
+    """
+    convertidos = df_leads['convertido'].fillna(False).astype(bool)
+    por_origem = convertidos.groupby(df_leads['origem'].astype(str)).agg(['size', 'sum'])
+    
+    fim = df_leads['data_captacao'].max()
+    recentes = df_leads[df_leads['data_captacao'] > fim - pd.Timedelta(days=dias_base)]
+    dias = max(1, min(dias_base, (fim - df_leads['data_captacao'].min()).days + 1))
+    volume = recentes['origem'].astype(str).value_counts().reindex(por_origem.index, fill_value=0)
+    
+    vendas = df_producao.dropna(subset=['valor_venda'])
+    tipos, nomes_tipos = pd.factorize(vendas['tipo_imovel'].astype(str))
+    comissoes = (vendas['comissao_percentual'].fillna(0) if 'comissao_percentual' in vendas.columns
+                 else pd.Series(0.0, index=vendas.index))
+    return {
+        'origens': por_origem.index.tolist(),
+        'leads': por_origem['size'].to_numpy(dtype=np.int64),
+        'convertidos': por_origem['sum'].to_numpy(dtype=np.int64),
+        'leads_por_dia': volume.to_numpy(dtype=float) / dias,
+        'tickets': vendas['valor_venda'].to_numpy(dtype=float),
+        'comissoes': comissoes.to_numpy(dtype=float),
+        'tipos': tipos.astype(np.int64),
+        'nomes_tipos': list(nomes_tipos),
+        'corretores': int(vendas['corretor'].nunique()) if 'corretor' in vendas.columns else 1
+    }
+
+
+def _poisson_inversa(uniformes, medias):
+    """
+    Sorteios de Poisson pela inversa da distribuição acumulada.
+    
+    O mesmo uniforme gera um valor maior quando a média é maior, de modo que cenários
+    com médias diferentes continuam pareados.
+    
+    Args:
+        uniformes (numpy.ndarray): Uniformes em [0, 1) (simulações x grupos)
+        medias (numpy.ndarray): Média de cada grupo
+    
+    Returns:
+        numpy.ndarray: Valores sorteados (simulações x grupos)
+    """
+    valores = np.zeros(uniformes.shape, dtype=np.int64)
+    for g, media in enumerate(medias):
+        if media <= 0:
+            continue
+        k = np.arange(int(media + 10 * np.sqrt(media) + 10))
+        log_pmf = k * np.log(media) - media - np.cumsum(np.log(np.maximum(k, 1)))
+        valores[:, g] = np.searchsorted(np.cumsum(np.exp(log_pmf)), uniformes[:, g], side='right')
+    return valores
+
+
+def _binomial_inversa(uniformes, n, p):
+    """
+    Sorteios binomiais pela inversa da distribuição acumulada.
+    
+    Como em _poisson_inversa, o mesmo uniforme gera um valor maior quando n ou p são
+    maiores, mantendo os cenários pareados; o custo não depende de n.
+    
+    Args:
+        uniformes (numpy.ndarray): Uniformes em [0, 1) (simulações x grupos)
+        n (numpy.ndarray): Quantidade de tentativas (simulações x grupos)
+        p (numpy.ndarray): Probabilidade de sucesso (simulações x grupos)
+    
+    Returns:
+        numpy.ndarray: Valores sorteados (simulações x grupos)
+    """
+    # A inversa em 0 é -1 (limite inferior do suporte menos um)
+    return np.maximum(stats.binom.ppf(uniformes, n, p), 0).astype(np.int64)
+
+
+def _soma_normal(vendas, valores, comissoes, normais):
+    """
+    VGV e comissão de cada simulação pela aproximação normal da soma dos tickets.
+    
+    A soma de k tickets sorteados com reposição tem média k x média e covariância
+    k x covariância dos tickets e das comissões de uma venda.
+    
+    Args:
+        vendas (numpy.ndarray): Vendas de cada simulação
+        valores (numpy.ndarray): Ticket de cada venda observada (com o fator do cenário)
+        comissoes (numpy.ndarray): Comissão de cada venda observada (em reais)
+        normais (numpy.ndarray): Normais padrão (simulações x 2)
+    
+    Returns:
+        tuple: (VGV, comissão) de cada simulação
+    """
+    desvio_valor, desvio_comissao = valores.std(), comissoes.std()
+    correlacao = np.corrcoef(valores, comissoes)[0, 1] if desvio_valor > 0 and desvio_comissao > 0 else 0.0
+    raiz = np.sqrt(vendas)
+    vgv = vendas * valores.mean() + raiz * desvio_valor * normais[:, 0]
+    comissao = vendas * comissoes.mean() + raiz * desvio_comissao * (
+        correlacao * normais[:, 0] + np.sqrt(max(1 - correlacao ** 2, 0)) * normais[:, 1]
+    )
+    return np.maximum(vgv, 0), np.maximum(comissao, 0)
+
+
+def _simular_bloco(parametros, cenario, tamanho, semente, horizonte_dias):
+    """
+    Simula um bloco de cenários (executado nos processos do pool).
+    
+    Args:
+        parametros (dict): Resultado de estimar_parametros
+        cenario (dict): Hipóteses do cenário ('conversao' em pontos percentuais somados
+                        por origem, 'volume' e 'ticket' como fatores por origem e por tipo,
+                        'corretores_adicionais')
+        tamanho (int): Simulações do bloco
+        semente (tuple): Sementes (numpy.random.SeedSequence) do bloco, uma por etapa
+                         (taxas, volumes, conversões, tickets e aproximação normal)
+        horizonte_dias (int): Dias simulados
+    
+    Returns:
+        dict: Leads, vendas, VGV e comissões de cada simulação
+    """
+    # Um gerador por etapa: alterar uma hipótese não desloca os sorteios das demais etapas
+    taxas_rng, volume_rng, conversao_rng, ticket_rng, normal_rng = (np.random.default_rng(s) for s in semente)
+    origens = parametros['origens']
+    delta = np.array([cenario.get('conversao', {}).get(origem, 0.0) for origem in origens])
+    fator_volume = np.array([cenario.get('volume', {}).get(origem, 1.0) for origem in origens])
+    fator_ticket = np.array([cenario.get('ticket', {}).get(tipo, 1.0) for tipo in parametros['nomes_tipos']])
+    capacidade = 1 + cenario.get('corretores_adicionais', 0) * PRODUTIVIDADE_NOVOS / max(parametros['corretores'], 1)
+    
+    # Taxas sorteadas da distribuição Beta das conversões observadas (incerteza da estimativa)
+    convertidos, leads = parametros['convertidos'], parametros['leads']
+    taxas = np.clip(taxas_rng.beta(convertidos + 1, leads - convertidos + 1, size=(tamanho, len(origens))) + delta, 0, 1)
+    medias = parametros['leads_por_dia'] * fator_volume * capacidade * horizonte_dias
+    volume = _poisson_inversa(volume_rng.random((tamanho, len(origens))), medias)
+    
+    # Conversões de cada origem: um uniforme por simulação e origem, invertido na binomial
+    vendas = _binomial_inversa(conversao_rng.random((tamanho, len(origens))), volume, taxas).sum(axis=1)
+    
+    # Tickets sorteados um a um nas simulações com até VENDAS_EXATAS vendas; as matrizes têm a
+    # k-ésima venda no primeiro eixo, para que as mesmas vendas recebam os mesmos tickets em todos
+    # os cenários, qualquer que seja a quantidade
+    exatas = vendas <= VENDAS_EXATAS
+    sorteio = ticket_rng.integers(0, len(parametros['tickets']), size=(int(vendas[exatas].max(initial=0)), tamanho))
+    realizadas = (np.arange(len(sorteio))[:, None] < vendas[None, :]) & exatas[None, :]
+    valores = np.where(realizadas, parametros['tickets'][sorteio] * fator_ticket[parametros['tipos'][sorteio]], 0.0)
+    vgv = valores.sum(axis=0)
+    comissao = (valores * parametros['comissoes'][sorteio]).sum(axis=0) / 100
+    
+    # Demais simulações: aproximação normal da soma dos tickets
+    normais = normal_rng.standard_normal((tamanho, 2))
+    if not exatas.all():
+        tickets = parametros['tickets'] * fator_ticket[parametros['tipos']]
+        vgv_normal, comissao_normal = _soma_normal(vendas[~exatas], tickets, tickets * parametros['comissoes'] / 100, normais[~exatas])
+        vgv[~exatas], comissao[~exatas] = vgv_normal, comissao_normal
+    return {
+        'leads': volume.sum(axis=1),
+        'vendas': vendas,
+        'vgv': vgv,
+        'comissao': comissao
+    }
+
+
+def simular_cenarios(parametros, cenarios=CENARIOS_PADRAO, simulacoes=SIMULACOES, horizonte_dias=HORIZONTE_DIAS,
+                     semente=SEMENTE, max_workers=None):
+    """
+    Simula todos os cenários, com os blocos distribuídos entre processos.
+    
+    Cada bloco tem a sua semente derivada de SeedSequence(semente), repetida em todos
+    os cenários (números aleatórios comuns); o resultado não depende de max_workers.
+    
+    Args:
+        parametros (dict): Resultado de estimar_parametros
+        cenarios (tuple): Hipóteses de cada cenário (ver _simular_bloco)
+        simulacoes (int): Simulações por cenário
+        horizonte_dias (int): Dias simulados
+        semente (int): Semente do gerador
+        max_workers (int): Processos (padrão: até 4, reservando um núcleo; 0 ou 1 = sequencial)
+    
+    Returns:
+        dict: Arrays de leads, vendas, VGV e comissões de cada cenário (pelo nome)
+    """
+    if not len(parametros['tickets']) or not len(parametros['origens']):
+        raise ValueError("Sem vendas ou leads para estimar a simulação")
+    max_workers = min(4, (os.cpu_count() or 1) - 1) if max_workers is None else max_workers
+    tamanhos = [min(TAMANHO_BLOCO, simulacoes - inicio) for inicio in range(0, simulacoes, TAMANHO_BLOCO)]
+    sementes = [tuple(bloco.spawn(5)) for bloco in np.random.SeedSequence(semente).spawn(len(tamanhos))]
+    tarefas = [(cenario, tamanho, semente_bloco) for cenario in cenarios for tamanho, semente_bloco in zip(tamanhos, sementes)]
+    
+    blocos = None
+    if max_workers > 1 and len(tarefas) > 1:
+        try:
+            # 'spawn' evita herdar threads (logging, monitoramento) via fork
+            with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                futuros = [executor.submit(_simular_bloco, parametros, cenario, tamanho, semente_bloco, horizonte_dias)
+                           for cenario, tamanho, semente_bloco in tarefas]
+                blocos = [futuro.result() for futuro in futuros]
+        except (OSError, ValueError, NotImplementedError, BrokenProcessPool) as e:
+            logger.warning(f"Pool de simulação indisponível, simulando no processo principal: {str(e)}")
+    if blocos is None:
+        blocos = [_simular_bloco(parametros, cenario, tamanho, semente_bloco, horizonte_dias)
+                  for cenario, tamanho, semente_bloco in tarefas]
+    
+    resultados = {}
+    for i, cenario in enumerate(cenarios):
+        partes = blocos[i * len(tamanhos):(i + 1) * len(tamanhos)]
+        resultados[cenario['nome']] = {medida: np.concatenate([parte[medida] for parte in partes]) for medida in partes[0]}
+    return resultados
+
+
+def faixas_percentis(simulados, percentis=PERCENTIS, referencia=None):
+    """
+    Percentis de cada medida simulada e, se houver cenário de referência, a comparação com ele.
+    
+    Args:
+        simulados (dict): Arrays de um cenário (resultado de simular_cenarios)
+        percentis (tuple): Percentis reportados
+        referencia (dict): Arrays do cenário de referência (mesmos números aleatórios)
+    
+    Returns:
+        dict: Média e percentis por medida; com referência, os percentis da diferença de
+              VGV e a probabilidade de o VGV superar o da referência
+    """
+    faixas = {}
+    for medida, valores in simulados.items():
+        quantis = np.percentile(valores, percentis)
+        faixas[medida] = dict({'media': float(valores.mean())}, **{f'p{p}': float(q) for p, q in zip(percentis, quantis)})
+    if referencia is not None:
+        diferenca = simulados['vgv'] - referencia['vgv']
+        faixas['comparacao'] = dict(
+            {f'diferenca_vgv_p{p}': float(q) for p, q in zip(percentis, np.percentile(diferenca, percentis))},
+            probabilidade_vgv_maior=float((diferenca > 0).mean())
+        )
+    return faixas
+
+
+def _hipoteses(pares, nome):
+    """
+    Converte argumentos CHAVE=VALOR da linha de comando em dicionário.
+    
+    Args:
+        pares (list): Argumentos no formato CHAVE=VALOR
+        nome (str): Nome do argumento (para mensagens de erro)
+    
+    Returns:
+        dict: Valor (float) por chave
+    """
+    hipoteses = {}
+    for par in pares or []:
+        chave, separador, valor = par.rpartition('=')
+        if not separador:
+            raise ValueError(f"{nome} deve estar no formato CHAVE=VALOR: {par}")
+        hipoteses[chave] = float(valor)
+    return hipoteses
+
+
+def main():
+    """
+    Função principal: simula um cenário hipotético contra o cenário base com os dados atuais.
+    """
+    from data_processor import DataProcessor
+    
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    
+    parser = argparse.ArgumentParser(description='Simulação de cenários de VGV e comissões')
+    parser.add_argument('--conversao', nargs='*', metavar='ORIGEM=PP', help='Pontos percentuais somados à conversão da origem')
+    parser.add_argument('--volume', nargs='*', metavar='ORIGEM=FATOR', help='Fator aplicado ao volume de leads da origem')
+    parser.add_argument('--ticket', nargs='*', metavar='TIPO=FATOR', help='Fator aplicado aos tickets do tipo de imóvel')
+    parser.add_argument('--corretores', type=int, default=0, help='Corretores adicionais')
+    parser.add_argument('--simulacoes', type=int, default=SIMULACOES, help='Simulações por cenário')
+    parser.add_argument('--horizonte', type=int, default=HORIZONTE_DIAS, help='Dias simulados')
+    parser.add_argument('--workers', type=int, help='Processos (padrão: até 4)')
+    parser.add_argument('--semente', type=int, default=SEMENTE, help='Semente do gerador')
+    args = parser.parse_args()
+    
+    try:
+        cenario = {
+            'nome': 'hipotese', 'descricao': 'Cenário informado',
+            'conversao': {origem: pp / 100 for origem, pp in _hipoteses(args.conversao, '--conversao').items()},
+            'volume': _hipoteses(args.volume, '--volume'),
+            'ticket': _hipoteses(args.ticket, '--ticket'),
+            'corretores_adicionais': args.corretores
+        }
+    except ValueError as e:
+        parser.error(str(e))
+    
+    processor = DataProcessor(os.path.join(base_dir, 'data'))
+    dataframes = {}
+    for tipo, arquivo in (('producao', 'vendas.xlsx'), ('leads', 'leads.xlsx')):
+        if processor.carregar_arquivo(tipo, arquivo):
+            dataframes[tipo] = processor.limpar_dados(tipo)
+    if dataframes.get('producao') is None or dataframes.get('leads') is None:
+        print("Dados de vendas e leads não encontrados em data/.")
+        return
+    
+    parametros = estimar_parametros(dataframes['leads'], dataframes['producao'])
+    simulados = simular_cenarios(parametros, (CENARIOS_PADRAO[0], cenario), args.simulacoes, args.horizonte,
+                                 args.semente, args.workers)
+    
+    print(f"{args.simulacoes} simulações dos próximos {args.horizonte} dias (percentis 5 / 50 / 95):")
+    for nome in ('base', 'hipotese'):
+        faixas = faixas_percentis(simulados[nome], referencia=simulados['base'] if nome != 'base' else None)
+        print(f"  {nome}: VGV R$ {faixas['vgv']['p5']:,.0f} / R$ {faixas['vgv']['p50']:,.0f} / R$ {faixas['vgv']['p95']:,.0f}; "
+              f"comissões R$ {faixas['comissao']['p5']:,.0f} / R$ {faixas['comissao']['p50']:,.0f} / R$ {faixas['comissao']['p95']:,.0f}")
+        if 'comparacao' in faixas:
+            print(f"  Diferença mediana de VGV: R$ {faixas['comparacao']['diferenca_vgv_p50']:,.0f} "
+                  f"(VGV maior que o base em {faixas['comparacao']['probabilidade_vgv_maior']:.0%} das simulações)")
+
+if __name__ == "__main__":
+    main()
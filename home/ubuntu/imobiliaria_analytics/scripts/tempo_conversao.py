@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de tempo até a conversão de leads
+Este script mantém, por origem e por corretor responsável, histogramas de baldes fixos
+(esbocos.HistogramasFixos) dos dias entre a captação e a conversão dos leads. Os leads
+são lidos em lotes, cada lote gera um esboço que é combinado aos anteriores, e os
+esboços são salvos entre as execuções: a cada nova execução apenas os leads convertidos
+depois da última conversão incorporada são processados. Medianas, percentis e
+histogramas são lidos dos esboços, sem guardar os leads.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+import esbocos
+import persistencia
+
+logger = logging.getLogger('tempo_conversao')
+
+# Versão do formato de output/modelos/tempo_conversao.json (persistencia.carregar_estado descarta as demais)
+VERSAO_ESTADO = 2
+
+# Dimensões com esboços próprios
+DIMENSOES = ('origem', 'corretor_responsavel')
+
+# Leads processados por lote
+TAMANHO_LOTE = 100_000
+
+# Limites (dias) do histograma resumido dos resultados
+LIMITES_HISTOGRAMA = (0, 3, 7, 14, 30, 60, 91)
+
+
+class TemposConversao:
+    """
+    Distribuição do tempo até a conversão por dimensão, com esboços persistentes.
+    """
+    
+    def __init__(self, caminho_estado, dimensoes=DIMENSOES, tamanho_lote=TAMANHO_LOTE):
+        """
+        Inicializa os esboços e carrega o estado salvo, se houver.
+        
+        Args:
+            caminho_estado (str): Arquivo JSON do estado
+            dimensoes (tuple): Colunas dos leads com esboços próprios
+            tamanho_lote (int): Leads processados por lote
+        """
+        self.caminho_estado = caminho_estado
+        self.dimensoes = tuple(dimensoes)
+        self.tamanho_lote = tamanho_lote
+        self.estado = self._carregar()
+        self.esbocos = {
+            dimensao: esbocos.HistogramasFixos.de_dict(self.estado['esbocos'][dimensao]) if self.estado else esbocos.HistogramasFixos()
+            for dimensao in self.dimensoes
+        }
+        self.modo = None
+        self.leads_incorporados = 0
+    
+    def _carregar(self):
+        """
+        Carrega o estado salvo (descartado se as dimensões ou os baldes dos esboços forem outros).
+        
+        Returns:
+            dict: Estado ou None se ausente/incompatível
+        """
+        def valido(estado):
+            return (set(estado.get('esbocos', {})) == set(self.dimensoes)
+                    and all(d['limites'] == esbocos.LIMITES_DIAS.tolist() for d in estado['esbocos'].values()))
+        return persistencia.carregar_estado(self.caminho_estado, VERSAO_ESTADO, 'de tempo até a conversão', valido, logger=logger)
+    
+    def salvar(self):
+        """
+        Salva os esboços e a marca da última conversão incorporada.
+        
+        Returns:
+            str: Caminho do estado ou None em caso de erro
+        """
+        self.estado['esbocos'] = {dimensao: esboco.para_dict() for dimensao, esboco in self.esbocos.items()}
+        return persistencia.salvar_estado(self.caminho_estado, self.estado, VERSAO_ESTADO, 'de tempo até a conversão', logger=logger)
+    
+    def atualizar(self, df):
+        """
+        Incorpora aos esboços os leads convertidos depois da última conversão incorporada.
+        
+        Os esboços são refeitos do zero quando não há estado ou quando a quantidade ou a
+        soma dos tempos das conversões até a marca mudou (conversões antigas incluídas,
+        removidas ou com datas corrigidas).
+        
+        Args:
+            df (pandas.DataFrame): Leads com data_captacao, data_conversao, convertido e as dimensões
+        """
+        conversao = df['data_conversao']
+        convertidos = df['convertido'].fillna(False).astype(bool).to_numpy() & conversao.notna().to_numpy()
+        dias = np.floor((conversao - df['data_captacao']).dt.total_seconds().to_numpy() / 86400)
+        
+        marca = pd.Timestamp(self.estado['marca']) if self.estado and self.estado['marca'] else None
+        refazer = marca is None
+        if not refazer:
+            anteriores = convertidos & (conversao <= marca).to_numpy()
+            refazer = (int(anteriores.sum()) != self.estado['convertidos']
+                       or float(np.nansum(dias[anteriores])) != self.estado['soma_dias'])
+        if refazer:
+            self.esbocos = {dimensao: esbocos.HistogramasFixos() for dimensao in self.dimensoes}
+            self.estado = {'versao': VERSAO_ESTADO, 'marca': None, 'convertidos': 0, 'soma_dias': 0.0}
+            novos = np.flatnonzero(convertidos)
+        else:
+            novos = np.flatnonzero(convertidos & (conversao > marca).to_numpy())
+        self.modo = 'completo' if refazer else 'incremental'
+        self.leads_incorporados = len(novos)
+        
+        # Cada lote gera um esboço por dimensão, combinado aos anteriores
+        for inicio in range(0, len(novos), self.tamanho_lote):
+            indices = novos[inicio:inicio + self.tamanho_lote]
+            lote = df.iloc[indices]
+            for dimensao in self.dimensoes:
+                self.esbocos[dimensao].mesclar(esbocos.HistogramasFixos.de_valores(lote[dimensao].to_numpy(), dias[indices]))
+        
+        if convertidos.any():
+            self.estado = {
+                'versao': VERSAO_ESTADO,
+                'marca': conversao[convertidos].max().isoformat(),
+                'convertidos': int(convertidos.sum()),
+                'soma_dias': float(np.nansum(dias[convertidos]))
+            }
+    
+    def resumo(self, dimensao=None, quantis=(0.25, 0.5, 0.75, 0.9)):
+        """
+        Percentis e histograma do tempo até a conversão de cada grupo de uma dimensão.
+        
+        Args:
+            dimensao (str): Dimensão (padrão: total de todos os leads)
+            quantis (tuple): Quantis reportados
+        
+        Returns:
+            pandas.DataFrame: Grupo, conversões, percentis (em dias) e contagens do
+                              histograma em LIMITES_HISTOGRAMA
+        """
+        esboco = self.esbocos[dimensao] if dimensao else self.esbocos[self.dimensoes[0]].total()
+        valores = esboco.quantis(quantis)
+        histograma = esboco.histograma(LIMITES_HISTOGRAMA)
+        
+        tabela = pd.DataFrame({dimensao or 'grupo': esboco.grupos, 'conversoes': esboco.quantidades()})
+        for i, q in enumerate(quantis):
+            tabela['mediana_dias' if q == 0.5 else f'p{int(q * 100)}_dias'] = valores[:, i]
+        rotulos = [f'{a}-{b - 1}' for a, b in zip(LIMITES_HISTOGRAMA[:-1], LIMITES_HISTOGRAMA[1:])] + [f'{LIMITES_HISTOGRAMA[-1]}+']
+        tabela['histograma'] = [dict(zip(rotulos, linha.tolist())) for linha in histograma]
+        return tabela[tabela['conversoes'] > 0].reset_index(drop=True)
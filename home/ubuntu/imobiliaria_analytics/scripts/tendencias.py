@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de cálculo vetorizado de tendências
+Este script ajusta, em uma única operação NumPy, a reta de mínimos quadrados
+(inclinação, intercepto, R² e erro padrão da inclinação) para milhares de séries
+diárias alinhadas, como as vendas de cada corretor, tipo de imóvel ou bairro.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('tendencias')
+
+
+def montar_matriz_diaria(df, coluna_data, coluna_valor=None, coluna_chave=None, inicio=None, fim=None):
+    """
+    Agrega um DataFrame em uma matriz (séries x dias) de somas e contagens diárias.
+    
+    Dias sem registros ficam com zero, de modo que todas as séries fiquem alinhadas.
+    
+    Args:
+        df (pandas.DataFrame): Dados de origem
+        coluna_data (str): Coluna de data
+        coluna_valor (str): Coluna somada (None para apenas contar)
+        coluna_chave (str ou list): Coluna(s) que definem as séries (None para uma única série;
+                                     com várias colunas, as chaves são tuplas)
+        inicio (pandas.Timestamp): Primeiro dia da matriz (padrão: menor data)
+        fim (pandas.Timestamp): Último dia da matriz (padrão: maior data)
+    
+    Returns:
+        tuple: (dias, chaves, somas, contagens), com dias um DatetimeIndex,
+               chaves um array com o rótulo de cada linha e somas/contagens
+               matrizes de formato (len(chaves), len(dias))
+    """
+    datas = df[coluna_data].dt.normalize()
+    inicio = pd.Timestamp(inicio).normalize() if inicio is not None else datas.min()
+    fim = pd.Timestamp(fim).normalize() if fim is not None else datas.max()
+    dias = pd.date_range(inicio, fim, freq='D')
+    
+    mascara = (datas >= inicio) & (datas <= fim)
+    if not mascara.all():
+        df = df[mascara]
+        datas = datas[mascara]
+    
+    indice_dia = ((datas - inicio) // pd.Timedelta(days=1)).to_numpy(dtype=np.int64)
+    if coluna_chave is None:
+        codigos = np.zeros(len(df), dtype=np.int64)
+        chaves = np.array(['total'], dtype=object)
+    else:
+        if isinstance(coluna_chave, (list, tuple)):
+            codigos, combinacoes = pd.factorize(pd.MultiIndex.from_frame(df[list(coluna_chave)]), sort=True)
+            chaves = np.empty(len(combinacoes), dtype=object)
+            chaves[:] = list(combinacoes)
+        else:
+            codigos, chaves = pd.factorize(df[coluna_chave], sort=True)
+            chaves = np.asarray(chaves, dtype=object)
+        validos = codigos >= 0
+        codigos, indice_dia = codigos[validos], indice_dia[validos]
+    
+    n_series, n_dias = len(chaves), len(dias)
+    posicao = codigos * n_dias + indice_dia
+    contagens = np.bincount(posicao, minlength=n_series * n_dias).reshape(n_series, n_dias)
+    
+    if coluna_valor is None:
+        somas = contagens.astype(float)
+    else:
+        pesos = df[coluna_valor].to_numpy(dtype=float)
+        if coluna_chave is not None:
+            pesos = pesos[validos]
+        somas = np.bincount(posicao, weights=np.nan_to_num(pesos), minlength=n_series * n_dias).reshape(n_series, n_dias)
+    
+    return dias, chaves, somas, contagens
+
+
+def ajustar_tendencias(series, x=None):
+    """
+    Ajusta y = intercepto + inclinacao * x para cada linha de uma matriz.
+    
+    Args:
+        series (numpy.ndarray): Matriz (n_series, n_pontos) ou vetor de uma série
+        x (numpy.ndarray): Abscissas comuns às séries (padrão: 0, 1, ..., n_pontos - 1)
+    
+    Returns:
+        dict: Arrays 'inclinacao', 'intercepto', 'r2' e 'erro_padrao' (um valor por série)
+    """
+    y = np.atleast_2d(np.asarray(series, dtype=float))
+    n = y.shape[1]
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+    
+    x_centrado = x - x.mean()
+    sxx = x_centrado @ x_centrado
+    media_y = y.mean(axis=1)
+    y_centrado = y - media_y[:, None]
+    
+    # Soluções fechadas dos mínimos quadrados para todas as séries de uma vez
+    inclinacao = (y_centrado @ x_centrado) / sxx if sxx > 0 else np.zeros(len(y))
+    intercepto = media_y - inclinacao * x.mean()
+    sst = np.einsum('ij,ij->i', y_centrado, y_centrado)
+    sse = np.maximum(sst - inclinacao ** 2 * sxx, 0.0)
+    
+    r2 = np.divide(sst - sse, sst, out=np.zeros_like(sst), where=sst > 0)
+    if n > 2 and sxx > 0:
+        erro_padrao = np.sqrt(sse / (n - 2) / sxx)
+    else:
+        erro_padrao = np.full(len(y), np.nan)
+    
+    return {
+        'inclinacao': inclinacao,
+        'intercepto': intercepto,
+        'r2': r2,
+        'erro_padrao': erro_padrao
+    }
+
+
+def direcao_tendencia(inclinacao):
+    """
+    Classifica a direção de uma tendência pelo sinal da inclinação.
+    
+    Args:
+        inclinacao (float): Inclinação da reta ajustada
+    
+    Returns:
+        str: 'crescente', 'decrescente' ou 'estável'
+    """
+    return 'crescente' if inclinacao > 0 else 'decrescente' if inclinacao < 0 else 'estável'
+
+
+def resumir_ajuste(ajuste, indice=0):
+    """
+    Extrai o ajuste de uma série em formato serializável.
+    
+    Args:
+        ajuste (dict): Resultado de ajustar_tendencias
+        indice (int): Linha da série
+    
+    Returns:
+        dict: Coeficiente, direção, intercepto, R² e erro padrão
+    """
+    inclinacao = float(ajuste['inclinacao'][indice])
+    erro_padrao = float(ajuste['erro_padrao'][indice])
+    return {
+        'coeficiente': inclinacao,
+        'direcao': direcao_tendencia(inclinacao),
+        'intercepto': float(ajuste['intercepto'][indice]),
+        'r2': float(ajuste['r2'][indice]),
+        'erro_padrao': erro_padrao if np.isfinite(erro_padrao) else None
+    }
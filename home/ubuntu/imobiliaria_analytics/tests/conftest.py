@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Configuração comum dos testes
+Os módulos do pipeline são importados pelo nome (como em scripts/main.py), então o
+diretório scripts/ entra no caminho de importação; os dados de exemplo vêm do
+DataGenerator, limpos pelo DataProcessor como no pipeline. As análises incrementais
+são exercitadas por ExecucoesIncrementais, que repete o ciclo de cada execução do
+pipeline (carregar o estado, atualizar, salvar) e compara com uma reconstrução do zero.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from data_generator import DataGenerator
+from data_processor import DataProcessor
+
+
+@pytest.fixture(scope='session')
+def _dados_limpos(tmp_path_factory):
+    """
+    Gera e limpa os dados de exemplo uma única vez por sessão.
+    """
+    diretorio = str(tmp_path_factory.mktemp('dados'))
+    dataframes = DataGenerator(diretorio).gerar_dataframes(400, 800, 120)
+    
+    processor = DataProcessor(diretorio)
+    processor.producao_df = dataframes['producao']
+    processor.ganhos_df = dataframes['ganhos']
+    processor.leads_df = dataframes['leads']
+    return {tipo: processor.limpar_dados(tipo) for tipo in DataProcessor.TIPOS_DADOS}
+
+
+@pytest.fixture
+def dados(_dados_limpos):
+    """
+    Cópias dos DataFrames limpos ('producao', 'ganhos' e 'leads'), que cada teste pode alterar.
+    """
+    return {tipo: df.copy() for tipo, df in _dados_limpos.items()}
+
+
+class ExecucoesIncrementais:
+    """
+    Execuções sucessivas de uma análise incremental com estado salvo em arquivo.
+    """
+    
+    def __init__(self, diretorio, carregar, atualizar, comparar=None, salvar=None):
+        """
+        Inicializa as execuções.
+        
+        Args:
+            diretorio (pathlib.Path): Diretório dos arquivos de estado
+            carregar (callable): Cria a análise a partir do caminho do estado
+            atualizar (callable): Incorpora os dados na análise (análise, *dados)
+            comparar (callable): Verifica se duas análises têm o mesmo resultado
+            salvar (callable): Salva a análise (padrão: análise.salvar())
+        """
+        self.diretorio = diretorio
+        self.carregar = carregar
+        self.atualizar = atualizar
+        self.comparar = comparar
+        self.salvar = salvar or (lambda analise: analise.salvar())
+        self.resultado = None
+    
+    def executar(self, *dados, arquivo='estado.json'):
+        """
+        Carrega o estado, incorpora os dados e salva, como em cada execução do pipeline.
+        
+        Args:
+            *dados: Argumentos de atualizar
+            arquivo (str): Nome do arquivo de estado
+        
+        Returns:
+            object: Análise atualizada (o retorno de atualizar fica em self.resultado)
+        """
+        analise = self.carregar(str(self.diretorio / arquivo))
+        self.resultado = self.atualizar(analise, *dados)
+        self.salvar(analise)
+        return analise
+    
+    def referencia(self, *dados):
+        """
+        Resultado de uma execução completa, sem estado anterior.
+        
+        Args:
+            *dados: Argumentos de atualizar
+        
+        Returns:
+            object: Análise reconstruída do zero
+        """
+        arquivo = self.diretorio / 'referencia.json'
+        if arquivo.exists():
+            arquivo.unlink()
+        return self.executar(*dados, arquivo=arquivo.name)
+    
+    def assert_igual_a_referencia(self, analise, *dados):
+        """
+        Verifica se a análise equivale a uma reconstrução do zero com os mesmos dados.
+        
+        Args:
+            analise (object): Análise atualizada incrementalmente
+            *dados: Argumentos de atualizar da reconstrução
+        """
+        self.comparar(analise, self.referencia(*dados))
+
+
+@pytest.fixture
+def execucoes(tmp_path):
+    """
+    Cria as ExecucoesIncrementais de uma análise, com os estados em tmp_path.
+    """
+    def criar(carregar, atualizar, comparar=None, salvar=None):
+        return ExecucoesIncrementais(tmp_path, carregar, atualizar, comparar, salvar)
+    return criar
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do estado incremental da detecção de anomalias (anomalias.DetectorAnomalias)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import anomalias
+from data_analyzer import DataAnalyzer
+
+CHAVES = ['vgv|total', 'vendas|total']
+CONTAGENS = [False, True]
+PICO = 100
+
+
+def historico(dias=120, semente=0):
+    """
+    Séries diárias sintéticas com padrão semanal e um pico no dia PICO.
+    """
+    gerador = np.random.default_rng(semente)
+    datas = pd.date_range('2025-01-06', periods=dias, freq='D')
+    semana = 1 + 0.3 * np.sin(2 * np.pi * np.arange(dias) / 7)
+    matriz = np.vstack([
+        400_000 * semana * gerador.normal(1, 0.05, dias),
+        gerador.poisson(8 * semana).astype(float)
+    ])
+    matriz[0, PICO] *= 3
+    return datas, matriz
+
+
+def atualizar(detector, dias, matriz, chaves=CHAVES, contagens=CONTAGENS):
+    return detector.atualizar(dias, chaves, matriz, contagens)
+
+
+def assert_estados_iguais(detector, esperado):
+    assert detector.estado['alertas'] == esperado.estado['alertas']
+    assert detector.estado['series'].keys() == esperado.estado['series'].keys()
+    for chave, serie in esperado.estado['series'].items():
+        assert detector.estado['series'][chave]['ultimo_dia'] == serie['ultimo_dia']
+        for campo in ('media', 'variancia', 'n', 'soma'):
+            np.testing.assert_allclose(detector.estado['series'][chave][campo], serie[campo], rtol=1e-9)
+
+
+@pytest.fixture
+def incremental(execucoes):
+    return execucoes(anomalias.DetectorAnomalias, atualizar, assert_estados_iguais)
+
+
+def test_pico_e_detectado(incremental):
+    dias, matriz = historico()
+    incremental.executar(dias, matriz)
+    assert any(a['serie'] == 'vgv|total' and a['data'] == dias[PICO].strftime('%Y-%m-%d') and a['tipo'] == 'pico'
+               for a in incremental.resultado)
+
+
+def test_reexecucao_nao_repete_alertas(incremental):
+    dias, matriz = historico()
+    primeiro = incremental.executar(dias, matriz)
+    
+    segundo = incremental.executar(dias, matriz)
+    assert incremental.resultado == []
+    assert segundo.dias_incorporados == 0
+    assert_estados_iguais(segundo, primeiro)
+
+
+def test_dias_novos_equivalem_a_uma_execucao_unica(incremental):
+    dias, matriz = historico()
+    
+    incremental.executar(dias[:90], matriz[:, :90])
+    detector = incremental.executar(dias, matriz)
+    assert detector.dias_incorporados == 30
+    assert all(a['data'] > dias[89].strftime('%Y-%m-%d') for a in incremental.resultado)
+    incremental.assert_igual_a_referencia(detector, dias, matriz)
+
+
+def test_sem_series_e_dias_sem_observacao(incremental):
+    dias, matriz = historico()
+    primeiro = incremental.executar(dias, matriz)
+    
+    incremental.executar(dias, matriz[:0], [], [])
+    assert incremental.resultado == []
+    
+    # Dias novos sem observação (NaN) não geram alertas nem alteram as linhas de base
+    estendidos = pd.date_range(dias[0], periods=len(dias) + 5, freq='D')
+    lacuna = np.hstack([matriz, np.full((len(CHAVES), 5), np.nan)])
+    detector = incremental.executar(estendidos, lacuna)
+    assert incremental.resultado == []
+    for chave in CHAVES:
+        np.testing.assert_allclose(detector.estado['series'][chave]['media'], primeiro.estado['series'][chave]['media'])
+
+
+def test_historico_reescrito_refaz_a_linha_de_base(incremental):
+    dias, matriz = historico()
+    anterior = incremental.executar(dias[:110], matriz[:, :110])
+    assert any(a['data'] == dias[PICO].strftime('%Y-%m-%d') for a in anterior.estado['alertas'])
+    
+    # Pico removido na correção dos dados: o alerta antigo deixa de existir
+    corrigida = matriz.copy()
+    corrigida[0, PICO] /= 3
+    detector = incremental.executar(dias, corrigida)
+    
+    incremental.assert_igual_a_referencia(detector, dias, corrigida)
+    assert not any(a['data'] == dias[PICO].strftime('%Y-%m-%d') and a['serie'] == 'vgv|total' for a in detector.estado['alertas'])
+
+
+def test_historico_mais_curto_refaz_a_linha_de_base(incremental):
+    dias, matriz = historico()
+    incremental.executar(dias, matriz)
+    
+    detector = incremental.executar(dias[:80], matriz[:, :80])
+    incremental.assert_igual_a_referencia(detector, dias[:80], matriz[:, :80])
+
+
+def leads_com_conversao_tardia(dias=210, semente=0):
+    """
+    Leads diários cuja conversão ocorre, em mediana, 15 dias após a captação.
+    """
+    gerador = np.random.default_rng(semente)
+    captacao = pd.to_datetime('2025-01-01') + pd.to_timedelta(np.repeat(np.arange(dias), gerador.poisson(20, dias)), unit='D')
+    convertido = gerador.random(len(captacao)) < 0.25
+    atraso = pd.to_timedelta(np.ceil(gerador.exponential(15 / np.log(2), len(captacao))), unit='D')
+    return pd.DataFrame({
+        'data_captacao': captacao,
+        'origem': gerador.choice(['Site', 'Portais'], len(captacao)),
+        'convertido': convertido,
+        'data_conversao': (captacao + atraso).where(convertido)
+    })
+
+
+def test_conversoes_tardias_nao_geram_quedas_nem_reprocessamento(tmp_path):
+    leads = leads_com_conversao_tardia()
+    inicio = leads['data_captacao'].min()
+    
+    # Execuções semanais: cada exportação conhece apenas as conversões já ocorridas
+    for execucao, dia in enumerate(range(150, 211, 7)):
+        corte = inicio + pd.Timedelta(days=dia)
+        exportacao = leads[leads['data_captacao'] < corte].copy()
+        futuras = exportacao['data_conversao'] >= corte
+        exportacao.loc[futuras, 'convertido'] = False
+        exportacao.loc[futuras, 'data_conversao'] = pd.NaT
+        
+        resultados = DataAnalyzer({'leads': exportacao}, {}, str(tmp_path)).detectar_anomalias()
+        if execucao:
+            assert resultados['detector']['dias_incorporados'] == 7
+        assert not [a for a in resultados['alertas'] if a['metrica'] == 'conversoes' and a['tipo'] == 'queda']
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do estado acumulado de contatos únicos (contatos_unicos.ContatosUnicos)
+"""
+
+import pandas as pd
+import pytest
+
+import contatos_unicos
+
+
+def preparar(df):
+    """
+    Leads com as dimensões dos esboços, como montados pelo pipeline.
+    """
+    return df[['contato', 'origem', 'data_captacao', 'tipo_interesse']].assign(
+        equipe='Equipe A',
+        mes=df['data_captacao'].dt.strftime('%Y-%m')
+    )
+
+
+def assert_tabelas_iguais(contagem, esperado):
+    for dimensoes in ((), ('origem',), ('mes',), ('origem', 'mes')):
+        pd.testing.assert_frame_equal(contagem.tabela(dimensoes), esperado.tabela(dimensoes))
+
+
+@pytest.fixture
+def incremental(execucoes):
+    return execucoes(contatos_unicos.ContatosUnicos, contatos_unicos.ContatosUnicos.adicionar, assert_tabelas_iguais)
+
+
+def test_normalizar_contato():
+    contatos = pd.Series(['Ana@Exemplo.com ', '(11) 98765-4321', '11987654321', 'não informado', None])
+    normalizados = contatos_unicos.normalizar_contato(contatos)
+    assert normalizados.iloc[0] == 'ana@exemplo.com'
+    assert normalizados.iloc[1] == normalizados.iloc[2] == '11987654321'
+    assert normalizados.iloc[3:5].isna().all()
+
+
+def test_reexecucao_nao_altera_as_estimativas(incremental, dados):
+    leads = preparar(dados['leads'])
+    
+    primeira = incremental.executar(leads)
+    total = primeira.tabela().iloc[0]
+    assert 0 < total['clientes_unicos'] <= total['leads_unicos']
+    
+    segunda = incremental.executar(leads.sample(frac=1, random_state=0))
+    assert segunda.leads_processados == len(leads)
+    assert_tabelas_iguais(segunda, primeira)
+
+
+def test_fontes_separadas_equivalem_a_base_unica(incremental, dados):
+    leads = preparar(dados['leads'])
+    metade = len(leads) // 2
+    
+    # Duas exportações com sobreposição, processadas em execuções diferentes
+    incremental.executar(leads.iloc[:metade + 100])
+    contagem = incremental.executar(leads.iloc[metade - 100:])
+    incremental.assert_igual_a_referencia(contagem, leads)
+
+
+def test_entrada_vazia(incremental, dados):
+    leads = preparar(dados['leads'])
+    
+    vazia = incremental.executar(leads.iloc[:0])
+    assert vazia.tabela().iloc[0]['leads_unicos'] == 0
+    
+    primeira = incremental.executar(leads)
+    assert_tabelas_iguais(incremental.executar(leads.iloc[:0]), primeira)
+
+
+def test_leads_removidos_continuam_contados(incremental, dados):
+    leads = preparar(dados['leads'])
+    primeira = incremental.executar(leads)
+    
+    # Comportamento documentado: os esboços só acumulam
+    contagem = incremental.executar(leads.iloc[: len(leads) // 2])
+    assert_tabelas_iguais(contagem, primeira)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do calendário persistente de comissões (fluxo_comissoes.CalendarioComissoes)
+"""
+
+import pandas as pd
+import pytest
+
+import fluxo_comissoes
+
+
+def assert_calendarios_iguais(calendario, esperado):
+    referencia = esperado.registros['data_pagamento'].min()
+    for dimensao in fluxo_comissoes.DIMENSOES:
+        resumo = calendario.resumo(referencia, dimensao).set_index(dimensao).sort_index()
+        resumo_esperado = esperado.resumo(referencia, dimensao).set_index(dimensao).sort_index()
+        pd.testing.assert_frame_equal(resumo, resumo_esperado, check_like=True)
+        
+        tabela = calendario.calendario(referencia, dimensao=dimensao)
+        tabela_esperada = esperado.calendario(referencia, dimensao=dimensao)
+        pd.testing.assert_frame_equal(tabela[sorted(tabela.columns)], tabela_esperada[sorted(tabela_esperada.columns)])
+
+
+@pytest.fixture
+def incremental(execucoes):
+    return execucoes(fluxo_comissoes.CalendarioComissoes, fluxo_comissoes.CalendarioComissoes.sincronizar,
+                     assert_calendarios_iguais)
+
+
+def test_reexecucao_nao_altera_o_calendario(incremental, dados):
+    df = dados['ganhos']
+    
+    primeira = incremental.executar(df)
+    assert primeira.modo == 'completo'
+    
+    segunda = incremental.executar(df)
+    assert segunda.modo == 'incremental'
+    assert segunda.registros_adicionados == segunda.registros_removidos == 0
+    incremental.assert_igual_a_referencia(segunda, df)
+
+
+def test_mudancas_de_status_sao_aplicadas(incremental, dados):
+    df = dados['ganhos']
+    incremental.executar(df)
+    
+    # Comissões pagas, reagendadas, sem data, reabertas, removidas e lançadas com atraso
+    abertos = df.index[df['status_pagamento'] != 'Pago']
+    pagos = df.index[df['status_pagamento'] == 'Pago']
+    df.loc[abertos[:10], 'status_pagamento'] = 'Pago'
+    df.loc[abertos[10:15], 'data_pagamento'] += pd.Timedelta(days=10)
+    df.loc[abertos[15:17], 'data_pagamento'] = pd.NaT
+    df.loc[pagos[:5], 'status_pagamento'] = 'Pendente'
+    df = pd.concat([df.drop(index=abertos[17:20]), df.iloc[:3].assign(status_pagamento='Pendente')])
+    
+    calendario = incremental.executar(df)
+    assert calendario.modo == 'incremental'
+    assert calendario.registros_adicionados > 0 and calendario.registros_removidos > 0
+    incremental.assert_igual_a_referencia(calendario, df)
+
+
+def test_entrada_vazia_esvazia_o_calendario(incremental, dados):
+    df = dados['ganhos']
+    incremental.executar(df)
+    
+    vazia = incremental.executar(df.iloc[:0])
+    assert len(vazia.registros) == 0
+    
+    calendario = incremental.executar(df)
+    incremental.assert_igual_a_referencia(calendario, df)
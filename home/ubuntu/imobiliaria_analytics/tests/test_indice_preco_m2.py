@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do estado incremental do índice de preço por m² (indice_preco_m2.IndicePrecoM2)
+"""
+
+import pandas as pd
+import pytest
+
+import indice_preco_m2
+
+
+def assert_tabelas_iguais(indice, esperado):
+    ordem = ['bairro', 'tipo_imovel', 'mes']
+    pd.testing.assert_frame_equal(
+        indice.tabela().sort_values(ordem).reset_index(drop=True),
+        esperado.tabela().sort_values(ordem).reset_index(drop=True)
+    )
+
+
+@pytest.fixture
+def incremental(execucoes):
+    return execucoes(indice_preco_m2.IndicePrecoM2, indice_preco_m2.IndicePrecoM2.atualizar, assert_tabelas_iguais)
+
+
+def test_reexecucao_recalcula_apenas_meses_abertos(incremental, dados):
+    df = dados['producao']
+    
+    primeira = incremental.executar(df)
+    assert primeira.modo == 'completo'
+    
+    segunda = incremental.executar(df)
+    assert segunda.modo == 'incremental'
+    assert 0 < segunda.linhas_processadas < primeira.linhas_processadas
+    assert_tabelas_iguais(segunda, primeira)
+
+
+def test_vendas_novas_no_mes_aberto(incremental, dados):
+    df = dados['producao']
+    recentes = df['data_venda'] >= df['data_venda'].max() - pd.Timedelta(days=10)
+    
+    incremental.executar(df[~recentes])
+    indice = incremental.executar(df)
+    assert indice.modo == 'incremental'
+    incremental.assert_igual_a_referencia(indice, df)
+
+
+def test_entrada_vazia(incremental, dados):
+    df = dados['producao']
+    
+    assert incremental.executar(df.iloc[:0]).tabela().empty
+    incremental.executar(df)
+    
+    vazia = incremental.executar(df.iloc[:0])
+    assert vazia.modo == 'completo'
+    assert vazia.tabela().empty
+    
+    indice = incremental.executar(df)
+    assert indice.modo == 'completo'
+    incremental.assert_igual_a_referencia(indice, df)
+
+
+def test_venda_antiga_removida_refaz_o_indice(incremental, dados):
+    df = dados['producao']
+    incremental.executar(df)
+    
+    reescrito = df.drop(index=df['data_venda'].idxmin())
+    indice = incremental.executar(reescrito)
+    assert indice.modo == 'completo'
+    incremental.assert_igual_a_referencia(indice, reescrito)
+
+
+def test_venda_antiga_corrigida_refaz_o_indice(incremental, dados):
+    df = dados['producao']
+    incremental.executar(df)
+    
+    # Mesma quantidade de vendas, valor corrigido
+    df.loc[df['data_venda'].idxmin(), 'valor_venda'] *= 1.5
+    indice = incremental.executar(df)
+    assert indice.modo == 'completo'
+    incremental.assert_igual_a_referencia(indice, df)
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da instrumentação das etapas (instrumentacao.instrumentado)
+"""
+
+import instrumentacao
+from data_analyzer import DataAnalyzer
+
+
+def test_contagem_de_linhas_independe_dos_argumentos_da_etapa(tmp_path, dados):
+    analyzer = DataAnalyzer(dados, {}, str(tmp_path))
+    instrumentador = instrumentacao.ativar(rastrear_memoria=False)
+    try:
+        analyzer.analisar_desempenho_corretores(max_workers=1)
+    finally:
+        instrumentacao.desativar()
+    
+    registro = next(r for r in instrumentador.registros if r['etapa'] == 'analisar_desempenho_corretores')
+    assert registro['linhas'] == len(dados['producao'])
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes dos intervalos de confiança vetorizados (intervalos)
+"""
+
+import numpy as np
+
+import intervalos
+
+
+def test_somas_reamostradas_por_grupo():
+    # Grupo vazio no fim: o último grupo com dados mantém todas as observações
+    medias = intervalos.reamostrar_somas([0, 0, 1, 1], [1, 2, 3, 4], 3, reamostragens=20_000).mean(axis=0)
+    np.testing.assert_allclose(medias, [3, 7, 0], atol=0.1)
+    
+    # Grupos vazios no início e no meio ficam com soma zero
+    somas = intervalos.reamostrar_somas([3, 1, 3], [5, 2, 1], 4, reamostragens=50)
+    assert (somas[:, [0, 2]] == 0).all()
+
+
+def test_somas_nao_dependem_dos_workers(monkeypatch):
+    # Blocos pequenos: várias sementes derivadas, processadas em sequência ou em threads
+    monkeypatch.setattr(intervalos, 'LIMITE_ELEMENTOS_BLOCO', 500 * 7)
+    gerador = np.random.default_rng(0)
+    codigos, valores = gerador.integers(0, 6, 500), gerador.gamma(2.0, 1000.0, 500)
+    
+    sequencial = intervalos.reamostrar_somas(codigos, valores, 8, reamostragens=200)
+    paralelo = intervalos.reamostrar_somas(codigos, valores, 8, reamostragens=200, max_workers=4)
+    np.testing.assert_array_equal(paralelo, sequencial)
+    np.testing.assert_allclose(sequencial.mean(axis=0), np.bincount(codigos, valores, minlength=8), rtol=0.05)
+
+
+def test_intervalo_wilson():
+    inferior, superior = intervalos.intervalo_wilson([0, 5, 10], [10, 10, 0])
+    assert inferior[0] == 0 and 0 < superior[0] < 0.35
+    assert inferior[1] < 0.5 < superior[1]
+    assert np.isnan(inferior[2]) and np.isnan(superior[2])
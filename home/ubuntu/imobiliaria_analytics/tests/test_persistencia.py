@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da gravação atômica e dos estados versionados (persistencia)
+"""
+
+import json
+import os
+import stat
+
+import persistencia
+
+
+def test_estado_salvo_e_carregado_com_a_versao(tmp_path):
+    caminho = str(tmp_path / 'modelos' / 'estado.json')
+    assert persistencia.salvar_estado(caminho, {'series': {'a': 1}}, 3, 'de teste') == caminho
+    
+    assert persistencia.carregar_estado(caminho, 3, 'de teste') == {'series': {'a': 1}, 'versao': 3}
+    assert persistencia.carregar_estado(caminho, 4, 'de teste') is None
+    assert persistencia.carregar_estado(caminho, 3, 'de teste', valido=lambda estado: 'outro' in estado) is None
+
+
+def test_estado_ausente_ou_ilegivel(tmp_path):
+    caminho = tmp_path / 'estado.json'
+    assert persistencia.carregar_estado(str(caminho), 1, 'de teste') is None
+    
+    caminho.write_text('{"versao": 1, ', encoding='utf-8')
+    assert persistencia.carregar_estado(str(caminho), 1, 'de teste') is None
+    
+    # Falha na verificação de compatibilidade também descarta o estado
+    caminho.write_text(json.dumps({'versao': 1}), encoding='utf-8')
+    assert persistencia.carregar_estado(str(caminho), 1, 'de teste', valido=lambda estado: estado['ausente']) is None
+
+
+def test_falha_ao_salvar_nao_interrompe(tmp_path):
+    assert persistencia.salvar_estado(str(tmp_path / 'estado.json'), {'valor': object()}, 1, 'de teste') is None
+    assert not [nome for nome in os.listdir(tmp_path) if nome.startswith('.tmp_')]
+
+
+def test_arquivos_gravados_com_permissoes_comuns(tmp_path, monkeypatch):
+    # A umask é lida na primeira gravação, não na importação
+    monkeypatch.setattr(persistencia, '_umask', None)
+    mascara = os.umask(0o022)
+    try:
+        caminho = persistencia.salvar_json_atomico(str(tmp_path / 'resultados.json'), {'a': 1})
+    finally:
+        os.umask(mascara)
+    assert stat.S_IMODE(os.stat(caminho).st_mode) == 0o644
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do estado incremental da pontuação de leads (pontuacao_leads.ModeloPontuacaoLeads)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pontuacao_leads
+
+
+def salvar(modelo):
+    if modelo.treinado:
+        modelo.salvar()
+
+
+@pytest.fixture
+def incremental(execucoes):
+    return execucoes(pontuacao_leads.ModeloPontuacaoLeads, pontuacao_leads.ModeloPontuacaoLeads.atualizar, salvar=salvar)
+
+
+def rotulados(df, agora):
+    """
+    Quantidade de leads rotulados distintos até o momento de referência.
+    """
+    rotulo, data_rotulo, _ = pontuacao_leads.classificar_leads(df, agora)
+    selecionados = np.flatnonzero(~np.isnan(rotulo) & (data_rotulo <= agora).to_numpy())
+    return len(np.unique(pontuacao_leads.identificar_rotulados(df.iloc[selecionados], rotulo[selecionados])))
+
+
+def momento(df):
+    return df['data_captacao'].max() + pd.Timedelta(days=1)
+
+
+def test_reexecucao_nao_treina_novamente(incremental, dados):
+    df = dados['leads']
+    agora = momento(df)
+    
+    primeira = incremental.executar(df, agora)
+    assert primeira.leads_incorporados == rotulados(df, agora) > 0
+    
+    segunda = incremental.executar(df, agora)
+    assert segunda.leads_incorporados == 0
+    assert segunda.estado['leads_treinados'] == primeira.leads_incorporados
+    np.testing.assert_array_equal(segunda.modelo.coef_, primeira.modelo.coef_)
+
+
+def test_leads_repetidos_entram_uma_vez(incremental, dados):
+    df = dados['leads']
+    agora = momento(df)
+    
+    modelo = incremental.executar(pd.concat([df, df]), agora)
+    assert modelo.leads_incorporados == rotulados(df, agora)
+
+
+def test_desfechos_antigos_chegando_depois_sao_incorporados(incremental, dados):
+    df = dados['leads']
+    agora = momento(df)
+    
+    # Leads convertidos no início do período ausentes da primeira exportação
+    convertidos = df.index[df['convertido'].fillna(False).astype(bool)]
+    atrasados = df.loc[convertidos].nsmallest(20, 'data_conversao').index
+    incremental.executar(df.drop(index=atrasados), agora)
+    
+    modelo = incremental.executar(df, agora)
+    assert modelo.leads_incorporados == rotulados(df, agora) - rotulados(df.drop(index=atrasados), agora) == len(atrasados)
+
+
+def test_entrada_vazia_preserva_o_estado(incremental, dados):
+    df = dados['leads']
+    agora = momento(df)
+    
+    sem_estado = incremental.executar(df.iloc[:0], agora)
+    assert sem_estado.leads_incorporados == 0
+    assert not sem_estado.treinado
+    
+    primeira = incremental.executar(df, agora)
+    vazia = incremental.executar(df.iloc[:0], agora)
+    assert vazia.leads_incorporados == 0
+    assert len(vazia.hashes_treinados) == len(primeira.hashes_treinados)
+    
+    assert incremental.executar(df, agora).leads_incorporados == 0
+
+
+def test_desfecho_reescrito_e_um_lead_novo(incremental, dados):
+    df = dados['leads']
+    agora = momento(df)
+    incremental.executar(df, agora)
+    
+    # Lead antigo dado como não convertido que passa a constar como convertido
+    antigo = df.loc[~df['convertido'].fillna(False).astype(bool)].nsmallest(1, 'data_captacao').index
+    df.loc[antigo, 'convertido'] = True
+    df.loc[antigo, 'data_conversao'] = df.loc[antigo, 'data_captacao'] + pd.Timedelta(days=3)
+    
+    modelo = incremental.executar(df, agora)
+    assert modelo.leads_incorporados == 1
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do estado incremental da previsão (previsao.ModeloPrevisao)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import previsao
+
+CHAVES = ['vgv|total', 'quantidade|total', 'vgv|Centro / Casa']
+
+
+def historico(dias=90, semente=0):
+    """
+    Séries diárias sintéticas com tendência leve e ruído.
+    """
+    gerador = np.random.default_rng(semente)
+    datas = pd.date_range('2025-01-01', periods=dias, freq='D')
+    base = np.array([[500_000.0], [3.0], [80_000.0]])
+    matriz = base * (1 + 0.002 * np.arange(dias)) * gerador.gamma(4.0, 0.25, (len(CHAVES), dias))
+    return datas, matriz
+
+
+def atualizar(modelo, dias, matriz, chaves=CHAVES):
+    modelo.atualizar(dias, chaves, matriz)
+
+
+def assert_series_iguais(modelo, esperado):
+    assert modelo.estado['series'].keys() == esperado.estado['series'].keys()
+    for chave, serie in esperado.estado['series'].items():
+        for campo, valor in serie.items():
+            np.testing.assert_allclose(modelo.estado['series'][chave][campo], valor, rtol=1e-9)
+
+
+@pytest.fixture
+def incremental(execucoes):
+    return execucoes(previsao.ModeloPrevisao, atualizar, assert_series_iguais)
+
+
+def test_reexecucao_sem_dias_novos_e_incremental(incremental):
+    dias, matriz = historico()
+    
+    primeira = incremental.executar(dias, matriz)
+    assert primeira.modo == 'ajuste completo'
+    
+    segunda = incremental.executar(dias, matriz)
+    assert segunda.modo == 'incremental'
+    assert segunda.dias_incorporados == 0
+    assert_series_iguais(segunda, primeira)
+
+
+def test_dias_novos_continuam_a_suavizacao(incremental):
+    dias, matriz = historico()
+    
+    inicial = incremental.executar(dias[:80], matriz[:, :80])
+    parametros = {chave: (s['alpha'], s['beta']) for chave, s in inicial.estado['series'].items()}
+    modelo = incremental.executar(dias, matriz)
+    assert modelo.modo == 'incremental'
+    assert modelo.dias_incorporados == 10
+    
+    # Mesmo resultado de suavizar todo o histórico com os parâmetros do ajuste inicial
+    alpha = np.array([parametros[c][0] for c in CHAVES])
+    beta = np.array([parametros[c][1] for c in CHAVES])
+    nivel, tendencia = previsao._inicializar(matriz)
+    nivel, tendencia, _, _ = previsao.suavizar(matriz, nivel, tendencia, alpha, beta)
+    np.testing.assert_allclose([modelo.estado['series'][c]['nivel'] for c in CHAVES], nivel, rtol=1e-9)
+    np.testing.assert_allclose([modelo.estado['series'][c]['tendencia'] for c in CHAVES], tendencia, rtol=1e-9)
+
+
+def test_serie_nova_recebe_ajuste_proprio(incremental):
+    dias, matriz = historico()
+    
+    incremental.executar(dias, matriz[:2], CHAVES[:2])
+    modelo = incremental.executar(dias, matriz)
+    assert modelo.modo == 'incremental'
+    incremental.assert_igual_a_referencia(modelo, dias, matriz)
+
+
+def test_sem_series_preserva_o_estado(incremental):
+    dias, matriz = historico()
+    primeira = incremental.executar(dias, matriz)
+    
+    vazia = incremental.executar(dias, matriz[:0], [])
+    assert vazia.modo == 'incremental'
+    
+    modelo = incremental.executar(dias, matriz)
+    assert modelo.modo == 'incremental'
+    assert modelo.dias_incorporados == 0
+    assert_series_iguais(modelo, primeira)
+
+
+def test_historico_reescrito_refaz_o_ajuste(incremental):
+    dias, matriz = historico()
+    incremental.executar(dias[:80], matriz[:, :80])
+    
+    # Venda antiga corrigida: os dias já incorporados mudaram
+    corrigida = matriz.copy()
+    corrigida[0, 10] += 5_000
+    modelo = incremental.executar(dias, corrigida)
+    assert modelo.modo == 'ajuste completo'
+    incremental.assert_igual_a_referencia(modelo, dias, corrigida)
+
+
+def test_historico_mais_curto_refaz_o_ajuste(incremental):
+    dias, matriz = historico()
+    incremental.executar(dias, matriz)
+    
+    modelo = incremental.executar(dias[:60], matriz[:, :60])
+    assert modelo.modo == 'ajuste completo'
+    incremental.assert_igual_a_referencia(modelo, dias[:60], matriz[:, :60])
+
+
+def test_reajuste_periodico(incremental):
+    dias, matriz = historico(120)
+    incremental.executar(dias[:80], matriz[:, :80])
+    
+    modelo = incremental.executar(dias, matriz)
+    assert modelo.modo == 'ajuste completo'
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da validade do JSON de resultados da análise (resultados_analise.json)
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from data_analyzer import DataAnalyzer
+from data_generator import DataGenerator
+from data_processor import DataProcessor
+
+
+def _rejeitar_constante(nome):
+    raise ValueError(f"Constante inválida em JSON: {nome}")
+
+
+def ler_json_estrito(caminho):
+    """
+    Lê um JSON rejeitando NaN, Infinity e -Infinity (aceitos pelo módulo json, mas não pelo padrão).
+    """
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f, parse_constant=_rejeitar_constante)
+
+
+def analisar(diretorio, dataframes):
+    """
+    Processa os dados e executa a análise completa, como o pipeline.
+    """
+    processor = DataProcessor(diretorio)
+    processor.producao_df = dataframes['producao']
+    processor.ganhos_df = dataframes['ganhos']
+    processor.leads_df = dataframes['leads']
+    limpos = {tipo: processor.limpar_dados(tipo) for tipo in DataProcessor.TIPOS_DADOS}
+    metricas = {tipo: processor.calcular_metricas(tipo, limpos[tipo]) for tipo in DataProcessor.TIPOS_DADOS}
+    
+    analyzer = DataAnalyzer(limpos, metricas, diretorio)
+    resultados = analyzer.executar_analise_completa()
+    return resultados, ler_json_estrito(os.path.join(diretorio, 'resultados_analise.json'))
+
+
+@pytest.mark.parametrize('periodo_dias', [45, 200])
+def test_resultados_sao_json_valido(tmp_path, periodo_dias):
+    diretorio = str(tmp_path)
+    dataframes = DataGenerator(diretorio).gerar_dataframes(300, 600, periodo_dias)
+    
+    resultados, salvo = analisar(diretorio, dataframes)
+    assert set(salvo) == set(resultados)
+    assert salvo['insights']
+    
+    # Segunda execução, com o estado dos modelos salvo na primeira
+    _, salvo = analisar(diretorio, dataframes)
+    assert salvo['insights']
+
+
+def test_grupos_sem_contato_nao_geram_nan(tmp_path):
+    diretorio = str(tmp_path)
+    dataframes = DataGenerator(diretorio).gerar_dataframes(300, 600, 120)
+    
+    # Origem sem nenhum contato: leads por cliente indefinido
+    leads = dataframes['leads']
+    leads.loc[leads['origem'] == leads['origem'].iloc[0], 'contato'] = np.nan
+    
+    _, salvo = analisar(diretorio, dataframes)
+    assert any(linha['leads_por_cliente'] is None for linha in salvo['contatos_unicos']['por_origem'])
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do estado incremental do tempo até a conversão (tempo_conversao.TemposConversao)
+"""
+
+import pandas as pd
+import pytest
+
+import tempo_conversao
+
+
+def assert_resumos_iguais(tempos, esperado):
+    pd.testing.assert_frame_equal(tempos.resumo(), esperado.resumo())
+    for dimensao in tempo_conversao.DIMENSOES:
+        pd.testing.assert_frame_equal(tempos.resumo(dimensao), esperado.resumo(dimensao))
+
+
+@pytest.fixture
+def incremental(execucoes):
+    return execucoes(tempo_conversao.TemposConversao, tempo_conversao.TemposConversao.atualizar, assert_resumos_iguais)
+
+
+def test_reexecucao_sem_dados_novos_e_incremental(incremental, dados):
+    df = dados['leads']
+    
+    primeira = incremental.executar(df)
+    assert primeira.modo == 'completo'
+    assert primeira.leads_incorporados == int(df['convertido'].sum())
+    
+    segunda = incremental.executar(df)
+    assert segunda.modo == 'incremental'
+    assert segunda.leads_incorporados == 0
+    incremental.assert_igual_a_referencia(segunda, df)
+
+
+def test_conversoes_novas_sao_incorporadas(incremental, dados):
+    df = dados['leads']
+    corte = df['data_conversao'].dropna().quantile(0.7)
+    
+    incremental.executar(df[~(df['data_conversao'] > corte)])
+    tempos = incremental.executar(df)
+    assert tempos.modo == 'incremental'
+    assert tempos.leads_incorporados == int((df['data_conversao'] > corte).sum())
+    incremental.assert_igual_a_referencia(tempos, df)
+
+
+def test_entrada_vazia_nao_perde_o_estado(incremental, dados):
+    df = dados['leads']
+    
+    incremental.executar(df)
+    vazia = incremental.executar(df.iloc[:0])
+    assert vazia.modo == 'completo'
+    assert vazia.resumo().empty
+    
+    # A execução seguinte com o histórico completo deve refazer tudo
+    tempos = incremental.executar(df)
+    assert tempos.modo == 'completo'
+    incremental.assert_igual_a_referencia(tempos, df)
+
+
+def test_entrada_vazia_na_mesma_instancia(tmp_path, incremental, dados):
+    df = dados['leads']
+    tempos = tempo_conversao.TemposConversao(str(tmp_path / 'tempo_conversao.json'))
+    
+    tempos.atualizar(df)
+    tempos.atualizar(df.iloc[:0])
+    tempos.atualizar(df)
+    assert tempos.modo == 'completo'
+    incremental.assert_igual_a_referencia(tempos, df)
+
+
+def test_historico_reescrito_refaz_os_esbocos(incremental, dados):
+    df = dados['leads']
+    incremental.executar(df)
+    
+    # Remover uma conversão antiga: a contagem até a marca muda
+    antiga = df['data_conversao'].idxmin()
+    reescrito = df.drop(index=antiga)
+    tempos = incremental.executar(reescrito)
+    assert tempos.modo == 'completo'
+    incremental.assert_igual_a_referencia(tempos, reescrito)
+
+
+def test_data_antiga_corrigida_refaz_os_esbocos(incremental, dados):
+    df = dados['leads']
+    incremental.executar(df)
+    
+    # Mesma quantidade de conversões, data de captação corrigida
+    antiga = df['data_conversao'].idxmin()
+    df.loc[antiga, 'data_captacao'] -= pd.Timedelta(days=2)
+    tempos = incremental.executar(df)
+    assert tempos.modo == 'completo'
+    incremental.assert_igual_a_referencia(tempos, df)